@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import hashlib
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from bklogin.utils.lru_cache import LocalLRUCache
+
+
+class BkTokenState(NamedTuple):
+    """登录票据状态（DB 中可变的部分）"""
+
+    # 是否已经退出登录
+    is_logout: bool
+    # 无操作失效时间戳
+    inactive_expires_at: int
+
+
+# 进程内缓存，在进程内共享（BkTokenManager 每次请求都会重新实例化）
+_local_cache = LocalLRUCache(settings.BK_TOKEN_LOCAL_CACHE_MAX_SIZE)
+
+
+class BkTokenStateCache:
+    """
+    登录票据状态缓存，两级缓存：进程内 LRU 缓存 -> CACHES["default"]（共享缓存，如 Redis）
+
+    缓存时间为 0 的层级不会被使用，若两级缓存都未启用，则所有操作都不生效
+    """
+
+    key_prefix = "bk_token_state"
+
+    def __init__(self):
+        self.timeout = settings.BK_TOKEN_CACHE_TIMEOUT
+        self.local_timeout = settings.BK_TOKEN_LOCAL_CACHE_TIMEOUT
+
+    def get(self, bk_token: str) -> BkTokenState | None:
+        key = self._make_key(bk_token)
+        if self.local_timeout > 0 and (state := _local_cache.get(key)) is not None:
+            return state
+
+        if self.timeout <= 0:
+            return None
+
+        if (value := cache.get(key)) is None:
+            return None
+
+        state = BkTokenState(*value)
+        if self.local_timeout > 0:
+            _local_cache.set(key, state, self.local_timeout)
+
+        return state
+
+    def set(self, bk_token: str, state: BkTokenState):
+        key = self._make_key(bk_token)
+        if self.timeout > 0:
+            # 以 tuple 形式存储，避免共享缓存反序列化时依赖类定义
+            cache.set(key, tuple(state), self.timeout)
+
+        if self.local_timeout > 0:
+            _local_cache.set(key, state, self.local_timeout)
+
+    def delete(self, bk_token: str):
+        key = self._make_key(bk_token)
+        if self.timeout > 0:
+            cache.delete(key)
+
+        _local_cache.delete(key)
+
+    def _make_key(self, bk_token: str) -> str:
+        # 登录票据较长且为敏感数据，不直接作为缓存 key
+        return f"{self.key_prefix}:{hashlib.sha256(bk_token.encode()).hexdigest()}"
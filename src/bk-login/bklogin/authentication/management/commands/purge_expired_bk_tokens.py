@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import time
+
+from django.core.management.base import BaseCommand
+
+from bklogin.authentication.manager import BkTokenManager
+
+
+class Command(BaseCommand):
+    """
+    分批清理已失效（已注销 / 已过期）的登录票据
+
+    - 执行一次（适用于 CronJob 等定时任务调度）
+    $ python manage.py purge_expired_bk_tokens
+
+    - 常驻执行，每 3600 秒清理一次（适用于 Sidecar 等常驻进程）
+    $ python manage.py purge_expired_bk_tokens --interval 3600
+
+    注意：单批删除数量不宜过大，避免长时间锁表，影响登录票据的生成 & 校验
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", dest="batch_size", type=int, default=1000, help="单批删除的票据数量")
+        parser.add_argument(
+            "--batch-interval", dest="batch_interval", type=float, default=0.1, help="批次之间的间隔时间（秒）"
+        )
+        parser.add_argument(
+            "--interval", dest="interval", type=int, default=0, help="定期清理的间隔时间（秒），默认 0 表示只执行一次"
+        )
+
+    def handle(self, batch_size: int, batch_interval: float, interval: int, *args, **options):
+        if batch_size <= 0:
+            raise ValueError(f"invalid batch size: {batch_size}")
+
+        while True:
+            deleted_count = BkTokenManager().purge_expired(batch_size, batch_interval)
+            self.stdout.write(f"purge {deleted_count} expired bk_tokens")
+
+            if interval <= 0:
+                break
+
+            time.sleep(interval)
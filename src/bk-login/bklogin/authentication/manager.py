@@ -27,6 +27,7 @@ from django.conf import settings
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .cache import BkTokenState, BkTokenStateCache
 from .models import BkToken
 
 logger = logging.getLogger(__name__)
@@ -96,6 +97,10 @@ class BkTokenManager:
         self.inactive_age = settings.BK_TOKEN_INACTIVE_AGE
         # Token 校验时间允许误差
         self.offset_error_age = settings.BK_TOKEN_OFFSET_ERROR_AGE
+        # Token 无操作失效时间的刷新间隔
+        self.inactive_refresh_interval = settings.BK_TOKEN_INACTIVE_REFRESH_INTERVAL
+        # Token 状态缓存
+        self.state_cache = BkTokenStateCache()
 
         # Token生成失败的重试次数
         self.allowed_retry_count = 5
@@ -144,16 +149,13 @@ class BkTokenManager:
         except ValueError as error:
             return False, "", str(error)
 
-        # 检查DB是存在
-        try:
-            bk_token_obj = BkToken.objects.get(token=bk_token)
-            is_logout = bk_token_obj.is_logout
-            inactive_expires_at = bk_token_obj.inactive_expires_at
-        except Exception:
+        # 检查DB是存在（优先从缓存中获取）
+        state = self._get_state(bk_token)
+        if state is None:
             return False, "", _("不存在 bk_token[%s] 的记录").format(bk_token)
 
         # token已注销
-        if is_logout:
+        if state.is_logout:
             return False, "", _("登录态已注销")
 
         now = int(time.time())
@@ -166,16 +168,46 @@ class BkTokenManager:
             return False, "", _("登录态有效期不合法")
 
         # token 无操作有效期已过
-        if now > inactive_expires_at + self.inactive_age:
+        if now > state.inactive_expires_at + self.inactive_age:
             return False, "", _("长时间无操作，登录态已过期")
 
         # 更新 无操作有效期
+        self._refresh_inactive_expires_at(bk_token, state, now + self.inactive_age)
+
+        return True, username, ""
+
+    def _get_state(self, bk_token: str) -> BkTokenState | None:
+        """获取 Token 状态，缓存未命中时查询 DB 并回填缓存"""
+        if state := self.state_cache.get(bk_token):
+            return state
+
+        try:
+            bk_token_obj = BkToken.objects.get(token=bk_token)
+        except Exception:
+            return None
+
+        state = BkTokenState(bk_token_obj.is_logout, bk_token_obj.inactive_expires_at)
+        self.state_cache.set(bk_token, state)
+        return state
+
+    def _refresh_inactive_expires_at(self, bk_token: str, state: BkTokenState, inactive_expires_at: int):
+        """
+        刷新无操作失效时间
+
+        Q: 为什么不是每次校验都更新？
+        A: 每个 SaaS 页面请求都会校验登录态，每次都更新会导致登录 DB 写入压力过大，
+           因此只有距离上次刷新超过 inactive_refresh_interval 时，才会更新 DB（无操作失效时间最多提前该间隔）
+        """
+        if inactive_expires_at - state.inactive_expires_at < self.inactive_refresh_interval:
+            return
+
         try:
-            BkToken.objects.filter(token=bk_token).update(inactive_expires_at=now + self.inactive_age)
+            BkToken.objects.filter(token=bk_token).update(inactive_expires_at=inactive_expires_at)
         except Exception:
             logger.exception("update inactive_expires_at fail")
+            return
 
-        return True, username, ""
+        self.state_cache.set(bk_token, state._replace(inactive_expires_at=inactive_expires_at))
 
     @staticmethod
     def set_invalid(bk_token: str):
@@ -185,3 +217,35 @@ class BkTokenManager:
         # Note: unquote_plus 是为了兼容 2.x 版本， 因为旧版本在设置 bk_token Cookie 时做了 quote_plus 转换编码
         bk_token = unquote_plus(bk_token)
         BkToken.objects.filter(token=bk_token).update(is_logout=True)
+        # 注：进程内缓存只能失效当前进程的，其他进程需等待缓存过期
+        BkTokenStateCache().delete(bk_token)
+
+    def purge_expired(self, batch_size: int = 1000, batch_interval: float = 0) -> int:
+        """
+        分批清理已失效的登录票据，返回清理的数量
+
+        Q: 为什么只需要按无操作失效时间清理？
+        A: 票据失效（已注销 / 已过期）后校验不再通过，也就不会再刷新无操作失效时间，
+           因此所有失效的票据最终都会因为长时间无操作而被清理（最多延迟 inactive_age）
+
+        Note: 每批仅按主键删除少量记录，避免长事务 & 大范围锁表，影响登录票据的生成 & 校验
+        """
+        # 与 is_valid 中的判断保持一致，额外预留允许误差，避免清理掉仍可能有效的票据
+        threshold = int(time.time()) - self.inactive_age - self.offset_error_age
+
+        deleted_count = 0
+        while True:
+            ids = list(
+                BkToken.objects.filter(inactive_expires_at__lt=threshold).values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            deleted_count += BkToken.objects.filter(id__in=ids).delete()[0]
+            if len(ids) < batch_size:
+                break
+
+            if batch_interval:
+                time.sleep(batch_interval)
+
+        return deleted_count
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2026-10-18 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bktoken',
+            name='inactive_expires_at',
+            field=models.IntegerField(db_index=True, default=0, verbose_name='无操作失效时间戳'),
+        ),
+    ]
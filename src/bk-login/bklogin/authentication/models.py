@@ -27,5 +27,5 @@ class BkToken(TimestampedModel):
     token = models.CharField("登录票据", max_length=255, unique=True, db_index=True)
     # 是否已经退出登录
     is_logout = models.BooleanField("票据是否已经执行过退出登录操作", default=False)
-    # 无操作过期时间戳
-    inactive_expires_at = models.IntegerField("无操作失效时间戳", default=0)
+    # 无操作过期时间戳（过期票据清理时按该字段范围扫描，因此需要索引）
+    inactive_expires_at = models.IntegerField("无操作失效时间戳", default=0, db_index=True)
@@ -25,18 +25,35 @@ from bklogin.common.error_codes import error_codes
 from bklogin.component.http import HttpStatusCode, http_get, http_post
 from bklogin.utils.url import urljoin
 
+from .cache import BkUserApiResponseCache
 from .models import GlobalSetting, IdpDetail, IdpInfo, TenantInfo, TenantUserDetailInfo, TenantUserInfo
 
 logger = logging.getLogger(__name__)
 
 
-def _call_bk_user_api(http_func, url_path: str, allow_error_status_func: Callable[[HttpStatusCode], bool], **kwargs):
-    """调用用户管理接口"""
+def _call_bk_user_api(
+    http_func,
+    url_path: str,
+    allow_error_status_func: Callable[[HttpStatusCode], bool],
+    cache_timeout: int = 0,
+    **kwargs,
+):
+    """
+    调用用户管理接口
+
+    :param cache_timeout: 响应缓存时间（秒），默认 0 表示不缓存，仅适用于读取变更不频繁数据的 GET 请求
+    """
     url = urljoin(settings.BK_USER_API_URL, url_path)
     # 内部 API 认证
     kwargs.setdefault("auth", HTTPBasicAuth(settings.BK_USER_APP_CODE, settings.BK_USER_APP_SECRET))
 
-    status, resp_data = http_func(url, **kwargs)
+    if cache_timeout > 0:
+        # Note: 缓存的是原始响应，因此命中缓存的 404 等响应仍会按下面的逻辑抛出异常
+        status, resp_data = BkUserApiResponseCache().get_or_fetch(
+            url_path, kwargs.get("params"), lambda: http_func(url, **kwargs), cache_timeout
+        )
+    else:
+        status, resp_data = http_func(url, **kwargs)
     if status.is_invalid:
         logger.error(
             "bk_user api failed, %s %s, kwargs: %s, error: %s", http_func.__name__, url, kwargs, resp_data["error"]
@@ -63,7 +80,9 @@ def _call_bk_user_api_20x(http_func, url_path: str, **kwargs):
 
 def get_global_setting() -> GlobalSetting:
     """查询全局配置"""
-    data = _call_bk_user_api_20x(http_get, "/api/v3/login/global-settings/")
+    data = _call_bk_user_api_20x(
+        http_get, "/api/v3/login/global-settings/", cache_timeout=settings.BK_USER_API_CACHE_TIMEOUT
+    )
     return GlobalSetting(**data)
 
 
@@ -73,21 +92,27 @@ def list_tenant(tenant_ids: List[str] | None = None) -> List[TenantInfo]:
     if tenant_ids:
         params["tenant_ids"] = ",".join(tenant_ids)
 
-    data = _call_bk_user_api_20x(http_get, "/api/v3/login/tenants/", params=params)
+    data = _call_bk_user_api_20x(
+        http_get, "/api/v3/login/tenants/", params=params, cache_timeout=settings.BK_USER_API_CACHE_TIMEOUT
+    )
     return [TenantInfo(**i) for i in data]
 
 
 def list_idp(tenant_id: str, idp_owner_tenant_id: str) -> List[IdpInfo]:
     """获取租户关联的认证源"""
     data = _call_bk_user_api_20x(
-        http_get, f"/api/v3/login/tenants/{tenant_id}/idp-owner-tenants/{idp_owner_tenant_id}/idps/"
+        http_get,
+        f"/api/v3/login/tenants/{tenant_id}/idp-owner-tenants/{idp_owner_tenant_id}/idps/",
+        cache_timeout=settings.BK_USER_API_CACHE_TIMEOUT,
     )
     return [IdpInfo(**i) for i in data]
 
 
 def get_idp(idp_id: str) -> IdpDetail:
     """获取IDP信息"""
-    data = _call_bk_user_api_20x(http_get, f"/api/v3/login/idps/{idp_id}/")
+    data = _call_bk_user_api_20x(
+        http_get, f"/api/v3/login/idps/{idp_id}/", cache_timeout=settings.BK_USER_API_CACHE_TIMEOUT
+    )
     return IdpDetail(**data)
 
 
@@ -103,5 +128,9 @@ def list_matched_tencent_user(tenant_id: str, idp_id: str, idp_users: List[Dict[
 
 def get_tenant_user(tenant_user_id: str) -> TenantUserDetailInfo:
     """通过租户用户ID获取租户用户信息"""
-    data = _call_bk_user_api_20x(http_get, f"/api/v3/login/tenant-users/{tenant_user_id}/")
+    data = _call_bk_user_api_20x(
+        http_get,
+        f"/api/v3/login/tenant-users/{tenant_user_id}/",
+        cache_timeout=settings.BK_USER_API_TENANT_USER_CACHE_TIMEOUT,
+    )
     return TenantUserDetailInfo(**data)
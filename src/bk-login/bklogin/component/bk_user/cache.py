@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Tuple
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+from bklogin.component.http import HttpStatusCode
+from bklogin.utils.lru_cache import LocalLRUCache
+
+# 进程内缓存，在进程内共享
+_local_cache = LocalLRUCache(settings.BK_USER_API_LOCAL_CACHE_MAX_SIZE)
+# 缓存未命中时，用于保证同一请求只调用一次 API 的锁（按 key 分段，避免锁数量无限增长）
+_fetch_locks = [threading.Lock() for __ in range(64)]
+
+
+class BkUserApiResponseCache:
+    """
+    用户管理 API 响应缓存，两级缓存：进程内 LRU 缓存 -> CACHES["default"]（共享缓存，如 Redis）
+
+    - 只缓存 20x 及 404 响应，其中 404 响应的缓存时间较短，避免不存在的资源反复请求用户管理
+    - 同一进程内，相同请求缓存未命中时，只有一个请求会调用 API，其余请求等待并复用其结果
+    """
+
+    key_prefix = "bk_user_api"
+
+    def __init__(self):
+        self.not_found_timeout = settings.BK_USER_API_NOT_FOUND_CACHE_TIMEOUT
+        self.shared_cache_enabled = settings.BK_USER_API_SHARED_CACHE_ENABLED
+
+    def get_or_fetch(
+        self,
+        url_path: str,
+        params: Dict[str, Any] | None,
+        fetch_func: Callable[[], Tuple[HttpStatusCode, Dict]],
+        timeout: int,
+    ) -> Tuple[HttpStatusCode, Dict]:
+        """优先从缓存中获取响应，缓存未命中时调用 fetch_func 并写入缓存，timeout 为 20x 响应的缓存时间（秒）"""
+        key = self._make_key(url_path, params)
+        if (value := self._get(key)) is not None:
+            return HttpStatusCode(value[0]), value[1]
+
+        with _fetch_locks[hash(key) % len(_fetch_locks)]:
+            # 等待锁期间，其他请求可能已经获取到结果
+            if (value := self._get(key)) is not None:
+                return HttpStatusCode(value[0]), value[1]
+
+            status, resp_data = fetch_func()
+            if status.is_success:
+                self._set(key, (status.code, resp_data), timeout)
+            elif status.is_not_found:
+                self._set(key, (status.code, resp_data), min(timeout, self.not_found_timeout))
+
+        return status, resp_data
+
+    def _get(self, key: str) -> Tuple[int, Dict] | None:
+        if (value := _local_cache.get(key)) is not None:
+            return value
+
+        if not self.shared_cache_enabled:
+            return None
+
+        # 回填进程内缓存时无法得知剩余的过期时间，因此不回填，仅依赖共享缓存
+        return cache.get(key)
+
+    def _set(self, key: str, value: Tuple[int, Dict], timeout: int):
+        if timeout <= 0:
+            return
+
+        _local_cache.set(key, value, timeout)
+        if self.shared_cache_enabled:
+            cache.set(key, value, timeout)
+
+    def _make_key(self, url_path: str, params: Dict[str, Any] | None) -> str:
+        query = urlencode(sorted(params.items())) if params else ""
+        return f"{self.key_prefix}:{hashlib.sha256(f'{url_path}?{query}'.encode()).hexdigest()}"
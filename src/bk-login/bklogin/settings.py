@@ -106,6 +106,17 @@ DATABASES = {
         },
     },
 }
+# Cache，默认使用本地内存缓存，多实例部署时可配置为共享缓存
+# 如：CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#     CACHE_LOCATION=redis://127.0.0.1:6379（需安装 redis 依赖）
+CACHES = {
+    "default": {
+        "BACKEND": env.str("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": env.str("CACHE_LOCATION", default=""),
+        "KEY_PREFIX": "bklogin",
+    },
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -200,11 +211,31 @@ BK_TOKEN_COOKIE_AGE = env.int("BK_LOGIN_COOKIE_AGE", default=60 * 60 * 24)
 BK_TOKEN_OFFSET_ERROR_AGE = env.int("BK_LOGIN_COOKIE_OFFSET_ERROR_AGE", default=60)
 # 无操作的失效期，默认2个小时. 长时间无操作, BkToken自动过期（Note: 调整为）
 BK_TOKEN_INACTIVE_AGE = env.int("BK_TOKEN_INACTIVE_AGE", default=60 * 60 * 2)
+# 无操作失效时间的刷新间隔（秒），校验登录票据时，距离上次刷新超过该间隔才会更新 DB，默认 1 分钟，0 表示每次校验都更新
+BK_TOKEN_INACTIVE_REFRESH_INTERVAL = env.int("BK_TOKEN_INACTIVE_REFRESH_INTERVAL", default=60)
+# 登录票据状态（是否注销，无操作失效时间）的缓存时间（秒），默认 0 表示不缓存，每次校验都查询 DB
+# 注意：缓存使用 CACHES["default"]，多实例部署时需配置为共享缓存（如 Redis），
+# 否则注销登录后其他实例在缓存过期前仍认为登录态有效
+BK_TOKEN_CACHE_TIMEOUT = env.int("BK_TOKEN_CACHE_TIMEOUT", default=0)
+# 登录票据状态的进程内（LRU）缓存时间（秒）及最大数量，用于减少对共享缓存的访问，默认 0 表示不使用
+# 注意：进程内缓存无法被其他进程失效，注销登录后其他进程在该时间内仍可能认为登录态有效，建议不超过数秒
+BK_TOKEN_LOCAL_CACHE_TIMEOUT = env.int("BK_TOKEN_LOCAL_CACHE_TIMEOUT", default=0)
+BK_TOKEN_LOCAL_CACHE_MAX_SIZE = env.int("BK_TOKEN_LOCAL_CACHE_MAX_SIZE", default=10000)
 
 # 用户管理相关信息
 BK_USER_APP_CODE = env.str("BK_USER_APP_CODE", default="bk_user")
 BK_USER_APP_SECRET = env.str("BK_USER_APP_SECRET")
 BK_USER_API_URL = env.str("BK_USER_API_URL", default="http://bk-user")
+# 用户管理 API 响应缓存时间（秒），用于登录页渲染时读取的全局配置 / 租户 / 认证源等变更不频繁的数据，0 表示不缓存
+# Note: 缓存期间内，用户管理中的变更（如停用认证源）不会立即在登录页生效
+BK_USER_API_CACHE_TIMEOUT = env.int("BK_USER_API_CACHE_TIMEOUT", default=10)
+# 用户管理 API 查询租户用户信息（get_user 等接口）的响应缓存时间（秒），0 表示不缓存
+BK_USER_API_TENANT_USER_CACHE_TIMEOUT = env.int("BK_USER_API_TENANT_USER_CACHE_TIMEOUT", default=10)
+# 用户管理 API 404 响应的缓存时间（秒），不超过对应 API 的缓存时间
+BK_USER_API_NOT_FOUND_CACHE_TIMEOUT = env.int("BK_USER_API_NOT_FOUND_CACHE_TIMEOUT", default=5)
+# 用户管理 API 响应是否同时缓存到 CACHES["default"]（共享缓存，如 Redis），默认只使用进程内缓存
+BK_USER_API_SHARED_CACHE_ENABLED = env.bool("BK_USER_API_SHARED_CACHE_ENABLED", default=False)
+BK_USER_API_LOCAL_CACHE_MAX_SIZE = env.int("BK_USER_API_LOCAL_CACHE_MAX_SIZE", default=1000)
 
 # bk apigw url tmpl
 BK_API_URL_TMPL = env.str("BK_API_URL_TMPL", default="")
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""
+bk_token 校验基准测试（不会在单元测试中执行）
+
+执行方式：pytest tests/authentication/bench_manager.py -s
+可通过环境变量 BENCH_VALIDATE_COUNT 指定校验次数（默认 1000）
+"""
+
+import os
+import time
+
+import pytest
+from bklogin.authentication.cache import _local_cache
+from bklogin.authentication.manager import BkTokenManager
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = pytest.mark.django_db
+
+VALIDATE_COUNT = int(os.getenv("BENCH_VALIDATE_COUNT", "1000"))
+
+
+def test_validate_bk_token(settings):
+    bk_token, __ = BkTokenManager().generate("admin")
+
+    # (模式名称, 刷新间隔, 共享缓存过期时间, 进程内缓存过期时间)
+    modes = [
+        ("refresh_every_time", 0, 0, 0),
+        ("coalesced", 60, 0, 0),
+        ("coalesced_cached", 60, 60, 5),
+    ]
+
+    print(f"\nbk_token validate benchmark (count: {VALIDATE_COUNT})")
+    for mode, interval, cache_timeout, local_cache_timeout in modes:
+        settings.BK_TOKEN_INACTIVE_REFRESH_INTERVAL = interval
+        settings.BK_TOKEN_CACHE_TIMEOUT = cache_timeout
+        settings.BK_TOKEN_LOCAL_CACHE_TIMEOUT = local_cache_timeout
+        cache.clear()
+        _local_cache.clear()
+
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            for __ in range(VALIDATE_COUNT):
+                assert BkTokenManager().is_valid(bk_token)[0]
+            cost = time.perf_counter() - start
+
+        print(
+            f"  {mode:<20} total: {cost:.3f}s, per validate: {cost / VALIDATE_COUNT * 1000:.3f}ms, "
+            f"queries per validate: {len(ctx.captured_queries) / VALIDATE_COUNT:.3f}"
+        )
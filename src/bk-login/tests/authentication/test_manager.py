@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import time
+from urllib.parse import unquote_plus
+
+import pytest
+from bklogin.authentication.manager import BkTokenManager
+from bklogin.authentication.models import BkToken
+from django.core.management import call_command
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def _enable_cache(settings):
+    settings.BK_TOKEN_CACHE_TIMEOUT = 60
+    settings.BK_TOKEN_LOCAL_CACHE_TIMEOUT = 5
+
+
+@pytest.fixture
+def bk_token() -> str:
+    token, __ = BkTokenManager().generate("admin")
+    return token
+
+
+class TestBkTokenManager:
+    def test_is_valid(self, bk_token):
+        assert BkTokenManager().is_valid(bk_token) == (True, "admin", "")
+
+    def test_is_valid_not_exists(self):
+        token = BkTokenManager().bk_token_processor.generate("admin", int(time.time()) + 60)
+        ok, __, msg = BkTokenManager().is_valid(token)
+        assert not ok
+        assert "不存在 bk_token" in msg
+
+    def test_is_valid_inactive_expired(self, settings, bk_token):
+        BkToken.objects.filter(token=unquote_plus(bk_token)).update(
+            inactive_expires_at=int(time.time()) - settings.BK_TOKEN_INACTIVE_AGE - 10
+        )
+        ok, __, msg = BkTokenManager().is_valid(bk_token)
+        assert not ok
+        assert msg == "长时间无操作，登录态已过期"
+
+    @pytest.mark.usefixtures("_enable_cache")
+    def test_set_invalid_with_cache(self, bk_token):
+        assert BkTokenManager().is_valid(bk_token)[0]
+
+        BkTokenManager.set_invalid(bk_token)
+        # 注销后，缓存被清理，不会再读取到缓存中的有效状态
+        assert BkTokenManager().is_valid(bk_token) == (False, "", "登录态已注销")
+
+
+class TestInactiveExpiresAtRefresh:
+    def test_refresh_every_time(self, settings, bk_token, django_assert_num_queries):
+        settings.BK_TOKEN_INACTIVE_REFRESH_INTERVAL = 0
+        # 查询 + 更新
+        with django_assert_num_queries(2):
+            assert BkTokenManager().is_valid(bk_token)[0]
+
+    def test_skip_refresh_within_interval(self, bk_token, django_assert_num_queries):
+        # 刚生成的 Token，距离上次刷新未超过间隔，不会更新 DB
+        with django_assert_num_queries(1):
+            assert BkTokenManager().is_valid(bk_token)[0]
+
+    def test_refresh_after_interval(self, settings, bk_token, django_assert_num_queries):
+        token = unquote_plus(bk_token)
+        stale_inactive_expires_at = int(time.time()) + settings.BK_TOKEN_INACTIVE_AGE - 120
+        BkToken.objects.filter(token=token).update(inactive_expires_at=stale_inactive_expires_at)
+
+        with django_assert_num_queries(2):
+            assert BkTokenManager().is_valid(bk_token)[0]
+
+        assert BkToken.objects.get(token=token).inactive_expires_at > stale_inactive_expires_at
+
+
+@pytest.mark.usefixtures("_enable_cache")
+class TestBkTokenStateCache:
+    def test_cache_hit(self, bk_token, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            assert BkTokenManager().is_valid(bk_token)[0]
+
+        # 缓存命中后，不再查询 DB
+        with django_assert_num_queries(0):
+            assert BkTokenManager().is_valid(bk_token)[0]
+
+    def test_shared_cache_hit(self, bk_token, django_assert_num_queries):
+        from bklogin.authentication.cache import _local_cache
+
+        assert BkTokenManager().is_valid(bk_token)[0]
+        # 模拟其他进程（进程内缓存未命中），从共享缓存中获取
+        _local_cache.clear()
+        with django_assert_num_queries(0):
+            assert BkTokenManager().is_valid(bk_token)[0]
+
+    def test_cache_updated_after_refresh(self, settings, bk_token, django_assert_num_queries):
+        token = unquote_plus(bk_token)
+        BkToken.objects.filter(token=token).update(
+            inactive_expires_at=int(time.time()) + settings.BK_TOKEN_INACTIVE_AGE - 120
+        )
+
+        # 查询 + 更新，更新后的状态会被写入缓存
+        with django_assert_num_queries(2):
+            assert BkTokenManager().is_valid(bk_token)[0]
+
+        with django_assert_num_queries(0):
+            assert BkTokenManager().is_valid(bk_token)[0]
+
+
+class TestPurgeExpired:
+    @pytest.fixture
+    def expired_bk_tokens(self, settings) -> list[str]:
+        tokens = [BkTokenManager().generate("admin")[0] for __ in range(5)]
+        BkToken.objects.filter(token__in=[unquote_plus(t) for t in tokens]).update(
+            inactive_expires_at=int(time.time()) - settings.BK_TOKEN_INACTIVE_AGE - 3600
+        )
+        return tokens
+
+    @pytest.mark.parametrize("batch_size", [1, 2, 5, 100])
+    def test_purge_expired(self, bk_token, expired_bk_tokens, batch_size):
+        assert BkTokenManager().purge_expired(batch_size=batch_size) == len(expired_bk_tokens)
+        assert list(BkToken.objects.values_list("token", flat=True)) == [unquote_plus(bk_token)]
+        assert BkTokenManager().is_valid(bk_token)[0]
+
+    def test_keep_recently_logout(self, bk_token):
+        # 刚注销的票据，需等待无操作失效后再清理
+        BkTokenManager.set_invalid(bk_token)
+        assert BkTokenManager().purge_expired() == 0
+        assert BkTokenManager().is_valid(bk_token) == (False, "", "登录态已注销")
+
+    def test_command(self, bk_token, expired_bk_tokens, capsys):
+        call_command("purge_expired_bk_tokens", "--batch-size", "2", "--batch-interval", "0")
+        assert "purge 5 expired bk_tokens" in capsys.readouterr().out
+        assert BkToken.objects.count() == 1
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import threading
+import time
+from unittest import mock
+
+import pytest
+from bklogin.component.bk_user import api as bk_user_api
+from bklogin.component.bk_user.cache import _local_cache
+from bklogin.component.http import HttpStatusCode
+from bklogin.utils.std_error import APIError
+from django.core.cache import cache
+
+IDP_DATA = {
+    "id": "idp-1",
+    "name": "local",
+    "status": "enabled",
+    "plugin": {"id": "local", "name": "Local"},
+    "owner_tenant_id": "default",
+    "plugin_config": {},
+}
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    _local_cache.clear()
+    yield
+    cache.clear()
+    _local_cache.clear()
+
+
+@pytest.fixture
+def http_get():
+    with mock.patch.object(bk_user_api, "http_get") as mocked:
+        mocked.__name__ = "http_get"
+        mocked.return_value = (HttpStatusCode(200), {"data": IDP_DATA})
+        yield mocked
+
+
+class TestBkUserApiCache:
+    def test_cache_hit(self, http_get):
+        assert bk_user_api.get_idp("idp-1").id == "idp-1"
+        assert bk_user_api.get_idp("idp-1").id == "idp-1"
+        assert http_get.call_count == 1
+
+    def test_cache_disabled(self, settings, http_get):
+        settings.BK_USER_API_CACHE_TIMEOUT = 0
+
+        bk_user_api.get_idp("idp-1")
+        bk_user_api.get_idp("idp-1")
+        assert http_get.call_count == 2  # noqa: PLR2004
+
+    def test_cache_key_with_params(self, http_get):
+        http_get.return_value = (HttpStatusCode(200), {"data": [{"id": "default", "name": "Default"}]})
+
+        bk_user_api.list_tenant(["default"])
+        bk_user_api.list_tenant(["default"])
+        bk_user_api.list_tenant(["other"])
+        assert http_get.call_count == 2  # noqa: PLR2004
+
+    def test_not_found_cached(self, http_get):
+        http_get.return_value = (HttpStatusCode(404), {"error": "not found"})
+
+        for __ in range(2):
+            with pytest.raises(APIError) as exc_info:
+                bk_user_api.get_idp("not-exists")
+            assert exc_info.value.code == "REMOTE_REQUEST_ERROR"
+
+        assert http_get.call_count == 1
+
+    @pytest.mark.parametrize("status_code", [-1, 500])
+    def test_error_not_cached(self, http_get, status_code):
+        http_get.return_value = (HttpStatusCode(status_code), {"error": "error"})
+
+        for __ in range(2):
+            with pytest.raises(APIError):
+                bk_user_api.get_idp("idp-1")
+
+        assert http_get.call_count == 2  # noqa: PLR2004
+
+    def test_post_not_cached(self):
+        with mock.patch.object(bk_user_api, "http_post") as http_post:
+            http_post.__name__ = "http_post"
+            http_post.return_value = (HttpStatusCode(200), {"data": []})
+            bk_user_api.list_matched_tencent_user("default", "idp-1", [])
+            bk_user_api.list_matched_tencent_user("default", "idp-1", [])
+
+        assert http_post.call_count == 2  # noqa: PLR2004
+
+    def test_shared_cache(self, settings, http_get):
+        settings.BK_USER_API_SHARED_CACHE_ENABLED = True
+
+        bk_user_api.get_idp("idp-1")
+        # 模拟其他进程（进程内缓存未命中），从共享缓存中获取
+        _local_cache.clear()
+        assert bk_user_api.get_idp("idp-1").id == "idp-1"
+        assert http_get.call_count == 1
+
+    def test_single_flight(self, http_get):
+        def slow_get(*args, **kwargs):
+            time.sleep(0.1)
+            return HttpStatusCode(200), {"data": IDP_DATA}
+
+        http_get.side_effect = slow_get
+
+        threads = [threading.Thread(target=bk_user_api.get_idp, args=("idp-1",)) for __ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert http_get.call_count == 1
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import time
+
+from bklogin.utils.lru_cache import LocalLRUCache
+
+
+class TestLocalLRUCache:
+    def test_get_set_delete(self):
+        cache = LocalLRUCache(max_size=10)
+        assert cache.get("k") is None
+        assert cache.get("k", "default") == "default"
+
+        cache.set("k", "v", timeout=60)
+        assert cache.get("k") == "v"
+
+        cache.delete("k")
+        assert cache.get("k") is None
+        # 删除不存在的 key 不会报错
+        cache.delete("k")
+
+    def test_expired(self):
+        cache = LocalLRUCache(max_size=10)
+        cache.set("k", "v", timeout=0.01)
+        time.sleep(0.02)
+        assert cache.get("k") is None
+        assert len(cache) == 0
+
+    def test_evict_least_recently_used(self):
+        cache = LocalLRUCache(max_size=2)
+        cache.set("a", 1, timeout=60)
+        cache.set("b", 2, timeout=60)
+        # 访问 a 后，b 成为最久未被访问的
+        assert cache.get("a") == 1
+        cache.set("c", 3, timeout=60)
+
+        assert len(cache) == 2  # noqa: PLR2004
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3  # noqa: PLR2004
+
+    def test_clear(self):
+        cache = LocalLRUCache(max_size=2)
+        cache.set("a", 1, timeout=60)
+        cache.clear()
+        assert len(cache) == 0
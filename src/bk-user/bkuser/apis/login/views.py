@@ -29,6 +29,7 @@ from bkuser.apps.idp.constants import IdpStatus
 from bkuser.apps.idp.models import Idp
 from bkuser.apps.tenant.constants import CollaborationStrategyStatus, TenantStatus
 from bkuser.apps.tenant.models import CollaborationStrategy, Tenant, TenantUser
+from bkuser.biz.credential import LocalUserCredentialVerifier, LocalUserLoginThrottle
 from bkuser.biz.idp import AuthenticationMatcher
 from bkuser.common.error_codes import error_codes
 
@@ -108,19 +109,28 @@ class LocalUserCredentialAuthenticateApi(LoginApiAccessControlMixin, generics.Cr
         slz.is_valid(raise_exception=True)
         data = slz.validated_data
 
-        # TODO: 密码错误次数检测&锁定，如何实现？
-        #  不同数据源配置，key=(data_source_id, username)，错误次数如何计算？如何锁定？
-
-        # 由于密码是Hash并加盐, 无法直接查询DB匹配，只能一个个遍历匹配
-        users = LocalDataSourceIdentityInfo.objects.filter(
-            data_source_id__in=data["data_source_ids"], username=data["username"]
+        # 密码错误次数达到上限的数据源，不再校验密码（需启用登录失败次数限制）
+        # Note: 失败次数按请求的数据源计数，与用户名是否存在无关，避免根据响应的差异判断出哪些用户名是存在的
+        throttle = LocalUserLoginThrottle(data["username"])
+        data_source_ids = set(data["data_source_ids"])
+        if locked_data_source_ids := throttle.get_locked_data_source_ids(data_source_ids):
+            data_source_ids -= locked_data_source_ids
+            if not data_source_ids:
+                raise error_codes.TOO_FREQUENTLY.f(_("密码错误次数过多，请稍后再试"))
+
+        # 由于密码是Hash并加盐, 无法直接查询DB匹配，只能逐个校验
+        users = list(
+            LocalDataSourceIdentityInfo.objects.filter(data_source_id__in=data_source_ids, username=data["username"])
         )
-        matched_users = [u for u in users if u.check_password(data["password"])]
+        matched_users = LocalUserCredentialVerifier().verify(users, data["password"])
 
         # 无任何匹配
         if not matched_users:
+            throttle.record_failure(data_source_ids)
             raise error_codes.USERNAME_OR_PASSWORD_WRONG_ERROR
 
+        throttle.reset({u.data_source_id for u in matched_users})
+
         # Q: 为什么这里不对用户状态、数据源状态、“是否首次登录检测并强制修改” 等进行检测呢？
         # A: [单一职责] 这里只对用户的凭证进行认证，并不是与登录绑定
         #  多租户下，认证后的数据源用户，
@@ -18,15 +18,14 @@
 from functools import cached_property
 from typing import Dict, Tuple
 
-from django.db.models import Q, QuerySet
+from django.db.models import QuerySet
 from rest_framework.permissions import IsAuthenticated
 
 from bkuser.apis.open_v2.authentications import ESBAuthentication
 from bkuser.apis.open_v2.renderers import BkLegacyApiJSONRenderer
-from bkuser.apps.data_source.constants import DataSourceTypeEnum
 from bkuser.apps.data_source.models import DataSource
-from bkuser.apps.tenant.constants import CollaborationStrategyStatus
 from bkuser.apps.tenant.models import CollaborationStrategy, Tenant, TenantUserIDGenerateConfig
+from bkuser.apps.tenant.utils import get_real_user_data_sources
 
 
 class LegacyOpenApiCommonMixin:
@@ -44,15 +43,7 @@ class DefaultTenantMixin:
 
     def get_real_user_data_sources(self) -> QuerySet[DataSource]:
         """获取默认租户真实用户数据源（含自己的 + 协同过来的），兼容 V2 的 OpenAPI 专用"""
-        # 接受方确认过的数据源，就是认为是有数据的
-        collaboration_tenant_ids = (
-            CollaborationStrategy.objects.filter(target_tenant=self.default_tenant)
-            .exclude(target_status=CollaborationStrategyStatus.UNCONFIRMED)
-            .values_list("source_tenant_id", flat=True)
-        )
-        return DataSource.objects.filter(
-            Q(owner_tenant_id=self.default_tenant.id) | Q(owner_tenant_id__in=collaboration_tenant_ids)
-        ).filter(type=DataSourceTypeEnum.REAL)
+        return get_real_user_data_sources(self.default_tenant.id)
 
     def get_collaboration_field_mapping(self) -> Dict[Tuple[str, str], str]:
         """
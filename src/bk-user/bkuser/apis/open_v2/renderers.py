@@ -14,6 +14,8 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
+from typing import Iterable, Iterator
+
 from rest_framework import status
 from rest_framework.renderers import JSONRenderer
 
@@ -33,3 +35,21 @@ class BkLegacyApiJSONRenderer(JSONRenderer):
 
         # For status codes other than (2xx, 4xx, 5xx), do not wrap data
         return super().render(data, accepted_media_type=None, renderer_context=None)
+
+
+def render_legacy_api_json_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    以流的方式输出蓝鲸历史版本 API Json 响应（仅支持 data 为数组的成功响应）
+
+    :param chunks: 数组元素分块，每个分块为以逗号分隔的若干个已序列化的 JSON 对象
+    """
+    yield b'{"result":true,"code":0,"message":"","data":['
+    sep = b""
+    for chunk in chunks:
+        if not chunk:
+            continue
+
+        yield sep + chunk
+        sep = b","
+
+    yield b"]}"
@@ -32,6 +32,7 @@ from bkuser.apis.open_v2.serializers.departments import (
     ProfileDepartmentListInputSLZ,
 )
 from bkuser.apps.data_source.constants import DataSourceTypeEnum
+from bkuser.apps.data_source.department_path_index import get_department_paths
 from bkuser.apps.data_source.models import (
     DataSourceDepartment,
     DataSourceDepartmentRelation,
@@ -39,7 +40,6 @@ from bkuser.apps.data_source.models import (
 )
 from bkuser.apps.tenant.models import TenantDepartment, TenantUser
 from bkuser.common.error_codes import error_codes
-from bkuser.utils.tree import Tree
 
 
 class DepartmentListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, generics.ListAPIView):
@@ -66,16 +66,40 @@ class DepartmentListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, generics.L
     def _build_dept_infos(
         self, tenant_depts: QuerySet[TenantDepartment], fields: List[str], with_ancestors: bool
     ) -> List[Dict[str, Any]]:
+        tenant_depts = list(tenant_depts)
+        # 没有指定 fields 的时候，才需要额外返回 full_name & children 等需要部门路径计算的字段
+        with_paths = not fields
+        # {数据源部门 ID: 部门路径}
+        dept_path_map = (
+            get_department_paths((d.data_source_id, d.data_source_department_id) for d in tenant_depts)
+            if with_paths
+            else {}
+        )
+        # 若指定 with_ancestors == True，还需要子部门的路径，用于计算子部门的 has_children
+        child_dept_path_map = (
+            get_department_paths(
+                (d.data_source_id, child_dept_id)
+                for d in tenant_depts
+                if d.data_source_department_id in dept_path_map
+                for child_dept_id in dept_path_map[d.data_source_department_id].children_ids
+            )
+            if with_paths and with_ancestors
+            else {}
+        )
+
+        # 只需要查询父部门，祖先部门，子部门对应的租户部门
+        related_dept_ids = {d.data_source_department.department_relation.parent_id for d in tenant_depts}
+        for path in dept_path_map.values():
+            related_dept_ids.update(path.ancestor_ids)
+        related_dept_ids.update(child_dept_path_map.keys())
+
         # 部门 ID 映射：{(数据源部门 ID, 租户 ID)：租户部门 ID}
         tenant_dept_id_map = {
             (data_source_dept_id, tenant_id): dept_id
-            for (data_source_dept_id, tenant_id, dept_id) in TenantDepartment.objects.values_list(
-                "data_source_department_id", "tenant_id", "id"
-            )
+            for (data_source_dept_id, tenant_id, dept_id) in TenantDepartment.objects.filter(
+                tenant_id__in={d.tenant_id for d in tenant_depts}, data_source_department_id__in=related_dept_ids
+            ).values_list("data_source_department_id", "tenant_id", "id")
         }
-        # {数据源部门 ID: 数据源部门名称}
-        dept_id_name_map = dict(DataSourceDepartment.objects.values_list("id", "name"))
-        rel_tree = Tree(DataSourceDepartmentRelation.objects.values_list("department_id", "parent_id"))
 
         resp_data = []
         for dept in tenant_depts:
@@ -98,34 +122,32 @@ class DepartmentListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, generics.L
                 continue
 
             # 没有指定 fields 的时候，额外返回 full_name & children 字段
-            dept_full_name = "/".join(
-                [
-                    dept_id_name_map[x]
-                    for x in rel_tree.get_ancestors(dept.data_source_department_id, include_self=True)
-                ]
-            )
+            dept_path = dept_path_map.get(dept.data_source_department_id)
+            dept_full_name = dept_path.full_name if dept_path else dept.data_source_department.name
             dept_info["full_name"] = dept_full_name
-            dept_info["has_children"] = bool(rel_tree.get_children(dept.data_source_department_id))
+            dept_info["has_children"] = bool(dept_path and dept_path.children_ids)
 
             # 若指定 with_ancestors == True，则额外返回祖先 & 孩子部门信息（为什么需要孩子信息？总之老的逻辑是这样的）
             if with_ancestors:
+                ancestors = zip(dept_path.ancestor_ids, dept_path.ancestor_names) if dept_path else []
                 dept_info["ancestors"] = [
-                    {"id": tenant_dept_id_map[(id, dept.tenant_id)], "name": dept_id_name_map.get(id, "--")}
-                    for id in rel_tree.get_ancestors(dept.data_source_department_id)
+                    {"id": tenant_dept_id_map[(id, dept.tenant_id)], "name": name}
+                    for id, name in ancestors
                     if (id, dept.tenant_id) in tenant_dept_id_map
                 ]
                 children = []
-                for child_dept_id in rel_tree.get_children(dept.data_source_department_id):
+                for child_dept_id in dept_path.children_ids if dept_path else []:
                     if (child_dept_id, dept.tenant_id) not in tenant_dept_id_map:
                         continue
 
-                    child_dept_name = dept_id_name_map.get(child_dept_id, "--")
+                    child_dept_path = child_dept_path_map.get(child_dept_id)
+                    child_dept_name = child_dept_path.name if child_dept_path else "--"
                     children.append(
                         {
                             "id": tenant_dept_id_map[(child_dept_id, dept.tenant_id)],
                             "name": child_dept_name,
                             "full_name": f"{dept_full_name}/{child_dept_name}",
-                            "has_children": bool(rel_tree.get_children(child_dept_id)),
+                            "has_children": bool(child_dept_path and child_dept_path.children_ids),
                         }
                     )
 
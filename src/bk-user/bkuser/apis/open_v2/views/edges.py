@@ -17,11 +17,12 @@
 from typing import Dict, List
 
 from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
 from rest_framework import generics
-from rest_framework.response import Response
 
 from bkuser.apis.open_v2.mixins import DefaultTenantMixin, LegacyOpenApiCommonMixin
 from bkuser.apis.open_v2.pagination import LegacyOpenApiPagination
+from bkuser.apis.open_v2.renderers import render_legacy_api_json_stream
 from bkuser.apis.open_v2.serializers.edges import (
     DepartmentProfileRelationListInputSLZ,
     DepartmentProfileRelationListOutputSLZ,
@@ -30,15 +31,28 @@ from bkuser.apis.open_v2.serializers.edges import (
 )
 from bkuser.apps.data_source.models import DataSourceDepartmentUserRelation, DataSourceUserLeaderRelation
 from bkuser.apps.tenant.models import TenantDepartment
-from bkuser.common.cache import Cache, CacheEnum, CacheKeyPrefixEnum
+from bkuser.apps.tenant.relation_dumps import (
+    BaseTenantRelationDump,
+    DepartmentUserRelationDump,
+    UserLeaderRelationDump,
+)
+from bkuser.apps.tenant.tasks import rebuild_tenant_relation_dumps
+
+
+def _stream_relation_dump(dump: BaseTenantRelationDump) -> StreamingHttpResponse:
+    """以流的方式返回关系数据全量转储"""
+    # 在开始输出响应前确认分块数据完整，分块缺失时会先重建，避免输出不完整的 JSON；分块在输出时才逐个读取
+    manifest, chunks = dump.get_or_build_chunks()
+    # 转储数据已经超过刷新间隔，需要在后台进行重建（当前请求依然返回现有的数据）
+    if manifest and dump.claim_refresh(manifest):
+        rebuild_tenant_relation_dumps.delay(dump.tenant_id, [dump.name])
+
+    return StreamingHttpResponse(render_legacy_api_json_stream(chunks), content_type="application/json")
 
 
 class DepartmentProfileRelationListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, generics.ListAPIView):
     pagination_class = LegacyOpenApiPagination
 
-    cache_key = "list_department_profile_relations"
-    cache_timeout = 60 * 10
-
     def get_queryset(self) -> QuerySet[DataSourceDepartmentUserRelation]:
         # 注：兼容 v2 的 OpenAPI 只提供默认租户的数据（包括默认租户本身数据源的数据 & 其他租户协同过来的数据）
         return (
@@ -66,25 +80,14 @@ class DepartmentProfileRelationListApi(LegacyOpenApiCommonMixin, DefaultTenantMi
         return self.get_paginated_response(DepartmentProfileRelationListOutputSLZ(relations, many=True).data)
 
     def _get_with_no_page(self):
-        """支持不分页的数据拉取，需要支持 Redis 缓存结果，出于性能考虑，不使用 OutputSLZ"""
-        cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.V2_API)
-        # 如果缓存中存在，则直接返回
-        if relations := cache.get(self.cache_key):
-            return Response(relations)
-
-        relations = self._convert(
-            [
-                {"id": rel.id, "department_id": rel.department_id, "profile_id": rel.user_id}
-                for rel in self.get_queryset()
-            ]
-        )
-        cache.set(self.cache_key, relations, timeout=self.cache_timeout)
-        return Response(relations)
+        """支持不分页的数据拉取，数据来自 Redis 中的全量转储，出于性能考虑，不使用 OutputSLZ"""
+        return _stream_relation_dump(DepartmentUserRelationDump(self.default_tenant.id))
 
     def _convert(self, data_source_dept_user_relations: List[Dict]) -> List[Dict]:
         """将数据源部门 ID 转换成租户部门 ID 注：在兼容 v2 的 OpenAPI 中，用户 ID 即为数据源用户 ID，无需转换"""
         dept_id_map = dict(
             TenantDepartment.objects.filter(
+                tenant=self.default_tenant,
                 data_source_department_id__in=[rel["department_id"] for rel in data_source_dept_user_relations],
             ).values_list("data_source_department_id", "id")
         )
@@ -98,9 +101,6 @@ class DepartmentProfileRelationListApi(LegacyOpenApiCommonMixin, DefaultTenantMi
 class ProfileLeaderRelationListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin, generics.ListAPIView):
     pagination_class = LegacyOpenApiPagination
 
-    cache_key = "list_profile_leader_relations"
-    cache_timeout = 60 * 10
-
     def get_queryset(self) -> QuerySet[DataSourceUserLeaderRelation]:
         # 注：兼容 v2 的 OpenAPI 只提供默认租户的数据（包括默认租户本身数据源的数据 & 其他租户协同过来的数据）
         return (
@@ -127,15 +127,5 @@ class ProfileLeaderRelationListApi(LegacyOpenApiCommonMixin, DefaultTenantMixin,
         return self.get_paginated_response(ProfileLeaderRelationListOutputSLZ(relations, many=True).data)
 
     def _get_with_no_page(self):
-        """支持不分页的数据拉取，需要支持 Redis 缓存结果，出于性能考虑，不使用 OutputSLZ"""
-        cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.V2_API)
-        # 如果缓存中存在，则直接返回
-        if relations := cache.get(self.cache_key):
-            return Response(relations)
-
-        relations = [
-            {"id": rel.id, "from_profile_id": rel.user_id, "to_profile_id": rel.leader_id}
-            for rel in self.get_queryset()
-        ]
-        cache.set(self.cache_key, relations, timeout=self.cache_timeout)
-        return Response(relations)
+        """支持不分页的数据拉取，数据来自 Redis 中的全量转储，出于性能考虑，不使用 OutputSLZ"""
+        return _stream_relation_dump(UserLeaderRelationDump(self.default_tenant.id))
@@ -37,16 +37,16 @@ from bkuser.apis.open_v2.serializers.profilers import (
     ProfileRetrieveInputSLZ,
 )
 from bkuser.apps.data_source.constants import DataSourceTypeEnum
+from bkuser.apps.data_source.department_path_index import get_department_paths
 from bkuser.apps.data_source.models import (
     DataSourceDepartmentRelation,
     DataSourceDepartmentUserRelation,
     DataSourceUserLeaderRelation,
 )
 from bkuser.apps.tenant.constants import TenantUserStatus
-from bkuser.apps.tenant.models import DataSourceDepartment, TenantDepartment, TenantUser
+from bkuser.apps.tenant.models import TenantDepartment, TenantUser
 from bkuser.common.error_codes import error_codes
 from bkuser.common.views import ExcludePatchAPIViewMixin
-from bkuser.utils.tree import Tree
 
 
 class ProfileStatusEnum(StrStructuredEnum):
@@ -222,10 +222,10 @@ class TenantUserListToUserInfosMixin(DefaultTenantMixin, DataSourceDomainMixin):
         for i in tenant_departments:
             tenant_dept_map[i.data_source_department_id].append(i)
 
-        # dept_id_name_map 和 rel_tree 用于计算部门 full_name
-        # {数据源部门 ID: 数据源部门名称}
-        dept_id_name_map = dict(DataSourceDepartment.objects.values_list("id", "name"))
-        rel_tree = Tree(DataSourceDepartmentRelation.objects.values_list("department_id", "parent_id"))
+        # 部门路径，用于计算部门 full_name，{数据源部门 ID: 部门路径}
+        dept_path_map = get_department_paths(
+            (i.data_source_id, i.data_source_department_id) for i in tenant_departments
+        )
 
         # 基于 部门 必须与用户同一个租户才是有效的，这里以 (tenant_id, data_source_user_id) 作为 key
         dept_map: Dict[Tuple[str, int], List[Dict]] = defaultdict(list)
@@ -237,14 +237,9 @@ class TenantUserListToUserInfosMixin(DefaultTenantMixin, DataSourceDomainMixin):
                         "id": tenant_dept.id,
                         "name": tenant_dept.data_source_department.name,
                         # TODO: 协同支持指定范围后，是以 “伪根” 开始，并不是原始数据源的根，需要调整
-                        "full_name": "/".join(
-                            [
-                                dept_id_name_map[i]
-                                for i in rel_tree.get_ancestors(
-                                    tenant_dept.data_source_department.id, include_self=True
-                                )
-                            ]
-                        ),
+                        "full_name": dept_path_map[tenant_dept.data_source_department_id].full_name
+                        if tenant_dept.data_source_department_id in dept_path_map
+                        else tenant_dept.data_source_department.name,
                         "order": idx + 1,
                     }
                 )
@@ -584,7 +579,7 @@ class ProfileRetrieveApi(
         ).select_related("data_source_department")
 
         # 部门的 full_name
-        full_name_map = self._get_department_full_name_map(department_ids)
+        full_name_map = self._get_department_full_name_map(departments)
 
         return [
             {
@@ -597,16 +592,10 @@ class ProfileRetrieveApi(
         ]
 
     @staticmethod
-    def _get_department_full_name_map(department_ids: List[int]) -> Dict[int, str]:
-        """获取部门的 full name"""
-        # 查询每个数据源部门的 MPTT 关系，用于获取祖先，进而便于后面获取部门的 full_name
-        dept_relations = DataSourceDepartmentRelation.objects.filter(department_id__in=department_ids)
-        return {
-            rel.department_id: "/".join(
-                rel.get_ancestors(include_self=True).values_list("department__name", flat=True)
-            )
-            for rel in dept_relations
-        }
+    def _get_department_full_name_map(departments: QuerySet[TenantDepartment]) -> Dict[int, str]:
+        """获取部门的 full name，{数据源部门 ID: full name}"""
+        dept_path_map = get_department_paths((d.data_source_id, d.data_source_department_id) for d in departments)
+        return {dept_id: path.full_name for dept_id, path in dept_path_map.items()}
 
     def _build_user_info(self, tenant_user: TenantUser, fields: List[str]) -> Dict[str, Any]:
         """生成用户信息"""
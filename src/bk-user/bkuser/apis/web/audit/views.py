@@ -15,17 +15,18 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 from datetime import timedelta
-from typing import Any, Dict
 
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 from bkuser.apis.web.mixins import CurrentUserTenantMixin
 from bkuser.apps.audit.models import OperationAuditRecord
 from bkuser.apps.permission.constants import PermAction
 from bkuser.apps.permission.permissions import perm_class
 from bkuser.biz.tenant import TenantUserHandler
+from bkuser.common.pagination import KeysetPagination
 
 from .serializers import AuditRecordListInputSLZ, AuditRecordListOutputSLZ
 
@@ -36,6 +37,7 @@ class AuditRecordListAPIView(CurrentUserTenantMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticated, perm_class(PermAction.MANAGE_TENANT)]
 
     serializer_class = AuditRecordListOutputSLZ
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         slz = AuditRecordListInputSLZ(data=self.request.query_params)
@@ -62,15 +64,26 @@ class AuditRecordListAPIView(CurrentUserTenantMixin, generics.ListAPIView):
         if object_name := params.get("object_name"):
             filters["object_name__icontains"] = object_name
 
-        return OperationAuditRecord.objects.filter(**filters)
-
-    def get_serializer_context(self) -> Dict[str, Any]:
-        # 对于 tenant_user_id 的查询也采取分页的方式，不需要全表查询
-        tenant_user_ids = self.paginate_queryset(self.get_queryset().values_list("creator", flat=True))
-
-        return {
-            "user_display_name_map": TenantUserHandler.get_tenant_user_display_name_map_by_ids(tenant_user_ids),
-        }
+        # 列表只需要展示少量字段，不需要加载操作前后数据等大字段
+        return OperationAuditRecord.objects.filter(**filters).only(
+            "id", "operation", "object_type", "object_name", "creator", "created_at"
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        records = page if page is not None else list(queryset)
+
+        # 操作人展示名只需要查询当前页的记录，复用分页结果，避免重复分页查询
+        context = self.get_serializer_context()
+        context["user_display_name_map"] = TenantUserHandler.get_tenant_user_display_name_map_by_ids(
+            list({r.creator for r in records if r.creator})
+        )
+        serializer = self.get_serializer(records, many=True, context=context)
+        if page is None:
+            return Response(serializer.data)
+
+        return self.get_paginated_response(serializer.data)
 
     @swagger_auto_schema(
         tags=["audit"],
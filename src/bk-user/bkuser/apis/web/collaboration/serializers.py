@@ -17,12 +17,13 @@
 from typing import Any, Dict, List
 
 import pydantic
+from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from drf_yasg.utils import swagger_serializer_method
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from bkuser.apps.sync.constants import SyncOperation, SyncTaskStatus
+from bkuser.apps.sync.constants import SyncLogLevel, SyncLogPhase, SyncOperation, SyncTaskStatus
 from bkuser.apps.sync.models import (
     DataSourceDepartmentChangeLog,
     DataSourceUserChangeLog,
@@ -226,8 +227,7 @@ class CollaborationFromStrategyUpdateInputSLZ(serializers.Serializer):
         return config
 
 
-class CollaborationFromStrategyConfirmInputSLZ(CollaborationFromStrategyUpdateInputSLZ):
-    ...
+class CollaborationFromStrategyConfirmInputSLZ(CollaborationFromStrategyUpdateInputSLZ): ...
 
 
 class CollaborationFromStrategyTargetStatusUpdateOutputSLZ(serializers.Serializer):
@@ -296,3 +296,19 @@ class CollaborationSyncRecordRetrieveOutputSLZ(serializers.Serializer):
     @swagger_serializer_method(serializer_or_field=CollaborationObjectsSLZ())
     def get_deleted_objs(self, obj: TenantSyncTask) -> Dict[str, Any]:
         return CollaborationObjectsSLZ(get_collaboration_objects_info(obj, SyncOperation.DELETE)).data
+
+
+class CollaborationSyncRecordLogListInputSLZ(serializers.Serializer):
+    level = serializers.ChoiceField(help_text="日志等级", choices=SyncLogLevel.get_choices(), required=False)
+    phase = serializers.ChoiceField(help_text="同步阶段", choices=SyncLogPhase.get_choices(), required=False)
+    tail = serializers.IntegerField(
+        help_text="仅获取最后 N 条日志（不分页）", required=False, min_value=1, max_value=settings.MAX_PAGE_SIZE
+    )
+
+
+class CollaborationSyncRecordLogListOutputSLZ(serializers.Serializer):
+    seq = serializers.IntegerField(help_text="日志序号")
+    phase = serializers.ChoiceField(help_text="同步阶段", choices=SyncLogPhase.get_choices())
+    level = serializers.ChoiceField(help_text="日志等级", choices=SyncLogLevel.get_choices())
+    message = serializers.CharField(help_text="日志内容")
+    count = serializers.IntegerField(help_text="重复次数")
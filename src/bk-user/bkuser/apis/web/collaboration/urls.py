@@ -87,4 +87,10 @@ urlpatterns = [
         views.CollaborationSyncRecordRetrieveApi.as_view(),
         name="collaboration.sync-record.retrieve",
     ),
+    # 协同数据更新记录日志列表
+    path(
+        "sync-records/<str:id>/logs/",
+        views.CollaborationSyncRecordLogListApi.as_view(),
+        name="collaboration.sync-record.log.list",
+    ),
 ]
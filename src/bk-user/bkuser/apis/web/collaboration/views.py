@@ -21,6 +21,7 @@ from django.db.models import QuerySet
 from django.utils.translation import gettext_lazy as _
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics, status
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
@@ -31,6 +32,8 @@ from bkuser.apis.web.collaboration.serializers import (
     CollaborationFromStrategyUpdateInputSLZ,
     CollaborationSourceTenantCustomFieldListOutputSLZ,
     CollaborationSyncRecordListOutputSLZ,
+    CollaborationSyncRecordLogListInputSLZ,
+    CollaborationSyncRecordLogListOutputSLZ,
     CollaborationSyncRecordRetrieveOutputSLZ,
     CollaborationTargetTenantListInputSLZ,
     CollaborationTargetTenantListOutputSLZ,
@@ -43,7 +46,7 @@ from bkuser.apis.web.collaboration.serializers import (
 from bkuser.apis.web.mixins import CurrentUserTenantMixin
 from bkuser.apps.permission.constants import PermAction
 from bkuser.apps.permission.permissions import perm_class
-from bkuser.apps.sync.models import TenantSyncTask
+from bkuser.apps.sync.models import TenantSyncTask, TenantSyncTaskLog
 from bkuser.apps.sync.shortcuts import start_collaboration_tenant_sync
 from bkuser.apps.tenant.constants import CollaborationStrategyStatus, TenantStatus
 from bkuser.apps.tenant.models import (
@@ -469,3 +472,47 @@ class CollaborationSyncRecordRetrieveApi(CurrentUserTenantMixin, generics.Retrie
     )
     def get(self, request, *args, **kwargs):
         return self.retrieve(request, *args, **kwargs)
+
+
+class CollaborationSyncRecordLogListApi(CurrentUserTenantMixin, generics.ListAPIView):
+    """协同数据更新记录日志（支持按等级 / 阶段过滤，分页获取或仅获取最后 N 条）"""
+
+    permission_classes = [IsAuthenticated, perm_class(PermAction.MANAGE_TENANT)]
+
+    serializer_class = CollaborationSyncRecordLogListOutputSLZ
+
+    def get_queryset(self) -> QuerySet[TenantSyncTaskLog]:
+        cur_tenant_id = self.get_current_tenant_id()
+        task = get_object_or_404(
+            TenantSyncTask.objects.filter(tenant_id=cur_tenant_id).exclude(data_source_owner_tenant_id=cur_tenant_id),
+            id=self.kwargs["id"],
+        )
+        return TenantSyncTaskLog.objects.filter(task=task)
+
+    def list(self, request, *args, **kwargs):
+        slz = CollaborationSyncRecordLogListInputSLZ(data=request.query_params)
+        slz.is_valid(raise_exception=True)
+        params = slz.validated_data
+
+        queryset = self.get_queryset()
+        if level := params.get("level"):
+            queryset = queryset.filter(level=level)
+        if phase := params.get("phase"):
+            queryset = queryset.filter(phase=phase)
+
+        # 指定 tail 时，仅返回最后 N 条日志（按序号正序），不分页
+        if tail := params.get("tail"):
+            logs = list(queryset.order_by("-seq", "-id")[:tail])[::-1]
+            return Response(self.get_serializer(logs, many=True).data)
+
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @swagger_auto_schema(
+        tags=["collaboration"],
+        operation_description="协同策略同步记录日志列表",
+        query_serializer=CollaborationSyncRecordLogListInputSLZ(),
+        responses={status.HTTP_200_OK: CollaborationSyncRecordLogListOutputSLZ(many=True)},
+    )
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
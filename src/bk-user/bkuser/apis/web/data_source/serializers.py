@@ -28,7 +28,7 @@ from rest_framework.exceptions import ValidationError
 
 from bkuser.apps.data_source.constants import DataSourceTypeEnum, FieldMappingOperation
 from bkuser.apps.data_source.models import DataSource, DataSourcePlugin, DataSourceSensitiveInfo
-from bkuser.apps.sync.constants import DataSourceSyncPeriod, SyncTaskTrigger
+from bkuser.apps.sync.constants import DataSourceSyncPeriod, SyncLogLevel, SyncLogPhase, SyncTaskTrigger
 from bkuser.apps.sync.models import DataSourceSyncTask
 from bkuser.apps.tenant.models import TenantUserCustomField, UserBuiltinField
 from bkuser.common.constants import SENSITIVE_MASK
@@ -399,6 +399,22 @@ class DataSourceSyncRecordRetrieveOutputSLZ(serializers.Serializer):
         return duration_string(duration)
 
 
+class DataSourceSyncRecordLogListInputSLZ(serializers.Serializer):
+    level = serializers.ChoiceField(help_text="日志等级", choices=SyncLogLevel.get_choices(), required=False)
+    phase = serializers.ChoiceField(help_text="同步阶段", choices=SyncLogPhase.get_choices(), required=False)
+    tail = serializers.IntegerField(
+        help_text="仅获取最后 N 条日志（不分页）", required=False, min_value=1, max_value=settings.MAX_PAGE_SIZE
+    )
+
+
+class DataSourceSyncRecordLogListOutputSLZ(serializers.Serializer):
+    seq = serializers.IntegerField(help_text="日志序号")
+    phase = serializers.ChoiceField(help_text="同步阶段", choices=SyncLogPhase.get_choices())
+    level = serializers.ChoiceField(help_text="日志等级", choices=SyncLogLevel.get_choices())
+    message = serializers.CharField(help_text="日志内容")
+    count = serializers.IntegerField(help_text="重复次数")
+
+
 class DataSourceDestroyInputSLZ(serializers.Serializer):
     is_delete_idp = serializers.BooleanField(help_text="重置数据源时是否同时删除 Idp 相关配置", default=False)
 
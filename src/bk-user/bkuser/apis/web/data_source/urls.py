@@ -62,6 +62,12 @@ urlpatterns = [
         views.DataSourceSyncRecordRetrieveApi.as_view(),
         name="data_source.sync_record.retrieve",
     ),
+    # 数据源同步记录日志列表
+    path(
+        "sync-records/<int:id>/logs/",
+        views.DataSourceSyncRecordLogListApi.as_view(),
+        name="data_source.sync_record.log.list",
+    ),
     # 数据源更新/获取/删除
     path(
         "<int:id>/",
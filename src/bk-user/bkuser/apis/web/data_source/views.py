@@ -15,6 +15,7 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import io
 import logging
 
 import openpyxl
@@ -24,6 +25,7 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics, status
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
@@ -43,6 +45,8 @@ from bkuser.apis.web.data_source.serializers import (
     DataSourceRelatedResourceStatsOutputSLZ,
     DataSourceRetrieveOutputSLZ,
     DataSourceSyncRecordListOutputSLZ,
+    DataSourceSyncRecordLogListInputSLZ,
+    DataSourceSyncRecordLogListOutputSLZ,
     DataSourceSyncRecordRetrieveOutputSLZ,
     DataSourceSyncRecordSearchInputSLZ,
     DataSourceTestConnectionInputSLZ,
@@ -66,7 +70,7 @@ from bkuser.apps.permission.permissions import perm_class
 from bkuser.apps.sync.constants import SyncTaskTrigger
 from bkuser.apps.sync.data_models import DataSourceSyncOptions
 from bkuser.apps.sync.managers import DataSourceSyncManager
-from bkuser.apps.sync.models import DataSourceSyncTask, TenantSyncTask
+from bkuser.apps.sync.models import DataSourceSyncTask, DataSourceSyncTaskLog, TenantSyncTask
 from bkuser.apps.tenant.models import TenantDepartment, TenantUser
 from bkuser.biz.auditor import DataSourceAuditor
 from bkuser.biz.data_source import DataSourceHandler
@@ -74,7 +78,7 @@ from bkuser.biz.exporters import DataSourceUserExporter
 from bkuser.biz.tenant import TenantUserHandler
 from bkuser.common.error_codes import error_codes
 from bkuser.common.passwd import PasswordGenerator
-from bkuser.common.response import convert_workbook_to_response
+from bkuser.common.response import convert_workbook_file_to_response, convert_workbook_to_response
 from bkuser.common.views import ExcludePatchAPIViewMixin
 from bkuser.idp_plugins.constants import BuiltinIdpPluginEnum
 from bkuser.plugins.base import get_default_plugin_cfg, get_plugin_cfg_schema_map, get_plugin_cls
@@ -456,8 +460,11 @@ class DataSourceExportApi(CurrentUserTenantDataSourceMixin, generics.ListAPIView
         if not (data_source.is_local and data_source.is_real_type):
             raise error_codes.DATA_SOURCE_OPERATION_UNSUPPORTED.f(_("仅能导出实体类型的本地数据源数据"))
 
-        workbook = DataSourceUserExporter(data_source).export()
-        return convert_workbook_to_response(workbook, f"{settings.EXPORT_EXCEL_FILENAME_PREFIX}_org_data.xlsx")
+        # 以只写模式逐行写入用户数据，避免用户量较大时，整个工作簿都保存在内存中
+        exporter = DataSourceUserExporter(data_source)
+        return convert_workbook_file_to_response(
+            exporter.export_to, f"{settings.EXPORT_EXCEL_FILENAME_PREFIX}_org_data.xlsx"
+        )
 
 
 class DataSourceImportApi(CurrentUserTenantDataSourceMixin, generics.CreateAPIView):
@@ -481,9 +488,10 @@ class DataSourceImportApi(CurrentUserTenantDataSourceMixin, generics.CreateAPIVi
         if not (data_source.is_local and data_source.is_real_type):
             raise error_codes.DATA_SOURCE_OPERATION_UNSUPPORTED.f(_("仅实体类型的本地数据源支持导入功能"))
 
-        # Request file 转换成 openpyxl.workbook
+        # 导入文件原始字节会被直接存储到临时存储中，由异步任务解析，此处只以只读模式加载以检查文件格式
+        content = data["file"].read()
         try:
-            workbook = openpyxl.load_workbook(data["file"])
+            openpyxl.load_workbook(io.BytesIO(content), read_only=True).close()
         except Exception:  # pylint: disable=broad-except
             logger.exception("本地数据源 %s 导入失败", data_source.id)
             raise error_codes.DATA_SOURCE_IMPORT_FAILED.f(_("文件格式异常"))
@@ -497,7 +505,7 @@ class DataSourceImportApi(CurrentUserTenantDataSourceMixin, generics.CreateAPIVi
         )
 
         try:
-            plugin_init_extra_kwargs = {"workbook": workbook}
+            plugin_init_extra_kwargs = {"workbook": content}
             task = DataSourceSyncManager(data_source, options).execute(plugin_init_extra_kwargs)
         except Exception as e:  # pylint: disable=broad-except
             # Q: 为什么不包装一层 DataSourceSyncError 而是捕获 Exception？
@@ -636,6 +644,49 @@ class DataSourceSyncRecordRetrieveApi(CurrentUserTenantMixin, generics.RetrieveA
         return Response(DataSourceSyncRecordRetrieveOutputSLZ(instance=data_source_sync_task, context=context).data)
 
 
+class DataSourceSyncRecordLogListApi(CurrentUserTenantMixin, generics.ListAPIView):
+    """数据源同步记录日志（支持按等级 / 阶段过滤，分页获取或仅获取最后 N 条）"""
+
+    permission_classes = [IsAuthenticated, perm_class(PermAction.MANAGE_TENANT)]
+
+    serializer_class = DataSourceSyncRecordLogListOutputSLZ
+
+    def get_queryset(self):
+        task = get_object_or_404(
+            DataSourceSyncTask.objects.filter(data_source__owner_tenant_id=self.get_current_tenant_id()),
+            id=self.kwargs["id"],
+        )
+        return DataSourceSyncTaskLog.objects.filter(task=task)
+
+    def list(self, request, *args, **kwargs):
+        slz = DataSourceSyncRecordLogListInputSLZ(data=request.query_params)
+        slz.is_valid(raise_exception=True)
+        params = slz.validated_data
+
+        queryset = self.get_queryset()
+        if level := params.get("level"):
+            queryset = queryset.filter(level=level)
+        if phase := params.get("phase"):
+            queryset = queryset.filter(phase=phase)
+
+        # 指定 tail 时，仅返回最后 N 条日志（按序号正序），不分页
+        if tail := params.get("tail"):
+            logs = list(queryset.order_by("-seq", "-id")[:tail])[::-1]
+            return Response(self.get_serializer(logs, many=True).data)
+
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @swagger_auto_schema(
+        tags=["data_source"],
+        operation_description="数据源更新日志列表",
+        query_serializer=DataSourceSyncRecordLogListInputSLZ(),
+        responses={status.HTTP_200_OK: DataSourceSyncRecordLogListOutputSLZ(many=True)},
+    )
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
+
+
 class DataSourcePluginConfigMetaRetrieveApi(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated, perm_class(PermAction.MANAGE_TENANT)]
 
@@ -41,6 +41,7 @@ from bkuser.apis.web.organization.serializers import (
     TenantDepartmentUpdateInputSLZ,
 )
 from bkuser.apps.data_source.constants import DataSourceTypeEnum
+from bkuser.apps.data_source.department_path_index import DataSourceDepartmentPathIndex, get_department_full_names
 from bkuser.apps.data_source.models import (
     DataSource,
     DataSourceDepartment,
@@ -258,6 +259,9 @@ class TenantDepartmentListCreateApi(CurrentUserTenantMixin, generics.ListCreateA
             # 【审计】将审计记录保存至数据库
             auditor.record_create(data_after_tenant_depts)
 
+        # 部门关系变更，部门路径索引需要重建
+        DataSourceDepartmentPathIndex(data_source.id).invalidate()
+
         return Response(TenantDepartmentCreateOutputSLZ(tenant_dept).data, status=status.HTTP_201_CREATED)
 
 
@@ -299,6 +303,8 @@ class TenantDepartmentUpdateDestroyApi(
 
         tenant_dept.data_source_department.name = data["name"]
         tenant_dept.data_source_department.save(update_fields=["name", "updated_at"])
+        # 部门名称变更，部门路径索引需要重建
+        DataSourceDepartmentPathIndex(tenant_dept.data_source_id).invalidate()
 
         # 【审计】将审计记录保存至数据库
         auditor.record_update(tenant_dept)
@@ -344,6 +350,9 @@ class TenantDepartmentUpdateDestroyApi(
             DataSourceDepartmentRelation.objects.filter(department_id__in=data_source_dept_ids).delete()
             DataSourceDepartmentRelation.objects.partial_rebuild(dept_relation.tree_id)
 
+        # 部门关系变更，部门路径索引需要重建
+        DataSourceDepartmentPathIndex(tenant_dept.data_source_id).invalidate()
+
         # 【审计】将审计记录保存至数据库
         auditor.record_delete()
 
@@ -356,14 +365,7 @@ class TenantDeptOrgPathMapMixin:
         data_source_dept_ids = [tenant_dept.data_source_department_id for tenant_dept in tenant_depts]
 
         # 数据源部门 ID -> 组织路径
-        org_path_map = {}
-        for dept_relation in DataSourceDepartmentRelation.objects.filter(
-            department_id__in=data_source_dept_ids
-        ).select_related("department"):
-            dept_names = list(
-                dept_relation.get_ancestors(include_self=True).values_list("department__name", flat=True)
-            )
-            org_path_map[dept_relation.department_id] = "/".join(dept_names)
+        org_path_map = get_department_full_names(data_source_dept_ids)
 
         # 租户部门 ID -> 组织路径
         return {
@@ -508,6 +510,8 @@ class TenantDepartmentParentUpdateApi(CurrentUserTenantMixin, ExcludePatchAPIVie
             )
 
         cur_dept_relation.move_to(parent_dept_relation)
+        # 部门关系变更，部门路径索引需要重建
+        DataSourceDepartmentPathIndex(tenant_dept.data_source_id).invalidate()
 
         # 【审计】记录变更后的数据
         auditor.record_update_parent_department(tenant_dept)
@@ -18,11 +18,11 @@
 import itertools
 from collections import defaultdict
 from datetime import timedelta
-from typing import Dict, List, Set
+from typing import Dict, List
 
 from django.conf import settings
 from django.db import transaction
-from django.db.models import Q, QuerySet
+from django.db.models import QuerySet
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from drf_yasg.utils import swagger_auto_schema
@@ -59,12 +59,15 @@ from bkuser.apis.web.organization.serializers import (
 )
 from bkuser.apis.web.organization.views.mixins import CurrentUserTenantDataSourceMixin
 from bkuser.apps.data_source.constants import DataSourceTypeEnum
+from bkuser.apps.data_source.department_path_index import get_department_full_names
 from bkuser.apps.data_source.models import (
     DataSource,
     DataSourceDepartmentRelation,
     DataSourceDepartmentUserRelation,
     DataSourceUser,
+    DataSourceUserExtrasIndex,
     DataSourceUserLeaderRelation,
+    DataSourceUserSearchToken,
 )
 from bkuser.apps.notification.tasks import send_reset_password_to_user
 from bkuser.apps.permission.constants import PermAction
@@ -89,6 +92,7 @@ from bkuser.biz.auditor import (
     TenantUserUpdateAuditor,
 )
 from bkuser.biz.organization import DataSourceUserHandler
+from bkuser.biz.searcher import TenantUserSearcher
 from bkuser.common.constants import PERMANENT_TIME
 from bkuser.common.error_codes import error_codes
 from bkuser.common.views import ExcludePatchAPIViewMixin
@@ -114,14 +118,12 @@ class OptionalTenantUserListApi(CurrentUserTenantDataSourceMixin, generics.ListA
         queryset = TenantUser.objects.filter(
             tenant_id=self.get_current_tenant_id(), data_source=self.get_current_tenant_local_real_data_source()
         ).select_related("data_source_user")
-        if kw := params.get("keyword"):
-            queryset = queryset.filter(
-                Q(data_source_user__username__icontains=kw) | Q(data_source_user__full_name__icontains=kw)
-            )
-
         if excluded_user_id := params.get("excluded_user_id"):
             queryset = queryset.exclude(id=excluded_user_id)
 
+        if kw := params.get("keyword"):
+            queryset = TenantUserSearcher(fields=["username", "full_name"]).search(queryset, kw)
+
         return queryset[: self.search_limit]
 
     @swagger_auto_schema(
@@ -156,12 +158,7 @@ class TenantUserSearchApi(CurrentUserTenantMixin, generics.ListAPIView):
 
         # FIXME (su) 手机 & 邮箱过滤在 DB 加密后不可用，到时候再调整
         if keyword := params.get("keyword"):
-            queryset = queryset.filter(
-                Q(data_source_user__username__icontains=keyword)
-                | Q(data_source_user__full_name__icontains=keyword)
-                | Q(data_source_user__email__icontains=keyword)
-                | Q(data_source_user__phone__icontains=keyword)
-            )
+            queryset = TenantUserSearcher().search(queryset, keyword)
 
         return queryset.select_related("data_source", "data_source_user")[: self.search_limit]
 
@@ -174,18 +171,8 @@ class TenantUserSearchApi(CurrentUserTenantMixin, generics.ListAPIView):
         for relation in DataSourceDepartmentUserRelation.objects.filter(user_id__in=data_source_user_ids):
             user_dept_id_map[relation.user_id].append(relation.department_id)
 
-        # 数据源部门 ID 集合
-        data_source_dept_ids: Set[int] = set().union(*user_dept_id_map.values())
-
         # 数据源部门 ID -> 组织路径
-        org_path_map = {}
-        for dept_relation in DataSourceDepartmentRelation.objects.filter(
-            department_id__in=data_source_dept_ids
-        ).select_related("department"):
-            dept_names = list(
-                dept_relation.get_ancestors(include_self=True).values_list("department__name", flat=True)
-            )
-            org_path_map[dept_relation.department_id] = "/".join(dept_names)
+        org_path_map = get_department_full_names(set().union(*user_dept_id_map.values()))
 
         # 租户用户 ID -> 组织路径列表
         return {
@@ -232,12 +219,7 @@ class TenantUserListCreateApi(CurrentUserTenantDataSourceMixin, generics.ListAPI
             tenant_id=cur_tenant_id, data_source=data_source
         )
         if kw := params.get("keyword"):
-            queryset = queryset.filter(
-                Q(data_source_user__username__icontains=kw)
-                | Q(data_source_user__full_name__icontains=kw)
-                | Q(data_source_user__email__icontains=kw)
-                | Q(data_source_user__phone__icontains=kw)
-            )
+            queryset = TenantUserSearcher().filter(queryset, kw)
 
         # 指定具体的部门的情况
         if params["department_id"]:
@@ -733,17 +715,14 @@ class TenantUserOrganizationPathListApi(CurrentUserTenantMixin, generics.ListAPI
     def get(self, request, *args, **kwargs):
         tenant_user = self.get_object()
 
-        data_source_dept_ids = DataSourceDepartmentUserRelation.objects.filter(
-            user_id=tenant_user.data_source_user.id,
-        ).values_list("department_id", flat=True)
+        data_source_dept_ids = list(
+            DataSourceDepartmentUserRelation.objects.filter(
+                user_id=tenant_user.data_source_user_id,
+            ).values_list("department_id", flat=True)
+        )
 
-        organization_paths: List[str] = []
-        # NOTE: 用户部门数量不会很多，且该 API 调用不频繁，这里的 N+1 问题可以先不处理
-        for dept_relation in DataSourceDepartmentRelation.objects.filter(department_id__in=data_source_dept_ids):
-            dept_names = list(
-                dept_relation.get_ancestors(include_self=True).values_list("department__name", flat=True)
-            )
-            organization_paths.append("/".join(dept_names))
+        org_path_map = get_department_full_names(data_source_dept_ids)
+        organization_paths = [org_path_map[dept_id] for dept_id in data_source_dept_ids if dept_id in org_path_map]
 
         return Response(
             TenantUserOrganizationPathOutputSLZ({"organization_paths": organization_paths}).data,
@@ -842,7 +821,11 @@ class TenantUserBatchCreateApi(CurrentUserTenantDataSourceMixin, generics.Create
             DataSourceUser.objects.bulk_create(data_source_users, batch_size=self.bulk_create_batch_size)
 
             # 重新从 DB 查询以获取带 ID 的数据源用户
-            data_source_users = DataSourceUser.objects.filter(code__in=[u["username"] for u in data["user_infos"]])
+            data_source_users = DataSourceUser.objects.filter(
+                data_source=data_source, code__in=[u["username"] for u in data["user_infos"]]
+            )
+            DataSourceUserExtrasIndex.objects.refresh(data_source.id, data_source_users)
+            DataSourceUserSearchToken.objects.refresh(data_source.id, data_source_users)
 
             # 绑定数据源部门 - 用户
             relations = [
@@ -1275,8 +1258,11 @@ class TenantUserCustomFieldBatchUpdateApi(
         now = timezone.now()
         for data_source_user in data_source_users:
             data_source_user.extras[field_name] = data["value"][field_name]
+            data_source_user.content_hash = data_source_user.gen_content_hash()
             data_source_user.updated_at = now
 
-        DataSourceUser.objects.bulk_update(data_source_users, fields=["extras", "updated_at"])
+        with transaction.atomic():
+            DataSourceUser.objects.bulk_update(data_source_users, fields=["extras", "content_hash", "updated_at"])
+            DataSourceUserExtrasIndex.objects.refresh(data_source.id, data_source_users)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
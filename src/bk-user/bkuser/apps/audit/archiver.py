@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import logging
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import ArchivedOperationAuditRecord, OperationAuditRecord
+
+logger = logging.getLogger(__name__)
+
+
+class OperationAuditRecordArchiver:
+    """
+    操作审计记录归档器
+
+    按批次将超过保留期限的操作记录移动到归档表（冷数据），每批次在独立事务中先写入归档表再删除原记录，
+    任务中断后重新执行即可（已归档的记录会被忽略），且不会长时间锁表
+    """
+
+    def __init__(self, retention_days: int, batch_size: int = 1000, batch_interval: float = 0):
+        """
+        :param retention_days: 操作记录保留天数
+        :param batch_size: 每批次归档的记录数量
+        :param batch_interval: 批次间隔（秒），用于降低对 DB 的压力
+        """
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+
+    def archive(self) -> int:
+        """归档过期的操作记录，返回归档的记录数量"""
+        queryset = self._get_expired_records()
+
+        archived_count = 0
+        while True:
+            records = list(queryset[: self.batch_size])
+            if not records:
+                break
+
+            with transaction.atomic():
+                ArchivedOperationAuditRecord.objects.bulk_create(
+                    [self._to_archived_record(r) for r in records], ignore_conflicts=True
+                )
+                OperationAuditRecord.objects.filter(id__in=[r.id for r in records]).delete()
+
+            archived_count += len(records)
+            logger.info("archived %d operation audit records, total %d", len(records), archived_count)
+
+            if len(records) < self.batch_size:
+                break
+
+            if self.batch_interval:
+                time.sleep(self.batch_interval)
+
+        return archived_count
+
+    def _get_expired_records(self) -> QuerySet[OperationAuditRecord]:
+        """获取过期的操作记录（按操作时间排序），可以使用 created_at 索引，每批次只需扫描该批次的记录"""
+        threshold = timezone.now() - timedelta(days=self.retention_days)
+        return OperationAuditRecord.objects.filter(created_at__lt=threshold).order_by("created_at")
+
+    @staticmethod
+    def _to_archived_record(record: OperationAuditRecord) -> ArchivedOperationAuditRecord:
+        return ArchivedOperationAuditRecord(
+            id=record.id,
+            archived_month=timezone.localtime(record.created_at).strftime("%Y%m"),
+            created_at=record.created_at,
+            updated_at=record.updated_at,
+            creator=record.creator,
+            updater=record.updater,
+            event_id=record.event_id,
+            tenant_id=record.tenant_id,
+            operation=record.operation,
+            object_type=record.object_type,
+            object_id=record.object_id,
+            object_name=record.object_name,
+            data_before=record.data_before,
+            data_after=record.data_after,
+            extras=record.extras,
+        )
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+# Generated by Django 4.2.18 on 2026-10-18 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='operationauditrecord',
+            index_together={('tenant_id', 'created_at'), ('tenant_id', 'creator', 'created_at'), ('tenant_id', 'object_type', 'created_at'), ('tenant_id', 'operation', 'created_at')},
+        ),
+        migrations.CreateModel(
+            name='ArchivedOperationAuditRecord',
+            fields=[
+                ('id', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('archived_month', models.CharField(help_text='格式如 202401', max_length=6, verbose_name='归档月份')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='归档时间')),
+                ('created_at', models.DateTimeField(verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(verbose_name='更新时间')),
+                ('creator', models.CharField(blank=True, max_length=128, null=True)),
+                ('updater', models.CharField(blank=True, max_length=128, null=True)),
+                ('event_id', models.CharField(max_length=64, verbose_name='事件 ID')),
+                ('tenant_id', models.CharField(max_length=128, verbose_name='租户 ID')),
+                ('operation', models.CharField(max_length=64, verbose_name='操作行为')),
+                ('object_type', models.CharField(max_length=32, verbose_name='操作对象类型')),
+                ('object_id', models.CharField(max_length=128, verbose_name='操作对象 ID')),
+                ('object_name', models.CharField(default='', max_length=128, verbose_name='操作对象名称')),
+                ('data_before', models.JSONField(default=dict, verbose_name='操作前数据')),
+                ('data_after', models.JSONField(default=dict, verbose_name='操作后数据')),
+                ('extras', models.JSONField(default=dict, verbose_name='额外信息')),
+            ],
+            options={
+                'index_together': {('archived_month', 'tenant_id', 'created_at')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+# Generated by Django 4.2.18 on 2026-10-18 09:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_add_record_indexes_and_archive'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='operationauditrecord',
+            index_together={('tenant_id', 'created_at'), ('tenant_id', 'object_type', 'created_at'), ('tenant_id', 'creator', 'created_at'), ('tenant_id', 'operation', 'created_at'), ('created_at',)},
+        ),
+    ]
@@ -42,3 +42,46 @@ class OperationAuditRecord(AuditedModel):
 
     class Meta:
         ordering = ["-created_at"]
+        # 与审计记录列表的过滤条件（租户必选，操作人 / 操作行为 / 操作对象类型可选）及排序对应
+        index_together = [
+            ("tenant_id", "created_at"),
+            ("tenant_id", "creator", "created_at"),
+            ("tenant_id", "operation", "created_at"),
+            ("tenant_id", "object_type", "created_at"),
+            # 归档时不区分租户，按操作时间逐批获取过期的记录
+            ("created_at",),
+        ]
+
+
+class ArchivedOperationAuditRecord(models.Model):
+    """
+    已归档的 SaaS 审计操作记录（冷数据）
+
+    超过保留期限的操作记录会从 OperationAuditRecord 中移动到该表，以控制热数据表的规模；
+    记录按操作时间所在月份（archived_month）分区存储，便于按月导出或清理
+    """
+
+    id = models.CharField(primary_key=True, max_length=64)
+    archived_month = models.CharField("归档月份", max_length=6, help_text="格式如 202401")
+    archived_at = models.DateTimeField("归档时间", auto_now_add=True)
+
+    # ----------------------- 原操作记录数据 -----------------------
+    # 注：不继承 AuditedModel，避免 auto_now / auto_now_add 覆盖原记录的时间
+    created_at = models.DateTimeField("创建时间")
+    updated_at = models.DateTimeField("更新时间")
+    creator = models.CharField(max_length=128, null=True, blank=True)
+    updater = models.CharField(max_length=128, null=True, blank=True)
+    event_id = models.CharField("事件 ID", max_length=64)
+    tenant_id = models.CharField("租户 ID", max_length=128)
+    operation = models.CharField("操作行为", max_length=64)
+    object_type = models.CharField("操作对象类型", max_length=32)
+    object_id = models.CharField("操作对象 ID", max_length=128)
+    object_name = models.CharField("操作对象名称", max_length=128, default="")
+    data_before = models.JSONField("操作前数据", default=dict)
+    data_after = models.JSONField("操作后数据", default=dict)
+    extras = models.JSONField("额外信息", default=dict)
+
+    class Meta:
+        index_together = [
+            ("archived_month", "tenant_id", "created_at"),
+        ]
@@ -17,11 +17,31 @@
 
 from typing import Any, Dict, List
 
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
 from bkuser.utils.uuid import generate_uuid
 
 from .constants import ObjectTypeEnum, OperationEnum
 from .data_models import AuditObject
 from .models import OperationAuditRecord
+from .tasks import persist_operation_audit_records
+
+# 异步写入时，需要序列化传递给 celery 任务的操作记录字段
+ASYNC_WRITE_RECORD_FIELDS = [
+    "id",
+    "creator",
+    "event_id",
+    "tenant_id",
+    "operation",
+    "object_type",
+    "object_id",
+    "object_name",
+    "data_before",
+    "data_after",
+    "extras",
+]
 
 
 def add_audit_record(
@@ -55,7 +75,7 @@ def add_audit_record(
 
     # 若有数据变更，则添加记录
     if data_before != data_after or extras:
-        OperationAuditRecord.objects.create(
+        record = OperationAuditRecord(
             creator=operator,
             tenant_id=tenant_id,
             operation=operation,
@@ -66,6 +86,7 @@ def add_audit_record(
             data_after=data_after,
             extras=extras,
         )
+        _save_records([record])
 
 
 def batch_add_audit_records(
@@ -101,4 +122,23 @@ def batch_add_audit_records(
         if obj.data_before != obj.data_after or obj.extras
     ]
 
-    OperationAuditRecord.objects.bulk_create(records, batch_size=100)
+    _save_records(records)
+
+
+def _save_records(records: List[OperationAuditRecord]):
+    """
+    保存操作记录
+
+    若开启了异步写入，则在当前事务提交后，由 celery 任务写入 DB，避免大批量的审计记录写入阻塞请求；
+    操作时间以当前时间（而非任务执行时间）为准
+    """
+    if not records:
+        return
+
+    if not settings.AUDIT_RECORD_ASYNC_WRITE_ENABLED:
+        OperationAuditRecord.objects.bulk_create(records, batch_size=100)
+        return
+
+    payload = [{f: getattr(r, f) for f in ASYNC_WRITE_RECORD_FIELDS} for r in records]
+    created_at = timezone.now().isoformat()
+    transaction.on_commit(lambda: persist_operation_audit_records.delay(payload, created_at))
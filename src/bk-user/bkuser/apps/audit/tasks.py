@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import logging
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from bkuser.celery import app
+from bkuser.common.task import BaseTask
+
+from .archiver import OperationAuditRecordArchiver
+from .models import OperationAuditRecord
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(base=BaseTask, ignore_result=True)
+def archive_expired_operation_audit_records():
+    """定时任务：将超过保留期限的操作审计记录归档"""
+    logger.info("[celery] receive task: archive_expired_operation_audit_records")
+
+    # 保留天数为 0 表示不归档
+    if settings.AUDIT_RECORD_RETENTION_DAYS <= 0:
+        return
+
+    archiver = OperationAuditRecordArchiver(
+        retention_days=settings.AUDIT_RECORD_RETENTION_DAYS,
+        batch_size=settings.AUDIT_RECORD_ARCHIVE_BATCH_SIZE,
+        batch_interval=settings.AUDIT_RECORD_ARCHIVE_BATCH_INTERVAL,
+    )
+    archived_count = archiver.archive()
+
+    logger.info("[celery] archive_expired_operation_audit_records finished, archived %d records", archived_count)
+
+
+@app.task(base=BaseTask, ignore_result=True)
+def persist_operation_audit_records(records: List[Dict[str, Any]], created_at: str):
+    """异步写入操作审计记录"""
+    logger.info("[celery] receive task: persist_operation_audit_records, count %d", len(records))
+
+    OperationAuditRecord.objects.bulk_create(
+        [OperationAuditRecord(**r) for r in records], batch_size=100, ignore_conflicts=True
+    )
+    # created_at 为 auto_now_add，写入时会被设置为当前时间，需要修正为实际的操作时间
+    OperationAuditRecord.objects.filter(id__in=[r["id"] for r in records]).update(
+        created_at=parse_datetime(created_at), updated_at=parse_datetime(created_at)
+    )
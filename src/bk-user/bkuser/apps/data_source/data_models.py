@@ -14,7 +14,7 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -38,3 +38,23 @@ class DataSourceUserFieldMapping(BaseModel):
             return f"{self.source_field} --> {self.target_field}"
 
         return f"{self.source_field} --{self.expression}--> {self.target_field}"
+
+
+class DataSourceDepartmentPath(BaseModel):
+    """数据源部门路径"""
+
+    # 数据源部门 ID
+    id: int
+    # 数据源部门名称
+    name: str
+    # 祖先部门 ID 列表（不含自身），从根部门开始
+    ancestor_ids: List[int]
+    # 祖先部门名称列表，与 ancestor_ids 一一对应
+    ancestor_names: List[str]
+    # 子部门 ID 列表
+    children_ids: List[int]
+
+    @property
+    def full_name(self) -> str:
+        """部门完整路径名称，如：公司/部门A/中心AA"""
+        return "/".join([*self.ancestor_names, self.name])
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import operator
+from collections import defaultdict
+from functools import reduce
+from typing import Collection, Dict, Iterable, List, Set, Tuple
+from uuid import uuid4
+
+from django.db.models import Q
+
+from bkuser.apps.data_source.data_models import DataSourceDepartmentPath
+from bkuser.apps.data_source.models import DataSourceDepartment, DataSourceDepartmentRelation
+from bkuser.common.cache import Cache, CacheEnum, CacheKeyPrefixEnum
+from bkuser.common.locks import LockType, RedisLock
+
+
+class DataSourceDepartmentPathIndex:
+    """
+    数据源部门路径索引
+
+    按数据源维度预计算每个部门的祖先链（ID & 名称）及子部门，存储到缓存中，使得获取部门 full_name / 祖先部门时，
+    只需要按部门 ID 从缓存中获取，而不需要每次都查询全表的部门及部门关系来构建树
+
+    索引是带版本的：部门及部门关系变更后（如数据源同步，页面上新建 / 重命名 / 移动 / 删除部门），
+    调用 invalidate 使当前版本失效，下次查询时会重新构建新版本的索引，旧版本的索引数据不会再被读取，等待缓存过期即可
+
+    只有当前版本不存在时才会全量构建索引（同一数据源同时只有一个请求在构建，其他请求直接查询 DB）；
+    版本存在但部分部门数据缺失（如被缓存淘汰）时，只查询缺失的部门并回填，不存在的部门也会缓存，避免重复查询
+    """
+
+    # 索引缓存过期时间（秒）
+    cache_timeout = 60 * 60
+    # 构建索引的锁超时时间（秒）
+    lock_timeout = 60
+    # 不存在的部门在缓存中的标记值
+    not_found_marker = "not_found"
+
+    def __init__(self, data_source_id: int):
+        self.data_source_id = data_source_id
+        self.cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.DEPARTMENT_PATH_INDEX)
+
+    def get_many(self, dept_ids: Collection[int]) -> Dict[int, DataSourceDepartmentPath]:
+        """批量获取部门路径，不存在于当前数据源的部门会被忽略"""
+        if not dept_ids:
+            return {}
+
+        version = self.cache.get(self._version_key)
+        if not version:
+            return self._build_or_load(dept_ids)
+
+        key_dept_id_map = {self._path_key(version, dept_id): dept_id for dept_id in dept_ids}
+        cached_paths = self.cache.get_many(list(key_dept_id_map.keys()))
+        paths = {key_dept_id_map[key]: path for key, path in cached_paths.items() if path != self.not_found_marker}
+
+        # 数据不完整（如部分数据被缓存淘汰），只查询缺失的部门并回填到当前版本的索引中
+        if missing_dept_ids := [dept_id for key, dept_id in key_dept_id_map.items() if key not in cached_paths]:
+            missing_paths = self._load(missing_dept_ids)
+            self.cache.set_many(
+                {
+                    self._path_key(version, dept_id): missing_paths.get(dept_id, self.not_found_marker)
+                    for dept_id in missing_dept_ids
+                },
+                timeout=self.cache_timeout,
+            )
+            paths.update(missing_paths)
+
+        return paths
+
+    def invalidate(self):
+        """使当前版本的索引失效"""
+        self.cache.delete(self._version_key)
+
+    def _build_or_load(self, dept_ids: Collection[int]) -> Dict[int, DataSourceDepartmentPath]:
+        """构建索引并获取部门路径，若其他请求正在构建索引，则直接从 DB 中查询"""
+        lock = RedisLock(
+            LockType.DEPARTMENT_PATH_INDEX, self.data_source_id, timeout=self.lock_timeout, blocking=False
+        )
+        if not lock.acquire():
+            return self._load(dept_ids)
+
+        try:
+            paths = self._build()
+        finally:
+            lock.release()
+
+        return {dept_id: paths[dept_id] for dept_id in dept_ids if dept_id in paths}
+
+    def _load(self, dept_ids: Collection[int]) -> Dict[int, DataSourceDepartmentPath]:
+        """
+        从 DB 中查询指定部门的路径（不读写索引），不存在于当前数据源的部门会被忽略
+
+        基于 MPTT 的 (tree_id, lft, rght) 区间一次性查出所有部门的祖先部门，查询次数与部门数量无关
+        """
+        # {数据源部门 ID: 数据源部门名称}
+        dept_id_name_map = dict(
+            DataSourceDepartment.objects.filter(data_source_id=self.data_source_id, id__in=dept_ids).values_list(
+                "id", "name"
+            )
+        )
+        if not dept_id_name_map:
+            return {}
+
+        # [(数据源部门 ID, tree_id, lft, rght)]
+        relations = list(
+            DataSourceDepartmentRelation.objects.filter(department_id__in=dept_id_name_map.keys()).values_list(
+                "department_id", "tree_id", "lft", "rght"
+            )
+        )
+        # {数据源部门 ID: [(祖先部门 ID, 祖先部门名称)]}，从根部门开始
+        ancestors_map: Dict[int, List[Tuple[int, str]]] = {}
+        if relations:
+            ancestor_cond = reduce(
+                operator.or_,
+                [Q(tree_id=tree_id, lft__lt=lft, rght__gt=rght) for _, tree_id, lft, rght in relations],
+            )
+            # {tree_id: [(lft, rght, 部门 ID, 部门名称)]}，按 lft 排序，即从根部门开始
+            tree_nodes_map: Dict[int, List[Tuple[int, int, int, str]]] = defaultdict(list)
+            for tree_id, lft, rght, dept_id, name in (
+                DataSourceDepartmentRelation.objects.filter(ancestor_cond, data_source_id=self.data_source_id)
+                .order_by("tree_id", "lft")
+                .values_list("tree_id", "lft", "rght", "department_id", "department__name")
+            ):
+                tree_nodes_map[tree_id].append((lft, rght, dept_id, name))
+
+            for dept_id, tree_id, lft, rght in relations:
+                ancestors_map[dept_id] = [
+                    (node_id, name)
+                    for node_lft, node_rght, node_id, name in tree_nodes_map[tree_id]
+                    if node_lft < lft and rght < node_rght
+                ]
+
+        children_map: Dict[int, List[int]] = defaultdict(list)
+        for dept_id, parent_id in DataSourceDepartmentRelation.objects.filter(
+            parent_id__in=dept_id_name_map.keys()
+        ).values_list("department_id", "parent_id"):
+            children_map[parent_id].append(dept_id)
+
+        return {
+            dept_id: DataSourceDepartmentPath(
+                id=dept_id,
+                name=dept_name,
+                ancestor_ids=[id for id, _ in ancestors_map.get(dept_id, [])],
+                ancestor_names=[name for _, name in ancestors_map.get(dept_id, [])],
+                children_ids=children_map.get(dept_id, []),
+            )
+            for dept_id, dept_name in dept_id_name_map.items()
+        }
+
+    def _build(self) -> Dict[int, DataSourceDepartmentPath]:
+        """构建当前数据源的部门路径索引，并写入缓存"""
+        # {数据源部门 ID: 数据源部门名称}
+        dept_id_name_map = dict(
+            DataSourceDepartment.objects.filter(data_source_id=self.data_source_id).values_list("id", "name")
+        )
+        # {数据源部门 ID: 父部门 ID}
+        dept_id_parent_id_map = dict(
+            DataSourceDepartmentRelation.objects.filter(data_source_id=self.data_source_id).values_list(
+                "department_id", "parent_id"
+            )
+        )
+        children_map: Dict[int, List[int]] = defaultdict(list)
+        for dept_id, parent_id in dept_id_parent_id_map.items():
+            if parent_id is not None:
+                children_map[parent_id].append(dept_id)
+
+        paths: Dict[int, DataSourceDepartmentPath] = {}
+        for dept_id, dept_name in dept_id_name_map.items():
+            ancestor_ids = self._get_ancestor_ids(dept_id, dept_id_parent_id_map)
+            paths[dept_id] = DataSourceDepartmentPath(
+                id=dept_id,
+                name=dept_name,
+                ancestor_ids=ancestor_ids,
+                ancestor_names=[dept_id_name_map.get(id, "--") for id in ancestor_ids],
+                children_ids=children_map.get(dept_id, []),
+            )
+
+        version = uuid4().hex
+        self.cache.set_many(
+            {self._path_key(version, dept_id): path for dept_id, path in paths.items()}, timeout=self.cache_timeout
+        )
+        # 版本号需要在索引数据都写入后再更新，避免读取到不完整的索引
+        self.cache.set(self._version_key, version, timeout=self.cache_timeout)
+        return paths
+
+    @staticmethod
+    def _get_ancestor_ids(dept_id: int, dept_id_parent_id_map: Dict[int, int | None]) -> List[int]:
+        """获取祖先部门 ID 列表（不含自身），从根部门开始"""
+        ancestor_ids: List[int] = []
+        visited: Set[int] = {dept_id}
+        while (parent_id := dept_id_parent_id_map.get(dept_id)) is not None:
+            # 避免有环导致死循环
+            if parent_id in visited:
+                break
+
+            ancestor_ids.append(parent_id)
+            visited.add(parent_id)
+            dept_id = parent_id
+
+        ancestor_ids.reverse()
+        return ancestor_ids
+
+    @property
+    def _version_key(self) -> str:
+        return f"{self.data_source_id}:version"
+
+    def _path_key(self, version: str, dept_id: int) -> str:
+        return f"{self.data_source_id}:{version}:{dept_id}"
+
+
+def get_department_paths(depts: Iterable[Tuple[int, int]]) -> Dict[int, DataSourceDepartmentPath]:
+    """
+    批量获取（多个数据源的）部门路径
+
+    :param depts: [(数据源 ID, 数据源部门 ID)]
+    :return: {数据源部门 ID: 部门路径}
+    """
+    data_source_dept_ids_map: Dict[int, Set[int]] = defaultdict(set)
+    for data_source_id, dept_id in depts:
+        data_source_dept_ids_map[data_source_id].add(dept_id)
+
+    paths: Dict[int, DataSourceDepartmentPath] = {}
+    for data_source_id, dept_ids in data_source_dept_ids_map.items():
+        paths.update(DataSourceDepartmentPathIndex(data_source_id).get_many(dept_ids))
+
+    return paths
+
+
+def get_department_full_names(dept_ids: Collection[int]) -> Dict[int, str]:
+    """
+    批量获取部门完整路径名称（如：公司/部门A/中心AA），不经过缓存，适用于对实时性要求较高的场景（如组织架构管理）
+
+    基于 MPTT 的 (tree_id, lft, rght) 区间一次性查出所有部门的祖先部门，查询次数与部门数量无关
+
+    :param dept_ids: 数据源部门 ID 列表（可以属于不同的数据源）
+    :return: {数据源部门 ID: 部门完整路径名称}，没有部门关系的部门会被忽略
+    """
+    if not dept_ids:
+        return {}
+
+    # [(数据源部门 ID, tree_id, lft, rght)]
+    depts = list(
+        DataSourceDepartmentRelation.objects.filter(department_id__in=dept_ids).values_list(
+            "department_id", "tree_id", "lft", "rght"
+        )
+    )
+    if not depts:
+        return {}
+
+    # 祖先部门（含自身）：同一棵树中，区间包含当前部门区间的部门
+    ancestor_cond = reduce(
+        operator.or_, [Q(tree_id=tree_id, lft__lte=lft, rght__gte=rght) for _, tree_id, lft, rght in depts]
+    )
+    # {tree_id: [(lft, rght, 部门名称)]}，按 lft 排序，即从根部门开始
+    tree_nodes_map: Dict[int, List[Tuple[int, int, str]]] = defaultdict(list)
+    for tree_id, lft, rght, name in (
+        DataSourceDepartmentRelation.objects.filter(ancestor_cond)
+        .order_by("tree_id", "lft")
+        .values_list("tree_id", "lft", "rght", "department__name")
+    ):
+        tree_nodes_map[tree_id].append((lft, rght, name))
+
+    return {
+        dept_id: "/".join(
+            name for node_lft, node_rght, name in tree_nodes_map[tree_id] if node_lft <= lft <= node_rght
+        )
+        for dept_id, tree_id, lft, rght in depts
+    }
@@ -24,7 +24,7 @@ from django.utils import timezone
 from bkuser.apps.data_source.constants import DataSourceTypeEnum
 from bkuser.apps.data_source.models import DataSource, DataSourceUser, LocalDataSourceIdentityInfo
 from bkuser.common.constants import PERMANENT_TIME
-from bkuser.common.hashers import make_password
+from bkuser.common.hashers import make_passwords
 from bkuser.common.passwd import PasswordGenerator
 from bkuser.plugins.local.constants import PasswordGenerateMethod
 from bkuser.plugins.local.models import LocalDataSourcePluginConfig, PasswordInitialConfig, PasswordRuleConfig
@@ -115,16 +115,19 @@ class LocalDataSourceIdentityInfoInitializer:
         # 由于用户密码将采用 HASH 加密，因此只有在初始化的时候才能获取到明文密码，用于后续通知
         user_password_map = {user.id: self.password_provider.generate() for user in users}
 
+        # 密码哈希较为耗时，批量并行计算（初始化仅在 celery 任务中执行，可以使用进程池）
+        encrypted_passwords = make_passwords([user_password_map[user.id] for user in users], use_process_pool=True)
+
         waiting_create_infos = [
             LocalDataSourceIdentityInfo(
                 user=user,
-                password=make_password(user_password_map[user.id]),
+                password=encrypted_password,
                 password_updated_at=time_now,
                 password_expired_at=expired_at,
                 data_source=self.data_source,
                 username=user.username,
             )
-            for user in users
+            for user, encrypted_password in zip(users, encrypted_passwords)
         ]
         LocalDataSourceIdentityInfo.objects.bulk_create(waiting_create_infos, batch_size=self.BATCH_SIZE)
 
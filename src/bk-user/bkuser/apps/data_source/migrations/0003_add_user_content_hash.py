@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+# Generated by Django 4.2.18 on 2026-10-18 06:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_source', '0002_init_builtin_data_source_plugin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasourceuser',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=32, verbose_name='内容哈希'),
+        ),
+        migrations.AlterIndexTogether(
+            name='datasourceuser',
+            index_together={('data_source', 'code', 'content_hash')},
+        ),
+    ]
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+# Generated by Django 4.2.18 on 2026-10-18 07:20
+
+import hashlib
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# 索引值的最大长度，与 DataSourceUserExtrasIndex.value 字段保持一致
+INDEX_VALUE_MAX_LENGTH = 255
+
+
+def build_value(value):
+    """将单个值转换为索引值（与迁移时的 DataSourceUserExtrasIndex.build_value 一致，不依赖模型代码的后续变更）"""
+    content = json.dumps(value, ensure_ascii=False, sort_keys=True)
+    if len(content) <= INDEX_VALUE_MAX_LENGTH:
+        return content
+
+    return "md5:" + hashlib.md5(content.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+def build_values(value):
+    """将自定义字段的值转换为索引值，空值不参与索引"""
+    values = value if isinstance(value, list) else [value]
+    return list({build_value(v) for v in values if v is not None})
+
+
+def forwards_func(apps, schema_editor):
+    """为存量的数据源用户构建自定义字段索引"""
+    DataSourceUser = apps.get_model("data_source", "DataSourceUser")
+    DataSourceUserExtrasIndex = apps.get_model("data_source", "DataSourceUserExtrasIndex")
+
+    indexes = []
+    users = DataSourceUser.objects.exclude(extras={}).values_list("id", "data_source_id", "extras")
+    for user_id, data_source_id, extras in users.iterator(chunk_size=1000):
+        for field, value in extras.items():
+            for v in build_values(value):
+                indexes.append(
+                    DataSourceUserExtrasIndex(data_source_id=data_source_id, user_id=user_id, field_name=field, value=v)
+                )
+
+        if len(indexes) >= 1000:
+            DataSourceUserExtrasIndex.objects.bulk_create(indexes, ignore_conflicts=True)
+            indexes = []
+
+    DataSourceUserExtrasIndex.objects.bulk_create(indexes, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_source', '0003_add_user_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataSourceUserExtrasIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field_name', models.CharField(max_length=128, verbose_name='字段名称')),
+                ('value', models.CharField(max_length=255, verbose_name='字段值')),
+                ('data_source', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='data_source.datasource')),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='data_source.datasourceuser')),
+            ],
+            options={
+                'unique_together': {('user', 'field_name', 'value')},
+                'index_together': {('data_source', 'field_name', 'value')},
+            },
+        ),
+        migrations.RunPython(forwards_func, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+# Generated by Django 4.2.18 on 2026-10-18 07:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# 参与搜索的字段 & n-gram 长度，与 DataSourceUserSearchToken.search_fields / gram_size 保持一致
+SEARCH_FIELDS = ["username", "full_name", "email", "phone"]
+GRAM_SIZE = 3
+
+
+def build_tokens(value):
+    """将字段值转换为 token 列表：所有 n-gram + 长度小于 n 的尾部片段（不依赖模型代码的后续变更）"""
+    if not value:
+        return []
+
+    value = value.lower()
+    grams = {value[i : i + GRAM_SIZE] for i in range(len(value) - GRAM_SIZE + 1)}
+    tails = {value[-size:] for size in range(1, GRAM_SIZE) if len(value) >= size}
+    return list(grams | tails)
+
+
+def forwards_func(apps, schema_editor):
+    """为存量的数据源用户构建搜索索引"""
+    DataSourceUser = apps.get_model("data_source", "DataSourceUser")
+    DataSourceUserSearchToken = apps.get_model("data_source", "DataSourceUserSearchToken")
+
+    fields = SEARCH_FIELDS
+    tokens = []
+    for user_id, data_source_id, *values in DataSourceUser.objects.values_list(
+        "id", "data_source_id", *fields
+    ).iterator(chunk_size=1000):
+        for field, value in zip(fields, values):
+            for token in build_tokens(value):
+                tokens.append(
+                    DataSourceUserSearchToken(
+                        data_source_id=data_source_id, user_id=user_id, field_name=field, token=token
+                    )
+                )
+
+        if len(tokens) >= 5000:
+            DataSourceUserSearchToken.objects.bulk_create(tokens, ignore_conflicts=True)
+            tokens = []
+
+    DataSourceUserSearchToken.objects.bulk_create(tokens, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_source', '0004_add_user_extras_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataSourceUserSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field_name', models.CharField(max_length=32, verbose_name='字段名称')),
+                ('token', models.CharField(max_length=16, verbose_name='Token')),
+                ('data_source', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='data_source.datasource')),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='data_source.datasourceuser')),
+            ],
+            options={
+                'unique_together': {('user', 'field_name', 'token')},
+                'index_together': {('data_source', 'token', 'field_name', 'user')},
+            },
+        ),
+        migrations.RunPython(forwards_func, migrations.RunPython.noop),
+    ]
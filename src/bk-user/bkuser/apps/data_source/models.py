@@ -15,6 +15,10 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import hashlib
+import json
+from typing import Any, Collection, Dict, List
+
 from blue_krill.models.fields import EncryptField
 from django.conf import settings
 from django.db import models, transaction
@@ -152,16 +156,260 @@ class DataSourceUser(TimestampedModel):
 
     # ----------------------- 其他 -----------------------
     extras = models.JSONField("自定义字段", default=dict)
+    # 内容哈希，数据源同步时用于快速判断用户数据是否有变更，为空表示未知（需要逐字段对比）
+    content_hash = models.CharField("内容哈希", max_length=32, blank=True, default="")
 
     # ----------------------- 状态相关 -----------------------
     # TODO: (1) 用户管理里涉及的功能状态 （2）企业本身的员工状态
 
+    # 参与内容哈希计算的字段，即数据源同步时需要对比的字段
+    content_hash_fields: List[str] = ["username", "full_name", "email", "phone", "phone_country_code", "extras"]
+
     class Meta:
         ordering = ["id"]
         unique_together = [
             ("code", "data_source"),
             ("username", "data_source"),
         ]
+        index_together = [
+            ("data_source", "code", "content_hash"),
+        ]
+
+    def save(self, *args, **kwargs):
+        # 若有参与内容哈希计算的字段被更新，则需要同步更新内容哈希，否则会导致数据源同步时跳过变更
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or set(update_fields) & set(self.content_hash_fields):
+            self.content_hash = self.gen_content_hash()
+            if update_fields is not None and "content_hash" not in update_fields:
+                kwargs["update_fields"] = [*update_fields, "content_hash"]
+
+        super().save(*args, **kwargs)
+
+        # 自定义字段索引 & 搜索索引需要与用户数据保持一致（bulk_create / bulk_update 需要手动调用 refresh）
+        if update_fields is None or "extras" in update_fields:
+            DataSourceUserExtrasIndex.objects.refresh(self.data_source_id, [self])
+
+        if update_fields is None or set(update_fields) & set(DataSourceUserSearchToken.search_fields):
+            DataSourceUserSearchToken.objects.refresh(self.data_source_id, [self])
+
+    def gen_content_hash(self) -> str:
+        """根据当前字段值计算内容哈希
+
+        注意：save 方法会自动更新内容哈希，但 bulk_create / bulk_update 等批量操作不会，
+        若批量操作中修改了参与计算的字段，需要调用该方法更新 content_hash 字段（或将其置空）
+        """
+        content = json.dumps([getattr(self, f) for f in self.content_hash_fields], ensure_ascii=False, sort_keys=True)
+        return hashlib.md5(content.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+class DataSourceUserExtrasIndexQuerySet(models.QuerySet):
+    def refresh(self, data_source_id: int, users: Collection[DataSourceUser]):
+        """
+        根据用户当前的 extras 重建其自定义字段索引
+
+        注意：bulk_create 在部分 DB（如 MySQL）中不会回填主键，此时会根据 code 查询用户 ID
+        """
+        if not users:
+            return
+
+        user_id_map = {u.code: u.id for u in users if u.id}
+        if missing_codes := [u.code for u in users if not u.id]:
+            user_id_map.update(
+                DataSourceUser.objects.filter(data_source_id=data_source_id, code__in=missing_codes).values_list(
+                    "code", "id"
+                )
+            )
+
+        indexes = [
+            DataSourceUserExtrasIndex(data_source_id=data_source_id, user_id=user_id, field_name=field, value=v)
+            for u in users
+            if (user_id := user_id_map.get(u.code))
+            for field, value in u.extras.items()
+            for v in DataSourceUserExtrasIndex.build_values(value)
+        ]
+        with transaction.atomic():
+            self.filter(user_id__in=user_id_map.values()).delete()
+            self.bulk_create(indexes, batch_size=500, ignore_conflicts=True)
+
+
+class DataSourceUserExtrasIndex(models.Model):
+    """
+    数据源用户自定义字段索引
+
+    extras 以 JSON 形式存储，按自定义字段查询用户（如认证源匹配，唯一性校验）时无法利用索引，
+    因此将 extras 中各字段的值投影到该表中（多选枚举等列表类型，每个元素一条记录），通过联合索引快速查询；
+    索引值为字段值的 JSON 序列化结果，以保持与 JSON 查询一致的类型语义（如 1 与 "1" 不相等）
+    """
+
+    data_source = models.ForeignKey(DataSource, on_delete=models.CASCADE, db_constraint=False)
+    user = models.ForeignKey(DataSourceUser, on_delete=models.CASCADE, db_constraint=False)
+    field_name = models.CharField("字段名称", max_length=128)
+    value = models.CharField("字段值", max_length=255)
+
+    objects = DataSourceUserExtrasIndexQuerySet.as_manager()
+
+    class Meta:
+        unique_together = [
+            ("user", "field_name", "value"),
+        ]
+        index_together = [
+            ("data_source", "field_name", "value"),
+        ]
+
+    @staticmethod
+    def build_values(value: Any) -> List[str]:
+        """将自定义字段的值转换为索引值，空值不参与索引"""
+        values = value if isinstance(value, list) else [value]
+        return list({DataSourceUserExtrasIndex.build_value(v) for v in values if v is not None})
+
+    @staticmethod
+    def build_value(value: Any) -> str:
+        """将单个值转换为索引值，超长的值使用其摘要代替（摘要前缀不会与 JSON 序列化结果冲突）"""
+        content = json.dumps(value, ensure_ascii=False, sort_keys=True)
+        if len(content) <= DataSourceUserExtrasIndex._meta.get_field("value").max_length:
+            return content
+
+        return "md5:" + hashlib.md5(content.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+class DataSourceUserSearchTokenQuerySet(models.QuerySet):
+    def refresh(self, data_source_id: int, users: Collection[DataSourceUser]):
+        """
+        根据用户当前的字段值重建其搜索索引
+
+        注意：bulk_create 在部分 DB（如 MySQL）中不会回填主键，此时会根据 code 查询用户 ID
+        """
+        if not users:
+            return
+
+        user_id_map = {u.code: u.id for u in users if u.id}
+        if missing_codes := [u.code for u in users if not u.id]:
+            user_id_map.update(
+                DataSourceUser.objects.filter(data_source_id=data_source_id, code__in=missing_codes).values_list(
+                    "code", "id"
+                )
+            )
+
+        tokens = [
+            DataSourceUserSearchToken(data_source_id=data_source_id, user_id=user_id, field_name=field, token=token)
+            for u in users
+            if (user_id := user_id_map.get(u.code))
+            for field in DataSourceUserSearchToken.search_fields
+            for token in DataSourceUserSearchToken.build_tokens(getattr(u, field))
+        ]
+        with transaction.atomic():
+            self.filter(user_id__in=user_id_map.values()).delete()
+            self.bulk_create(tokens, batch_size=1000, ignore_conflicts=True)
+
+    def match_user_ids(
+        self, keyword: str, fields: Collection[str], data_source_ids: Collection[int]
+    ) -> "DataSourceUserSearchTokenQuerySet | None":
+        """
+        获取指定数据源中，指定字段可能包含关键字的数据源用户 ID（用于子查询）
+
+        关键字长度不超过 gram_size - 1 时，结果是精确的；否则为候选集合，还需要调用方再做一次子串匹配来过滤；
+        若关键字区分度过低（命中的 token 数量达到 gram_sample_limit），索引无法有效缩小候选范围，此时返回 None，
+        调用方应直接做子串匹配
+        """
+        keyword = keyword.lower()
+        queryset = self.filter(data_source_id__in=data_source_ids, field_name__in=fields)
+        sample_limit = DataSourceUserSearchToken.gram_sample_limit
+
+        # 短关键字：任意包含该关键字的字段值，都必然存在以其为前缀的 token（n-gram 或尾部 token）
+        if len(keyword) < DataSourceUserSearchToken.gram_size:
+            queryset = queryset.filter(token__startswith=keyword)
+            if queryset[:sample_limit].count() >= sample_limit:
+                return None
+            return queryset.values("user_id")
+
+        # 长关键字：包含关键字的字段值必然包含其所有 n-gram，因此只需以其中最稀有的几个 n-gram 获取候选集合；
+        # 只统计部分 n-gram（首、中、尾）的出现次数，且按 gram_sample_limit 截断统计，避免对高频 n-gram 做全量计数
+        gram_counts: Dict[str, int] = {}
+        for gram in DataSourceUserSearchToken.build_probe_grams(keyword):
+            gram_counts[gram] = queryset.filter(token=gram)[:sample_limit].count()
+            # 存在未出现过的 n-gram，说明不可能有匹配的用户
+            if not gram_counts[gram]:
+                return queryset.filter(token=gram).values("user_id")
+
+        if min(gram_counts.values()) >= sample_limit:
+            return None
+
+        grams = sorted(gram_counts, key=gram_counts.__getitem__)[: DataSourceUserSearchToken.gram_match_count]
+        if len(grams) == 1:
+            return queryset.filter(token=grams[0]).values("user_id")
+
+        # 同一字段需要同时命中选中的 n-gram
+        return (
+            queryset.filter(token__in=grams)
+            .values("user_id", "field_name")
+            .annotate(matched_count=models.Count("id"))
+            .filter(matched_count=len(grams))
+            .values("user_id")
+        )
+
+
+class DataSourceUserSearchToken(models.Model):
+    """
+    数据源用户搜索索引（n-gram）
+
+    将用户名、姓名、邮箱、手机号（小写后）拆分为 n-gram token，另外记录值尾部长度小于 n 的片段，
+    使得任意长度关键字的子串搜索（icontains）都可以先通过该表的索引缩小候选范围，避免对用户表的全表扫描：
+    - 关键字长度 < n：包含关键字的字段值，必然存在以关键字为前缀的 token（token LIKE 'kw%'）
+    - 关键字长度 >= n：包含关键字的字段值，必然包含关键字的所有 n-gram（包括其中最稀有的）
+
+    token 按数据源划分（索引以数据源开头），搜索时只在指定的数据源中统计 & 匹配，不受其他租户数据量的影响
+    """
+
+    # 参与搜索的字段
+    search_fields = ["username", "full_name", "email", "phone"]
+    # n-gram 长度
+    gram_size = 3
+    # 长关键字选取候选 n-gram 时，单个 n-gram 出现次数的统计上限
+    gram_sample_limit = 5000
+    # 长关键字最多统计多少个 n-gram 的出现次数（从首、中、尾位置选取）
+    gram_probe_count = 3
+    # 长关键字最多使用多少个（最稀有的）n-gram 获取候选集合
+    gram_match_count = 2
+
+    data_source = models.ForeignKey(DataSource, on_delete=models.CASCADE, db_constraint=False)
+    user = models.ForeignKey(DataSourceUser, on_delete=models.CASCADE, db_constraint=False)
+    field_name = models.CharField("字段名称", max_length=32)
+    token = models.CharField("Token", max_length=16)
+
+    objects = DataSourceUserSearchTokenQuerySet.as_manager()
+
+    class Meta:
+        unique_together = [
+            ("user", "field_name", "token"),
+        ]
+        index_together = [
+            ("data_source", "token", "field_name", "user"),
+        ]
+
+    @classmethod
+    def build_grams(cls, value: str) -> List[str]:
+        """将字符串拆分为 n-gram 列表（去重）"""
+        return list({value[i : i + cls.gram_size] for i in range(len(value) - cls.gram_size + 1)})
+
+    @classmethod
+    def build_probe_grams(cls, value: str) -> List[str]:
+        """从字符串的 n-gram 中均匀选取（包含首、尾）最多 gram_probe_count 个（去重）"""
+        grams = [value[i : i + cls.gram_size] for i in range(len(value) - cls.gram_size + 1)]
+        if len(grams) <= cls.gram_probe_count:
+            return list(dict.fromkeys(grams))
+
+        step = (len(grams) - 1) / (cls.gram_probe_count - 1)
+        return list(dict.fromkeys(grams[round(idx * step)] for idx in range(cls.gram_probe_count)))
+
+    @classmethod
+    def build_tokens(cls, value: str | None) -> List[str]:
+        """将字段值转换为 token 列表：所有 n-gram + 长度小于 n 的尾部片段"""
+        if not value:
+            return []
+
+        value = value.lower()
+        tails = [value[-size:] for size in range(1, cls.gram_size) if len(value) >= size]
+        return list(set(cls.build_grams(value)) | set(tails))
 
 
 class LocalDataSourceIdentityInfo(TimestampedModel):
@@ -15,10 +15,11 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 import logging
-from typing import Dict
+from collections import defaultdict
+from typing import Dict, Iterable, List
 
 from bkuser.apps.data_source.constants import USER_EXTRAS_UPDATE_BATCH_SIZE
-from bkuser.apps.data_source.models import DataSource, DataSourceUser
+from bkuser.apps.data_source.models import DataSource, DataSourceUser, DataSourceUserExtrasIndex
 from bkuser.celery import app
 from bkuser.common.task import BaseTask
 from bkuser.plugins.constants import DataSourcePluginEnum
@@ -45,10 +46,13 @@ def remove_dropped_field_in_user_extras(tenant_id: str, field_name: str):
     )
     for u in users:
         u.extras.pop(field_name)
+        u.content_hash = u.gen_content_hash()
 
     DataSourceUser.objects.bulk_update(
-        users, fields=["extras", "updated_at"], batch_size=USER_EXTRAS_UPDATE_BATCH_SIZE
+        users, fields=["extras", "content_hash", "updated_at"], batch_size=USER_EXTRAS_UPDATE_BATCH_SIZE
     )
+    # 字段已删除，直接清理该字段的索引即可，无需逐个用户重建
+    DataSourceUserExtrasIndex.objects.filter(data_source__owner_tenant_id=tenant_id, field_name=field_name).delete()
 
 
 @app.task(base=BaseTask, ignore_result=True)
@@ -75,6 +79,19 @@ def migrate_user_extras_with_mapping(tenant_id: str, field_name: str, mapping: D
         elif isinstance(value, str):
             u.extras[field_name] = mapping.get(value, value)
 
+        u.content_hash = u.gen_content_hash()
+
     DataSourceUser.objects.bulk_update(
-        users, fields=["extras", "updated_at"], batch_size=USER_EXTRAS_UPDATE_BATCH_SIZE
+        users, fields=["extras", "content_hash", "updated_at"], batch_size=USER_EXTRAS_UPDATE_BATCH_SIZE
     )
+    _refresh_user_extras_index(users)
+
+
+def _refresh_user_extras_index(users: Iterable[DataSourceUser]):
+    """按数据源重建用户的自定义字段索引"""
+    data_source_users_map: Dict[int, List[DataSourceUser]] = defaultdict(list)
+    for u in users:
+        data_source_users_map[u.data_source_id].append(u)
+
+    for data_source_id, data_source_users in data_source_users_map.items():
+        DataSourceUserExtrasIndex.objects.refresh(data_source_id, data_source_users)
@@ -56,6 +56,16 @@ class SyncLogLevel(StrStructuredEnum):
     ERROR = EnumField("ERROR", label="ERROR")
 
 
+class SyncLogPhase(StrStructuredEnum):
+    """同步日志所属阶段"""
+
+    PREPARE = EnumField("prepare", label=_("准备"))
+    DEPARTMENT = EnumField("department", label=_("同步部门"))
+    USER = EnumField("user", label=_("同步用户"))
+    VALIDATE = EnumField("validate", label=_("数据校验"))
+    FINISH = EnumField("finish", label=_("收尾"))
+
+
 class SyncTaskStatus(StrStructuredEnum):
     """同步任务状态枚举"""
 
@@ -88,3 +98,10 @@ class TenantSyncObjectType(StrStructuredEnum):
 
     USER = EnumField("user", label=_("用户"))
     DEPARTMENT = EnumField("department", label=_("部门"))
+
+
+class WorkbookTempStoreBackend(StrStructuredEnum):
+    """Workbook 临时存储后端"""
+
+    REDIS = EnumField("redis", label=_("Redis"))
+    FILESYSTEM = EnumField("filesystem", label=_("文件系统"))
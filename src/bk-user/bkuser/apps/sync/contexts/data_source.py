@@ -19,19 +19,25 @@
 # ruff: noqa: G003, G004
 import logging
 import traceback
-from typing import List
+from typing import Dict, List, Type
 
 from celery.exceptions import SoftTimeLimitExceeded
 from django.conf import settings
 from django.utils import timezone
 
 from bkuser.apps.data_source.models import DataSourceDepartment, DataSourceUser
-from bkuser.apps.sync.constants import DataSourceSyncObjectType, SyncOperation, SyncTaskStatus
+from bkuser.apps.sync.constants import DataSourceSyncObjectType, SyncLogPhase, SyncTaskStatus
 from bkuser.apps.sync.exceptions import DataSourceSyncInterrupted
 from bkuser.apps.sync.locks import DataSourceSyncTaskLock
 from bkuser.apps.sync.loggers import TaskLogger
-from bkuser.apps.sync.models import DataSourceDepartmentChangeLog, DataSourceSyncTask, DataSourceUserChangeLog
-from bkuser.apps.sync.recorders import ChangeLogRecorder
+from bkuser.apps.sync.models import (
+    DataSourceDepartmentChangeLog,
+    DataSourceSyncTask,
+    DataSourceSyncTaskLog,
+    DataSourceUserChangeLog,
+)
+from bkuser.apps.sync.recorders import ChangeLogEntry, SpooledChangeLogRecorder
+from bkuser.utils.iterx import chunked
 
 logger = logging.getLogger(__name__)
 
@@ -44,7 +50,7 @@ class DataSourceSyncTaskContext:
     def __init__(self, task: DataSourceSyncTask):
         self.task = task
         self.logger = TaskLogger()
-        self.recorder = ChangeLogRecorder()
+        self.recorder = SpooledChangeLogRecorder()
         self.synced_obj_types: set[DataSourceSyncObjectType] = set()
 
         timeout = task.extras.get("timeout", settings.DATA_SOURCE_SYNC_DEFAULT_TIMEOUT)
@@ -63,6 +69,7 @@ class DataSourceSyncTaskContext:
             self.logger.error(f"failed to acquire data source {self.task.data_source_id} sync lock...")
             self._update_task(SyncTaskStatus.FAILED)
             self._store_logs_into_db()
+            self.recorder.close()
             raise DataSourceSyncInterrupted("failed to acquire data source sync lock, exit...")
 
         # 继续执行同步逻辑
@@ -74,10 +81,12 @@ class DataSourceSyncTaskContext:
         self.lock.release()
 
         if exc_type is None:
+            self.logger.phase = SyncLogPhase.FINISH
             self.logger.info("data source sync task success!")
             self._update_task(SyncTaskStatus.SUCCESS)
             self._store_records_into_db()
             self._store_logs_into_db()
+            self.recorder.close()
             return
 
         # 任务超时添加特殊提示
@@ -91,6 +100,7 @@ class DataSourceSyncTaskContext:
         )
         self._update_task(SyncTaskStatus.FAILED)
         self._store_logs_into_db()
+        self.recorder.close()
 
     def _update_task(self, status: SyncTaskStatus):
         """更新 task 记录"""
@@ -106,82 +116,75 @@ class DataSourceSyncTaskContext:
         self.task.save(update_fields=update_fields)
 
     def _store_records_into_db(self):
-        """将变更记录存入数据库"""
-        # 用户变更记录
-        if created_users := self.recorder.get(SyncOperation.CREATE, DataSourceSyncObjectType.USER):
-            DataSourceUserChangeLog.objects.bulk_create(
-                self._build_user_change_logs(SyncOperation.CREATE, created_users), batch_size=self.batch_size
-            )
-
-        if deleted_users := self.recorder.get(SyncOperation.DELETE, DataSourceSyncObjectType.USER):
-            DataSourceUserChangeLog.objects.bulk_create(
-                self._build_user_change_logs(SyncOperation.DELETE, deleted_users), batch_size=self.batch_size
-            )
-
-        if updated_users := self.recorder.get(SyncOperation.UPDATE, DataSourceSyncObjectType.USER):
-            DataSourceUserChangeLog.objects.bulk_create(
-                self._build_user_change_logs(SyncOperation.UPDATE, updated_users), batch_size=self.batch_size
-            )
-
-        # 部门变更记录
-        if created_depts := self.recorder.get(SyncOperation.CREATE, DataSourceSyncObjectType.DEPARTMENT):
-            DataSourceDepartmentChangeLog.objects.bulk_create(
-                self._build_dept_change_logs(SyncOperation.CREATE, created_depts), batch_size=self.batch_size
-            )
-
-        if deleted_depts := self.recorder.get(SyncOperation.DELETE, DataSourceSyncObjectType.DEPARTMENT):
-            DataSourceDepartmentChangeLog.objects.bulk_create(
-                self._build_dept_change_logs(SyncOperation.DELETE, deleted_depts), batch_size=self.batch_size
-            )
-
-        if updated_depts := self.recorder.get(SyncOperation.UPDATE, DataSourceSyncObjectType.DEPARTMENT):
-            DataSourceDepartmentChangeLog.objects.bulk_create(
-                self._build_dept_change_logs(SyncOperation.UPDATE, updated_depts), batch_size=self.batch_size
-            )
-
-    def _build_user_change_logs(
-        self, operation: SyncOperation, users: List[DataSourceUser]
-    ) -> List[DataSourceUserChangeLog]:
-        if operation == SyncOperation.CREATE:
-            # 由于 bulk_create 不会返回 id，因此当 operation 为 create 时候，需要通过查询获取真实的 ID
-            users = DataSourceUser.objects.filter(code__in=[u.code for u in users], data_source=self.task.data_source)
-
+        """将变更记录分批存入数据库"""
+        for entries in chunked(self.recorder.iter_entries(), self.batch_size):
+            user_entries = [e for e in entries if e.type == DataSourceSyncObjectType.USER]
+            if user_entries:
+                DataSourceUserChangeLog.objects.bulk_create(self._build_user_change_logs(user_entries))
+
+            dept_entries = [e for e in entries if e.type == DataSourceSyncObjectType.DEPARTMENT]
+            if dept_entries:
+                DataSourceDepartmentChangeLog.objects.bulk_create(self._build_dept_change_logs(dept_entries))
+
+    def _build_user_change_logs(self, entries: List[ChangeLogEntry]) -> List[DataSourceUserChangeLog]:
+        user_id_map = self._get_missing_id_map(DataSourceUser, entries)
         return [
             DataSourceUserChangeLog(
                 task=self.task,
                 data_source=self.task.data_source,
-                operation=operation,
-                user_id=u.id,
-                user_code=u.code,
-                username=u.username,
-                full_name=u.full_name,
+                operation=e.operation,
+                user_id=user_id,
+                user_code=e.code,
+                username=e.name,
+                full_name=e.full_name,
             )
-            for u in users
+            for e in entries
+            if (user_id := e.id or user_id_map.get(e.code))
         ]
 
-    def _build_dept_change_logs(
-        self, operation: SyncOperation, depts: List[DataSourceDepartment]
-    ) -> List[DataSourceDepartmentChangeLog]:
-        if operation == SyncOperation.CREATE:
-            # 由于 bulk_create 不会返回 id，因此当 operation 为 create 时候，需要通过查询获取真实的 ID
-            depts = DataSourceDepartment.objects.filter(
-                code__in=[d.code for d in depts], data_source=self.task.data_source
-            )
-
+    def _build_dept_change_logs(self, entries: List[ChangeLogEntry]) -> List[DataSourceDepartmentChangeLog]:
+        dept_id_map = self._get_missing_id_map(DataSourceDepartment, entries)
         return [
             DataSourceDepartmentChangeLog(
                 task=self.task,
                 data_source=self.task.data_source,
-                operation=operation,
-                department_id=d.id,
-                department_code=d.code,
-                department_name=d.name,
+                operation=e.operation,
+                department_id=dept_id,
+                department_code=e.code,
+                department_name=e.name,
             )
-            for d in depts
+            for e in entries
+            if (dept_id := e.id or dept_id_map.get(e.code))
         ]
 
+    def _get_missing_id_map(
+        self, model: Type[DataSourceUser] | Type[DataSourceDepartment], entries: List[ChangeLogEntry]
+    ) -> Dict[str, int]:
+        """
+        获取缺失 ID 的变更条目的 {code: ID} 映射
+
+        同步器在 bulk_create 后会回填主键，正常情况下不会有缺失 ID 的条目，这里仅做兜底，DB 中不存在的对象不会被记录
+        """
+        if missing_codes := [e.code for e in entries if not e.id]:
+            return dict(
+                model.objects.filter(data_source=self.task.data_source, code__in=missing_codes).values_list(
+                    "code", "id"
+                )
+            )
+
+        return {}
+
     def _store_logs_into_db(self):
-        """将步骤日志存入数据库"""
-        sync_task_logs = self.logger.logs.strip()
-        self.task.logs = sync_task_logs
+        """将步骤日志存入数据库（结构化日志分批写入，文本日志仅用于兼容任务详情中的展示）"""
+        for entries in chunked(enumerate(self.logger.entries, start=1), self.batch_size):
+            DataSourceSyncTaskLog.objects.bulk_create(
+                [
+                    DataSourceSyncTaskLog(
+                        task=self.task, seq=seq, phase=e.phase, level=e.level, message=e.message, count=e.times
+                    )
+                    for seq, e in entries
+                ]
+            )
+
+        self.task.logs = self.logger.logs.strip()
         self.task.save(update_fields=["logs", "updated_at"])
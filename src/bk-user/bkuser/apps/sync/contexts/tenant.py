@@ -24,13 +24,14 @@ from typing import List
 from celery.exceptions import SoftTimeLimitExceeded
 from django.utils import timezone
 
-from bkuser.apps.sync.constants import SyncOperation, SyncTaskStatus, TenantSyncObjectType
+from bkuser.apps.sync.constants import SyncLogPhase, SyncOperation, SyncTaskStatus, TenantSyncObjectType
 from bkuser.apps.sync.exceptions import TenantSyncInterrupted
 from bkuser.apps.sync.locks import TenantSyncTaskLock
 from bkuser.apps.sync.loggers import TaskLogger
-from bkuser.apps.sync.models import TenantDepartmentChangeLog, TenantSyncTask, TenantUserChangeLog
+from bkuser.apps.sync.models import TenantDepartmentChangeLog, TenantSyncTask, TenantSyncTaskLog, TenantUserChangeLog
 from bkuser.apps.sync.recorders import ChangeLogRecorder
 from bkuser.apps.tenant.models import TenantDepartment, TenantUser
+from bkuser.utils.iterx import chunked
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +74,7 @@ class TenantSyncTaskContext:
         self.lock.release()
 
         if exc_type is None:
+            self.logger.phase = SyncLogPhase.FINISH
             self.logger.info("tenant sync task success!")
             self._update_task(SyncTaskStatus.SUCCESS)
             self._store_records_into_db()
@@ -178,7 +180,16 @@ class TenantSyncTaskContext:
         ]
 
     def _store_logs_into_db(self):
-        """将步骤日志存入数据库"""
-        sync_task_logs = self.logger.logs.strip()
-        self.task.logs = sync_task_logs
+        """将步骤日志存入数据库（结构化日志分批写入，文本日志仅用于兼容任务详情中的展示）"""
+        for entries in chunked(enumerate(self.logger.entries, start=1), self.batch_size):
+            TenantSyncTaskLog.objects.bulk_create(
+                [
+                    TenantSyncTaskLog(
+                        task=self.task, seq=seq, phase=e.phase, level=e.level, message=e.message, count=e.times
+                    )
+                    for seq, e in entries
+                ]
+            )
+
+        self.task.logs = self.logger.logs.strip()
         self.task.save(update_fields=["logs", "updated_at"])
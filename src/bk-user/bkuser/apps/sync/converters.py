@@ -17,8 +17,8 @@
 
 # ignore custom logger must use %s string format in this file
 # ruff: noqa: G003, G004
-import re
-from typing import Any, Dict, List
+from functools import cached_property, lru_cache
+from typing import Any, Callable, Dict, List, Tuple
 
 import pydantic
 from django.conf import settings
@@ -35,6 +35,110 @@ from bkuser.plugins.models import RawDataSourceUser
 from bkuser.utils.pydantic import stringify_pydantic_error
 
 
+class DataSourceUserConversionPlan:
+    """数据源用户转换计划
+
+    根据字段映射 & 租户用户自定义字段预先编译：字段映射关系，各自定义字段的转换函数，正则校验函数等，
+    每次同步只需要编译一次，避免逐个用户重复构建映射 & 遍历字段配置；
+    手机号的校验结果会在转换过程中被缓存（LRU，数量有上限，不会随数据源规模增长占用内存）
+    """
+
+    # 手机号校验结果的最大缓存数量
+    phone_validation_cache_size = 4096
+
+    def __init__(self, field_mapping: List[DataSourceUserFieldMapping], custom_fields: List[TenantUserCustomField]):
+        # TODO (su) 支持复杂字段映射类型，如表达式，目前都当作直接映射处理（目前只支持直接映射）
+        mapping = {m.target_field: m.source_field for m in field_mapping}
+
+        self.username_field = mapping["username"]
+        self.full_name_field = mapping["full_name"]
+        self.email_field = mapping.get("email")
+        self.phone_field = mapping.get("phone")
+        self.phone_country_code_field = mapping.get("phone_country_code")
+        self.default_phone_country_code = settings.DEFAULT_PHONE_COUNTRY_CODE
+
+        self.match_username = DATA_SOURCE_USERNAME_REGEX.fullmatch
+        self.match_email = EMAIL_REGEX.fullmatch
+
+        # 并不是所有的自定义字段，都已经被配置到字段映射中，这里应该以字段映射为准
+        self.extras_rules: List[Tuple[str, str, Any, Callable[[str, Any], Any]]] = [
+            (f.name, mapping[f.name], f.default, self._compile_custom_field_converter(f))
+            for f in custom_fields
+            if f.name in mapping
+        ]
+        # 校验手机号，校验通过的结果会被缓存（不合法会抛出 ValueError，同步会中止，因此无需缓存）
+        self.validate_phone: Callable[[str, str], None] = lru_cache(maxsize=self.phone_validation_cache_size)(
+            validate_phone_with_country_code
+        )
+
+    def build_extras(self, username: str, props: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            name: convert(username, props.get(source_field, default))
+            for name, source_field, default, convert in self.extras_rules
+        }
+
+    @staticmethod
+    def _compile_custom_field_converter(f: TenantUserCustomField) -> Callable[[str, Any], Any]:  # noqa: C901
+        """根据自定义字段的类型，生成对应的字段值转换函数"""
+        opt_ids = [opt["id"] for opt in f.options]
+        opt_id_set = set(opt_ids)
+
+        # 数字类型，转换成整型不丢精度就转，不行就浮点数
+        if f.data_type == UserFieldDataType.NUMBER:
+
+            def convert_number(username: str, value: Any) -> Any:
+                try:
+                    value = float(value)
+                    return int(value) if int(value) == value else value
+                except ValueError:
+                    raise ValueError(
+                        f"username: {username}, number field {f.name} value `{value}` cannot convert to number"
+                    )
+
+            return convert_number
+
+        # 枚举类型，值（id）必须是字符串，且是可选项中的一个
+        if f.data_type == UserFieldDataType.ENUM:
+
+            def convert_enum(username: str, value: Any) -> Any:
+                if value not in opt_id_set:
+                    raise ValueError(
+                        f"username: {username}, enum field {f.name} value `{value}` not in options {opt_ids}"
+                    )
+                return value
+
+            return convert_enum
+
+        # 多选枚举类型，值必须是字符串列表，且是可选项的子集
+        if f.data_type == UserFieldDataType.MULTI_ENUM:
+
+            def convert_multi_enum(username: str, value: Any) -> Any:
+                # 兼容 xlsx 导入，统一所有插件输出的多选枚举，都是通过 "," 分隔的字符串表示列表
+                # 但是，默认值 default 可能是 list 类型，因此这里还是需要做类型判断的
+                if isinstance(value, str):
+                    value = [v.strip() for v in value.split(",") if v.strip()]
+
+                if not opt_id_set.issuperset(value):
+                    raise ValueError(
+                        f"username: {username}, multi enum field {f.name} value `{value}` not subset of {opt_ids}"
+                    )
+                return value
+
+            return convert_multi_enum
+
+        # 必填字段检查仅适用于字符串类型字段，因为数字类型即使是 0 也不能判断是空，枚举类型都有值检查
+        if f.data_type == UserFieldDataType.STRING and f.required:
+
+            def convert_required_string(username: str, value: Any) -> Any:
+                if not value:
+                    raise ValueError(f"username: {username}, field {f.name} is required")
+                return value
+
+            return convert_required_string
+
+        return lambda username, value: value
+
+
 class DataSourceUserConverter:
     """数据源用户转换器"""
 
@@ -44,41 +148,40 @@ class DataSourceUserConverter:
         self.custom_fields = TenantUserCustomField.objects.filter(tenant_id=self.data_source.owner_tenant_id)
         self.field_mapping = self._get_field_mapping()
 
+    @cached_property
+    def plan(self) -> DataSourceUserConversionPlan:
+        """转换计划，在首次转换用户时编译（同一次同步中，字段映射 & 自定义字段配置都不会变化）"""
+        return DataSourceUserConversionPlan(self.field_mapping, list(self.custom_fields))
+
     def convert(self, user: RawDataSourceUser) -> DataSourceUser:
-        # TODO (su) 支持复杂字段映射类型，如表达式，目前都当作直接映射处理（目前只支持直接映射）
-        mapping = {m.target_field: m.source_field for m in self.field_mapping}
+        plan = self.plan
         props = user.properties
 
-        username = props.get(mapping["username"])
+        username = props.get(plan.username_field)
         # 1. 用户名是必须提供的，而且需要满足正则校验规则
         if not username:
             raise ValueError("username is required")
 
-        if not re.fullmatch(DATA_SOURCE_USERNAME_REGEX, username):
+        if not plan.match_username(username):
             raise ValueError(f"username [{username}] not match pattern {DATA_SOURCE_USERNAME_REGEX.pattern}")
 
         # 2. 姓名也是必须提供的
-        full_name = props.get(mapping["full_name"])
+        full_name = props.get(plan.full_name_field)
         if not full_name:
             raise ValueError(f"username {username}, full_name is required")
 
-        email = props.get(mapping.get("email")) or ""  # type: ignore
+        email = props.get(plan.email_field) or ""  # type: ignore
         # 3. 如果提供了邮箱，则必须满足正则校验规则
-        if email and not re.fullmatch(EMAIL_REGEX, email):
+        if email and not plan.match_email(email):
             raise ValueError(
                 f"username {username}, email [{email}] provided but not match pattern {EMAIL_REGEX.pattern}"
             )
 
-        phone = props.get(mapping.get("phone")) or ""  # type: ignore
-        country_code = (
-            props.get(
-                mapping.get("phone_country_code"),  # type: ignore
-            )
-            or settings.DEFAULT_PHONE_COUNTRY_CODE
-        )
+        phone = props.get(plan.phone_field) or ""  # type: ignore
+        country_code = props.get(plan.phone_country_code_field) or plan.default_phone_country_code  # type: ignore
         # 4. 如果提供了手机号，则需要通过 phonenumbers 的检查，确保手机号码合法
         if phone:
-            validate_phone_with_country_code(phone, country_code)
+            plan.validate_phone(phone, country_code)
 
         return DataSourceUser(
             data_source=self.data_source,
@@ -88,7 +191,7 @@ class DataSourceUserConverter:
             email=email,
             phone=phone,
             phone_country_code=country_code,
-            extras=self._build_extras(username, props, mapping),
+            extras=plan.build_extras(username, props),
         )
 
     def _get_field_mapping(self) -> List[DataSourceUserFieldMapping]:
@@ -134,49 +237,3 @@ class DataSourceUserConverter:
             for fields in [UserBuiltinField.objects.all(), self.custom_fields]
             for f in fields
         ]
-
-    def _build_extras(  # noqa: C901
-        self, username: str, props: Dict[str, str], mapping: Dict[str, str]
-    ) -> Dict[str, Any]:
-        extras = {}
-        for f in self.custom_fields:
-            # 并不是所有的自定义字段，都已经被配置到字段映射中，这里应该以字段映射为准
-            if f.name not in mapping:
-                continue
-
-            opt_ids = [opt["id"] for opt in f.options]
-            value = props.get(mapping[f.name], f.default)
-
-            # 数字类型，转换成整型不丢精度就转，不行就浮点数
-            if f.data_type == UserFieldDataType.NUMBER:
-                try:
-                    value = float(value)  # type: ignore
-                    value = int(value) if int(value) == value else value  # type: ignore
-                except ValueError:
-                    raise ValueError(
-                        f"username: {username}, number field {f.name} value `{value}` cannot convert to number"
-                    )
-            # 枚举类型，值（id）必须是字符串，且是可选项中的一个
-            elif f.data_type == UserFieldDataType.ENUM:
-                if value not in opt_ids:
-                    raise ValueError(
-                        f"username: {username}, enum field {f.name} value `{value}` not in options {opt_ids}"
-                    )
-            # 多选枚举类型，值必须是字符串列表，且是可选项的子集
-            elif f.data_type == UserFieldDataType.MULTI_ENUM:
-                # 兼容 xlsx 导入，统一所有插件输出的多选枚举，都是通过 "," 分隔的字符串表示列表
-                # 但是，默认值 default 可能是 list 类型，因此这里还是需要做类型判断的
-                if isinstance(value, str):
-                    value = [v.strip() for v in value.split(",") if v.strip()]  # type: ignore
-
-                if set(value) - set(opt_ids):
-                    raise ValueError(
-                        f"username: {username}, multi enum field {f.name} value `{value}` not subset of {opt_ids}"
-                    )
-            # 必填字段检查仅适用于字符串类型字段，因为数字类型即使是 0 也不能判断是空，枚举类型都有值检查
-            elif f.data_type == UserFieldDataType.STRING and f.required and not value:
-                raise ValueError(f"username: {username}, field {f.name} is required")
-
-            extras[f.name] = value
-
-        return extras
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from typing import Type
+
+from django.db.models import Exists, Model, OuterRef, QuerySet
+
+from bkuser.apps.data_source.models import DataSource, DataSourceDepartment, DataSourceUser
+from bkuser.apps.tenant.models import Tenant, TenantDepartment, TenantUser
+
+
+class TenantSyncDiffer:
+    """
+    租户同步差异计算器：计算租户中需要删除 / 需要新建（同步）的对象
+
+    通过反连接（NOT EXISTS）子查询由 DB 基于索引计算差异，SQL 的大小与数据源中的数据量无关，
+    避免将全量 ID 列表作为 IN 参数下发到 DB
+    """
+
+    def __init__(
+        self,
+        tenant: Tenant,
+        data_source: DataSource,
+        tenant_model: Type[Model],
+        data_source_model: Type[Model],
+        relation_field: str,
+    ):
+        """
+        :param tenant: 租户
+        :param data_source: 数据源
+        :param tenant_model: 租户对象模型，如 TenantUser
+        :param data_source_model: 数据源对象模型，如 DataSourceUser
+        :param relation_field: 租户对象模型中，关联数据源对象的外键字段名，如 data_source_user
+        """
+        self.tenant = tenant
+        self.data_source = data_source
+        self.tenant_model = tenant_model
+        self.data_source_model = data_source_model
+        self.relation_field_id = f"{relation_field}_id"
+
+    def get_waiting_delete_queryset(self) -> QuerySet:
+        """租户中存在，但是数据源中不存在的租户对象（需要删除）"""
+        data_source_objs = self.data_source_model._default_manager.filter(
+            data_source=self.data_source, id=OuterRef(self.relation_field_id)
+        )
+        return self.tenant_model._default_manager.filter(tenant=self.tenant, data_source=self.data_source).filter(
+            ~Exists(data_source_objs)
+        )
+
+    def get_waiting_sync_queryset(self) -> QuerySet:
+        """数据源中存在，但是租户中不存在的数据源对象（需要新建对应的租户对象）"""
+        tenant_objs = self.tenant_model._default_manager.filter(
+            tenant=self.tenant, **{self.relation_field_id: OuterRef("id")}
+        )
+        return self.data_source_model._default_manager.filter(data_source=self.data_source).filter(
+            ~Exists(tenant_objs)
+        )
+
+    @classmethod
+    def for_users(cls, tenant: Tenant, data_source: DataSource) -> "TenantSyncDiffer":
+        return cls(tenant, data_source, TenantUser, DataSourceUser, "data_source_user")
+
+    @classmethod
+    def for_departments(cls, tenant: Tenant, data_source: DataSource) -> "TenantSyncDiffer":
+        return cls(tenant, data_source, TenantDepartment, DataSourceDepartment, "data_source_department")
@@ -22,3 +22,7 @@ class DataSourceSyncInterrupted(Exception):
 
 class TenantSyncInterrupted(Exception):
     """租户同步被中断（如无法获取同步锁）"""
+
+
+class DataSourceUserFetchStopped(Exception):
+    """数据源用户拉取被停止（如同步提前失败）"""
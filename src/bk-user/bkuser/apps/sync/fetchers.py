@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, List
+
+from django.db import connections
+
+from bkuser.apps.sync.constants import SyncLogPhase
+from bkuser.apps.sync.exceptions import DataSourceUserFetchStopped
+from bkuser.apps.sync.loggers import TaskLogger
+from bkuser.apps.sync.spools import RawDataSourceUserSpool
+from bkuser.plugins.base import BaseDataSourcePlugin
+from bkuser.plugins.models import RawDataSourceUser
+
+logger = logging.getLogger(__name__)
+
+
+class DataSourceUserFetcher:
+    """
+    数据源用户拉取器，支持在后台线程中预拉取用户数据
+
+    Q: 为什么需要预拉取？
+    A: 插件拉取用户数据（网络 IO）并不依赖 DB 中的部门数据，若等部门同步（DB 写入）完成后才开始拉取用户，
+       两者耗时会完全串行叠加；预拉取后，同步总耗时约为 max(拉取耗时, 写入耗时)，而非两者之和
+
+    注意：预拉取应在插件的 fetch_departments 调用完成后再开始，因为部分插件（如 LDAP）拉取用户时，
+         会用到拉取部门时生成的中间数据（如部门 DN 与 Code 的映射）
+
+    同步提前失败时，会通知后台线程停止拉取（分块模式下每拉取一个用户检查一次）并等待其结束，避免泄漏拉取任务及插件连接
+    """
+
+    # 同步提前失败时，等待后台拉取停止的最长时间（秒）
+    stop_timeout = 10
+
+    def __init__(self, plugin: BaseDataSourcePlugin, chunk_size: int, prefetch: bool, task_logger: TaskLogger):
+        """
+        :param task_logger: 插件使用的任务日志记录器，后台拉取时，插件记录的日志需要归属于用户同步阶段
+        """
+        self.plugin = plugin
+        self.chunk_size = chunk_size
+        self.prefetch = prefetch
+        self.task_logger = task_logger
+
+        self._spool: RawDataSourceUserSpool | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._future: Future | None = None
+        self._stop_event = threading.Event()
+
+    def __enter__(self) -> "DataSourceUserFetcher":
+        if self.prefetch:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="data-source-user-prefetch")
+            self._future = self._executor.submit(self._fetch_in_thread)
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._executor is None:
+            self.close()
+            return
+
+        if self._future is not None and not self._future.done():
+            # 同步提前失败时，通知后台线程停止拉取，并等待其结束（插件会释放连接等资源）
+            self._stop_event.set()
+            self._future.cancel()
+            wait([self._future], timeout=self.stop_timeout)
+
+        if self._future is not None and not self._future.done():
+            # 插件阻塞在单次请求中，超时仍未停止的，不再等待，而是在拉取结束后再释放资源
+            logger.warning("prefetch users from data source plugin %s not stopped in time", self.plugin.id)
+            self._future.add_done_callback(lambda _: self.close())
+        else:
+            self.close()
+
+        self._executor.shutdown(wait=False)
+
+    def fetch(self) -> List[RawDataSourceUser] | RawDataSourceUserSpool:
+        """获取用户数据，预拉取模式下会等待后台拉取完成，拉取过程中的异常会在此处抛出"""
+        if self._future is not None:
+            return self._future.result()
+
+        return self._fetch()
+
+    def close(self):
+        if self._spool is not None:
+            self._spool.close()
+
+    def _fetch(self) -> List[RawDataSourceUser] | RawDataSourceUserSpool:
+        if self.chunk_size <= 0:
+            return self.plugin.fetch_users()
+
+        # 分块模式下，插件提供的用户数据会被逐条暂存到临时文件中，而不是全部加载到内存中
+        self._spool = RawDataSourceUserSpool()
+        users = self.plugin.iter_users()
+        try:
+            self._spool.extend(self._iter_until_stopped(users))
+        finally:
+            # 提前停止时，需要关闭插件的生成器，以便插件及时释放连接等资源
+            if close := getattr(users, "close", None):
+                close()
+
+        return self._spool
+
+    def _iter_until_stopped(self, users: Iterable[RawDataSourceUser]) -> Iterator[RawDataSourceUser]:
+        for user in users:
+            if self._stop_event.is_set():
+                raise DataSourceUserFetchStopped(f"fetch users from data source plugin {self.plugin.id} stopped")
+
+            yield user
+
+    def _fetch_in_thread(self) -> List[RawDataSourceUser] | RawDataSourceUserSpool:
+        try:
+            # 后台拉取期间，主线程还处于部门同步阶段，因此需要为当前线程单独指定日志阶段
+            with self.task_logger.bind_phase(SyncLogPhase.USER):
+                return self._fetch()
+        except DataSourceUserFetchStopped:
+            logger.info("prefetch users from data source plugin %s stopped", self.plugin.id)
+            raise
+        except Exception:
+            logger.exception("failed to prefetch users from data source plugin %s", self.plugin.id)
+            raise
+        finally:
+            # 插件理论上不会访问 DB，但若有则需要关闭当前线程中的 DB 连接，避免连接泄漏
+            connections.close_all()
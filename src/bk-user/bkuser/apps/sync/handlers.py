@@ -24,6 +24,7 @@ from django_celery_beat.models import IntervalSchedule, PeriodicTask
 from pydantic import ValidationError
 
 from bkuser.apps.data_source.constants import DataSourceTypeEnum
+from bkuser.apps.data_source.department_path_index import DataSourceDepartmentPathIndex
 from bkuser.apps.data_source.models import DataSource
 from bkuser.apps.sync.constants import DataSourceSyncPeriod
 from bkuser.apps.sync.data_models import DataSourceSyncConfig, TenantSyncOptions
@@ -32,11 +33,18 @@ from bkuser.apps.sync.names import gen_data_source_sync_periodic_task_name
 from bkuser.apps.sync.signals import post_sync_data_source, post_sync_tenant
 from bkuser.apps.sync.tasks import initialize_identity_info_and_send_notification
 from bkuser.apps.tenant.constants import CollaborationStrategyStatus
-from bkuser.apps.tenant.models import CollaborationStrategy
+from bkuser.apps.tenant.models import CollaborationStrategy, Tenant
+from bkuser.apps.tenant.tasks import rebuild_tenant_relation_dumps
 
 logger = logging.getLogger(__name__)
 
 
+@receiver(post_sync_data_source)
+def invalidate_department_path_index(sender, data_source: DataSource, **kwargs):
+    """数据源同步后，部门及部门关系可能发生变更，需要使部门路径索引失效"""
+    transaction.on_commit(lambda: DataSourceDepartmentPathIndex(data_source.id).invalidate())
+
+
 @receiver(post_sync_data_source)
 def sync_tenant_departments_users(sender, data_source: DataSource, **kwargs):
     """同步租户数据（部门 & 用户）"""
@@ -74,6 +82,12 @@ def sync_identity_infos_and_notify_after_sync_tenant(sender, data_source: DataSo
     transaction.on_commit(lambda: initialize_identity_info_and_send_notification.delay(data_source.id))
 
 
+@receiver(post_sync_tenant)
+def rebuild_relation_dumps_after_sync_tenant(sender, tenant: Tenant, **kwargs):
+    """在完成租户同步后，租户的部门 - 用户，用户 - Leader 关系可能发生变更，需要在后台重建关系数据全量转储"""
+    transaction.on_commit(lambda: rebuild_tenant_relation_dumps.delay(tenant.id))
+
+
 @receiver(post_save, sender=DataSource)
 def sync_identity_infos_and_notify_after_modify_data_source(sender, instance: DataSource, created: bool, **kwargs):
     """
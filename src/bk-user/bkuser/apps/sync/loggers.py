@@ -15,35 +15,101 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-import io
 import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
 from functools import partialmethod
-from typing import Callable
+from typing import Callable, Dict, Generator, List, NamedTuple, Tuple
 
-from bkuser.apps.sync.constants import SyncLogLevel
+from django.conf import settings
+
+from bkuser.apps.sync.constants import SyncLogLevel, SyncLogPhase
 
 logger = logging.getLogger(__name__)
 
 
+class TaskLogEntry(NamedTuple):
+    """任务日志条目"""
+
+    phase: SyncLogPhase
+    level: SyncLogLevel
+    message: str
+    # 相同日志（阶段，等级，内容均相同）的出现次数
+    times: int
+
+
 class TaskLogger:
-    """任务日志记录器"""
+    """任务日志记录器
+
+    相同的日志会被聚合（保留首次出现的位置，并累计出现次数），避免逐用户的警告日志重复堆积；
+    日志总大小超过上限后，INFO / WARNING 日志仅计数而不再保存，ERROR 日志始终保留
+    """
+
+    # 单条日志内容的最大长度，超出部分会被截断（如缺失的 Leader / 部门列表可能非常长）
+    max_message_length = 4096
 
     has_warning: bool
-    _buffer: io.StringIO
+    # 当前所处的同步阶段，由同步流程在进入各阶段时设置（可通过 bind_phase 为单个线程指定阶段）
+    phase: SyncLogPhase
 
-    def __init__(self):
+    def __init__(self, max_size: int | None = None):
         self.has_warning = False
-        self._buffer = io.StringIO()
+        self.phase = SyncLogPhase.PREPARE
+        self.max_size = settings.SYNC_TASK_LOG_MAX_SIZE if max_size is None else max_size
+        self._size = 0
+        # 利用 dict 有序的特性，按首次出现的顺序记录日志及其出现次数
+        self._counts: Dict[Tuple[SyncLogPhase, SyncLogLevel, str], int] = {}
+        self._omitted_counts: Counter[SyncLogLevel] = Counter()
+        # 预拉取用户数据时，插件会在后台线程中记录日志
+        self._lock = threading.Lock()
+        # 线程独立的同步阶段，优先于 phase 使用
+        self._local = threading.local()
 
     @property
-    def logs(self):
-        return self._buffer.getvalue()
+    def entries(self) -> List[TaskLogEntry]:
+        entries = [TaskLogEntry(phase, level, msg, count) for (phase, level, msg), count in self._counts.items()]
+        # 因超出大小上限而被丢弃的日志，汇总为一条警告日志
+        if self._omitted_counts:
+            omitted = ", ".join(f"{level.value}: {cnt}" for level, cnt in self._omitted_counts.items())
+            msg = f"task logs exceed size limit ({self.max_size}), omitted logs count: {omitted}"
+            entries.append(TaskLogEntry(self.phase, SyncLogLevel.WARNING, msg, 1))
+
+        return entries
+
+    @property
+    def logs(self) -> str:
+        return "".join(
+            f"{e.level.value} {e.message}" + (f" (repeated {e.times} times)" if e.times > 1 else "") + "\n\n"
+            for e in self.entries
+        )
+
+    @contextmanager
+    def bind_phase(self, phase: SyncLogPhase) -> Generator[None, None, None]:
+        """在当前线程中，按指定的阶段记录日志，不受其他线程修改 phase 的影响（如后台预拉取用户数据时）"""
+        prev_phase = getattr(self._local, "phase", None)
+        self._local.phase = phase
+        try:
+            yield
+        finally:
+            self._local.phase = prev_phase
 
     def _log(self, level: SyncLogLevel, msg: str):
         if level == SyncLogLevel.WARNING:
             self.has_warning = True
 
-        self._buffer.write(f"{level.value} {msg}\n\n")
+        if len(msg) > self.max_message_length:
+            msg = msg[: self.max_message_length] + "...(truncated)"
+
+        key = (getattr(self._local, "phase", None) or self.phase, level, msg)
+        with self._lock:
+            if key in self._counts:
+                self._counts[key] += 1
+            elif level == SyncLogLevel.ERROR or self._size + len(msg) <= self.max_size:
+                self._counts[key] = 1
+                self._size += len(msg)
+            else:
+                self._omitted_counts[level] += 1
 
     # TODO (su) 支持 debug 级别的日志？但只能通过 shell 组装的 task 才能触发？
     info: Callable = partialmethod(_log, SyncLogLevel.INFO)  # type: ignore
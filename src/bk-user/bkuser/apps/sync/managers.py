@@ -15,10 +15,12 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import io
 from typing import Any, Dict, Optional
 
 from django.conf import settings
 from django.utils import timezone
+from openpyxl import load_workbook
 
 from bkuser.apps.data_source.models import DataSource
 from bkuser.apps.sync.constants import SyncTaskStatus
@@ -38,7 +40,11 @@ class DataSourceSyncManager:
         self.sync_timeout = data_source.sync_timeout
 
     def execute(self, plugin_init_extra_kwargs: Optional[Dict[str, Any]] = None) -> DataSourceSyncTask:
-        """同步数据源数据到数据库中，注意该方法不可用于 DB 事务中，可能导致异步任务获取 Task 失败"""
+        """
+        同步数据源数据到数据库中，注意该方法不可用于 DB 事务中，可能导致异步任务获取 Task 失败
+
+        注：本地数据源的 plugin_init_extra_kwargs["workbook"] 可以是 Workbook，也可以是 xlsx 文件的原始字节
+        """
         plugin_init_extra_kwargs = plugin_init_extra_kwargs or {}
 
         task = DataSourceSyncTask.objects.create(
@@ -56,7 +62,7 @@ class DataSourceSyncManager:
         )
 
         if self.sync_options.async_run:
-            # 若数据源是本地数据源，则将 Workbook 文件存储到临时存储中
+            # 若数据源是本地数据源，则将 Workbook 文件（或上传文件的原始字节）存储到临时存储中
             if self.data_source.is_local:
                 storage = WorkbookTempStore()
                 temporary_storage_id = storage.save(plugin_init_extra_kwargs["workbook"])
@@ -64,6 +70,13 @@ class DataSourceSyncManager:
 
             self._ensure_only_basic_type_in_kwargs(plugin_init_extra_kwargs)
             sync_data_source.apply_async(args=[task.id, plugin_init_extra_kwargs], soft_time_limit=self.sync_timeout)
+        elif isinstance(plugin_init_extra_kwargs.get("workbook"), bytes):
+            # 同步的方式，若提供的是上传文件的原始字节，则需要先以只读模式加载成 Workbook
+            workbook = load_workbook(io.BytesIO(plugin_init_extra_kwargs["workbook"]), read_only=True)
+            try:
+                DataSourceSyncTaskRunner(task, {**plugin_init_extra_kwargs, "workbook": workbook}).run()
+            finally:
+                workbook.close()
         else:
             # 同步的方式，不需要序列化/反序列化，因此不需要检查基础类型
             DataSourceSyncTaskRunner(task, plugin_init_extra_kwargs).run()
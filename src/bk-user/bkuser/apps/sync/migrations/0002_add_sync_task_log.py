@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+# Generated by Django 4.2.18 on 2026-10-18 08:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantSyncTaskLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('seq', models.IntegerField(verbose_name='日志序号')),
+                ('phase', models.CharField(choices=[('prepare', '准备'), ('department', '同步部门'), ('user', '同步用户'), ('validate', '数据校验'), ('finish', '收尾')], max_length=32, verbose_name='所属阶段')),
+                ('level', models.CharField(choices=[('INFO', 'INFO'), ('WARNING', 'WARNING'), ('ERROR', 'ERROR')], max_length=32, verbose_name='日志等级')),
+                ('message', models.TextField(verbose_name='日志内容')),
+                ('count', models.IntegerField(default=1, verbose_name='重复次数')),
+                ('task', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='log_entries', to='sync.tenantsynctask')),
+            ],
+            options={
+                'ordering': ['seq', 'id'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='DataSourceSyncTaskLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('seq', models.IntegerField(verbose_name='日志序号')),
+                ('phase', models.CharField(choices=[('prepare', '准备'), ('department', '同步部门'), ('user', '同步用户'), ('validate', '数据校验'), ('finish', '收尾')], max_length=32, verbose_name='所属阶段')),
+                ('level', models.CharField(choices=[('INFO', 'INFO'), ('WARNING', 'WARNING'), ('ERROR', 'ERROR')], max_length=32, verbose_name='日志等级')),
+                ('message', models.TextField(verbose_name='日志内容')),
+                ('count', models.IntegerField(default=1, verbose_name='重复次数')),
+                ('task', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='log_entries', to='sync.datasourcesynctask')),
+            ],
+            options={
+                'ordering': ['seq', 'id'],
+                'abstract': False,
+            },
+        ),
+    ]
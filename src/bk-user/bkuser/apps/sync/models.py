@@ -20,7 +20,13 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from bkuser.apps.data_source.models import DataSource
-from bkuser.apps.sync.constants import SyncOperation, SyncTaskStatus, SyncTaskTrigger
+from bkuser.apps.sync.constants import (
+    SyncLogLevel,
+    SyncLogPhase,
+    SyncOperation,
+    SyncTaskStatus,
+    SyncTaskTrigger,
+)
 from bkuser.apps.tenant.models import Tenant
 from bkuser.common.models import TimestampedModel
 from bkuser.utils.uuid import generate_uuid
@@ -57,6 +63,28 @@ class DataSourceSyncTask(TimestampedModel):
         return _("数据源导入成功") if self.status == SyncTaskStatus.SUCCESS else _("数据源导入失败")
 
 
+class BaseSyncTaskLog(TimestampedModel):
+    """同步任务日志（结构化存储，每行为一条日志，相同的日志会被聚合为一行并记录重复次数）"""
+
+    seq = models.IntegerField("日志序号")
+    phase = models.CharField("所属阶段", choices=SyncLogPhase.get_choices(), max_length=32)
+    level = models.CharField("日志等级", choices=SyncLogLevel.get_choices(), max_length=32)
+    message = models.TextField("日志内容")
+    count = models.IntegerField("重复次数", default=1)
+
+    class Meta:
+        abstract = True
+        ordering = ["seq", "id"]
+
+
+class DataSourceSyncTaskLog(BaseSyncTaskLog):
+    """数据源同步任务日志"""
+
+    task = models.ForeignKey(
+        DataSourceSyncTask, on_delete=models.CASCADE, db_constraint=False, related_name="log_entries"
+    )
+
+
 class DataSourceUserChangeLog(TimestampedModel):
     """数据源用户变更日志"""
 
@@ -111,6 +139,12 @@ class TenantSyncTask(TimestampedModel):
         ordering = ["-id"]
 
 
+class TenantSyncTaskLog(BaseSyncTaskLog):
+    """租户同步任务日志"""
+
+    task = models.ForeignKey(TenantSyncTask, on_delete=models.CASCADE, db_constraint=False, related_name="log_entries")
+
+
 class TenantUserChangeLog(TimestampedModel):
     """租户用户变更日志"""
 
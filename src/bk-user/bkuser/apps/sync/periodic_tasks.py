@@ -17,16 +17,17 @@
 
 import logging
 from datetime import timedelta
+from typing import List, Type
 
-from django.db.models import F, Value
+from django.db.models import F, Max, Value
 from django.db.models.functions import Concat
 from django.utils import timezone
 
 from bkuser.apps.data_source.models import DataSource
-from bkuser.apps.sync.constants import SyncTaskStatus, SyncTaskTrigger
+from bkuser.apps.sync.constants import SyncLogLevel, SyncLogPhase, SyncTaskStatus, SyncTaskTrigger
 from bkuser.apps.sync.data_models import DataSourceSyncOptions
 from bkuser.apps.sync.managers import DataSourceSyncManager
-from bkuser.apps.sync.models import DataSourceSyncTask, TenantSyncTask
+from bkuser.apps.sync.models import DataSourceSyncTask, DataSourceSyncTaskLog, TenantSyncTask, TenantSyncTaskLog
 from bkuser.celery import app
 from bkuser.common.task import BaseTask
 
@@ -63,24 +64,50 @@ def mark_running_sync_task_as_failed_if_exceed_one_day():
     logger.info("[celery-beat] start mark running sync task as failed if exceed one day")
 
     time_now = timezone.now()
-    error_msg = "\n\nERROR sync task runs more than one day, consider it as failed."
-
-    DataSourceSyncTask.objects.filter(
-        status__in=[SyncTaskStatus.PENDING, SyncTaskStatus.RUNNING],
-        start_at__lt=time_now - timedelta(days=1),
-    ).update(
-        status=SyncTaskStatus.FAILED,
-        logs=Concat(F("logs"), Value(error_msg)),
-        updated_at=time_now,
-    )
+    error_msg = "sync task runs more than one day, consider it as failed."
 
-    TenantSyncTask.objects.filter(
-        status__in=[SyncTaskStatus.PENDING, SyncTaskStatus.RUNNING],
-        start_at__lt=time_now - timedelta(days=1),
-    ).update(
-        status=SyncTaskStatus.FAILED,
-        logs=Concat(F("logs"), Value(error_msg)),
-        updated_at=time_now,
-    )
+    for task_model, log_model in [
+        (DataSourceSyncTask, DataSourceSyncTaskLog),
+        (TenantSyncTask, TenantSyncTaskLog),
+    ]:
+        task_ids = list(
+            task_model.objects.filter(
+                status__in=[SyncTaskStatus.PENDING, SyncTaskStatus.RUNNING],
+                start_at__lt=time_now - timedelta(days=1),
+            ).values_list("id", flat=True)
+        )
+        if not task_ids:
+            continue
+
+        task_model.objects.filter(id__in=task_ids).update(
+            status=SyncTaskStatus.FAILED,
+            logs=Concat(F("logs"), Value(f"\n\nERROR {error_msg}")),
+            updated_at=time_now,
+        )
+        _append_sync_task_error_logs(log_model, task_ids, error_msg)
 
     logger.info("[celery-beat] mark running sync task as failed if exceed one day end")
+
+
+def _append_sync_task_error_logs(
+    log_model: Type[DataSourceSyncTaskLog] | Type[TenantSyncTaskLog], task_ids: List[int], message: str
+):
+    """为同步任务追加 ERROR 级别的结构化日志（序号在任务已有的日志之后）"""
+    max_seq_map = dict(
+        log_model.objects.filter(task_id__in=task_ids)
+        .values("task_id")
+        .annotate(max_seq=Max("seq"))
+        .values_list("task_id", "max_seq")
+    )
+    log_model.objects.bulk_create(
+        [
+            log_model(
+                task_id=task_id,
+                seq=max_seq_map.get(task_id, 0) + 1,
+                phase=SyncLogPhase.FINISH,
+                level=SyncLogLevel.ERROR,
+                message=message,
+            )
+            for task_id in task_ids
+        ]
+    )
@@ -15,9 +15,11 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import json
 import logging
-from collections import defaultdict
-from typing import Dict, List, Tuple
+import tempfile
+from collections import Counter, defaultdict
+from typing import IO, Dict, Iterable, Iterator, List, NamedTuple, Tuple
 
 from bkuser.apps.data_source.models import DataSourceDepartment, DataSourceUser
 from bkuser.apps.sync.constants import DataSourceSyncObjectType, SyncOperation, TenantSyncObjectType
@@ -51,3 +53,66 @@ class ChangeLogRecorder:
     ) -> List[DataSourceUser | DataSourceDepartment | TenantUser | TenantDepartment]:
         """获取某类型某操作的变更日志"""
         return self.records[(operation, type)]
+
+
+class ChangeLogEntry(NamedTuple):
+    """变更条目（仅包含记录变更日志所需的字段）"""
+
+    operation: SyncOperation
+    type: DataSourceSyncObjectType
+    # 对象 ID，为 None 表示 bulk_create 未回填主键，需要在写入变更日志时根据 code 查询
+    id: int | None
+    code: str
+    # 用户为用户名，部门为部门名称
+    name: str
+    # 用户姓名，部门为空字符串
+    full_name: str
+
+
+class SpooledChangeLogRecorder:
+    """
+    变更日志记录器（暂存到临时文件）
+
+    Q: 为什么不直接使用 ChangeLogRecorder？
+    A: ChangeLogRecorder 会持有全部变更对象（模型实例）直到同步结束，数据源首次同步（如 30w 用户）时会占用大量内存；
+       该记录器在添加时，即将变更对象转换成精简的变更条目落盘，最终按批次流式读取，峰值内存与变更数量无关
+    """
+
+    def __init__(self):
+        # 文件会在 close() 中被关闭（临时文件关闭后自动删除）
+        self._file: IO[bytes] = tempfile.TemporaryFile()  # noqa: SIM115
+        self._counter: Counter[Tuple[SyncOperation, DataSourceSyncObjectType]] = Counter()
+
+    def add(
+        self,
+        operation: SyncOperation,
+        type: DataSourceSyncObjectType,
+        items: Iterable[DataSourceUser | DataSourceDepartment],
+    ):
+        """添加某类型某操作的变更日志"""
+        for item in items:
+            if isinstance(item, DataSourceUser):
+                entry = [operation, type, item.id, item.code, item.username, item.full_name]
+            else:
+                entry = [operation, type, item.id, item.code, item.name, ""]
+
+            self._file.write(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n")
+            self._counter[(operation, type)] += 1
+
+    def count(self, operation: SyncOperation, type: DataSourceSyncObjectType) -> int:
+        """获取某类型某操作的变更数量"""
+        return self._counter[(operation, type)]
+
+    def iter_entries(self) -> Iterator[ChangeLogEntry]:
+        """按添加顺序迭代所有变更条目"""
+        self._file.flush()
+        self._file.seek(0)
+        for line in self._file:
+            operation, type, id, code, name, full_name = json.loads(line)
+            yield ChangeLogEntry(SyncOperation(operation), DataSourceSyncObjectType(type), id, code, name, full_name)
+
+        # 迭代结束后，需要将文件指针移动到末尾，以免影响后续的追加写入
+        self._file.seek(0, 2)
+
+    def close(self):
+        self._file.close()
@@ -18,13 +18,17 @@
 # ignore custom logger must use %s string format in this file
 # ruff: noqa: G004
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List
+
+from django.conf import settings
 
 from bkuser.apps.data_source.models import DataSource, DataSourceUser
-from bkuser.apps.sync.constants import DataSourceSyncObjectType
+from bkuser.apps.sync.constants import DataSourceSyncObjectType, SyncLogPhase
 from bkuser.apps.sync.contexts import DataSourceSyncTaskContext
+from bkuser.apps.sync.fetchers import DataSourceUserFetcher
 from bkuser.apps.sync.models import DataSourceSyncTask
 from bkuser.apps.sync.signals import post_sync_data_source
+from bkuser.apps.sync.spools import RawDataSourceUserSpool
 from bkuser.apps.sync.syncers import (
     DataSourceDepartmentRelationSyncer,
     DataSourceDepartmentSyncer,
@@ -36,6 +40,7 @@ from bkuser.apps.sync.validators import DataSourceUserExtrasUniqueValidator
 from bkuser.apps.tenant.constants import TenantStatus
 from bkuser.apps.tenant.models import Tenant
 from bkuser.plugins.base import get_plugin_cls
+from bkuser.plugins.models import RawDataSourceDepartment, RawDataSourceUser
 
 logger = logging.getLogger(__name__)
 
@@ -54,8 +59,11 @@ class DataSourceSyncTaskRunner:
 
         with DataSourceSyncTaskContext(self.task) as ctx:
             self._initial_plugin(ctx, self.plugin_init_extra_kwargs)
-            self._sync_departments(ctx)
-            self._sync_users(ctx)
+            raw_departments = self._fetch_departments(ctx)
+            # 部门数据拉取完成后，用户数据的拉取可以与部门数据的同步（DB 写入）并行进行
+            with self._new_user_fetcher(ctx) as user_fetcher:
+                self._sync_departments(ctx, raw_departments)
+                self._sync_users(ctx, user_fetcher)
             self._validate_unique_fields(ctx)
             self._send_signal(ctx)
 
@@ -78,11 +86,23 @@ class DataSourceSyncTaskRunner:
         PluginCls = get_plugin_cls(self.data_source.plugin_id)  # noqa: N806
         self.plugin = PluginCls(plugin_cfg, ctx.logger, **plugin_init_extra_kwargs)
 
-    def _sync_departments(self, ctx: DataSourceSyncTaskContext):
-        """同步部门信息"""
+    def _fetch_departments(self, ctx: DataSourceSyncTaskContext) -> List[RawDataSourceDepartment]:
+        """拉取部门信息"""
         raw_departments = self.plugin.fetch_departments()
         ctx.logger.info(f"receive {len(raw_departments)} departments from data source plugin")
+        return raw_departments
+
+    def _new_user_fetcher(self, ctx: DataSourceSyncTaskContext) -> DataSourceUserFetcher:
+        """创建用户数据拉取器，若启用预拉取，则会在后台线程中开始拉取用户数据"""
+        prefetch = settings.DATA_SOURCE_SYNC_PREFETCH_USERS
+        if prefetch:
+            ctx.logger.info("prefetch users from data source plugin while syncing departments")
 
+        return DataSourceUserFetcher(self.plugin, settings.DATA_SOURCE_SYNC_USER_CHUNK_SIZE, prefetch, ctx.logger)
+
+    def _sync_departments(self, ctx: DataSourceSyncTaskContext, raw_departments: List[RawDataSourceDepartment]):
+        """同步部门信息"""
+        ctx.logger.phase = SyncLogPhase.DEPARTMENT
         kwargs = {
             "ctx": ctx,
             "data_source": self.data_source,
@@ -99,9 +119,22 @@ class DataSourceSyncTaskRunner:
 
         ctx.logger.info("succeed to sync departments and their relations from data source plugin")
 
-    def _sync_users(self, ctx: DataSourceSyncTaskContext):
+    def _sync_users(self, ctx: DataSourceSyncTaskContext, user_fetcher: DataSourceUserFetcher):
         """同步用户信息"""
-        raw_users = self.plugin.fetch_users()
+        ctx.logger.phase = SyncLogPhase.USER
+        chunk_size = settings.DATA_SOURCE_SYNC_USER_CHUNK_SIZE
+        if chunk_size > 0:
+            ctx.logger.info(f"sync users in chunk mode, chunk size is {chunk_size}")
+
+        self._sync_raw_users(ctx, user_fetcher.fetch(), chunk_size)
+
+    def _sync_raw_users(
+        self,
+        ctx: DataSourceSyncTaskContext,
+        raw_users: List[RawDataSourceUser] | RawDataSourceUserSpool,
+        chunk_size: int,
+    ):
+        """同步用户主体，用户 Leader 关系，用户部门关系"""
         ctx.logger.info(f"receive {len(raw_users)} users from data source plugin")
 
         kwargs = {
@@ -121,7 +154,7 @@ class DataSourceSyncTaskRunner:
         # ref: https://github.com/TencentBlueKing/bk-user/pull/1904/files
         exists_user_ids = set(DataSourceUser.objects.filter(data_source=self.data_source).values_list("id", flat=True))
         # 用户主体
-        DataSourceUserSyncer(**kwargs).sync()  # type: ignore
+        DataSourceUserSyncer(chunk_size=chunk_size, **kwargs).sync()  # type: ignore
         ctx.synced_obj_types.add(DataSourceSyncObjectType.USER)
         # 用户 Leader 关系
         DataSourceUserLeaderRelationSyncer(exists_user_ids_before_sync=exists_user_ids, **kwargs).sync()  # type: ignore
@@ -134,6 +167,7 @@ class DataSourceSyncTaskRunner:
 
     def _validate_unique_fields(self, ctx: DataSourceSyncTaskContext):
         """对有唯一性要求的自定义字段的校验"""
+        ctx.logger.phase = SyncLogPhase.VALIDATE
         DataSourceUserExtrasUniqueValidator(self.data_source, ctx.logger).validate()
 
     def _send_signal(self, ctx: DataSourceSyncTaskContext):
@@ -161,6 +195,7 @@ class DataSourceSyncTaskRunner:
 
          注意：其中场景 2 出现概率极低（原因是 mptt 树是直接重建的，除非 tree_id 分配到 int 上限导致失败，需运维介入）
         """
+        ctx.logger.phase = SyncLogPhase.FINISH
         ctx.logger.info(f"current synced object types is {[t.value for t in ctx.synced_obj_types]}")
 
         if (
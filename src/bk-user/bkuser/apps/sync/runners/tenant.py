@@ -18,6 +18,7 @@
 import logging
 
 from bkuser.apps.data_source.models import DataSource
+from bkuser.apps.sync.constants import SyncLogPhase
 from bkuser.apps.sync.contexts import TenantSyncTaskContext
 from bkuser.apps.sync.models import TenantSyncTask
 from bkuser.apps.sync.signals import post_sync_tenant
@@ -68,10 +69,12 @@ class TenantSyncTaskRunner:
 
     def _sync_departments(self, ctx: TenantSyncTaskContext):
         """同步部门信息"""
+        ctx.logger.phase = SyncLogPhase.DEPARTMENT
         TenantDepartmentSyncer(ctx, self.data_source, self.tenant).sync()
 
     def _sync_users(self, ctx: TenantSyncTaskContext):
         """同步用户信息"""
+        ctx.logger.phase = SyncLogPhase.USER
         TenantUserSyncer(ctx, self.data_source, self.tenant).sync()
 
     def _send_signal(self):
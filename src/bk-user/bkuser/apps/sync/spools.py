@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import tempfile
+from typing import IO, Iterable, Iterator
+
+from bkuser.plugins.models import RawDataSourceUser
+
+
+class RawDataSourceUserSpool:
+    """
+    原始数据源用户暂存池，将插件提供的用户数据逐条落盘到临时文件中，支持重复迭代
+
+    Q: 为什么不直接使用 List[RawDataSourceUser]？
+    A: 用户量较大（如 30w）时，全量的 pydantic 对象会占用数 GB 内存，落盘后同步器按块（chunk）读取 & 处理数据，
+       峰值内存只和块大小相关，而与数据源总用户数无关
+    """
+
+    def __init__(self):
+        # 文件会在 close() 中被关闭（临时文件关闭后自动删除）
+        self._file: IO[bytes] = tempfile.TemporaryFile()  # noqa: SIM115
+        self._count = 0
+
+    def __enter__(self) -> "RawDataSourceUserSpool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[RawDataSourceUser]:
+        self._file.flush()
+        self._file.seek(0)
+        for line in self._file:
+            yield RawDataSourceUser.model_validate_json(line)
+
+        # 迭代结束后，需要将文件指针移动到末尾，以免影响后续的追加写入
+        self._file.seek(0, 2)
+
+    def extend(self, users: Iterable[RawDataSourceUser]):
+        """追加用户数据到暂存池中"""
+        for u in users:
+            self._file.write(u.model_dump_json().encode("utf-8") + b"\n")
+            self._count += 1
+
+    def close(self):
+        self._file.close()
@@ -17,8 +17,10 @@
 
 # ignore custom logger must use %s string format in this file
 # ruff: noqa: G004
-from typing import Dict, List, Set
+from collections import Counter
+from typing import Any, Dict, List, Set, Tuple
 
+from django.conf import settings
 from django.db import transaction
 from django.db.models import QuerySet
 from django.utils import timezone
@@ -32,7 +34,8 @@ from bkuser.apps.data_source.models import (
 from bkuser.apps.sync.constants import DataSourceSyncObjectType, SyncOperation
 from bkuser.apps.sync.contexts import DataSourceSyncTaskContext
 from bkuser.plugins.models import RawDataSourceDepartment
-from bkuser.utils.tree import bfs_traversal_tree, build_forest_with_parent_relations
+from bkuser.utils.django import bulk_create_with_pks
+from bkuser.utils.tree import TreeNode, bfs_traversal_tree, build_forest_with_parent_relations
 
 
 class DataSourceDepartmentSyncer:
@@ -83,15 +86,27 @@ class DataSourceDepartmentSyncer:
             # Q: 为什么这里的顺序应该是 1. 删除 2. 更新 3. 创建
             # A: 同步操作原则是数据库尽可能 “干净” 以避免冲突，因此删除是最优先的，可以让数据更少，
             #  而更新放在第二步的原因是 “挪窝”，可以避免一些已有的数据和待创建的数据冲突导致同步失败
+            # 删除的部门需要在删除前记录（QuerySet 在删除后再求值就获取不到数据了）
+            self.ctx.recorder.add(
+                SyncOperation.DELETE,
+                DataSourceSyncObjectType.DEPARTMENT,
+                waiting_delete_depts.iterator(self.batch_size),
+            )
             waiting_delete_depts.delete()
             DataSourceDepartment.objects.bulk_update(
                 waiting_update_depts, fields=["name", "extras", "updated_at"], batch_size=self.batch_size
             )
-            DataSourceDepartment.objects.bulk_create(waiting_create_depts, batch_size=self.batch_size)
+            # 在创建时即回填主键，记录变更时不需要再根据 code 查询
+            bulk_create_with_pks(
+                DataSourceDepartment,
+                waiting_create_depts,
+                "code",
+                batch_size=self.batch_size,
+                data_source=self.data_source,
+            )
 
         # 数据源部门同步相关日志
-        self.ctx.logger.info(f"delete {len(waiting_delete_depts)} departments")
-        self.ctx.recorder.add(SyncOperation.DELETE, DataSourceSyncObjectType.DEPARTMENT, waiting_delete_depts)
+        self.ctx.logger.info(f"delete {len(waiting_delete_dept_codes)} departments")
 
         self.ctx.logger.info(f"update {len(waiting_update_depts)} departments")
         self.ctx.recorder.add(SyncOperation.UPDATE, DataSourceSyncObjectType.DEPARTMENT, waiting_update_depts)
@@ -179,26 +194,112 @@ class DataSourceDepartmentRelationSyncer:
         # {dept_code: parent_dept_code}
         dept_parent_code_map = {dept.code: dept.parent for dept in self.raw_departments}
 
-        # 如果是增量同步模式，则需要将存量的部门关系捞出来，和新的合并下，再删除重建
-        # Q: 为什么不是增量模式时候，一通对比之后，直接往现有的 MPTT 森林里面塞节点？
-        # A: MPTT 树结构复杂，变更操作可能存在风险，且后台任务对性能要求不高，先用简单的删除重建方案
+        # 如果是增量同步模式，则需要将存量的部门关系捞出来，和新的合并
         if self.incremental:
-            for relation in DataSourceDepartmentRelation.objects.filter(data_source=self.data_source):
+            exists_parent_relations = DataSourceDepartmentRelation.objects.filter(
+                data_source=self.data_source
+            ).values_list("department__code", "parent__department__code")
+            for dept_code, parent_dept_code in exists_parent_relations:
                 # 如果某个部门有新的父部门，则跳过
-                if relation.department.code in dept_parent_code_map:
+                if dept_code in dept_parent_code_map:
                     continue
 
-                dept_parent_code_map[relation.department.code] = (
-                    relation.parent.department.code if relation.parent else None
+                dept_parent_code_map[dept_code] = parent_dept_code
+
+        # 根据部门父子关系，构建森林
+        forest_roots = build_forest_with_parent_relations(list(dept_parent_code_map.items()))
+
+        if settings.DATA_SOURCE_SYNC_DEPT_RELATION_REBUILD:
+            self._rebuild_department_relations(dept_code_map, dept_parent_code_map, forest_roots)
+        else:
+            self._patch_department_relations(dept_code_map, forest_roots)
+
+    def _patch_department_relations(
+        self, dept_code_map: Dict[str, DataSourceDepartment], forest_roots: List[TreeNode]
+    ):
+        """
+        基于现有的 MPTT 森林，对部门关系进行差异更新
+
+        在 Python 中计算出目标森林各节点的 parent, tree_id, lft, rght, level，再与 DB 中的现有数据比对，
+        仅创建新增的节点，更新发生变化（如移动，或因其他节点变动导致 lft / rght 偏移）的节点，删除不再存在的节点，
+        且尽可能复用现有的 tree_id，仅当没有可复用的 tree_id 时，才会分配新的 tree_id
+        """
+        # {dept_id: (parent_id, tree_id, lft, rght, level)}
+        exists_rel_values_map: Dict[int, Tuple[int | None, int, int, int, int]] = {
+            dept_id: (parent_id, tree_id, lft, rght, level)
+            for dept_id, parent_id, tree_id, lft, rght, level in DataSourceDepartmentRelation.objects.filter(
+                data_source=self.data_source
+            ).values_list("department_id", "parent_id", "tree_id", "lft", "rght", "level")
+        }
+
+        trees = [self._calc_mptt_tree_nodes(root, dept_code_map) for root in forest_roots]
+        # 优先为规模较大的树分配 tree_id，使得更多的节点能够保持 tree_id 不变
+        trees.sort(key=len, reverse=True)
+
+        waiting_create_relations: List[DataSourceDepartmentRelation] = []
+        waiting_update_relations: List[DataSourceDepartmentRelation] = []
+        target_dept_ids: Set[int] = set()
+        claimed_tree_ids: Set[int] = set()
+        updated_at = timezone.now()
+
+        for nodes in trees:
+            tree_id = self._claim_tree_id(nodes, exists_rel_values_map, claimed_tree_ids)
+            claimed_tree_ids.add(tree_id)
+
+            for dept_id, (parent_id, lft, rght, level) in nodes.items():
+                target_dept_ids.add(dept_id)
+
+                values = (parent_id, tree_id, lft, rght, level)
+                if exists_rel_values_map.get(dept_id) == values:
+                    continue
+
+                relation = DataSourceDepartmentRelation(
+                    data_source=self.data_source,
+                    department_id=dept_id,
+                    parent_id=parent_id,
+                    tree_id=tree_id,
+                    lft=lft,
+                    rght=rght,
+                    level=level,
                 )
+                if dept_id in exists_rel_values_map:
+                    relation.updated_at = updated_at
+                    waiting_update_relations.append(relation)
+                else:
+                    waiting_create_relations.append(relation)
 
+        waiting_delete_dept_ids = exists_rel_values_map.keys() - target_dept_ids
+
+        with DataSourceDepartmentRelation.objects.disable_mptt_updates(), transaction.atomic():
+            # Q: 为什么这里的顺序是 1. 创建 2. 更新 3. 删除
+            # A: 节点按先序遍历顺序创建，可确保父节点先于子节点创建；已有的节点可能被移动到新的节点下，
+            #  因此更新需要在创建后；而删除时会级联删除子节点，因此需要在子节点都被移动到新的父节点下之后才能执行
+            DataSourceDepartmentRelation.objects.bulk_create(waiting_create_relations, batch_size=self.batch_size)
+            DataSourceDepartmentRelation.objects.bulk_update(
+                waiting_update_relations,
+                fields=["parent", "tree_id", "lft", "rght", "level", "updated_at"],
+                batch_size=self.batch_size,
+            )
+            DataSourceDepartmentRelation.objects.filter(
+                data_source=self.data_source, department_id__in=waiting_delete_dept_ids
+            ).delete()
+
+        self.ctx.logger.info(f"create {len(waiting_create_relations)} department relations")
+        self.ctx.logger.info(f"update {len(waiting_update_relations)} department relations")
+        self.ctx.logger.info(f"delete {len(waiting_delete_dept_ids)} department relations")
+        self.ctx.logger.info(f"data source has {len(trees)} department tree(s) currently")
+
+    def _rebuild_department_relations(
+        self,
+        dept_code_map: Dict[str, DataSourceDepartment],
+        dept_parent_code_map: Dict[str, str | None],
+        forest_roots: List[TreeNode],
+    ):
+        """删除当前数据源所有的部门关系，再全量重建"""
         # {dept_code: data_source_dept_relation}
         dept_code_rel_map: Dict[str, DataSourceDepartmentRelation] = {}
         mptt_tree_ids: Set[int] = set()
 
-        parent_relations = list(dept_parent_code_map.items())
-        # 根据部门父子关系，构建森林
-        forest_roots = build_forest_with_parent_relations(parent_relations)
         # 逐棵树进行便利，因为需要保证一棵树的节点拥有相同的 tree_id
         for root in forest_roots:
             tree_id = self._generate_tree_id(self.data_source)
@@ -238,11 +339,61 @@ class DataSourceDepartmentRelationSyncer:
         self.ctx.logger.info(f"re-create {len(dept_code_rel_map)} department relations")
         self.ctx.logger.info(f"data source has {len(mptt_tree_ids)} department tree(s) currently")
 
+    @staticmethod
+    def _calc_mptt_tree_nodes(root: TreeNode, dept_code_map: Dict[str, DataSourceDepartment]) -> Dict[int, List[Any]]:
+        """
+        计算树中各节点的 MPTT 字段，返回结构：{dept_id: [parent_id, lft, rght, level]}
+
+        返回的节点按先序遍历顺序排列（父节点先于子节点），兄弟节点按部门 ID 排序，以确保计算结果稳定
+        NOTE: 树的深度可能较大，因此使用栈而非递归实现深度优先遍历
+        """
+        nodes: Dict[int, List[Any]] = {}
+        counter = 1
+        # 栈元素：(节点, 父部门 ID, 层级, 是否已访问过子节点)
+        stack: List[Tuple[TreeNode, int | None, int, bool]] = [(root, None, 0, False)]
+        while stack:
+            node, parent_id, level, visited = stack.pop()
+            dept_id = dept_code_map[node.id].id
+            # 子节点都已经分配过 lft, rght，可以确定当前节点的 rght
+            if visited:
+                nodes[dept_id][2] = counter
+                counter += 1
+                continue
+
+            nodes[dept_id] = [parent_id, counter, 0, level]
+            counter += 1
+
+            stack.append((node, parent_id, level, True))
+            children = sorted(node.children, key=lambda n: dept_code_map[n.id].id, reverse=True)
+            stack.extend((child, dept_id, level + 1, False) for child in children)
+
+        return nodes
+
+    def _claim_tree_id(
+        self,
+        nodes: Dict[int, List[Any]],
+        exists_rel_values_map: Dict[int, Tuple[int | None, int, int, int, int]],
+        claimed_tree_ids: Set[int],
+    ) -> int:
+        """为树分配 tree_id，优先复用树中大多数节点原有的 tree_id，若都已被其他树占用，则分配新的 tree_id"""
+        tree_id_counter = Counter(
+            exists_rel_values_map[dept_id][1] for dept_id in nodes if dept_id in exists_rel_values_map
+        )
+        for tree_id, _ in tree_id_counter.most_common():
+            if tree_id not in claimed_tree_ids:
+                return tree_id
+
+        return self._generate_tree_id(self.data_source)
+
     @staticmethod
     def _generate_tree_id(data_source: DataSource) -> int:
         """
         在 MPTT 中，单个 tree_id 只能用于一棵树，因此需要为不同的树分配不同的 ID
 
         分配实现：利用 MySQL 自增 ID 分配 tree_id（不需要包含到事务中，虽然可能造成浪费）
+        NOTE: 在页面上新建根部门时，由 MPTT 分配 tree_id（最大值 + 1），可能与自增 ID 冲突，因此需要跳过已被使用的 ID
         """
-        return DepartmentRelationMPTTTree.objects.create(data_source=data_source).id
+        while True:
+            tree_id = DepartmentRelationMPTTTree.objects.create(data_source=data_source).id
+            if not DataSourceDepartmentRelation.objects.filter(tree_id=tree_id).exists():
+                return tree_id
@@ -17,7 +17,7 @@
 
 # ignore custom logger must use %s string format in this file
 # ruff: noqa: G003, G004
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
 
 from django.db import transaction
 from django.db.models import QuerySet
@@ -28,17 +28,21 @@ from bkuser.apps.data_source.models import (
     DataSourceDepartment,
     DataSourceDepartmentUserRelation,
     DataSourceUser,
+    DataSourceUserExtrasIndex,
     DataSourceUserLeaderRelation,
+    DataSourceUserSearchToken,
 )
 from bkuser.apps.sync.constants import DataSourceSyncObjectType, SyncOperation
 from bkuser.apps.sync.contexts import DataSourceSyncTaskContext
 from bkuser.apps.sync.converters import DataSourceUserConverter
 from bkuser.apps.tenant.utils import is_username_frozen
 from bkuser.plugins.models import RawDataSourceUser
+from bkuser.utils.django import bulk_create_with_pks
+from bkuser.utils.iterx import chunked
 
 
 class DataSourceUserSyncer:
-    """数据源用户同步器，支持覆盖更新，日志记录等"""
+    """数据源用户同步器，支持覆盖更新，分块处理，日志记录等"""
 
     # 单次批量创建 / 更新数量
     batch_size = 250
@@ -47,10 +51,15 @@ class DataSourceUserSyncer:
         self,
         ctx: DataSourceSyncTaskContext,
         data_source: DataSource,
-        raw_users: List[RawDataSourceUser],
+        raw_users: Iterable[RawDataSourceUser],
         overwrite: bool,
         incremental: bool,
+        chunk_size: int = 0,
     ):
+        """
+        :param raw_users: 原始用户数据，需要支持重复迭代（如列表，RawDataSourceUserSpool）
+        :param chunk_size: 分块处理的用户数量，为 0 则表示不分块（全部用户数据作为一块进行 diff & 变更）
+        """
         # 增量模式下才可以选择覆不覆盖，全量模式下只有覆盖
         if not (incremental or overwrite):
             raise ValueError("incremental or overwrite must be True")
@@ -60,6 +69,7 @@ class DataSourceUserSyncer:
         self.raw_users = raw_users
         self.overwrite = overwrite
         self.incremental = incremental
+        self.chunk_size = chunk_size
         self.converter = DataSourceUserConverter(data_source, ctx.logger)
         # 由于在部分老版本迁移过来的数据源中租户用户 ID 会由 username + 规则 拼接生成，
         # 该类数据源同步时候不可更新 username，而全新数据源对应租户 ID 都是 uuid 则不受影响
@@ -79,29 +89,63 @@ class DataSourceUserSyncer:
         waiting_update_user_codes = user_codes & raw_user_codes if self.overwrite else set()
 
         waiting_delete_users = self._get_waiting_delete_users(waiting_delete_user_codes)
-        waiting_update_users = self._get_waiting_update_users(self.raw_users, waiting_update_user_codes)
-        waiting_create_users = self._get_waiting_create_users(self.raw_users, waiting_create_user_codes)
+        update_user_count, create_user_count = 0, 0
 
         with transaction.atomic():
             # Q: 为什么这里的顺序应该是 1. 删除 2. 更新 3. 创建
             # A: 同步操作原则是数据库尽可能 “干净” 以避免冲突，因此删除是最优先的，可以让数据更少，
             #  而更新放在第二步的原因是 “挪窝”，可以避免一些已有的数据和待创建的数据冲突导致同步失败
-            waiting_delete_users.delete()
-            DataSourceUser.objects.bulk_update(
-                waiting_update_users,
-                fields=["username", "full_name", "email", "phone", "phone_country_code", "extras", "updated_at"],
-                batch_size=self.batch_size,
+            # NOTE: 分块模式下，需要所有块都完成更新后，才能开始创建，因此需要迭代两轮
+            # NOTE: 变更记录在变更时按块写入记录器（暂存到临时文件），不会在内存中持有所有变更的用户
+            # 删除的用户需要在删除前记录（QuerySet 在删除后再求值就获取不到数据了）
+            self.ctx.recorder.add(
+                SyncOperation.DELETE, DataSourceSyncObjectType.USER, waiting_delete_users.iterator(self.batch_size)
             )
-            DataSourceUser.objects.bulk_create(waiting_create_users, batch_size=self.batch_size)
+            waiting_delete_users.delete()
+            for raw_users in self._iter_raw_user_chunks():
+                users, fix_hash_users = self._get_waiting_update_users(raw_users, waiting_update_user_codes)
+                DataSourceUser.objects.bulk_update(
+                    users,
+                    fields=[
+                        "username",
+                        "full_name",
+                        "email",
+                        "phone",
+                        "phone_country_code",
+                        "extras",
+                        "content_hash",
+                        "updated_at",
+                    ],
+                    batch_size=self.batch_size,
+                )
+                DataSourceUser.objects.bulk_update(fix_hash_users, fields=["content_hash"], batch_size=self.batch_size)
+                DataSourceUserExtrasIndex.objects.refresh(self.data_source.id, users)
+                DataSourceUserSearchToken.objects.refresh(self.data_source.id, users)
+                self.ctx.recorder.add(SyncOperation.UPDATE, DataSourceSyncObjectType.USER, users)
+                update_user_count += len(users)
+
+            for raw_users in self._iter_raw_user_chunks():
+                users = self._get_waiting_create_users(raw_users, waiting_create_user_codes)
+                # 在创建时即回填主键，后续的索引刷新 & 变更记录都不需要再根据 code 查询
+                bulk_create_with_pks(
+                    DataSourceUser, users, "code", batch_size=self.batch_size, data_source=self.data_source
+                )
+                DataSourceUserExtrasIndex.objects.refresh(self.data_source.id, users)
+                DataSourceUserSearchToken.objects.refresh(self.data_source.id, users)
+                self.ctx.recorder.add(SyncOperation.CREATE, DataSourceSyncObjectType.USER, users)
+                create_user_count += len(users)
 
-        self.ctx.logger.info(f"delete {len(waiting_delete_users)} users")
-        self.ctx.recorder.add(SyncOperation.DELETE, DataSourceSyncObjectType.USER, waiting_delete_users)
+        self.ctx.logger.info(f"delete {len(waiting_delete_user_codes)} users")
+        self.ctx.logger.info(f"update {update_user_count} users")
+        self.ctx.logger.info(f"create {create_user_count} users")
 
-        self.ctx.logger.info(f"update {len(waiting_update_users)} users")
-        self.ctx.recorder.add(SyncOperation.UPDATE, DataSourceSyncObjectType.USER, waiting_update_users)
+    def _iter_raw_user_chunks(self) -> Iterator[List[RawDataSourceUser]]:
+        """按块迭代原始用户数据，未指定块大小时，所有用户数据作为一块返回"""
+        if self.chunk_size <= 0:
+            yield list(self.raw_users)
+            return
 
-        self.ctx.logger.info(f"create {len(waiting_create_users)} users")
-        self.ctx.recorder.add(SyncOperation.CREATE, DataSourceSyncObjectType.USER, waiting_create_users)
+        yield from chunked(self.raw_users, self.chunk_size)
 
     def _get_waiting_delete_users(self, user_codes: Set[str]) -> QuerySet[DataSourceUser]:
         return DataSourceUser.objects.filter(data_source=self.data_source, code__in=user_codes)
@@ -109,20 +153,37 @@ class DataSourceUserSyncer:
     def _get_waiting_create_users(
         self, raw_users: List[RawDataSourceUser], waiting_create_user_codes: Set[str]
     ) -> List[DataSourceUser]:
-        return [self.converter.convert(u) for u in raw_users if u.code in waiting_create_user_codes]
+        users = [self.converter.convert(u) for u in raw_users if u.code in waiting_create_user_codes]
+        # bulk_create 不会调用 save 方法，因此需要手动计算内容哈希
+        for u in users:
+            u.content_hash = u.gen_content_hash()
+
+        return users
 
     def _get_waiting_update_users(
         self, raw_users: List[RawDataSourceUser], waiting_update_user_codes: Set[str]
-    ) -> List[DataSourceUser]:
+    ) -> Tuple[List[DataSourceUser], List[DataSourceUser]]:
+        """获取需要更新的用户，返回值：(数据有变更的用户，仅需要修正内容哈希的用户)"""
         if not waiting_update_user_codes:
-            return []
+            return [], []
 
         user_map = {u.code: self.converter.convert(u) for u in raw_users}
 
-        may_update_users = DataSourceUser.objects.filter(
+        # 先通过 (code, content_hash) 进行预筛选，只有内容哈希不一致的用户，才需要捞出完整数据进行对比
+        # 这样在数据源没有变更的情况下，只需要一次索引扫描，而不需要加载 & 对比所有用户的完整数据
+        exists_user_hashes = DataSourceUser.objects.filter(
             data_source=self.data_source, code__in=[u.code for u in raw_users]
-        )
-        waiting_update_users = []
+        ).values_list("code", "content_hash")
+        may_update_user_codes = [
+            code
+            for code, content_hash in exists_user_hashes
+            if code in waiting_update_user_codes and content_hash != user_map[code].gen_content_hash()
+        ]
+        if not may_update_user_codes:
+            return [], []
+
+        may_update_users = DataSourceUser.objects.filter(data_source=self.data_source, code__in=may_update_user_codes)
+        waiting_update_users, waiting_fix_hash_users = [], []
         for u in may_update_users:
             # 先进行 diff，不是所有的用户都要被更新，只有有字段不一致的，才需要更新
             target_user = user_map[u.code]
@@ -134,6 +195,11 @@ class DataSourceUserSyncer:
                 and u.phone_country_code == target_user.phone_country_code
                 and u.extras == target_user.extras
             ):
+                # 数据没有变更，但是内容哈希不正确（如：存量数据 / 批量操作没有更新哈希），需要修正
+                if u.content_hash != (content_hash := u.gen_content_hash()):
+                    u.content_hash = content_hash
+                    waiting_fix_hash_users.append(u)
+
                 continue
 
             if self.enable_update_username:
@@ -144,11 +210,12 @@ class DataSourceUserSyncer:
             u.phone = target_user.phone
             u.phone_country_code = target_user.phone_country_code
             u.extras = target_user.extras
+            u.content_hash = u.gen_content_hash()
             u.updated_at = timezone.now()
             # 真正需要更新的用户，是有字段不一致的
             waiting_update_users.append(u)
 
-        return waiting_update_users
+        return waiting_update_users, waiting_fix_hash_users
 
 
 class DataSourceUserLeaderRelationSyncer:
@@ -161,7 +228,7 @@ class DataSourceUserLeaderRelationSyncer:
         self,
         ctx: DataSourceSyncTaskContext,
         data_source: DataSource,
-        raw_users: List[RawDataSourceUser],
+        raw_users: Iterable[RawDataSourceUser],
         exists_user_ids_before_sync: Set[int],
         overwrite: bool,
         incremental: bool,
@@ -310,7 +377,7 @@ class DataSourceUserDeptRelationSyncer:
         self,
         ctx: DataSourceSyncTaskContext,
         data_source: DataSource,
-        raw_users: List[RawDataSourceUser],
+        raw_users: Iterable[RawDataSourceUser],
         exists_user_ids_before_sync: Set[int],
         overwrite: bool,
         incremental: bool,
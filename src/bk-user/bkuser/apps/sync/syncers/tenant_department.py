@@ -19,11 +19,13 @@
 # ruff: noqa: G004
 from django.db import transaction
 
-from bkuser.apps.data_source.models import DataSource, DataSourceDepartment
+from bkuser.apps.data_source.models import DataSource
 from bkuser.apps.sync.constants import SyncOperation, TenantSyncObjectType
 from bkuser.apps.sync.contexts import TenantSyncTaskContext
-from bkuser.apps.tenant.models import Tenant, TenantDepartment, TenantDepartmentIDRecord
+from bkuser.apps.sync.differs import TenantSyncDiffer
+from bkuser.apps.tenant.models import Tenant, TenantDepartment
 from bkuser.apps.tenant.utils import TenantDeptIDGenerator
+from bkuser.utils.iterx import chunked
 
 
 class TenantDepartmentSyncer:
@@ -38,47 +40,32 @@ class TenantDepartmentSyncer:
 
     def sync(self):
         """TODO (su) 协同支持指定数据范围后，需要考虑限制"""
-        exists_tenant_departments = TenantDepartment.objects.filter(tenant=self.tenant, data_source=self.data_source)
-        data_source_departments = DataSourceDepartment.objects.filter(data_source=self.data_source)
+        differ = TenantSyncDiffer.for_departments(self.tenant, self.data_source)
+        # 预先加载租户部门 ID 记录，避免逐个部门查询
+        generator = TenantDeptIDGenerator(self.tenant.id, self.data_source, prepare_batch=True)
 
-        # 删除掉租户中存在的，但是数据源中不存在的
-        waiting_delete_tenant_departments = exists_tenant_departments.exclude(
-            data_source_department__in=data_source_departments
-        )
-
-        # 数据源中存在，但是租户中不存在的，需要创建
-        waiting_sync_data_source_departments = data_source_departments.exclude(
-            id__in=[u.data_source_department_id for u in exists_tenant_departments]
-        )
-        waiting_create_tenant_departments = [
-            TenantDepartment(
-                id=TenantDeptIDGenerator(self.tenant.id, self.data_source).gen(dept),
-                tenant=self.tenant,
-                data_source_department=dept,
-                data_source=self.data_source,
-            )
-            for dept in waiting_sync_data_source_departments
-        ]
-
-        # 统一在事务中对租户部门进行变更，先删除再增加
+        # 统一在事务中计算差异并对租户部门进行变更，先删除再增加，避免差异计算后、变更前被并发修改
         with transaction.atomic():
-            waiting_delete_tenant_departments.delete()
-            TenantDepartment.objects.bulk_create(waiting_create_tenant_departments, batch_size=self.batch_size)
+            # 删除掉租户中存在的，但是数据源中不存在的（需要在删除前取出并加锁，用于记录变更）
+            waiting_delete_tenant_departments = list(differ.get_waiting_delete_queryset().select_for_update())
+            if waiting_delete_tenant_departments:
+                # DELETE 语句本身依然带有 NOT EXISTS 条件，不会删除已经在数据源中存在的
+                differ.get_waiting_delete_queryset().delete()
 
-            # 批量记录租户部门 ID（后续有复用需求）
-            records = [
-                TenantDepartmentIDRecord(
+            # 数据源中存在，但是租户中不存在的，需要创建
+            waiting_create_tenant_departments = [
+                TenantDepartment(
+                    id=generator.gen(dept),
                     tenant=self.tenant,
+                    data_source_department=dept,
                     data_source=self.data_source,
-                    code=dept.data_source_department.code,
-                    tenant_department_id=dept.id,
                 )
-                for dept in TenantDepartment.objects.filter(
-                    tenant=self.tenant, data_source_department__in=waiting_sync_data_source_departments
-                ).select_related("data_source_department")
+                for dept in differ.get_waiting_sync_queryset()
             ]
-            # 由于存量历史数据（Record）也会被下发，因此需要忽略冲突保证其他数据可以正常插入
-            TenantDepartmentIDRecord.objects.bulk_create(records, batch_size=self.batch_size, ignore_conflicts=True)
+            # 分块创建租户部门，并批量记录租户部门 ID（后续有复用需求）
+            for depts in chunked(waiting_create_tenant_departments, self.batch_size):
+                TenantDepartment.objects.bulk_create(depts)
+                generator.batch_record(depts)
 
         # 记录删除日志，变更记录
         self.ctx.logger.info(f"delete {len(waiting_delete_tenant_departments)} tenant departments")
@@ -22,9 +22,10 @@ import datetime
 from django.db import transaction
 from django.utils import timezone
 
-from bkuser.apps.data_source.models import DataSource, DataSourceUser
+from bkuser.apps.data_source.models import DataSource
 from bkuser.apps.sync.constants import SyncOperation, TenantSyncObjectType
 from bkuser.apps.sync.contexts import TenantSyncTaskContext
+from bkuser.apps.sync.differs import TenantSyncDiffer
 from bkuser.apps.tenant.models import Tenant, TenantUser, TenantUserValidityPeriodConfig
 from bkuser.apps.tenant.utils import TenantUserIDGenerator
 from bkuser.common.constants import PERMANENT_TIME
@@ -43,31 +44,28 @@ class TenantUserSyncer:
 
     def sync(self):
         """TODO (su) 协同支持指定数据范围后，需要考虑限制"""
-        exists_tenant_users = TenantUser.objects.filter(tenant=self.tenant, data_source=self.data_source)
-        data_source_users = DataSourceUser.objects.filter(data_source=self.data_source)
-
-        # 删除掉租户中存在的，但是数据源中不存在的
-        waiting_delete_tenant_users = exists_tenant_users.exclude(data_source_user__in=data_source_users)
-
-        # 数据源中存在，但是租户中不存在的，需要创建
-        waiting_sync_data_source_users = data_source_users.exclude(
-            id__in=[u.data_source_user_id for u in exists_tenant_users]
-        )
+        differ = TenantSyncDiffer.for_users(self.tenant, self.data_source)
         generator = TenantUserIDGenerator(self.tenant.id, self.data_source, prepare_batch=True)
-        waiting_create_tenant_users = [
-            TenantUser(
-                id=generator.gen(user),
-                tenant=self.tenant,
-                data_source_user=user,
-                data_source=self.data_source,
-                account_expired_at=self.user_account_expired_at,
-            )
-            for user in waiting_sync_data_source_users
-        ]
 
-        # 统一在事务中对租户用户进行变更，先删除再增加
+        # 统一在事务中计算差异并对租户用户进行变更，先删除再增加，避免差异计算后、变更前被并发修改
         with transaction.atomic():
-            waiting_delete_tenant_users.delete()
+            # 删除掉租户中存在的，但是数据源中不存在的（需要在删除前取出并加锁，用于记录变更）
+            waiting_delete_tenant_users = list(differ.get_waiting_delete_queryset().select_for_update())
+            if waiting_delete_tenant_users:
+                # DELETE 语句本身依然带有 NOT EXISTS 条件，不会删除已经在数据源中存在的
+                differ.get_waiting_delete_queryset().delete()
+
+            # 数据源中存在，但是租户中不存在的，需要创建
+            waiting_create_tenant_users = [
+                TenantUser(
+                    id=generator.gen(user),
+                    tenant=self.tenant,
+                    data_source_user=user,
+                    data_source=self.data_source,
+                    account_expired_at=self.user_account_expired_at,
+                )
+                for user in differ.get_waiting_sync_queryset()
+            ]
             TenantUser.objects.bulk_create(waiting_create_tenant_users, batch_size=self.batch_size)
 
         # 记录删除日志，变更记录
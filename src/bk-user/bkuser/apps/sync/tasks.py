@@ -23,8 +23,8 @@ from bkuser.apps.data_source.initializers import LocalDataSourceIdentityInfoInit
 from bkuser.apps.data_source.models import DataSource
 from bkuser.apps.notification.constants import NotificationScene
 from bkuser.apps.notification.notifier import TenantUserNotifier
-from bkuser.apps.sync.constants import SyncTaskStatus
-from bkuser.apps.sync.models import DataSourceSyncTask, TenantSyncTask
+from bkuser.apps.sync.constants import SyncLogLevel, SyncLogPhase, SyncTaskStatus
+from bkuser.apps.sync.models import DataSourceSyncTask, DataSourceSyncTaskLog, TenantSyncTask
 from bkuser.apps.sync.runners import DataSourceSyncTaskRunner, TenantSyncTaskRunner
 from bkuser.apps.sync.workbook_temp_store import WorkbookTempStore
 from bkuser.apps.tenant.models import TenantUser
@@ -46,12 +46,22 @@ def sync_data_source(task_id: int, plugin_init_extra_kwargs: Dict[str, Any]):
         try:
             workbook = storage.pop(temporary_storage_id)
         except ValueError:
+            error_msg = f"data source sync task {task_id} require raw data in temporary storage, but not found"
             task.status = SyncTaskStatus.FAILED
-            task.logs = f"data source sync task {task_id} require raw data in temporary storage, but not found"
+            task.logs = error_msg
             task.save(update_fields=["status", "logs", "updated_at"])
+            DataSourceSyncTaskLog.objects.create(
+                task=task, seq=1, phase=SyncLogPhase.PREPARE, level=SyncLogLevel.ERROR, message=error_msg
+            )
             return
 
-        plugin_init_extra_kwargs = {"workbook": workbook}
+        try:
+            DataSourceSyncTaskRunner(task, {"workbook": workbook}).run()
+        finally:
+            # 只读模式加载的 Workbook 需要主动关闭
+            workbook.close()
+
+        return
 
     DataSourceSyncTaskRunner(task, plugin_init_extra_kwargs).run()
 
@@ -19,7 +19,9 @@
 # ruff: noqa: G004
 from collections import defaultdict
 
-from bkuser.apps.data_source.models import DataSource, DataSourceUser
+from django.db.models import Count
+
+from bkuser.apps.data_source.models import DataSource, DataSourceUserExtrasIndex
 from bkuser.apps.sync.loggers import TaskLogger
 from bkuser.apps.tenant.models import TenantUserCustomField
 
@@ -39,21 +41,25 @@ class DataSourceUserExtrasUniqueValidator:
         if not unique_custom_fields.exists():
             self.logger.info(f"no unique custom fields found in tenant {self.data_source.owner_tenant_id}, skip...")
 
-        user_extras_map = dict(
-            DataSourceUser.objects.filter(data_source=self.data_source).values_list("username", "extras")
-        )
+        # 通过自定义字段索引聚合出重复的值，避免将全量用户的 extras 加载到内存中逐个比较
+        indexes = DataSourceUserExtrasIndex.objects.filter(data_source=self.data_source)
         for f in unique_custom_fields:
             self.logger.info(f"checking unique custom field {f.display_name}({f.name})...")
+            # 空值不会写入索引，即是可以被允许的（非必填字段）
+            duplicate_values = (
+                indexes.filter(field_name=f.name)
+                .values("value")
+                .annotate(user_count=Count("user_id"))
+                .filter(user_count__gt=1)
+                .values_list("value", flat=True)
+            )
             counter = defaultdict(list)
-            for username, extras in user_extras_map.items():
-                # 空值是可以被允许的（非必填字段）
-                if f.name in extras and extras[f.name] is not None:
-                    counter[extras[f.name]].append(username)
+            for val, username in indexes.filter(field_name=f.name, value__in=list(duplicate_values)).values_list(
+                "value", "user__username"
+            ):
+                counter[val].append(username)
 
             for val, usernames in counter.items():
-                if len(usernames) == 1:
-                    continue
-
                 self.has_duplicate_unique_value = True
                 self.logger.error(
                     f"custom field {f.display_name}({f.name}) has duplicate unique value {val}, usernames: {usernames}"
@@ -14,13 +14,20 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
-
 import base64
 import io
-
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Type
+
+from django.conf import settings
 from openpyxl import load_workbook
 from openpyxl.workbook import Workbook
 
+from bkuser.apps.sync.constants import WorkbookTempStoreBackend
 from bkuser.common.cache import Cache, CacheEnum, CacheKeyPrefixEnum
 from bkuser.utils.uuid import generate_uuid
 
@@ -28,47 +35,191 @@ from bkuser.utils.uuid import generate_uuid
 TemporaryStorageDefaultTimeout = 10 * 60
 
 
+class BaseWorkbookStorage(ABC):
+    """Workbook 临时存储后端基类，只负责存取原始字节，不关心 Workbook 格式"""
+
+    @abstractmethod
+    def set(self, key: str, data: bytes, timeout: int):
+        """存储数据，超过 timeout 秒后数据失效"""
+        ...
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """获取数据，不存在或已失效则返回 None"""
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        """删除数据"""
+        ...
+
+
+class RedisWorkbookStorage(BaseWorkbookStorage):
+    """
+    Redis 存储后端，原始字节分块存储，不做 base64 编码
+
+    存储结构：{key} -> 分块数量，{key}:{idx} -> 第 idx 个分块的字节数据
+    """
+
+    def __init__(self, chunk_size: int | None = None):
+        self.cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.WORKBOOK_TEMPORARY_STORE)
+        self.chunk_size = chunk_size or settings.WORKBOOK_TEMP_STORE_REDIS_CHUNK_SIZE
+
+    def set(self, key: str, data: bytes, timeout: int):
+        chunks = {
+            self._chunk_key(key, idx): data[offset : offset + self.chunk_size]
+            for idx, offset in enumerate(range(0, len(data), self.chunk_size))
+        }
+        self.cache.set_many(chunks, timeout)
+        # 分块数量最后写入，确保读取时分块数据均已就绪
+        self.cache.set(key, len(chunks), timeout)
+
+    def get(self, key: str) -> bytes | None:
+        chunk_cnt = self.cache.get(key)
+        if chunk_cnt is None:
+            return None
+
+        # 兼容旧版本存储的 base64 编码数据（升级时可能有尚未被消费的临时数据）
+        if isinstance(chunk_cnt, str):
+            return base64.b64decode(chunk_cnt)
+
+        chunk_keys = [self._chunk_key(key, idx) for idx in range(chunk_cnt)]
+        chunks = self.cache.get_many(chunk_keys)
+        # 部分分块已失效，则认为数据不完整
+        if len(chunks) != len(chunk_keys):
+            return None
+
+        return b"".join(chunks[k] for k in chunk_keys)
+
+    def delete(self, key: str):
+        chunk_cnt = self.cache.get(key)
+        self.cache.delete(key)
+        if isinstance(chunk_cnt, int):
+            self.cache.delete_many([self._chunk_key(key, idx) for idx in range(chunk_cnt)])
+
+    @staticmethod
+    def _chunk_key(key: str, idx: int) -> str:
+        return f"{key}:{idx}"
+
+
+class FileSystemWorkbookStorage(BaseWorkbookStorage):
+    """
+    文件系统存储后端，适用于 web 与 celery worker 共享存储卷的部署方式，可避免大文件占用 Redis 内存
+
+    文件的修改时间（mtime）被设置为过期时间，读取 / 写入时会清理已过期的文件
+    """
+
+    suffix = ".xlsx"
+
+    def __init__(self, directory: str | Path | None = None):
+        self.directory = Path(directory or settings.WORKBOOK_TEMP_STORE_FILESYSTEM_DIR)
+
+    def set(self, key: str, data: bytes, timeout: int):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._clean_expired()
+
+        # 先写入临时文件再重命名，确保读取时文件是完整的
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+
+        expire_at = time.time() + timeout
+        os.utime(tmp_path, (expire_at, expire_at))
+        os.replace(tmp_path, self._path(key))
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            if path.stat().st_mtime < time.time():
+                path.unlink(missing_ok=True)
+                return None
+
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        # key 由 uuid 生成，此处确保不会出现路径穿越
+        if not key.isalnum():
+            raise ValueError(f"invalid temporary storage key: {key}")
+
+        return self.directory / f"{key}{self.suffix}"
+
+    def _clean_expired(self):
+        now = time.time()
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                if path.stat().st_mtime < now:
+                    path.unlink(missing_ok=True)
+            except FileNotFoundError:  # noqa: PERF203
+                continue
+
+
+_storage_cls_map: Dict[str, Type[BaseWorkbookStorage]] = {
+    WorkbookTempStoreBackend.REDIS: RedisWorkbookStorage,
+    WorkbookTempStoreBackend.FILESYSTEM: FileSystemWorkbookStorage,
+}
+
+
+def register_workbook_storage(backend: str, storage_cls: Type[BaseWorkbookStorage]):
+    """注册 Workbook 临时存储后端（如 bk-repo 等），通过 settings.WORKBOOK_TEMP_STORE_BACKEND 启用"""
+    _storage_cls_map[backend] = storage_cls
+
+
 class WorkbookTempStore:
-    """导入 Workbook 时的临时存储"""
+    """
+    导入 Workbook 时的临时存储
+
+    Q: 为什么存储原始字节而不是 Workbook？
+    A: 导入时上传的文件本身就是 xlsx 格式，直接存储原始字节可以避免在 web 进程中完整解析 & 重新序列化 Workbook，
+       同时不做 base64 编码，避免额外 33% 的存储开销；Workbook 只在 celery worker 中以只读模式解析一次
+    """
+
+    def __init__(self, backend: str | None = None):
+        backend = backend or settings.WORKBOOK_TEMP_STORE_BACKEND
+        if backend not in _storage_cls_map:
+            raise ValueError(f"workbook temporary storage backend {backend} not supported")
 
-    def __init__(self):
-        # 初始化 redis 临时存储，后续加入 bk-repo 等 backend
-        self.storage = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.WORKBOOK_TEMPORARY_STORE)
+        self.storage = _storage_cls_map[backend]()
 
-    def save(self, workbook: Workbook, timeout: int = TemporaryStorageDefaultTimeout) -> str:
+    def save(self, workbook: Workbook | bytes, timeout: int = TemporaryStorageDefaultTimeout) -> str:
         """
         将 Excel Workbook 保存到临时存储中，并返回临时存储的数据唯一标识
-        :param workbook: Excel Workbook
+        :param workbook: Excel Workbook 或 xlsx 文件原始字节（推荐，可避免重新序列化）
         :param timeout: 过期时间
         :return: 临时数据唯一标识
         """
-
-        # 将 Workbook 保存到 内存字节流，便于获取到字节内容
-        with io.BytesIO() as buffer:
-            workbook.save(buffer)
-            data = buffer.getvalue()
+        if isinstance(workbook, Workbook):
+            # 将 Workbook 保存到 内存字节流，便于获取到字节内容
+            with io.BytesIO() as buffer:
+                workbook.save(buffer)
+                data = buffer.getvalue()
+        else:
+            data = workbook
 
         # 生成临时数据的唯一标识，用于后续查询
         temporary_storage_id = generate_uuid()
-
-        encoded_data = base64.b64encode(data).decode("utf-8")
-        self.storage.set(temporary_storage_id, encoded_data, timeout)
+        self.storage.set(temporary_storage_id, data, timeout)
 
         return temporary_storage_id
 
     def pop(self, temporary_storage_id: str) -> Workbook:
         """
         从临时存储中获取临时数据并转换为 Excel Workbook, 获取成功后即删除该临时存储中的临时数据
+
+        注：Workbook 以只读（read_only）模式加载，单元格数据按需流式解析，只能逐行遍历，使用完成后需要调用 close()
+
         :param temporary_storage_id: 临时数据唯一标识
-        :return: Excel Workbook
+        :return: Excel Workbook（只读）
         """
-
-        encoded_data = self.storage.get(temporary_storage_id)
-        if not encoded_data:
+        data = self.storage.get(temporary_storage_id)
+        if not data:
             raise ValueError(f"data(id={temporary_storage_id}) not found in temporary storage")
 
         # 获取成功则删除，无需等待过期
         self.storage.delete(temporary_storage_id)
 
-        data = base64.b64decode(encoded_data)
-        return load_workbook(filename=io.BytesIO(data))
+        return load_workbook(filename=io.BytesIO(data), read_only=True)
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import json
+import logging
+import time
+from itertools import islice
+from typing import Any, Dict, Iterator, Tuple, Type
+from uuid import uuid4
+
+from bkuser.apps.data_source.models import DataSourceDepartmentUserRelation, DataSourceUserLeaderRelation
+from bkuser.apps.tenant.models import TenantDepartment
+from bkuser.apps.tenant.utils import get_real_user_data_sources
+from bkuser.common.cache import Cache, CacheEnum, CacheKeyPrefixEnum
+from bkuser.common.locks import LockType, RedisLock
+from bkuser.utils.iterx import chunked
+
+logger = logging.getLogger(__name__)
+
+
+class BaseTenantRelationDump:
+    """
+    租户关系数据全量转储（兼容 V2 OpenAPI 的不分页拉取）
+
+    全量的关系数据会被预先序列化为 JSON，按 chunk_size 分块存储在 Redis 中，请求时先确认全部分块均存在（数据完整），
+    再逐个读取分块并以流的方式返回，避免将全量数据作为单个巨大的 Value 存储 / 反序列化，也避免同时加载全部分块到内存。
+    转储数据通过清单（manifest）记录当前版本及分块数量，重建时写入新版本的分块，最后才替换清单并删除旧版本的分块。
+
+    防止缓存击穿：
+    1. 冷启动（清单不存在）时，仅有一个请求会执行重建，其他请求会等待重建完成后直接读取；
+       等待超过 lock_wait_timeout（重建过慢或重建进程崩溃导致锁未释放）时，直接从 DB 生成数据返回，不再继续等待
+    2. 数据过期前会提前在后台刷新（refresh-ahead），请求本身总是返回现有的数据，不会等待重建
+    3. 租户同步完成后，会在后台重建该租户已有的转储数据
+    """
+
+    # 转储名称，子类必须指定，用于区分缓存 key
+    name: str
+    # 单个分块中的关系数量
+    chunk_size = 5000
+    # 转储数据过期时间（秒）
+    cache_timeout = 60 * 60 * 24
+    # 转储数据刷新间隔（秒），超过该时间的数据仍可以返回，但是会触发后台重建
+    refresh_interval = 60 * 10
+    # 重建锁超时时间（秒）
+    lock_timeout = 60 * 5
+    # 请求等待重建锁的最长时间（秒）
+    lock_wait_timeout = 10
+    # 重建后旧版本分块的保留时间（秒），需要覆盖正在读取旧版本分块的请求的输出耗时
+    prev_chunks_timeout = 60 * 5
+
+    def __init__(self, tenant_id: str):
+        self.tenant_id = tenant_id
+        self.cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.RELATION_DUMP)
+
+    def get_manifest(self) -> Dict[str, Any] | None:
+        """获取转储数据清单，结构：{"version": str, "chunk_count": int, "built_at": float}"""
+        return self.cache.get(self._manifest_key)
+
+    def claim_refresh(self, manifest: Dict[str, Any]) -> bool:
+        """检查转储数据是否需要刷新，一个刷新周期内只有首个调用方会获得刷新权（返回 True）"""
+        if time.time() - manifest["built_at"] < self.refresh_interval:
+            return False
+
+        return self.cache.add(self._refresh_flag_key, manifest["version"], timeout=self.refresh_interval)
+
+    def rebuild(self) -> bool:
+        """重建转储数据，若其他进程正在重建，则跳过"""
+        lock = RedisLock(LockType.RELATION_DUMP, self._lock_suffix, timeout=self.lock_timeout, blocking=False)
+        if not lock.acquire():
+            logger.info("relation dump %s of tenant %s is building, skip rebuild", self.name, self.tenant_id)
+            return False
+
+        try:
+            self._build()
+        finally:
+            lock.release()
+
+        return True
+
+    def invalidate(self):
+        """使转储数据失效，下次获取时会重新构建"""
+        self.cache.delete(self._manifest_key)
+
+    def is_complete(self, manifest: Dict[str, Any]) -> bool:
+        """
+        检查转储数据的分块是否完整（只检查分块是否存在，不读取分块数据）
+
+        分块可能因为 Redis 内存淘汰而丢失，需要在响应开始输出前确认，不能在流式输出的过程中才发现数据不完整
+        """
+        keys = [self._chunk_key(manifest["version"], idx) for idx in range(manifest["chunk_count"])]
+        if (exists_count := self.cache.count_existing(keys)) < len(keys):
+            logger.warning(
+                "relation dump %s of tenant %s missing %s chunks of version %s",
+                self.name,
+                self.tenant_id,
+                len(keys) - exists_count,
+                manifest["version"],
+            )
+            return False
+
+        return True
+
+    def iter_chunks(self, manifest: Dict[str, Any]) -> Iterator[bytes]:
+        """逐个读取转储数据的分块，每个分块为以逗号分隔的若干个已序列化的 JSON 对象"""
+        for idx in range(manifest["chunk_count"]):
+            chunk = self.cache.get(self._chunk_key(manifest["version"], idx))
+            if chunk is None:
+                # 完整性检查后分块依然可能被淘汰，此时响应已经开始输出，只能从 DB 生成剩余的分块
+                # 注：若期间关系数据有变更，分块边界处的数据可能重复或遗漏，但保证输出的是合法的 JSON
+                logger.warning(
+                    "relation dump %s of tenant %s chunk %s of version %s evicted while streaming",
+                    self.name,
+                    self.tenant_id,
+                    idx,
+                    manifest["version"],
+                )
+                yield from islice(self._iter_serialized_chunks(), idx, None)
+                return
+
+            yield chunk
+
+    def get_or_build_chunks(self) -> Tuple[Dict[str, Any] | None, Iterator[bytes]]:
+        """
+        获取转储数据清单及分块迭代器，若清单不存在或分块缺失，则（同一时间只有一个请求会执行）重建
+
+        等待重建锁超时时，不返回清单（None），分块迭代器直接从 DB 生成数据
+        """
+        manifest = self.get_manifest()
+        if manifest and self.is_complete(manifest):
+            return manifest, self.iter_chunks(manifest)
+
+        lock = RedisLock(
+            LockType.RELATION_DUMP,
+            self._lock_suffix,
+            timeout=self.lock_timeout,
+            blocking_timeout=self.lock_wait_timeout,
+        )
+        if not lock.acquire():
+            logger.warning(
+                "wait relation dump %s of tenant %s build lock timeout, fallback to generate from db",
+                self.name,
+                self.tenant_id,
+            )
+            return None, self._iter_serialized_chunks()
+
+        try:
+            # 获得锁后需要再检查一次，因为可能在等待锁的过程中，其他请求已经完成了重建
+            current = self.get_manifest()
+            if current and (not manifest or current["version"] != manifest["version"]) and self.is_complete(current):
+                return current, self.iter_chunks(current)
+
+            self.invalidate()
+            manifest = self._build()
+        finally:
+            lock.release()
+
+        # 刚重建的分块依然缺失（Redis 内存极度紧张），只能直接从 DB 生成
+        if not self.is_complete(manifest):
+            return manifest, self._iter_serialized_chunks()
+
+        return manifest, self.iter_chunks(manifest)
+
+    def _build(self) -> Dict[str, Any]:
+        built_at = time.time()
+        version = uuid4().hex
+        prev_manifest = self.get_manifest()
+
+        chunk_count = 0
+        for chunk in self._iter_serialized_chunks():
+            self.cache.set(self._chunk_key(version, chunk_count), chunk, timeout=self.cache_timeout)
+            chunk_count += 1
+
+        manifest = {"version": version, "chunk_count": chunk_count, "built_at": built_at}
+        self.cache.set(self._manifest_key, manifest, timeout=self.cache_timeout)
+
+        # 清单替换后，旧版本的分块不会再被新的请求读取，但可能仍有请求正在逐个读取输出，
+        # 因此不直接删除，而是缩短过期时间，避免在 Redis 中堆积
+        if prev_manifest:
+            for idx in range(prev_manifest["chunk_count"]):
+                self.cache.touch(self._chunk_key(prev_manifest["version"], idx), timeout=self.prev_chunks_timeout)
+
+        logger.info(
+            "relation dump %s of tenant %s built, version %s, chunk count %s, cost %.3fs",
+            self.name,
+            self.tenant_id,
+            version,
+            chunk_count,
+            time.time() - built_at,
+        )
+        return manifest
+
+    def _iter_serialized_chunks(self) -> Iterator[bytes]:
+        for relations in chunked(self._iter_relations(), self.chunk_size):
+            # 去除列表的方括号，多个分块之间只需要用逗号连接即可组成完整的 JSON 数组
+            yield json.dumps(relations, separators=(",", ":"))[1:-1].encode()
+
+    def _iter_relations(self) -> Iterator[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @property
+    def _lock_suffix(self) -> str:
+        return f"{self.name}:{self.tenant_id}"
+
+    @property
+    def _manifest_key(self) -> str:
+        return f"{self.name}:{self.tenant_id}:manifest"
+
+    @property
+    def _refresh_flag_key(self) -> str:
+        return f"{self.name}:{self.tenant_id}:refresh"
+
+    def _chunk_key(self, version: str, idx: int) -> str:
+        return f"{self.name}:{self.tenant_id}:{version}:{idx}"
+
+
+class DepartmentUserRelationDump(BaseTenantRelationDump):
+    """租户部门 - 用户关系全量转储，部门 ID 为租户部门 ID，用户 ID 为数据源用户 ID"""
+
+    name = "dept_user"
+
+    def _iter_relations(self) -> Iterator[Dict[str, Any]]:
+        data_sources = get_real_user_data_sources(self.tenant_id)
+        # {数据源部门 ID: 租户部门 ID}
+        dept_id_map = dict(
+            TenantDepartment.objects.filter(tenant_id=self.tenant_id, data_source__in=data_sources).values_list(
+                "data_source_department_id", "id"
+            )
+        )
+        relations = DataSourceDepartmentUserRelation.objects.filter(data_source__in=data_sources).values_list(
+            "id", "department_id", "user_id"
+        )
+        for rel_id, dept_id, user_id in relations.iterator(chunk_size=self.chunk_size):
+            if dept_id in dept_id_map:
+                yield {"id": rel_id, "department_id": dept_id_map[dept_id], "profile_id": user_id}
+
+
+class UserLeaderRelationDump(BaseTenantRelationDump):
+    """租户用户 - Leader 关系全量转储，用户 ID 均为数据源用户 ID"""
+
+    name = "user_leader"
+
+    def _iter_relations(self) -> Iterator[Dict[str, Any]]:
+        relations = DataSourceUserLeaderRelation.objects.filter(
+            data_source__in=get_real_user_data_sources(self.tenant_id)
+        ).values_list("id", "user_id", "leader_id")
+        for rel_id, user_id, leader_id in relations.iterator(chunk_size=self.chunk_size):
+            yield {"id": rel_id, "from_profile_id": user_id, "to_profile_id": leader_id}
+
+
+RELATION_DUMP_CLASSES: Dict[str, Type[BaseTenantRelationDump]] = {
+    DepartmentUserRelationDump.name: DepartmentUserRelationDump,
+    UserLeaderRelationDump.name: UserLeaderRelationDump,
+}
@@ -15,11 +15,13 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 import logging
+from typing import List
 
 from django.utils import timezone
 
 from bkuser.apps.tenant.constants import TenantUserStatus
 from bkuser.apps.tenant.models import CollaborationStrategy, TenantUser
+from bkuser.apps.tenant.relation_dumps import RELATION_DUMP_CLASSES
 from bkuser.celery import app
 from bkuser.common.task import BaseTask
 
@@ -46,6 +48,22 @@ def remove_dropped_field_in_collaboration_strategy_field_mapping(tenant_id: str,
         strategy.save(update_fields=["target_config", "updated_at"])
 
 
+@app.task(base=BaseTask, ignore_result=True)
+def rebuild_tenant_relation_dumps(tenant_id: str, dump_names: List[str] | None = None):
+    """重建租户关系数据全量转储，未指定转储名称时，只重建已经存在（即有被使用）的转储"""
+    logger.info("[celery] receive task: rebuild_tenant_relation_dumps, tenant %s, dumps %s", tenant_id, dump_names)
+
+    for name, dump_cls in RELATION_DUMP_CLASSES.items():
+        if dump_names is not None and name not in dump_names:
+            continue
+
+        dump = dump_cls(tenant_id)
+        if dump_names is None and not dump.get_manifest():
+            continue
+
+        dump.rebuild()
+
+
 @app.task(base=BaseTask, ignore_result=True)
 def update_expired_tenant_user_status():
     """定时任务：批量更新过期用户的状态"""
@@ -16,11 +16,20 @@
 # to the current version of the project delivered to anyone in the future.
 
 import logging
-from typing import Dict, Tuple
+from typing import Collection, Dict, Tuple
 
+from django.db.models import Q, QuerySet
+
+from bkuser.apps.data_source.constants import DataSourceTypeEnum
 from bkuser.apps.data_source.models import DataSource, DataSourceDepartment, DataSourceUser
-from bkuser.apps.tenant.constants import TenantUserIdRuleEnum
-from bkuser.apps.tenant.models import TenantDepartmentIDRecord, TenantUserIDGenerateConfig, TenantUserIDRecord
+from bkuser.apps.tenant.constants import CollaborationStrategyStatus, TenantUserIdRuleEnum
+from bkuser.apps.tenant.models import (
+    CollaborationStrategy,
+    TenantDepartment,
+    TenantDepartmentIDRecord,
+    TenantUserIDGenerateConfig,
+    TenantUserIDRecord,
+)
 from bkuser.utils.uuid import generate_uuid
 
 logger = logging.getLogger(__name__)
@@ -35,6 +44,19 @@ def is_username_frozen(data_source: DataSource) -> bool:
     )
 
 
+def get_real_user_data_sources(tenant_id: str) -> QuerySet[DataSource]:
+    """获取租户的真实用户数据源（含自己的 + 协同过来的）"""
+    # 接受方确认过的数据源，就是认为是有数据的
+    collaboration_tenant_ids = (
+        CollaborationStrategy.objects.filter(target_tenant_id=tenant_id)
+        .exclude(target_status=CollaborationStrategyStatus.UNCONFIRMED)
+        .values_list("source_tenant_id", flat=True)
+    )
+    return DataSource.objects.filter(
+        Q(owner_tenant_id=tenant_id) | Q(owner_tenant_id__in=collaboration_tenant_ids)
+    ).filter(type=DataSourceTypeEnum.REAL)
+
+
 class TenantUserIDGenerator:
     """租户用户 ID 生成器"""
 
@@ -125,3 +147,39 @@ class TenantDeptIDGenerator:
                 return record.tenant_department_id
 
         return None
+
+    def batch_record(self, tenant_depts: Collection[TenantDepartment]):
+        """
+        批量记录（刚创建的）租户部门 ID，以便后续复用，已有记录的部门会被忽略
+
+        注意：bulk_create 在部分 DB（如 MySQL）中不会回填主键，此时会根据数据源部门 ID 查询并回填租户部门 ID
+        """
+        if missing_dept_ids := [dept.data_source_department_id for dept in tenant_depts if not dept.id]:
+            dept_id_map = dict(
+                TenantDepartment.objects.filter(
+                    tenant_id=self.target_tenant_id, data_source_department_id__in=missing_dept_ids
+                ).values_list("data_source_department_id", "id")
+            )
+            for dept in tenant_depts:
+                if not dept.id:
+                    dept.id = dept_id_map.get(dept.data_source_department_id)
+
+        records = []
+        for dept in tenant_depts:
+            key = (self.target_tenant_id, self.data_source.id, dept.data_source_department.code)
+            if not dept.id or key in self.tenant_dept_id_map:
+                continue
+
+            records.append(
+                TenantDepartmentIDRecord(
+                    tenant_id=self.target_tenant_id,
+                    data_source=self.data_source,
+                    code=dept.data_source_department.code,
+                    tenant_department_id=dept.id,
+                )
+            )
+            if self.prepare_batch:
+                self.tenant_dept_id_map[key] = dept.id
+
+        # 由于存量历史数据（Record）也会被下发，因此需要忽略冲突保证其他数据可以正常插入
+        TenantDepartmentIDRecord.objects.bulk_create(records, ignore_conflicts=True)
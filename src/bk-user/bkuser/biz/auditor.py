@@ -15,7 +15,7 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 from collections import defaultdict
-from typing import Any, Dict, List
+from typing import Any, Collection, Dict, List
 
 from bkuser.apps.audit.constants import ObjectTypeEnum, OperationEnum
 from bkuser.apps.audit.data_models import AuditObject
@@ -40,6 +40,53 @@ from bkuser.apps.tenant.models import (
 from bkuser.utils.django import get_model_dict
 
 
+def get_user_department_ids_map(data_source_user_ids: Collection[int]) -> Dict[int, List[int]]:
+    """批量获取数据源用户的部门 ID 列表"""
+    user_department_map: Dict[int, List[int]] = defaultdict(list)
+    for user_id, department_id in DataSourceDepartmentUserRelation.objects.filter(
+        user_id__in=data_source_user_ids
+    ).values_list("user_id", "department_id"):
+        user_department_map[user_id].append(department_id)
+
+    return user_department_map
+
+
+def get_user_leader_ids_map(data_source_user_ids: Collection[int]) -> Dict[int, List[int]]:
+    """批量获取数据源用户的上级 ID 列表"""
+    user_leader_map: Dict[int, List[int]] = defaultdict(list)
+    for user_id, leader_id in DataSourceUserLeaderRelation.objects.filter(
+        user_id__in=data_source_user_ids
+    ).values_list("user_id", "leader_id"):
+        user_leader_map[user_id].append(leader_id)
+
+    return user_leader_map
+
+
+def batch_get_tenant_user_snapshots(tenant_users: Collection[TenantUser]) -> Dict[str, Dict[str, Any]]:
+    """
+    批量获取租户用户的审计快照（租户用户、数据源用户、部门、上级）
+
+    查询次数固定（数据源用户、部门关系、上级关系各一次），不会随用户数量增加
+
+    :return: {租户用户 ID: 快照}
+    """
+    data_source_user_ids = {u.data_source_user_id for u in tenant_users}
+    data_source_user_map = {u.id: u for u in DataSourceUser.objects.filter(id__in=data_source_user_ids)}
+    user_department_map = get_user_department_ids_map(data_source_user_ids)
+    user_leader_map = get_user_leader_ids_map(data_source_user_ids)
+
+    return {
+        tenant_user.id: {
+            "tenant_user": get_model_dict(tenant_user),
+            "data_source_user": get_model_dict(data_source_user_map[tenant_user.data_source_user_id]),
+            "department_ids": user_department_map[tenant_user.data_source_user_id],
+            "leader_ids": user_leader_map[tenant_user.data_source_user_id],
+            "tenant_id": tenant_user.tenant_id,
+        }
+        for tenant_user in tenant_users
+    }
+
+
 class DataSourceAuditor:
     """用于记录数据源相关操作的审计"""
 
@@ -209,42 +256,21 @@ class TenantUserDestroyAuditor:
 
     def pre_record_data_before(self, tenant_user: TenantUser):
         """记录变更前的相关数据记录"""
-
-        # 为每个用户的审计数据创建唯一的键
-        tenant_user_id = tenant_user.id
-
-        # 初始化对应 tenant_user 的审计数据
-        # 若为本租户下的用户
-        if tenant_user.tenant_id == self.tenant_id:
-            self.data_befores[tenant_user_id] = {
-                "tenant_user": get_model_dict(tenant_user),
-                "data_source_user": get_model_dict(tenant_user.data_source_user),
-                # 记录修改前的用户部门
-                "department_ids": list(
-                    DataSourceDepartmentUserRelation.objects.filter(
-                        user=tenant_user.data_source_user,
-                    ).values_list("department_id", flat=True)
-                ),
-                # 记录修改前的用户上级
-                "leader_ids": list(
-                    DataSourceUserLeaderRelation.objects.filter(user=tenant_user.data_source_user).values_list(
-                        "leader_id", flat=True
-                    )
-                ),
-                "tenant_id": tenant_user.tenant_id,
-            }
-        # 若为协同租户下的用户
-        else:
-            self.data_befores[tenant_user_id] = {
-                "tenant_user": get_model_dict(tenant_user),
-                "tenant_id": tenant_user.tenant_id,
-            }
+        self.batch_pre_record_data_before([tenant_user])
 
     def batch_pre_record_data_before(self, tenant_users: List[TenantUser]):
         """批量记录变更前的相关数据记录"""
-
+        # 若为本租户下的用户，需要记录数据源用户、部门、上级等信息（批量查询）
+        self.data_befores.update(
+            batch_get_tenant_user_snapshots([u for u in tenant_users if u.tenant_id == self.tenant_id])
+        )
+        # 若为协同租户下的用户，只需要记录租户用户信息
         for tenant_user in tenant_users:
-            self.pre_record_data_before(tenant_user)
+            if tenant_user.tenant_id != self.tenant_id:
+                self.data_befores[tenant_user.id] = {
+                    "tenant_user": get_model_dict(tenant_user),
+                    "tenant_id": tenant_user.tenant_id,
+                }
 
     def record(self):
         """组装相关数据，并调用 apps.audit 模块里的方法进行记录"""
@@ -418,16 +444,7 @@ class TenantUserDepartmentRelationsAuditor:
     @staticmethod
     def get_user_department_map(data_source_user_ids: List[int]) -> Dict:
         """记录用户与部门之间的映射关系"""
-        user_department_relations = DataSourceDepartmentUserRelation.objects.filter(
-            user_id__in=data_source_user_ids
-        ).values("department_id", "user_id")
-        user_department_map = defaultdict(list)
-
-        # 将用户的所有部门存储在列表中
-        for relation in user_department_relations:
-            user_department_map[relation["user_id"]].append(relation["department_id"])
-
-        return user_department_map
+        return get_user_department_ids_map(data_source_user_ids)
 
 
 class TenantUserLeaderRelationsUpdateAuditor:
@@ -477,16 +494,7 @@ class TenantUserLeaderRelationsUpdateAuditor:
     @staticmethod
     def get_user_leader_map(data_source_user_ids: List[int]) -> Dict:
         # 记录用户与上级之间的映射关系
-        user_leader_relations = DataSourceUserLeaderRelation.objects.filter(user_id__in=data_source_user_ids).values(
-            "leader_id", "user_id"
-        )
-        user_leader_map = defaultdict(list)
-
-        # 将用户的所有上级存储在列表中
-        for relation in user_leader_relations:
-            user_leader_map[relation["user_id"]].append(relation["leader_id"])
-
-        return user_leader_map
+        return get_user_leader_ids_map(data_source_user_ids)
 
 
 class TenantUserAccountExpiredAtUpdateAuditor:
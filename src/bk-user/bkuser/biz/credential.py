@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import logging
+import time
+from typing import Collection, List, Set
+
+from django.conf import settings
+
+from bkuser.apps.data_source.models import LocalDataSourceIdentityInfo
+from bkuser.common.cache import Cache, CacheEnum, CacheKeyPrefixEnum
+from bkuser.common.hashers import check_password
+
+logger = logging.getLogger(__name__)
+
+
+class LocalUserCredentialVerifier:
+    """本地数据源用户凭据（账密）校验"""
+
+    def verify(
+        self, identity_infos: List[LocalDataSourceIdentityInfo], raw_password: str
+    ) -> List[LocalDataSourceIdentityInfo]:
+        """校验密码，返回密码匹配的用户身份信息"""
+        start = time.perf_counter()
+        # 由于密码是 Hash 并加盐的（每个用户的盐值都不同），无法直接查询 DB 匹配，只能逐个校验
+        matched_infos = [info for info in identity_infos if check_password(raw_password, info.password)]
+        logger.debug(
+            "verify local user credential, candidates: %d, cost: %.3fs",
+            len(identity_infos),
+            time.perf_counter() - start,
+        )
+        return matched_infos
+
+
+class LocalUserLoginThrottle:
+    """
+    本地数据源用户登录失败次数限制，按 (数据源 ID, 用户名) 计数
+
+    无论用户名是否存在都会计数 & 限制，避免根据响应的差异判断出哪些用户名是存在的
+
+    在时间窗口内，密码错误次数达到上限后，窗口结束前不再校验该数据源下该用户名的密码，
+    以避免暴力破解的请求持续消耗计算密码哈希所需的 CPU 资源
+    """
+
+    def __init__(self, username: str):
+        self.username = username
+        self.enabled = settings.LOGIN_ATTEMPT_THROTTLE_ENABLED
+        self.max_failures = settings.LOGIN_ATTEMPT_MAX_FAILURES
+        self.failure_window = settings.LOGIN_ATTEMPT_FAILURE_WINDOW
+        self.cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.LOGIN_ATTEMPT)
+
+    def get_locked_data_source_ids(self, data_source_ids: Collection[int]) -> Set[int]:
+        """获取失败次数已达到上限的数据源 ID"""
+        if not (self.enabled and data_source_ids):
+            return set()
+
+        key_map = {self._gen_cache_key(ds_id): ds_id for ds_id in data_source_ids}
+        failures = self.cache.get_many(list(key_map.keys()))
+        return {key_map[key] for key, cnt in failures.items() if cnt >= self.max_failures}
+
+    def record_failure(self, data_source_ids: Collection[int]):
+        """记录登录失败"""
+        if not self.enabled:
+            return
+
+        for ds_id in data_source_ids:
+            self.cache.incr(self._gen_cache_key(ds_id), timeout=self.failure_window)
+
+    def reset(self, data_source_ids: Collection[int]):
+        """登录成功后，重置失败次数"""
+        if not (self.enabled and data_source_ids):
+            return
+
+        self.cache.delete_many([self._gen_cache_key(ds_id) for ds_id in data_source_ids])
+
+    def _gen_cache_key(self, data_source_id: int) -> str:
+        return f"{data_source_id}:{self.username}"
@@ -14,14 +14,17 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
+from copy import copy
 from itertools import groupby
-from typing import Dict, List
+from typing import IO, Dict, Iterator, List, Tuple
 
 from django.conf import settings
+from openpyxl.cell import MergedCell, WriteOnlyCell
 from openpyxl.reader.excel import load_workbook
 from openpyxl.styles import Alignment, Font, colors
 from openpyxl.styles.numbers import FORMAT_TEXT
 from openpyxl.workbook import Workbook
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
 from openpyxl.worksheet.worksheet import Worksheet
 
 from bkuser.apps.data_source.models import (
@@ -45,6 +48,8 @@ class DataSourceUserExporter:
     col_name_row_idx = 2
     # 新增的列的默认宽度
     default_column_width = 40
+    # 从 DB 中分批读取用户数据时，每批的数量
+    chunk_size = 2000
 
     def __init__(self, data_source: DataSource):
         self.data_source = data_source
@@ -61,42 +66,65 @@ class DataSourceUserExporter:
         return self.workbook
 
     def export(self) -> Workbook:
+        for row in self._iter_user_rows():
+            self.sheet.append(row)  # noqa: PERF401 sheet isn't a list
+
+        self._set_all_columns_to_text_format()
+        return self.workbook
+
+    def export_to(self, fp: IO[bytes]):
+        """
+        以只写（write_only）模式导出数据到文件中，用户数据从 DB 中分批读取并逐行写入
+
+        Q: 与 export() 的区别？
+        A: export() 会将所有单元格保存在内存中（用户量较大时会占用大量内存），
+           而只写模式下，单元格数据在写入后即被刷到临时文件中，内存占用与用户数量基本无关
+        """
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(self.sheet.title)
+        self._copy_template_header_rows(sheet)
+
+        for row in self._iter_user_rows():
+            sheet.append(row)
+
+        workbook.save(fp)
+
+    def _iter_user_rows(self) -> Iterator[Tuple[str, ...]]:
+        """逐个生成用户数据行，用户数据从 DB 中分批读取"""
         dept_org_map = self._build_dept_org_map()
         user_departments_map = self._build_user_departments_map()
         user_leaders_map = self._build_user_leaders_map()
         user_username_map = self._build_user_username_map()
 
-        for u in self.users:
+        users = self.users.values_list(
+            "id", "username", "full_name", "email", "phone", "phone_country_code", "extras"
+        ).iterator(chunk_size=self.chunk_size)
+        for user_id, username, full_name, email, phone, phone_country_code, user_extras in users:
             extras = []
             # 自定义字段的值，不一定是字符串类型，需要做下转换
             for field in self.custom_fields:
                 # 导出数据时，若自定义字段不存在或为空值，则替换为 ""
-                value = u.extras.get(field.name) or ""
-                value = ",".join(value) if isinstance(value, list) else str(value)  # type: ignore
+                value = user_extras.get(field.name) or ""
+                value = ",".join(value) if isinstance(value, list) else str(value)
                 extras.append(value)
 
-            self.sheet.append(  # noqa: PERF401 sheet isn't a list
-                (
-                    # 用户名
-                    u.username,
-                    # 姓名
-                    u.full_name,
-                    # 邮箱
-                    u.email,
-                    # 手机号
-                    f"+{u.phone_country_code}{u.phone}" if u.phone else "",
-                    # 组织信息
-                    ",".join(dept_org_map.get(dept_id, "") for dept_id in user_departments_map.get(u.id, [])),
-                    # 直接上级
-                    ",".join(user_username_map.get(leader_id, "") for leader_id in user_leaders_map.get(u.id, [])),
-                    # 自定义字段
-                    *extras,
-                )
+            yield (
+                # 用户名
+                username,
+                # 姓名
+                full_name,
+                # 邮箱
+                email,
+                # 手机号
+                f"+{phone_country_code}{phone}" if phone else "",
+                # 组织信息
+                ",".join(dept_org_map.get(dept_id, "") for dept_id in user_departments_map.get(user_id, [])),
+                # 直接上级
+                ",".join(user_username_map.get(leader_id, "") for leader_id in user_leaders_map.get(user_id, [])),
+                # 自定义字段
+                *extras,
             )
 
-        self._set_all_columns_to_text_format()
-        return self.workbook
-
     def _load_template(self):
         self.workbook = load_workbook(settings.EXPORT_ORG_TEMPLATE)
         self.sheet = self.workbook["users"]
@@ -143,6 +171,36 @@ class DataSourceUserExporter:
         for idx, _ in enumerate(self.sheet.columns):
             self.sheet.column_dimensions[self._gen_sheet_col_idx(idx)].number_format = FORMAT_TEXT
 
+    def _copy_template_header_rows(self, sheet: WriteOnlyWorksheet):
+        """将模板（已补充自定义字段）中的表头复制到只写模式的表格中，包括单元格值，样式，行高，列宽及合并单元格"""
+        for idx, col_dim in self.sheet.column_dimensions.items():
+            sheet.column_dimensions[idx].width = col_dim.width
+            # 将单元格设置为纯文本模式，防止出现类型转换
+            sheet.column_dimensions[idx].number_format = FORMAT_TEXT
+
+        for idx, row_dim in self.sheet.row_dimensions.items():
+            sheet.row_dimensions[idx].height = row_dim.height
+
+        for cell_range in self.sheet.merged_cells.ranges:
+            sheet.merged_cells.add(cell_range.coord)
+
+        for row in self.sheet.iter_rows(max_row=self.col_name_row_idx):
+            header_cells: List[WriteOnlyCell | None] = []
+            for cell in row:
+                # 被合并的单元格没有值，只需要占位即可
+                if isinstance(cell, MergedCell) or cell.value is None:
+                    header_cells.append(None)
+                    continue
+
+                header_cell = WriteOnlyCell(sheet, value=cell.value)
+                header_cell.font = copy(cell.font)
+                header_cell.alignment = copy(cell.alignment)
+                header_cell.border = copy(cell.border)
+                header_cell.fill = copy(cell.fill)
+                header_cells.append(header_cell)
+
+            sheet.append(header_cells)
+
     @staticmethod
     def _gen_sheet_col_idx(idx: int) -> str:
         """
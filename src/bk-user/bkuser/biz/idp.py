@@ -20,7 +20,7 @@ from typing import Any, Dict, List
 
 from django.db.models import Q
 
-from bkuser.apps.data_source.models import DataSourceUser
+from bkuser.apps.data_source.models import DataSourceUser, DataSourceUserExtrasIndex
 from bkuser.apps.idp.data_models import DataSourceMatchRule
 from bkuser.apps.idp.models import Idp
 from bkuser.apps.tenant.constants import UserFieldDataType
@@ -85,7 +85,7 @@ class AuthenticationMatcher:
             source_data: {"user_id": "zhangsan", "telephone": "12345678901", "company_email": "test@example.com"}
             return: (Q(data_source_id=1) & Q(username="zhangsan") & Q(phone="12345678901"))
         """
-        conditions = [{"data_source_id": match_rule.data_source_id}]
+        conditions = [Q(data_source_id=match_rule.data_source_id)]
         # 无字段比较，相当于无法匹配，直接返回
         if not match_rule.field_compare_rules:
             return None
@@ -96,43 +96,53 @@ class AuthenticationMatcher:
             if rule.source_field not in source_data:
                 return None
 
-            filter_key = self._build_field_filter_key(rule.target_field)
-            if not filter_key:
-                return None
-
             # Note: 目前仅仅是equal的比较操作符，所以这里暂时简单处理，
             #  后续支持其他操作符再抽象出Converter来处理
-            conditions.append({filter_key: source_data[rule.source_field]})
+            condition = self._build_field_condition(
+                match_rule.data_source_id, rule.target_field, source_data[rule.source_field]
+            )
+            if condition is None:
+                return None
+
+            conditions.append(condition)
 
-        return reduce(operator.and_, [Q(**c) for c in conditions])
+        return reduce(operator.and_, conditions)
 
-    def _build_field_filter_key(self, field: str) -> str | None:
+    def _build_field_condition(self, data_source_id: int, field: str, value: Any) -> Q | None:
         """
-        构建字段的Django过滤Key
-        1. 内建字段，key=field
-        2. 用户自定义字段，在extras字段里，以JSON方式存储
-          - data_type=string/number/enum: key=f"extras__{field}"
-          - data_type=multi_enum: key=f"extras__{field}__contains"
-
-        Django JSONField查询: https://docs.djangoproject.com/en/3.2/topics/db/queries/#querying-jsonfield
-        Note: JSON查询性能出现问题时，可以通过额外运维方式创建虚列索引来解决
-          ALTER TABLE my_table ADD COLUMN field_col INT AS (JSON_UNQUOTE(JSON_EXTRACT(extras, '$.my_field'))) VIRTUAL;
-          CREATE INDEX idx_field_col ON my_table (field_col); 最好与data_source_id字段一起联合索引
+        构建字段的Django过滤条件
+        1. 内建字段，Q(field=value)
+        2. 用户自定义字段，在extras字段里，以JSON方式存储，通过自定义字段索引表匹配，避免对JSON字段全表扫描
+          - data_type=string/number/enum: 索引值与value相等
+          - data_type=multi_enum: value（若为列表则为其中每个元素）都需要命中索引，等价于 extras__{field}__contains
         """
         # 内建字段
         if field in self.builtin_field_data_type_map:
-            return field
-
-        # 自定义字段，且data_type=string/number/enum
-        if field in self.custom_field_data_type_map:
-            data_type = self.custom_field_data_type_map[field]
-            # string/number/enum
-            if data_type in [UserFieldDataType.STRING, UserFieldDataType.NUMBER, UserFieldDataType.ENUM]:
-                return f"extras__{field}"
-
-            # multi_enum
-            if data_type in UserFieldDataType.MULTI_ENUM:
-                return f"extras__{field}__contains"
+            return Q(**{field: value})
+
+        data_type = self.custom_field_data_type_map.get(field)
+        if data_type in [UserFieldDataType.STRING, UserFieldDataType.NUMBER, UserFieldDataType.ENUM]:
+            values = [value]
+        elif data_type == UserFieldDataType.MULTI_ENUM:
+            values = value if isinstance(value, list) else [value]
+        else:
+            # 非预期的字段和数据类型，都无法匹配
+            return None
 
-        # 非预期的字段和数据类型，都无法匹配
-        return None
+        # 空列表无法通过索引表达包含关系，退化为JSON查询
+        if not values:
+            return Q(**{f"extras__{field}__contains": value})
+
+        return reduce(
+            operator.and_,
+            [
+                Q(
+                    id__in=DataSourceUserExtrasIndex.objects.filter(
+                        data_source_id=data_source_id,
+                        field_name=field,
+                        value=DataSourceUserExtrasIndex.build_value(v),
+                    ).values("user_id")
+                )
+                for v in values
+            ],
+        )
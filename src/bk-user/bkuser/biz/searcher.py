@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import operator
+from functools import reduce
+from typing import List
+
+from django.db.models import Case, Exists, IntegerField, OuterRef, Q, QuerySet, Value, When
+
+from bkuser.apps.data_source.models import DataSource, DataSourceUserSearchToken
+from bkuser.apps.tenant.models import TenantUser
+
+
+class TenantUserSearcher:
+    """
+    租户用户搜索，按关键字对数据源用户的用户名、姓名、邮箱、手机号做子串匹配（大小写不敏感）
+
+    先通过数据源用户搜索索引（n-gram）得到候选用户，再在候选集合中做子串匹配，结果与直接 icontains 一致，
+    但避免了对数据源用户表的全表扫描（关键字区分度过低时除外，此时子串匹配本身就能很快找到足够多的结果）
+    """
+
+    def __init__(self, fields: List[str] | None = None):
+        """
+        :param fields: 参与搜索的数据源用户字段，默认为所有支持搜索的字段
+        """
+        self.fields = fields or DataSourceUserSearchToken.search_fields
+
+    def filter(self, queryset: QuerySet[TenantUser], keyword: str) -> QuerySet[TenantUser]:
+        """过滤出匹配关键字的租户用户（不改变 queryset 的排序）"""
+        # 搜索索引按数据源划分，只在 queryset 涉及的数据源（数量很少，逐个判断是否存在用户即可）中匹配
+        data_source_ids = list(
+            DataSource.objects.filter(Exists(queryset.filter(data_source_id=OuterRef("id")))).values_list(
+                "id", flat=True
+            )
+        )
+        user_ids = DataSourceUserSearchToken.objects.match_user_ids(keyword, self.fields, data_source_ids)
+        # 关键字区分度过低时，索引无法有效缩小候选范围，直接做子串匹配
+        if user_ids is not None:
+            queryset = queryset.filter(data_source_user_id__in=user_ids)
+
+        return queryset.filter(self._any_field_q("icontains", keyword))
+
+    def search(self, queryset: QuerySet[TenantUser], keyword: str) -> QuerySet[TenantUser]:
+        """
+        过滤出匹配关键字的租户用户，并按匹配程度排序
+
+        排序规则：字段值与关键字完全相同 > 字段值以关键字开头 > 字段值包含关键字，相同程度下按用户名排序
+        """
+        rank = Case(
+            When(self._any_field_q("iexact", keyword), then=Value(0)),
+            When(self._any_field_q("istartswith", keyword), then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        )
+        return (
+            self.filter(queryset, keyword)
+            .annotate(search_rank=rank)
+            .order_by("search_rank", "data_source_user__username", "id")
+        )
+
+    def search_ids(self, queryset: QuerySet[TenantUser], keyword: str, limit: int) -> List[str]:
+        """搜索匹配关键字的租户用户，返回按匹配程度排序后的前 limit 个租户用户 ID"""
+        return list(self.search(queryset, keyword).values_list("id", flat=True)[:limit])
+
+    def _any_field_q(self, lookup: str, keyword: str) -> Q:
+        return reduce(operator.or_, [Q(**{f"data_source_user__{f}__{lookup}": keyword}) for f in self.fields])
@@ -26,8 +26,8 @@ from rest_framework.exceptions import ValidationError
 
 from bkuser.apps.data_source.constants import DATA_SOURCE_USERNAME_REGEX
 from bkuser.apps.data_source.models import (
-    DataSourceUser,
     DataSourceUserDeprecatedPasswordRecord,
+    DataSourceUserExtrasIndex,
     LocalDataSourceIdentityInfo,
 )
 from bkuser.apps.tenant.constants import TENANT_USER_CUSTOM_FIELD_NAME_REGEX, UserFieldDataType
@@ -182,9 +182,14 @@ def _validate_unique_and_required(
 
     if field.unique:
         # 唯一性检查，由于添加 / 修改用户一般不会有并发操作，因此这里没有对并发的情况进行预防
-        queryset = DataSourceUser.objects.filter(data_source_id=data_source_id, **{f"extras__{field.name}": value})
+        # 通过自定义字段索引检查，避免对 extras 的 JSON 查询导致全表扫描
+        queryset = DataSourceUserExtrasIndex.objects.filter(
+            data_source_id=data_source_id,
+            field_name=field.name,
+            value=DataSourceUserExtrasIndex.build_value(value),
+        )
         if data_source_user_id:
-            queryset = queryset.exclude(id=data_source_user_id)
+            queryset = queryset.exclude(user_id=data_source_user_id)
 
         if queryset.exists():
             raise ValidationError(_("字段 {} 的值 {} 不满足唯一性要求").format(field.display_name, value))
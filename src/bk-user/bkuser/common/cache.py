@@ -45,8 +45,14 @@ class CacheKeyPrefixEnum(StrStructuredEnum):
     VERIFICATION_CODE = "vc"
     # 用户重置密码用 Token
     RESET_PASSWORD_TOKEN = "rpt"
+    # 用户登录失败次数
+    LOGIN_ATTEMPT = "la"
     # Workbook 临时存储
     WORKBOOK_TEMPORARY_STORE = "wts"
+    # 数据源部门路径索引
+    DEPARTMENT_PATH_INDEX = "dpi"
+    # 租户关系数据全量转储
+    RELATION_DUMP = "rd"
 
 
 def _default_key_function(*args, **kwargs):
@@ -137,10 +143,31 @@ class Cache:
         key = self._make_key(key)
         self.cache.set(key, value, timeout, version)
 
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self._make_key(key)
+        return self.cache.add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, timeout=DEFAULT_TIMEOUT, version=None) -> int:
+        """计数加 delta，key 不存在时从 0 开始计数，过期时间只在 key 首次创建时设置"""
+        key = self._make_key(key)
+        self.cache.add(key, 0, timeout, version)
+        return self.cache.incr(key, delta, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        """更新 key 的过期时间，key 不存在时返回 False"""
+        key = self._make_key(key)
+        return self.cache.touch(key, timeout, version)
+
     def delete(self, key, version=None):
         key = self._make_key(key)
         self.cache.delete(key, version)
 
+    def delete_many(self, keys, version=None):
+        if not keys:
+            return
+
+        self.cache.delete_many([self._make_key(k) for k in keys], version)
+
     def get_many(self, keys, version=None):
         if not keys:
             return {}
@@ -156,6 +183,19 @@ class Cache:
             data[map_keys[key]] = results[key]
         return data
 
+    def count_existing(self, keys, version=None) -> int:
+        """统计存在的 key 数量，只检查 key 是否存在，不会读取 value"""
+        if not keys:
+            return 0
+
+        keys = [self._make_key(k) for k in keys]
+        if self.type == CacheEnum.REDIS:
+            # Redis EXISTS 命令支持一次检查多个 key，避免逐个 key 请求
+            client = self.cache.client.get_client(write=False)
+            return client.exists(*[self.cache.make_key(k, version) for k in keys])
+
+        return sum(self.cache.has_key(k, version) for k in keys)
+
     def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
         map_key_data = {self._make_key(key): value for key, value in data.items()}
         self.cache.set_many(map_key_data, timeout, version)
@@ -15,7 +15,7 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-__all__ = ["PBKDF2SM3PasswordHasher", "check_password", "make_password"]
+__all__ = ["PBKDF2SM3PasswordHasher", "check_password", "make_password", "make_passwords"]
 
 from .pbkdf2 import PBKDF2SM3PasswordHasher
-from .shortcuts import check_password, make_password
+from .shortcuts import check_password, make_password, make_passwords
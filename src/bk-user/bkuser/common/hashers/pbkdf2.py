@@ -15,34 +15,65 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 import base64
+import hashlib
 from typing import Dict
 
 from django.contrib.auth.hashers import BasePasswordHasher, mask_hash, must_update_salt
 from django.utils.crypto import constant_time_compare
 from django.utils.encoding import force_bytes
+from tongsuopy.crypto.hashes import SM3 as TongSuoSM3  # noqa: N811
+from tongsuopy.crypto.hashes import Hash
 
 from .sm3 import SM3
 
 
+def _is_hashlib_sm3_available() -> bool:
+    """标准库 hashlib 是否支持 SM3（取决于链接的 OpenSSL 版本 & 编译选项，如 OpenSSL 3.x 默认支持）"""
+    try:
+        hashlib.new("sm3")
+    except ValueError:
+        return False
+
+    return True
+
+
+_HASHLIB_SM3_AVAILABLE = _is_hashlib_sm3_available()
+
+
 def _pbkdf2_hmac_sm3(password: bytes, salt: bytes, iterations: int, dk_len: int | None = None) -> bytes:
     """
     Password based key derivation function 2 (PKCS #5 v2.0)
+
+    若标准库 hashlib 支持 SM3，则直接使用 hashlib.pbkdf2_hmac（C 实现），性能约为 Python 实现的 20 倍；
+    否则使用基于 tongsuopy SM3 的 Python 实现，两者计算结果完全一致
+    """
+    if iterations < 1:
+        raise ValueError("pbkdf2 iterations must greater than 0")
+    if dk_len is not None and dk_len < 1:
+        raise ValueError("pbkdf2 dklen must greater than 0")
+
+    if _HASHLIB_SM3_AVAILABLE:
+        return hashlib.pbkdf2_hmac("sm3", password, salt, iterations, dk_len)
+
+    return _pbkdf2_hmac_sm3_py(password, salt, iterations, dk_len)
+
+
+def _pbkdf2_hmac_sm3_py(password: bytes, salt: bytes, iterations: int, dk_len: int | None = None) -> bytes:
+    """
+    pbkdf2_hmac_sm3 的 Python 实现
     实现参考自：lib/python3.10/hashlib.py L188 pbkdf2_hmac
 
-    TODO 性能优化，目前相同迭代次数条件下，pbkdf2_hmac_sm3 性能仅为 pbkdf2_hmac + sha256 的 1/70
+    性能说明：相同迭代次数条件下，性能约为 pbkdf2_hmac + sha256 的 1/40
     原因有二：1. tongsuopy.SM3 性能约为 hashlib.sha256 的 1/15
-            2. 本函数 pbkdf2_hmac 实现性能约为标准库 pbkdf2_hmac 的 1/4
-            注：标准库 pbkdf2_hmac 为 C 实现且带缓存，但仅支持 hashlib 内置的算法（如 sha1, sha256）
+            2. 每轮迭代需要复制 & 计算两次 HMAC 内外层摘要，Python 层调用开销较大
+    因此这里直接使用 tongsuopy 的 Hash 对象（跳过 SM3 封装），并将循环内的属性查找提前绑定到局部变量
     """
-    inner, outer = SM3(), SM3()
-    block_size = inner.block_size
+    algorithm = TongSuoSM3()
+    inner, outer = Hash(algorithm), Hash(algorithm)
+    block_size, digest_size = SM3.block_size, SM3.digest_size
 
-    if iterations < 1:
-        raise ValueError("pbkdf2 iterations must greater than 0")
     if dk_len is None:
-        dk_len = outer.digest_size
-    if dk_len < 1:
-        raise ValueError("pbkdf2 dklen must greater than 0")
+        dk_len = digest_size
 
     if len(password) > block_size:
         password = SM3(password).digest()
@@ -51,30 +82,32 @@ def _pbkdf2_hmac_sm3(password: bytes, salt: bytes, iterations: int, dk_len: int
 
     _trans_5C = bytes((x ^ 0x5C) for x in range(256))  # noqa: N806
     _trans_36 = bytes((x ^ 0x36) for x in range(256))
+    # HMAC 内外层的初始状态（填充密钥后）只需计算一次，之后每轮迭代复制即可
     inner.update(password.translate(_trans_36))
     outer.update(password.translate(_trans_5C))
+    inner_copy, outer_copy = inner.copy, outer.copy
 
-    def prf(msg):
-        # PBKDF2_HMAC uses the password as key. We can re-use the same
-        # digest objects and just update copies to skip initialization.
-        inner_cp = inner.copy()
-        outer_cp = outer.copy()
+    def prf(msg: bytes) -> bytes:
+        inner_cp = inner_copy()
         inner_cp.update(msg)
-        outer_cp.update(inner_cp.digest())
-        return outer_cp.digest()
+        outer_cp = outer_copy()
+        outer_cp.update(inner_cp.finalize())
+        return outer_cp.finalize()
+
+    from_bytes = int.from_bytes
 
     d_key = b""
     loop = 1
     while len(d_key) < dk_len:
         prev = prf(salt + loop.to_bytes(4, "big"))
-        r_key = int.from_bytes(prev, "big")
+        # 摘要仅 32 字节，转成 int 后异或，比逐字节异或快得多
+        r_key = from_bytes(prev, "big")
         for _i in range(iterations - 1):
             prev = prf(prev)
-            # r_key = r_key ^ prev
-            r_key ^= int.from_bytes(prev, "big")
+            r_key ^= from_bytes(prev, "big")
 
         loop += 1
-        d_key += r_key.to_bytes(inner.digest_size, "big")
+        d_key += r_key.to_bytes(digest_size, "big")
 
     return d_key[:dk_len]
 
@@ -14,10 +14,21 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List
+
 from django.conf import settings
 from django.contrib.auth.hashers import check_password as dj_check_password
 from django.contrib.auth.hashers import make_password as dj_make_password
 
+logger = logging.getLogger(__name__)
+
+# 密码数量少于该值时，直接串行计算（进程池启动的开销大于收益）
+_MIN_PARALLEL_HASH_COUNT = 8
+
 
 def check_password(raw_password: str, encrypted_password: str) -> bool:
     """Return a boolean of whether the raw_password was correct. Handles hashing formats behind the scenes."""
@@ -27,3 +38,39 @@ def check_password(raw_password: str, encrypted_password: str) -> bool:
 def make_password(raw_password: str, salt: str | None = None) -> str:
     """Return a securely generated hash of the given plain-text password."""
     return dj_make_password(raw_password, salt=salt, hasher=settings.PASSWORD_ENCRYPT_ALGORITHM)
+
+
+def make_passwords(raw_passwords: List[str], use_process_pool: bool = False) -> List[str]:
+    """
+    批量生成密码哈希（每个密码单独加盐），返回结果与 raw_passwords 顺序一致
+
+    由于密码哈希是 CPU 密集型的耗时操作（单个密码数十到数百毫秒），在后台任务中批量初始化密码时，
+    可以将计算分发到多个进程中并行执行，进程数由 PASSWORD_HASH_MAX_WORKERS 配置，若进程池无法启动则退化为串行计算
+
+    :param use_process_pool: 是否使用进程池并行计算，仅允许在 celery 任务中使用；
+        web 进程（gevent + 多线程）中 fork 子进程，可能因继承已被持有的锁，DB / Redis 连接及 gevent hub 而死锁
+    """
+    max_workers = min(settings.PASSWORD_HASH_MAX_WORKERS, len(raw_passwords))
+    if not use_process_pool or max_workers <= 1 or len(raw_passwords) < _MIN_PARALLEL_HASH_COUNT:
+        return [make_password(raw_password) for raw_password in raw_passwords]
+
+    algorithm = settings.PASSWORD_ENCRYPT_ALGORITHM
+    # 每个进程处理多批任务，以减少进程间通信的次数
+    chunk_size = max(1, len(raw_passwords) // (max_workers * 4))
+    try:
+        # Note: 使用 fork 方式创建子进程，子进程可直接继承父进程中已加载的 django 配置
+        with ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("fork")) as executor:
+            return list(
+                executor.map(_make_password, raw_passwords, [algorithm] * len(raw_passwords), chunksize=chunk_size)
+            )
+    # 仅处理进程池无法启动的情况：平台不支持 fork（ValueError），资源不足（OSError），
+    # 子进程异常退出（BrokenProcessPool），在守护进程中创建子进程（AssertionError）；其他异常直接抛出
+    except (ValueError, OSError, BrokenProcessPool, AssertionError):
+        logger.exception("failed to start process pool for making passwords, fallback to serial")
+
+    return [make_password(raw_password) for raw_password in raw_passwords]
+
+
+def _make_password(raw_password: str, algorithm: str) -> str:
+    """在子进程中执行的密码哈希函数（需要能被 pickle，因此定义为模块级函数）"""
+    return dj_make_password(raw_password, hasher=algorithm)
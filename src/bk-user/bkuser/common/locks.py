@@ -30,21 +30,31 @@ class LockType(StrStructuredEnum):
     GLOBAL = EnumField("global", label=_("全局锁"))
     DATA_SOURCE_SYNC = EnumField("data_source_sync", label=_("数据源同步锁"))
     TENANT_SYNC = EnumField("tenant_sync", label=_("租户同步锁"))
+    RELATION_DUMP = EnumField("relation_dump", label=_("关系数据转储锁"))
+    DEPARTMENT_PATH_INDEX = EnumField("department_path_index", label=_("部门路径索引构建锁"))
 
 
 class RedisLock:
     """基于 Redis 实现的分布式锁"""
 
-    def __init__(self, type_: LockType, suffix: Any = None, timeout: Optional[int] = None, blocking=True) -> None:
+    def __init__(
+        self,
+        type_: LockType,
+        suffix: Any = None,
+        timeout: Optional[int] = None,
+        blocking=True,
+        blocking_timeout: Optional[float] = None,
+    ) -> None:
         """
         :param type_: 锁类型, LockType 中的值
         :param suffix: 任意实现 __str__ 方法的对象
         :param timeout: 锁超时时间
         :param blocking: 是否为阻塞锁
+        :param blocking_timeout: 阻塞锁等待的最长时间（秒），超时后 acquire 返回 False，默认一直等待
         """
         key = self._make_key(type_, suffix)
         cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.LOCK)
-        self._lock = cache.lock(key, timeout=timeout)
+        self._lock = cache.lock(key, timeout=timeout, blocking_timeout=blocking_timeout)
         self._blocking = blocking
 
     def _make_key(self, type_: str, suffix: Any) -> str:
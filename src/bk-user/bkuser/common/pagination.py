@@ -14,9 +14,16 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
+import base64
+import json
 from collections import OrderedDict
+from typing import Any, List, Tuple
 
 from django.conf import settings
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
@@ -66,3 +73,87 @@ class CustomPageNumberPagination(PageNumberPagination):
                 "results": schema,
             },
         }
+
+
+class ApproximateCountPaginator(DjangoPaginator):
+    """总数为近似值的分页器，最多统计 max_count 条，避免对大表执行 COUNT(*)"""
+
+    max_count = 10000
+
+    @cached_property
+    def count(self) -> int:
+        return self.object_list[: self.max_count].count()
+
+
+class KeysetPagination(CustomPageNumberPagination):
+    """
+    键集（游标）分页器，按 (created_at, id) 倒序分页，避免翻页越深 OFFSET 扫描越多的问题
+
+    - 请求携带 cursor 参数时（首页传空字符串），使用键集分页，响应中的 next 为下一页的游标（没有下一页则为 null）；
+      该模式下 count 为近似值（最多统计 max_count 条），count_is_approximate 表示实际总数是否可能更多
+    - 未携带 cursor 参数时，兼容页码分页，count 为精确总数，保证能正确计算总页数并翻到任意页
+    """
+
+    cursor_query_param = "cursor"
+    approximate_paginator_class = ApproximateCountPaginator
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> List[Any] | None:
+        queryset = queryset.order_by("-created_at", "-id")
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.approximate_paginator_class(queryset, page_size)
+        self.count = paginator.count
+        self.count_is_approximate = self.count >= paginator.max_count
+        if cursor := request.query_params[self.cursor_query_param]:
+            created_at, pk = self._decode_cursor(cursor)
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        # 多取一条用于判断是否还有下一页
+        objs = list(queryset[: page_size + 1])
+        self.next_cursor = self._encode_cursor(objs[page_size - 1]) if len(objs) > page_size else None
+        return objs[:page_size]
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.count),
+                    ("count_is_approximate", self.count_is_approximate),
+                    ("next", self.next_cursor),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_is_approximate"] = {"type": "boolean"}
+        response_schema["properties"]["next"] = {"type": "string", "nullable": True}
+        return response_schema
+
+    @staticmethod
+    def _encode_cursor(obj) -> str:
+        content = json.dumps([obj.created_at.isoformat(), str(obj.pk)])
+        return base64.urlsafe_b64encode(content.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[Any, str]:
+        try:
+            created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            created_at = parse_datetime(created_at)
+        except Exception:
+            raise error_codes.VALIDATION_ERROR.f("wrong cursor {}".format(cursor))
+
+        if created_at is None:
+            raise error_codes.VALIDATION_ERROR.f("wrong cursor {}".format(cursor))
+
+        return created_at, pk
@@ -14,7 +14,10 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
-from django.http import HttpResponse
+import tempfile
+from typing import IO, Callable
+
+from django.http import FileResponse, HttpResponse
 from openpyxl.workbook import Workbook
 
 
@@ -24,3 +27,22 @@ def convert_workbook_to_response(workbook: Workbook, filename: str) -> HttpRespo
     response["Content-Disposition"] = f"attachment;filename={filename}"
     workbook.save(response)
     return response
+
+
+def convert_workbook_file_to_response(write_to: Callable[[IO[bytes]], None], filename: str) -> FileResponse:
+    """
+    将工作簿写入到临时文件中，再以流式响应的方式返回，适用于以只写（write_only）模式生成的大文件
+
+    :param write_to: 将工作簿写入到指定文件的函数
+    :param filename: 下载的文件名
+    """
+    # 临时文件会在响应结束后由 FileResponse 关闭（关闭后自动删除）
+    fp = tempfile.TemporaryFile()  # noqa: SIM115
+    try:
+        write_to(fp)
+        fp.seek(0)
+    except Exception:
+        fp.close()
+        raise
+
+    return FileResponse(fp, as_attachment=True, filename=filename, content_type="application/ms-excel")
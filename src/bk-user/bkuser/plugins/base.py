@@ -16,7 +16,7 @@
 # to the current version of the project delivered to anyone in the future.
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, List, Protocol, Type
+from typing import Dict, Iterator, List, Protocol, Type
 
 from drf_yasg import openapi
 
@@ -47,6 +47,14 @@ class BaseDataSourcePlugin(ABC):
         """获取用户信息"""
         ...
 
+    def iter_departments(self) -> Iterator[RawDataSourceDepartment]:
+        """逐个获取部门信息，默认基于 fetch_departments 实现，支持流式拉取的插件可重写该方法"""
+        yield from self.fetch_departments()
+
+    def iter_users(self) -> Iterator[RawDataSourceUser]:
+        """逐个获取用户信息，默认基于 fetch_users 实现，支持流式拉取的插件可重写该方法以降低内存占用"""
+        yield from self.fetch_users()
+
     @abstractmethod
     def test_connection(self) -> TestConnectionResult:
         """连通性测试（非本地数据源需提供）"""
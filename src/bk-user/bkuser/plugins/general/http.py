@@ -17,7 +17,12 @@
 
 import base64
 import logging
-from typing import Any, Dict, List
+import math
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Deque, Dict, Iterator, List, Tuple
 
 import requests
 from django.utils.translation import gettext_lazy as _
@@ -26,6 +31,7 @@ from requests.exceptions import JSONDecodeError
 from rest_framework import status
 
 from bkuser.plugins.general.constants import (
+    DEFAULT_CONCURRENCY,
     DEFAULT_PAGE,
     MAX_TOTAL_COUNT,
     PAGE_SIZE_FOR_FETCH_FIRST,
@@ -75,81 +81,192 @@ def get_reason_from_status_code(status_code: int) -> str:
     )
 
 
-def fetch_all_data(
-    url: str, headers: Dict[str, str], params: Dict[str, Any], page_size: PageSizeEnum, timeout: int, retries: int
-) -> List[Dict[str, Any]]:
+def _new_session(retries: int) -> requests.Session:
+    """创建请求会话，请求失败时会按指定次数重试（指数退避）"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        max_retries=Retry(
+            total=retries,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+        )
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _fetch_page(
+    session: requests.Session,
+    url: str,
+    headers: Dict[str, str],
+    params: Dict[str, Any],
+    page: int,
+    page_size: int,
+    timeout: int,
+) -> Tuple[int, List[Dict[str, Any]]]:
     """
-    根据指定配置，请求数据源 API 以获取用户 / 部门数据
+    请求数据源 API 的指定页
+
+    :returns: (数据总数, 当前页数据)
+    """
+    params = {**params, "page": page, "page_size": page_size}
+    resp = session.get(url, headers=headers, params=params, timeout=timeout)
+    if not resp.ok:
+        raise RequestApiError(
+            _("请求数据源 API {} 参数 {} 异常，状态码：{}，可能原因是：{}，响应内容：{}").format(
+                url,
+                stringify_params(params),
+                resp.status_code,
+                get_reason_from_status_code(resp.status_code),
+                resp.content,
+            )  # noqa: E501
+        )
+
+    try:
+        resp_data = resp.json()
+    except JSONDecodeError as e:
+        raise RespDataFormatError(
+            _("数据源 API {} 参数 {} 返回非 Json 格式，响应内容 {}").format(
+                url, stringify_params(params), resp.content
+            )  # noqa: E501
+        ) from e
+
+    total_cnt = resp_data.get("count", 0)
+    cur_req_results = resp_data.get("results", [])
+
+    logger.info(
+        "request data source api %s, params %s, get %d items, total count is %d",
+        url,
+        params,
+        len(cur_req_results),
+        total_cnt,
+    )
+    return total_cnt, cur_req_results
+
+
+def _iter_pages_concurrently(
+    url: str,
+    headers: Dict[str, str],
+    params: Dict[str, Any],
+    pages: range,
+    page_size: int,
+    timeout: int,
+    retries: int,
+    concurrency: int,
+) -> Iterator[Dict[str, Any]]:
+    """并发请求指定的若干页，同时进行中的请求不超过 concurrency 个，并按页码顺序返回数据"""
+    # requests.Session 不保证线程安全，因此每个线程使用独立的会话
+    local = threading.local()
+    sessions: List[requests.Session] = []
+
+    def fetch(page: int) -> List[Dict[str, Any]]:
+        if not hasattr(local, "session"):
+            local.session = _new_session(retries)
+            sessions.append(local.session)
+
+        return _fetch_page(local.session, url, headers, params, page, page_size, timeout)[1]
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="general-plugin-fetch")
+    waiting_pages = iter(pages)
+    futures: Deque[Future] = deque()
+    try:
+        futures.extend(executor.submit(fetch, page) for page in islice(waiting_pages, concurrency))
+        while futures:
+            results = futures.popleft().result()
+            # 每取走一页的结果，就补充提交一页，使得内存中暂存的分页数据不超过 concurrency 页
+            if (page := next(waiting_pages, None)) is not None:
+                futures.append(executor.submit(fetch, page))
+
+            yield from results
+    finally:
+        # 出现异常或调用方提前终止迭代时，取消尚未开始的请求
+        for future in futures:
+            future.cancel()
+
+        executor.shutdown(wait=True)
+        for session in sessions:
+            session.close()
+
+
+def iter_all_data(
+    url: str,
+    headers: Dict[str, str],
+    params: Dict[str, Any],
+    page_size: PageSizeEnum,
+    timeout: int,
+    retries: int,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> Iterator[Dict[str, Any]]:
+    """
+    根据指定配置，逐页请求数据源 API，并逐条返回用户 / 部门数据（每拉取一页返回一页）
 
     :param url: 数据源 URL，如 https://bk.example.com/apis/v1/users
     :param headers: 请求头，包含认证信息等
     :param params: 查询参数，即 url 中 ?scope=company 部分
     :param timeout: 单次请求超时时间
     :param retries: 请求失败重试次数
-    :returns: API 返回结果，应符合通用 HTTP 数据源 API 协议
+    :param concurrency: 并发请求数，大于 1 时，会在首页返回数据总数后，并发请求剩余的分页（结果依然按页码顺序返回）
+    :returns: API 返回结果中的单条数据，应符合通用 HTTP 数据源 API 协议
     """
     # 做强制类型转换，避免在序列化等场景中无法自动转换成 int
     page_size = int(page_size)  # type: ignore
+    max_page = MAX_TOTAL_COUNT / page_size
+
+    with _new_session(retries) as session:
+        total_cnt, cur_req_results = _fetch_page(session, url, headers, params, DEFAULT_PAGE, page_size, timeout)
+        yield from cur_req_results
+
+        cur_page = DEFAULT_PAGE
+        if concurrency <= 1:
+            while True:
+                if cur_page * page_size >= total_cnt:
+                    break
+
+                # 理论拉取数量超过最大上限，强制退出
+                if cur_page >= max_page:
+                    logger.warning("request data source api %s, exceed max page %d, force break...", url, max_page)
+                    break
+
+                cur_page += 1
+                total_cnt, cur_req_results = _fetch_page(session, url, headers, params, cur_page, page_size, timeout)
+                yield from cur_req_results
+
+            return
+
+    # 并发模式下，以首页返回的数据总数为准，确定需要请求的分页
+    last_page = math.ceil(total_cnt / page_size)
+    # 理论拉取数量超过最大上限，只拉取到上限为止
+    if last_page > max_page:
+        logger.warning("request data source api %s, exceed max page %d, force break...", url, max_page)
+        last_page = int(max_page)
+
+    yield from _iter_pages_concurrently(
+        url, headers, params, range(cur_page + 1, last_page + 1), page_size, timeout, retries, concurrency
+    )
 
-    with requests.Session() as session:
-        adapter = HTTPAdapter(
-            max_retries=Retry(
-                total=retries,
-                backoff_factor=1,
-                status_forcelist=[429, 500, 502, 503, 504],
-            )
-        )
-        session.mount("https://", adapter)
-        session.mount("http://", adapter)
-
-        cur_page, max_page = DEFAULT_PAGE, MAX_TOTAL_COUNT / page_size
-        total_cnt, items = 0, []
-        while True:
-            params.update({"page": cur_page, "page_size": page_size})
-            resp = session.get(url, headers=headers, params=params, timeout=timeout)
-            if not resp.ok:
-                raise RequestApiError(
-                    _("请求数据源 API {} 参数 {} 异常，状态码：{}，可能原因是：{}，响应内容：{}").format(
-                        url,
-                        stringify_params(params),
-                        resp.status_code,
-                        get_reason_from_status_code(resp.status_code),
-                        resp.content,
-                    )  # noqa: E501
-                )
-
-            try:
-                resp_data = resp.json()
-            except JSONDecodeError as e:  # noqa: PERF203
-                raise RespDataFormatError(
-                    _("数据源 API {} 参数 {} 返回非 Json 格式，响应内容 {}").format(
-                        url, stringify_params(params), resp.content
-                    )  # noqa: E501
-                ) from e
-
-            total_cnt = resp_data.get("count", 0)
-            cur_req_results = resp_data.get("results", [])
-            items.extend(cur_req_results)
-
-            logger.info(
-                "request data source api %s, params %s, get %d items, total count is %d",
-                url,
-                params,
-                len(cur_req_results),
-                total_cnt,
-            )
-
-            if cur_page * page_size >= total_cnt:
-                break
-
-            # 理论拉取数量超过最大上限，强制退出
-            if cur_page >= max_page:
-                logger.warning("request data source api %s, exceed max page %d, force break...", url, max_page)
-                break
 
-            cur_page += 1
+def fetch_all_data(
+    url: str,
+    headers: Dict[str, str],
+    params: Dict[str, Any],
+    page_size: PageSizeEnum,
+    timeout: int,
+    retries: int,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> List[Dict[str, Any]]:
+    """
+    根据指定配置，请求数据源 API 以获取用户 / 部门数据
 
-    return items
+    :param url: 数据源 URL，如 https://bk.example.com/apis/v1/users
+    :param headers: 请求头，包含认证信息等
+    :param params: 查询参数，即 url 中 ?scope=company 部分
+    :param timeout: 单次请求超时时间
+    :param retries: 请求失败重试次数
+    :param concurrency: 并发请求数
+    :returns: API 返回结果，应符合通用 HTTP 数据源 API 协议
+    """
+    return list(iter_all_data(url, headers, params, page_size, timeout, retries, concurrency))
 
 
 def fetch_first_item(url: str, headers: Dict[str, str], params: Dict[str, Any], timeout: int) -> Dict[str, Any] | None:
@@ -15,14 +15,20 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
 from django.utils.translation import gettext_lazy as _
 
 from bkuser.plugins.base import BaseDataSourcePlugin, PluginLogger
 from bkuser.plugins.constants import DataSourcePluginEnum
 from bkuser.plugins.general.exceptions import RequestApiError, RespDataFormatError
-from bkuser.plugins.general.http import fetch_all_data, fetch_first_item, gen_headers, gen_query_params
+from bkuser.plugins.general.http import (
+    fetch_all_data,
+    fetch_first_item,
+    gen_headers,
+    gen_query_params,
+    iter_all_data,
+)
 from bkuser.plugins.general.models import GeneralDataSourcePluginConfig
 from bkuser.plugins.models import (
     RawDataSourceDepartment,
@@ -53,6 +59,7 @@ class GeneralDataSourcePlugin(BaseDataSourcePlugin):
             cfg.page_size,
             cfg.request_timeout,
             cfg.retries,
+            concurrency=cfg.concurrency,
         )
         return [self._gen_raw_dept(d) for d in depts]
 
@@ -66,9 +73,40 @@ class GeneralDataSourcePlugin(BaseDataSourcePlugin):
             cfg.page_size,
             cfg.request_timeout,
             cfg.retries,
+            concurrency=cfg.concurrency,
         )
         return [self._gen_raw_user(u) for u in users]
 
+    def iter_departments(self) -> Iterator[RawDataSourceDepartment]:
+        """逐页拉取并返回部门信息"""
+        cfg = self.plugin_config.server_config
+        depts = iter_all_data(
+            cfg.server_base_url + cfg.department_api_path,
+            gen_headers(self.plugin_config.auth_config),
+            gen_query_params(cfg.department_api_query_params),
+            cfg.page_size,
+            cfg.request_timeout,
+            cfg.retries,
+            concurrency=cfg.concurrency,
+        )
+        for d in depts:
+            yield self._gen_raw_dept(d)
+
+    def iter_users(self) -> Iterator[RawDataSourceUser]:
+        """逐页拉取并返回用户信息"""
+        cfg = self.plugin_config.server_config
+        users = iter_all_data(
+            cfg.server_base_url + cfg.user_api_path,
+            gen_headers(self.plugin_config.auth_config),
+            gen_query_params(cfg.user_api_query_params),
+            cfg.page_size,
+            cfg.request_timeout,
+            cfg.retries,
+            concurrency=cfg.concurrency,
+        )
+        for u in users:
+            yield self._gen_raw_user(u)
+
     def test_connection(self) -> TestConnectionResult:
         """连通性测试"""
         cfg = self.plugin_config.server_config
@@ -18,7 +18,7 @@
 # ignore custom logger must use %s string format in this file
 # ruff: noqa: G004
 from collections import Counter
-from typing import List
+from typing import Any, Dict, List, Set
 
 import phonenumbers
 from django.conf import settings
@@ -43,7 +43,7 @@ from bkuser.plugins.models import RawDataSourceDepartment, RawDataSourceUser
 
 
 class LocalDataSourceDataParser:
-    """本地数据源数据解析器"""
+    """本地数据源数据解析器，只会逐行遍历用户表一次，因此支持以只读（read_only）模式加载的 Workbook"""
 
     # 用户表名称
     user_sheet_name = "users"
@@ -95,9 +95,9 @@ class LocalDataSourceDataParser:
 
     def parse(self):
         """预解析部门 & 用户数据"""
-        self._validate_and_prepare()
-        self._parse_departments()
-        self._parse_users()
+        self._validate_sheet()
+        self._validate_columns()
+        self._parse_rows()
         self.is_parsed = True
 
     def get_departments(self) -> List[RawDataSourceDepartment]:
@@ -106,12 +106,6 @@ class LocalDataSourceDataParser:
     def get_users(self) -> List[RawDataSourceUser]:
         return self.users
 
-    def _validate_and_prepare(self):
-        """检查表格格式，确保后续可正常解析"""
-        self._validate_sheet()
-        self._validate_columns()
-        self._validate_users()
-
     def _validate_sheet(self):
         # 确保用户表确实存在
         if self.user_sheet_name not in self.workbook.sheetnames:
@@ -150,8 +144,16 @@ class LocalDataSourceDataParser:
         if duplicate_col_names := [n for n, cnt in Counter(sheet_col_names).items() if cnt > 1]:
             raise DuplicateColumnName(_("待导入文件中存在重复列名：{}").format(", ".join(duplicate_col_names)))
 
-    def _validate_users(self):
-        all_usernames = []
+    def _parse_rows(self):
+        """
+        逐行遍历用户表（仅遍历一次），校验用户数据，收集组织路径并生成用户数据
+
+        Q: 为什么不分成校验，解析部门，解析用户多次遍历？
+        A: 用户量较大（如 10w）时，每次遍历都需要重新读取 & 解析单元格，耗时成倍增加；
+           单次遍历也使得解析器可以处理以只读（read_only）模式加载的 Workbook（流式读取，内存占用低）
+        """
+        all_usernames: List[str] = []
+        organizations: Set[str] = set()
         for idx, cell_values in enumerate(
             self.sheet.iter_rows(min_row=self.user_data_min_row_idx, max_col=self.valid_col_length, values_only=True),
             start=self.user_data_min_row_idx,
@@ -161,27 +163,14 @@ class LocalDataSourceDataParser:
                 continue
 
             info = dict(zip(self.all_field_names, cell_values, strict=True))
-            # 1. 检查所有必填字段是否有值（注：自定义字段必填在后续的流程中检查）
-            for field_name in self.required_field_names:
-                if not info.get(field_name):
-                    raise RequiredFieldIsEmpty(_("待导入文件中必填字段 {} 存在空值").format(field_name))
-
-            username = info["username"]
-            # 2. 检查用户名是否合法
-            if not USERNAME_REGEX.fullmatch(username):
-                raise InvalidUsername(
-                    _(
-                        "用户名 {} 不符合命名规范: 由3-32位字母、数字、下划线(_)、点(.)、连接符(-)字符组成，以字母或数字开头及结尾",  # noqa: E501
-                    ).format(username)
-                )
-
-            # 3. 检查用户不能是自己的 leader
-            if (leaders := info.get("leaders")) and username in [ld.strip() for ld in leaders.split(",")]:
-                raise InvalidLeader(_("待导入文件中用户 {} 不能是自己的直接上级").format(username))
+            self._validate_user(info)
+            all_usernames.append(info["username"].lower())
 
-            all_usernames.append(username.lower())
+            user_orgs = self._parse_user_organizations(info["username"], info["organizations"])
+            organizations.update(user_orgs)
+            self.users.append(self._gen_raw_user(info))
 
-        # 4. 检查用户名是否有重复的（以大小写不敏感的方式检查）
+        # 检查用户名是否有重复的（以大小写不敏感的方式检查）
         if duplicate_usernames := [n for n, cnt in Counter(all_usernames).items() if cnt > 1]:
             raise DuplicateUsername(
                 _(
@@ -189,39 +178,59 @@ class LocalDataSourceDataParser:
                 ).format(", ".join(duplicate_usernames))
             )
 
-    def _parse_departments(self):
-        organizations = set()
-        for cell_values in self.sheet.iter_rows(
-            min_row=self.user_data_min_row_idx, max_col=self.valid_col_length, values_only=True
-        ):
-            if not any(cell_values):
-                continue
+        self.departments = self._gen_raw_departments(organizations)
 
-            username, user_orgs = cell_values[self.username_idx_in_row], cell_values[self.organization_idx_in_row]
-            if not user_orgs:
-                self.logger.info(f"username {username} not provide organization, skip...")
-                continue
+    def _validate_user(self, info: Dict[str, Any]):
+        # 1. 检查所有必填字段是否有值（注：自定义字段必填在后续的流程中检查）
+        for field_name in self.required_field_names:
+            if not info.get(field_name):
+                raise RequiredFieldIsEmpty(_("待导入文件中必填字段 {} 存在空值").format(field_name))
 
-            for org in user_orgs.split(","):
-                cur_org = org.strip()
-                if not all(cur_org.split("/")):
-                    raise InvalidOrganization(
-                        _(
-                            "用户 {} 组织路径 {} 不合法：不得以 / 开头或结尾或存在连续的 / 字符",
-                        ).format(username, cur_org)
-                    )
-
-                organizations.add(cur_org)
-                # 所有的父部门都要被添加进来
-                while "/" in cur_org:
-                    cur_org, __, __ = cur_org.rpartition("/")
-                    organizations.add(cur_org.strip())
+        username = info["username"]
+        # 2. 检查用户名是否合法
+        if not USERNAME_REGEX.fullmatch(username):
+            raise InvalidUsername(
+                _(
+                    "用户名 {} 不符合命名规范: 由3-32位字母、数字、下划线(_)、点(.)、连接符(-)字符组成，以字母或数字开头及结尾",  # noqa: E501
+                ).format(username)
+            )
+
+        # 3. 检查用户不能是自己的 leader
+        if (leaders := info.get("leaders")) and username in [ld.strip() for ld in leaders.split(",")]:
+            raise InvalidLeader(_("待导入文件中用户 {} 不能是自己的直接上级").format(username))
+
+    def _parse_user_organizations(self, username: str, user_orgs: str | None) -> Set[str]:
+        """解析用户所属的组织路径，包含所有的父组织路径"""
+        organizations: Set[str] = set()
+        if not user_orgs:
+            self.logger.info(f"username {username} not provide organization, skip...")
+            return organizations
+
+        for org in user_orgs.split(","):
+            cur_org = org.strip()
+            if not all(cur_org.split("/")):
+                raise InvalidOrganization(
+                    _(
+                        "用户 {} 组织路径 {} 不合法：不得以 / 开头或结尾或存在连续的 / 字符",
+                    ).format(username, cur_org)
+                )
+
+            organizations.add(cur_org)
+            # 所有的父部门都要被添加进来
+            while "/" in cur_org:
+                cur_org, __, __ = cur_org.rpartition("/")
+                organizations.add(cur_org.strip())
+
+        return organizations
 
+    @staticmethod
+    def _gen_raw_departments(organizations: Set[str]) -> List[RawDataSourceDepartment]:
         # 组织路径：本数据源部门 Code 映射表
         org_code_map = {org: gen_dept_code(org) for org in organizations}
+        departments = []
         for org in organizations:
             parent_org, __, dept_name = org.rpartition("/")
-            self.departments.append(
+            departments.append(
                 RawDataSourceDepartment(
                     code=org_code_map[org],
                     name=dept_name,
@@ -231,40 +240,33 @@ class LocalDataSourceDataParser:
                 )
             )
 
-    def _parse_users(self):
-        for cell_values in self.sheet.iter_rows(
-            min_row=self.user_data_min_row_idx, max_col=self.valid_col_length, values_only=True
-        ):
-            if not any(cell_values):
-                continue
-
-            properties = dict(zip(self.all_field_names, cell_values, strict=True))
-
-            departments, leaders = [], []
-            if organizations := properties.pop("organizations"):
-                departments = [gen_dept_code(org.strip()) for org in organizations.split(",") if org.strip()]
-
-            if leader_names := properties.pop("leaders"):
-                # xlsx 中填写的是 leader 的 username，但在本地数据源中，username 就是 code
-                leaders = [ld.strip() for ld in leader_names.split(",") if ld.strip()]
-
-            phone_number = str(properties.pop("phone_number"))
-            # 默认认为是不带国际代码的
-            phone, country_code = phone_number, settings.DEFAULT_PHONE_COUNTRY_CODE
-            if phone_number.startswith("+"):
-                ret = phonenumbers.parse(phone_number)
-                phone, country_code = str(ret.national_number), str(ret.country_code)
-
-            properties.update({"phone": phone, "phone_country_code": country_code})
-
-            # 格式化，将所有非 None 字段都转成 str 类型
-            properties = {k: str(v) for k, v in properties.items() if v is not None}
-            self.users.append(
-                RawDataSourceUser(
-                    # 本地数据源用户，code 就是 username
-                    code=properties["username"],
-                    properties=properties,
-                    leaders=leaders,
-                    departments=departments,
-                )
-            )
+        return departments
+
+    @staticmethod
+    def _gen_raw_user(properties: Dict[str, Any]) -> RawDataSourceUser:
+        departments, leaders = [], []
+        if organizations := properties.pop("organizations"):
+            departments = [gen_dept_code(org.strip()) for org in organizations.split(",") if org.strip()]
+
+        if leader_names := properties.pop("leaders"):
+            # xlsx 中填写的是 leader 的 username，但在本地数据源中，username 就是 code
+            leaders = [ld.strip() for ld in leader_names.split(",") if ld.strip()]
+
+        phone_number = str(properties.pop("phone_number"))
+        # 默认认为是不带国际代码的
+        phone, country_code = phone_number, settings.DEFAULT_PHONE_COUNTRY_CODE
+        if phone_number.startswith("+"):
+            ret = phonenumbers.parse(phone_number)
+            phone, country_code = str(ret.national_number), str(ret.country_code)
+
+        properties.update({"phone": phone, "phone_country_code": country_code})
+
+        # 格式化，将所有非 None 字段都转成 str 类型
+        properties = {k: str(v) for k, v in properties.items() if v is not None}
+        return RawDataSourceUser(
+            # 本地数据源用户，code 就是 username
+            code=properties["username"],
+            properties=properties,
+            leaders=leaders,
+            departments=departments,
+        )
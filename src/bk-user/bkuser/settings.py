@@ -293,6 +293,10 @@ CELERY_BEAT_SCHEDULE = {
         "task": "bkuser.apps.tenant.tasks.update_expired_tenant_user_status",
         "schedule": crontab(minute="0", hour="3"),
     },
+    "periodic_archive_expired_operation_audit_records": {
+        "task": "bkuser.apps.audit.tasks.archive_expired_operation_audit_records",
+        "schedule": crontab(minute="0", hour="4"),
+    },
 }
 # Celery 消息队列配置
 CELERY_BROKER_URL = env.str("BK_BROKER_URL", default="")
@@ -576,12 +580,16 @@ ENCRYPT_CIPHER_TYPE = "SM4CTR" if BK_CRYPTO_TYPE == "SHANGMI" else "FernetCipher
 # 密码加密算法（可选值：pbkdf2_sha256，pbkdf2_sm3）
 # 重要：一旦用户数据写入后该值不能修改，否则可能导致现有 DB 数据不可用
 # 注：pbkdf2_sm3 性能较差，单次加密约 360ms，pbkdf2_sha256 单次加密约为 60ms
+# 注：若 Python 链接的 OpenSSL 支持 SM3（如 OpenSSL 3.x），pbkdf2_sm3 单次加密约为 40ms
 # 注：尽管 Django 默认支持 argon2, scrypt 等加密算法，但是并发加密时候会对内存有明显压力，更安全但不推荐使用
 PASSWORD_ENCRYPT_ALGORITHM = env.str("PASSWORD_ENCRYPT_ALGORITHM", "")
 
 if not PASSWORD_ENCRYPT_ALGORITHM:
     PASSWORD_ENCRYPT_ALGORITHM = "pbkdf2_sm3" if BK_CRYPTO_TYPE == "SHANGMI" else "pbkdf2_sha256"
 
+# 后台任务中批量生成密码哈希（如初始化本地数据源用户密码）时，并行计算的最大进程数，1 表示不使用多进程
+PASSWORD_HASH_MAX_WORKERS = env.int("PASSWORD_HASH_MAX_WORKERS", default=4)
+
 # ------------------------------------------ 蓝鲸通知中心配置 ------------------------------------------
 
 # 通知中心的功能可通过配置开启
@@ -642,6 +650,12 @@ VERIFICATION_CODE_LENGTH = env.int("VERIFICATION_CODE_LENGTH", 8)
 VERIFICATION_CODE_MAX_RETRIES = env.int("VERIFICATION_CODE_MAX_RETRIES", 3)
 # 单类验证码每天最大发送次数
 VERIFICATION_CODE_MAX_SEND_PER_DAY = env.int("VERIFICATION_CODE_MAX_SEND_PER_DAY", 3)
+# 是否启用本地数据源用户登录失败次数限制（基于 Redis，按 数据源 + 用户名 计数）
+LOGIN_ATTEMPT_THROTTLE_ENABLED = env.bool("LOGIN_ATTEMPT_THROTTLE_ENABLED", False)
+# 登录失败次数限制：在时间窗口内，密码错误次数达到上限后，该数据源下的该用户名在窗口结束前不再校验密码
+LOGIN_ATTEMPT_MAX_FAILURES = env.int("LOGIN_ATTEMPT_MAX_FAILURES", 10)
+# 登录失败次数统计的时间窗口（从首次失败开始计算），默认 10 min
+LOGIN_ATTEMPT_FAILURE_WINDOW = env.int("LOGIN_ATTEMPT_FAILURE_WINDOW", 60 * 10)
 
 # 重置密码 Token 有效期，默认 15 min
 RESET_PASSWORD_TOKEN_VALID_TIME = env.int("RESET_PASSWORD_TOKEN_VALID_TIME", 60 * 15)
@@ -661,6 +675,12 @@ TENANT_EMAIL_UPDATE_RESTRICTIONS = env.dict("TENANT_EMAIL_UPDATE_RESTRICTIONS",
 # 数据导入/导出配置
 # 导入文件大小限制，单位为 MB
 MAX_USER_DATA_FILE_SIZE = env.int("MAX_USER_DATA_FILE_SIZE", 10)
+# 本地数据源异步导入时，导入文件（原始字节）的临时存储后端，可选值：redis / filesystem
+WORKBOOK_TEMP_STORE_BACKEND = env.str("WORKBOOK_TEMP_STORE_BACKEND", "redis")
+# 使用 Redis 存储时，单个分块的最大字节数，超过该大小的文件会被拆分成多个 Key 存储，以避免 Redis 单个 Value 过大
+WORKBOOK_TEMP_STORE_REDIS_CHUNK_SIZE = env.int("WORKBOOK_TEMP_STORE_REDIS_CHUNK_SIZE", 2 * 1024 * 1024)
+# 使用文件系统存储时的存储目录，注意：web 与 celery worker 需要共享该目录（如挂载同一个存储卷）
+WORKBOOK_TEMP_STORE_FILESYSTEM_DIR = env.str("WORKBOOK_TEMP_STORE_FILESYSTEM_DIR", "/tmp/bkuser/workbooks")
 # 导出文件名称前缀
 EXPORT_EXCEL_FILENAME_PREFIX = "bk_user_export"
 # 成员，组织信息导出模板
@@ -670,6 +690,25 @@ EXPORT_ORG_TEMPLATE = MEDIA_ROOT / "excel/export_org_tmpl.xlsx"
 DATA_SOURCE_SYNC_DEFAULT_TIMEOUT = env.int("DATA_SOURCE_SYNC_DEFAULT_TIMEOUT", 60 * 60)
 # 租户同步默认超时时间（秒）
 TENANT_SYNC_DEFAULT_TIMEOUT = env.int("TENANT_SYNC_DEFAULT_TIMEOUT", 15 * 60)
+# 数据源同步时，分块处理用户数据的块大小，默认为 0 表示不分块（全量用户数据会一次性加载到内存中）
+# 若数据源用户量较大（如 10w+），建议配置该值（如 5000）以流式拉取 & 分块处理用户数据，降低同步任务内存占用
+DATA_SOURCE_SYNC_USER_CHUNK_SIZE = env.int("DATA_SOURCE_SYNC_USER_CHUNK_SIZE", 0)
+# 数据源同步部门关系时，是否删除全部部门关系后重建，默认为 False 表示基于现有的 MPTT 森林进行差异更新
+# 若部门关系数据出现异常（如 lft / rght 错乱），可临时开启该配置以全量重建部门关系
+DATA_SOURCE_SYNC_DEPT_RELATION_REBUILD = env.bool("DATA_SOURCE_SYNC_DEPT_RELATION_REBUILD", False)
+# 数据源同步时，是否在同步部门数据（DB 写入）的同时，在后台线程中预拉取用户数据，默认为 False 表示串行执行
+# 开启后同步总耗时约为 max(拉取用户耗时, 同步部门耗时)，适用于拉取用户耗时较长的数据源（如 LDAP / 通用 HTTP）
+DATA_SOURCE_SYNC_PREFETCH_USERS = env.bool("DATA_SOURCE_SYNC_PREFETCH_USERS", False)
+# 单个同步任务日志的大小上限（字符数），超出后 INFO / WARNING 日志将被丢弃（仅记录丢弃数量），ERROR 日志始终保留
+SYNC_TASK_LOG_MAX_SIZE = env.int("SYNC_TASK_LOG_MAX_SIZE", 1024 * 1024)
+
+# 是否异步写入操作审计记录（在请求事务提交后由 celery 任务写入），默认为 False 表示在请求中同步写入
+AUDIT_RECORD_ASYNC_WRITE_ENABLED = env.bool("AUDIT_RECORD_ASYNC_WRITE_ENABLED", False)
+# 操作审计记录保留天数，超过该天数的记录会被定时任务移动到归档表（冷数据），默认为 0 表示不归档
+AUDIT_RECORD_RETENTION_DAYS = env.int("AUDIT_RECORD_RETENTION_DAYS", 0)
+# 操作审计记录归档时，每批次处理的记录数量及批次间隔（秒）
+AUDIT_RECORD_ARCHIVE_BATCH_SIZE = env.int("AUDIT_RECORD_ARCHIVE_BATCH_SIZE", 1000)
+AUDIT_RECORD_ARCHIVE_BATCH_INTERVAL = env.float("AUDIT_RECORD_ARCHIVE_BATCH_INTERVAL", 0)
 
 # 限制组织架构页面用户/部门搜索 API 返回的最大条数
 # 由于需要计算组织路径导致性能不佳，建议不要太高，而是让用户细化搜索条件
@@ -16,11 +16,17 @@
 # to the current version of the project delivered to anyone in the future.
 
 import json
-from typing import Any, Dict
+from typing import Any, Dict, List, Type
 
 from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.models import AutoField, Model
+from django.db.models.sql import InsertQuery
 from django.forms import model_to_dict
 
+from bkuser.utils.iterx import chunked
+
 
 def get_model_dict(obj) -> Dict[str, Any]:
     # 获取模型的所有字段名称
@@ -29,3 +35,100 @@ def get_model_dict(obj) -> Dict[str, Any]:
     model_dict = model_to_dict(obj, fields=fields)
     # 使用 DjangoJSONEncoder 将字典转换为 JSON 字符串，然后再解析回字典
     return json.loads(json.dumps(model_dict, cls=DjangoJSONEncoder))
+
+
+def fill_bulk_created_pks(model: Type[Model], objs: List[Model], key_field: str, batch_size: int = 1000, **filters):
+    """
+    回填 bulk_create 创建的对象的主键
+
+    支持 RETURNING 的 DB（如 PostgreSQL，SQLite 3.35+）在 bulk_create 时已回填主键，不会产生额外的查询；
+    其他 DB（如 MySQL）则根据唯一键分批查询主键并回填
+
+    :param model: 模型类
+    :param objs: bulk_create 创建的对象列表
+    :param key_field: 唯一键字段（需要与 filters 一起唯一确定对象），如 code
+    :param batch_size: 单次查询的唯一键数量
+    :param filters: 额外的过滤条件，如 data_source=data_source
+    """
+    key_obj_map = {getattr(obj, key_field): obj for obj in objs if obj.pk is None}
+    for keys in chunked(key_obj_map.keys(), batch_size):
+        queryset = model._default_manager.filter(**filters, **{f"{key_field}__in": keys})
+        for key, pk in queryset.values_list(key_field, "pk"):
+            key_obj_map[key].pk = pk
+
+
+# {DB 别名: 自增主键的步长}，单条多行 INSERT 语句分配的自增主键不保证连续时为 None
+_auto_pk_steps: Dict[str, int | None] = {}
+
+
+def bulk_create_with_pks(
+    model: Type[Model], objs: List[Model], key_field: str, batch_size: int = 1000, **filters
+) -> None:
+    """
+    批量创建对象，并为对象回填主键
+
+    - 支持 RETURNING 的 DB（如 PostgreSQL，SQLite 3.35+）：直接使用 bulk_create，由 DB 返回主键
+    - MySQL：每批对象使用单条多行 INSERT 语句插入，InnoDB 在自增锁模式为 0 / 1（traditional / consecutive）时，
+      会为单条语句分配一段连续的自增主键，因此可以根据 LAST_INSERT_ID（首个主键）及步长，
+      直接推算出每个对象的主键，不需要额外的查询
+    - 其他情况（如自增锁模式为 2，同一语句分配的主键可能不连续）：bulk_create 后，根据唯一键分批查询并回填主键
+
+    :param model: 模型类
+    :param objs: 待创建的对象列表（主键需要为空）
+    :param key_field: 唯一键字段（需要与 filters 一起唯一确定对象），如 code，仅在需要查询回填主键时使用
+    :param batch_size: 单批创建（及查询）的对象数量
+    :param filters: 额外的过滤条件，如 data_source=data_source
+    """
+    if not objs:
+        return
+
+    using = router.db_for_write(model)
+    connection = connections[using]
+    step = _get_auto_pk_step(connection)
+    if (
+        connection.features.can_return_rows_from_bulk_insert
+        or step is None
+        or not isinstance(model._meta.pk, AutoField)
+        or any(obj.pk is not None for obj in objs)
+    ):
+        model._default_manager.db_manager(using).bulk_create(objs, batch_size=batch_size)
+        fill_bulk_created_pks(model, objs, key_field, batch_size, **filters)
+        return
+
+    fields = [f for f in model._meta.concrete_fields if not isinstance(f, AutoField)]
+    batch_size = max(min(batch_size, connection.ops.bulk_batch_size(fields, objs)), 1)
+    with transaction.atomic(using=using, savepoint=False), connection.cursor() as cursor:
+        for batch in chunked(objs, batch_size):
+            query = InsertQuery(model)
+            query.insert_values(fields, batch)
+            # 支持多行 INSERT 的 DB，as_sql 只会生成一条语句
+            ((sql, params),) = query.get_compiler(using=using).as_sql()
+            cursor.execute(sql, params)
+
+            # MySQL 的 LAST_INSERT_ID 为本条语句分配的首个主键，SQLite 则为最后一个
+            first_pk = cursor.lastrowid if connection.vendor == "mysql" else cursor.lastrowid - (len(batch) - 1) * step
+            for idx, obj in enumerate(batch):
+                obj.pk = first_pk + idx * step
+                obj._state.adding = False
+                obj._state.db = using
+
+
+def _get_auto_pk_step(connection: BaseDatabaseWrapper) -> int | None:
+    """获取单条多行 INSERT 语句分配的自增主键的步长，不保证连续时返回 None"""
+    if connection.alias in _auto_pk_steps:
+        return _auto_pk_steps[connection.alias]
+
+    step = None
+    if connection.vendor == "sqlite":
+        # SQLite 写入时独占整个 DB，单条语句插入的行，rowid 总是连续的
+        step = 1
+    elif connection.vendor == "mysql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment")
+            lock_mode, increment = cursor.fetchone()
+        # 自增锁模式为 2（interleaved）时，并发的插入语句会交错分配主键，同一语句的主键不保证连续
+        if int(lock_mode) in [0, 1]:
+            step = int(increment)
+
+    _auto_pk_steps[connection.alias] = step
+    return step
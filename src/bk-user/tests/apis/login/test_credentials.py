@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+from typing import List, Tuple
+
+import pytest
+from bkuser.apps.data_source.models import DataSourceUser, LocalDataSourceIdentityInfo
+from bkuser.common.cache import CacheEnum
+from bkuser.common.hashers import make_password
+from django.core.cache import caches
+from django.urls import reverse
+from rest_framework import status
+
+pytestmark = pytest.mark.django_db
+
+
+class TestLocalUserCredentialAuthenticateApi:
+    @pytest.fixture(autouse=True)
+    def _enable_throttle(self, settings):
+        settings.LOGIN_ATTEMPT_THROTTLE_ENABLED = True
+        settings.LOGIN_ATTEMPT_MAX_FAILURES = 2
+        caches[CacheEnum.REDIS].clear()
+        yield
+        caches[CacheEnum.REDIS].clear()
+
+    @pytest.fixture
+    def identity_info(self, bare_local_data_source) -> LocalDataSourceIdentityInfo:
+        user = DataSourceUser.objects.create(data_source=bare_local_data_source, username="zhangsan", phone="")
+        return LocalDataSourceIdentityInfo.objects.create(
+            user=user, data_source=bare_local_data_source, username="zhangsan", password=make_password("password")
+        )
+
+    def _authenticate(self, api_client, data_source_id: int, username: str, password: str):
+        return api_client.post(
+            reverse("login.local_user_credentials.authenticate"),
+            data={"data_source_ids": [data_source_id], "username": username, "password": password},
+            format="json",
+        )
+
+    def test_authenticate(self, api_client, identity_info):
+        resp = self._authenticate(api_client, identity_info.data_source_id, "zhangsan", "password")
+        assert resp.status_code == status.HTTP_200_OK
+        assert len(resp.data) == 1
+
+    def test_throttle_regardless_of_user_exists(self, api_client, identity_info):
+        """用户名存在与否，响应都是一致的（避免根据响应判断用户名是否存在）"""
+
+        def _get_responses(username: str) -> List[Tuple[int, str]]:
+            # 最后一次使用正确的密码：达到失败次数上限后，即使密码正确也不再校验
+            passwords = ["wrong-password"] * 3 + ["password"]
+            responses = [self._authenticate(api_client, identity_info.data_source_id, username, p) for p in passwords]
+            return [(resp.status_code, resp.data["message"]) for resp in responses]
+
+        responses = _get_responses("zhangsan")
+        assert [code for code, __ in responses] == [
+            status.HTTP_400_BAD_REQUEST,
+            status.HTTP_400_BAD_REQUEST,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        ]
+        assert _get_responses("not_exists") == responses
@@ -14,15 +14,25 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
+import json
+
 import pytest
 from bkuser.apps.data_source.models import DataSourceUser
 from bkuser.apps.tenant.models import TenantDepartment
+from bkuser.apps.tenant.relation_dumps import DepartmentUserRelationDump, UserLeaderRelationDump
 from django.urls import reverse
 from rest_framework import status
 
 pytestmark = pytest.mark.django_db
 
 
+@pytest.fixture(autouse=True)
+def _invalidate_relation_dumps(default_tenant):
+    """关系数据全量转储是租户维度的，需要在用例执行前失效，避免读取到其他用例的数据"""
+    DepartmentUserRelationDump(default_tenant.id).invalidate()
+    UserLeaderRelationDump(default_tenant.id).invalidate()
+
+
 class TestListDeptProfileRelations:
     def test_standard(self, api_client, default_tenant, local_data_source):
         resp = api_client.get(reverse("open_v2.list_department_profile_relations"), data={"page": 1, "page_size": 10})
@@ -45,8 +55,10 @@ class TestListDeptProfileRelations:
         )
 
         assert resp.status_code == status.HTTP_200_OK
-        # 不分页模式下，没有 count, results 结构
-        assert len(resp.data) == 26  # noqa: PLR2004
+        # 不分页模式下，以流的方式返回，没有 count, results 结构
+        relations = json.loads(b"".join(resp.streaming_content))["data"]
+        assert len(relations) == 26  # noqa: PLR2004
+        assert TenantDepartment.objects.filter(id__in={r["department_id"] for r in relations}).count() == 18  # noqa: PLR2004
 
 
 class TestListProfileLeaderRelations:
@@ -71,5 +83,25 @@ class TestListProfileLeaderRelations:
         )
 
         assert resp.status_code == status.HTTP_200_OK
-        # 不分页模式下，没有 count, results 结构
-        assert len(resp.data) == 22  # noqa: PLR2004
+        # 不分页模式下，以流的方式返回，没有 count, results 结构
+        relations = json.loads(b"".join(resp.streaming_content))["data"]
+        assert len(relations) == 22  # noqa: PLR2004
+        assert set(relations[0].keys()) == {"id", "from_profile_id", "to_profile_id"}
+
+    def test_no_page_with_missing_chunk(
+        self, api_client, default_tenant, local_data_source, collaboration_data_source
+    ):
+        dump = UserLeaderRelationDump(default_tenant.id)
+        manifest, _ = dump.get_or_build_chunks()
+        assert manifest is not None
+        # 模拟 Redis 内存淘汰导致的分块丢失
+        dump.cache.delete(dump._chunk_key(manifest["version"], 0))
+
+        resp = api_client.get(
+            reverse("open_v2.list_profile_leader_relations"),
+            data={"page": 1, "page_size": 10, "no_page": True},
+        )
+
+        assert resp.status_code == status.HTTP_200_OK
+        relations = json.loads(b"".join(resp.streaming_content))["data"]
+        assert len(relations) == 22  # noqa: PLR2004
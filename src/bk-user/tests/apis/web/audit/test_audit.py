@@ -15,7 +15,11 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+from typing import List
+from unittest import mock
+
 import pytest
+from bkuser.common.pagination import ApproximateCountPaginator
 from django.urls import reverse
 from rest_framework import status
 
@@ -217,3 +221,53 @@ class TestAuditRecordListApi:
         assert resp.status_code == status.HTTP_200_OK
         assert resp.data["count"] == 4
         assert len(resp.data["results"]) == 2
+
+    def test_audit_record_list_cursor_pagination(self, api_client, audit_records):
+        object_names: List[str] = []
+        cursor = ""
+        for _ in range(3):
+            resp = api_client.get(reverse("audit.list"), data={"cursor": cursor, "page_size": 3})
+
+            assert resp.status_code == status.HTTP_200_OK
+            assert resp.data["count"] == 4
+            assert resp.data["count_is_approximate"] is False
+            object_names.extend(record["object_name"] for record in resp.data["results"])
+
+            cursor = resp.data["next"]
+            if not cursor:
+                break
+
+        # 按时间倒序，且翻页过程中记录不重复，不遗漏
+        assert object_names == ["DataSource4", "DataSource3", "DataSource2", "DataSource1"]
+
+    def test_audit_record_list_cursor_pagination_with_filter(self, api_client, audit_records):
+        resp = api_client.get(reverse("audit.list"), data={"cursor": "", "operation": "create_data_source"})
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.data["count"] == 1
+        assert resp.data["next"] is None
+        assert resp.data["results"][0]["operation"] == "create_data_source"
+
+    def test_audit_record_list_invalid_cursor(self, api_client, audit_records):
+        resp = api_client.get(reverse("audit.list"), data={"cursor": "invalid"})
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_audit_record_list_page_pagination_exact_count(self, api_client, audit_records):
+        with mock.patch.object(ApproximateCountPaginator, "max_count", 2):
+            resp = api_client.get(reverse("audit.list"), data={"page": 4, "page_size": 1})
+
+        # 页码分页使用精确总数，不受近似统计上限影响，可翻到上限之后的页
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.data["count"] == 4
+        assert "count_is_approximate" not in resp.data
+        assert len(resp.data["results"]) == 1
+
+    def test_audit_record_list_cursor_pagination_approximate_count(self, api_client, audit_records):
+        with mock.patch.object(ApproximateCountPaginator, "max_count", 2):
+            resp = api_client.get(reverse("audit.list"), data={"cursor": "", "page_size": 1})
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.data["count"] == 2
+        assert resp.data["count_is_approximate"] is True
+        assert resp.data["next"]
@@ -255,3 +255,10 @@ class TestCollaborationSyncRecordListAndRetrieveApi:
         assert resp.data["created_objs"]["department_count"] == 9  # noqa: PLR2004
         assert resp.data["deleted_objs"]["user_count"] == 0
         assert resp.data["deleted_objs"]["department_count"] == 0
+
+        # 测试获取日志
+        resp = api_client.get(
+            reverse("collaboration.sync-record.log.list", kwargs={"id": record["id"]}), data={"tail": 1}
+        )
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.data[0]["message"] == "tenant sync task success!"
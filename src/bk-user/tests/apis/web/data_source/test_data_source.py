@@ -15,6 +15,7 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import io
 from urllib.parse import urlencode
 
 import pytest
@@ -22,16 +23,18 @@ from bkuser.apps.data_source.constants import DataSourceTypeEnum, FieldMappingOp
 from bkuser.apps.data_source.models import DataSource, DataSourceDepartment, DataSourceSensitiveInfo, DataSourceUser
 from bkuser.apps.idp.constants import INVALID_REAL_DATA_SOURCE_ID, IdpStatus
 from bkuser.apps.idp.models import Idp, IdpSensitiveInfo
-from bkuser.apps.sync.constants import SyncTaskStatus
-from bkuser.apps.sync.models import DataSourceSyncTask
+from bkuser.apps.sync.constants import SyncLogLevel, SyncLogPhase, SyncTaskStatus
+from bkuser.apps.sync.models import DataSourceSyncTask, DataSourceSyncTaskLog
 from bkuser.plugins.constants import DataSourcePluginEnum
 from bkuser.plugins.local.constants import PasswordGenerateMethod
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test.utils import override_settings
 from django.urls import reverse
+from openpyxl.reader.excel import load_workbook
 from rest_framework import status
 
+from tests.test_utils.data_source import init_data_source_users_depts_and_relations
 from tests.test_utils.tenant import sync_users_depts_to_tenant
 
 pytestmark = pytest.mark.django_db
@@ -453,6 +456,54 @@ class TestDataSourceSyncRecordApi:
         resp = api_client.get(reverse("data_source.sync_record.retrieve", kwargs={"id": other_tenant_task.id}))
         assert resp.status_code == status.HTTP_404_NOT_FOUND
 
+    def test_list_logs(self, api_client, data_source_sync_tasks):
+        task = data_source_sync_tasks[0]
+        DataSourceSyncTaskLog.objects.bulk_create(
+            [
+                DataSourceSyncTaskLog(
+                    task=task,
+                    seq=seq,
+                    phase=SyncLogPhase.USER,
+                    level=SyncLogLevel.WARNING if seq % 2 else SyncLogLevel.INFO,
+                    message=f"log {seq}",
+                )
+                for seq in range(1, 16)
+            ]
+        )
+        url = reverse("data_source.sync_record.log.list", kwargs={"id": task.id})
+
+        resp = api_client.get(url, data={"page": 2, "page_size": 10})
+        assert resp.data["count"] == 15  # noqa: PLR2004
+        assert [log["seq"] for log in resp.data["results"]] == list(range(11, 16))
+
+        resp = api_client.get(url, data={"level": SyncLogLevel.WARNING, "page_size": 100})
+        assert resp.data["count"] == 8  # noqa: PLR2004
+
+        resp = api_client.get(url, data={"tail": 3})
+        assert [log["message"] for log in resp.data] == ["log 13", "log 14", "log 15"]
+
+    def test_list_other_tenant_data_source_sync_record_logs(self, api_client, data_source_sync_tasks):
+        other_tenant_task = data_source_sync_tasks[2]
+        resp = api_client.get(reverse("data_source.sync_record.log.list", kwargs={"id": other_tenant_task.id}))
+        assert resp.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestDataSourceExportApi:
+    def test_export(self, api_client, data_source):
+        init_data_source_users_depts_and_relations(data_source)
+
+        resp = api_client.get(reverse("data_source.export_data", kwargs={"id": data_source.id}))
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.streaming
+        assert "_org_data.xlsx" in resp["Content-Disposition"]
+
+        workbook = load_workbook(io.BytesIO(b"".join(resp.streaming_content)), read_only=True)
+        usernames = [row[0] for row in workbook["users"].iter_rows(min_row=3, max_col=1, values_only=True)]
+        assert usernames == list(
+            DataSourceUser.objects.filter(data_source=data_source).order_by("id").values_list("username", flat=True)
+        )
+        workbook.close()
+
 
 class TestDataSourceImportApi:
     def test_data_source_import_success(self, api_client, data_source):
@@ -474,3 +525,18 @@ class TestDataSourceImportApi:
             assert sync_task.status == SyncTaskStatus.SUCCESS
             assert DataSourceUser.objects.filter(data_source_id=data_source.id).exists()
             assert DataSourceDepartment.objects.filter(data_source_id=data_source.id).exists()
+
+    def test_data_source_import_invalid_file(self, api_client, data_source):
+        uploaded_file = SimpleUploadedFile(
+            name="fake_users.xlsx",
+            content=b"not a xlsx file",
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+        resp = api_client.post(
+            reverse("data_source.import_from_excel", kwargs={"id": data_source.id}),
+            data={"overwrite": False, "incremental": True, "file": uploaded_file},
+            format="multipart",
+        )
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+        assert "文件格式异常" in resp.data["message"]
+        assert not DataSourceSyncTask.objects.filter(data_source=data_source).exists()
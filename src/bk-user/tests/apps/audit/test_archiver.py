@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from datetime import timedelta
+
+import pytest
+from bkuser.apps.audit.archiver import OperationAuditRecordArchiver
+from bkuser.apps.audit.models import ArchivedOperationAuditRecord, OperationAuditRecord
+from django.utils import timezone
+
+pytestmark = pytest.mark.django_db
+
+
+class TestOperationAuditRecordArchiver:
+    @pytest.fixture
+    def audit_records(self):
+        now = timezone.now()
+        records = [
+            OperationAuditRecord.objects.create(
+                creator="admin",
+                tenant_id="default",
+                operation="modify_data_source",
+                object_type="data_source",
+                object_id=str(idx),
+                object_name=f"DataSource{idx}",
+                data_before={"name": "before"},
+                data_after={"name": "after"},
+            )
+            for idx in range(5)
+        ]
+        # created_at 为 auto_now_add，需要通过 update 修改；前 3 条为过期记录
+        for idx, record in enumerate(records):
+            OperationAuditRecord.objects.filter(id=record.id).update(created_at=now - timedelta(days=100 - idx * 30))
+
+        return records
+
+    def test_archive(self, audit_records):
+        archived_count = OperationAuditRecordArchiver(retention_days=30, batch_size=2).archive()
+
+        assert archived_count == 3
+        assert set(OperationAuditRecord.objects.values_list("object_id", flat=True)) == {"3", "4"}
+
+        archived_records = {r.object_id: r for r in ArchivedOperationAuditRecord.objects.all()}
+        assert set(archived_records.keys()) == {"0", "1", "2"}
+
+        # 归档记录保留原记录的数据及创建时间
+        origin = audit_records[0]
+        archived = archived_records["0"]
+        assert archived.id == origin.id
+        assert archived.data_after == {"name": "after"}
+        assert archived.created_at < timezone.now() - timedelta(days=99)
+        assert archived.archived_month == timezone.localtime(archived.created_at).strftime("%Y%m")
+
+    def test_archive_nothing(self, audit_records):
+        assert OperationAuditRecordArchiver(retention_days=365).archive() == 0
+        assert OperationAuditRecord.objects.count() == 5
+
+    def test_expired_records_use_index(self):
+        """获取过期记录时使用 created_at 索引，不需要全表扫描及额外排序"""
+        plan = OperationAuditRecordArchiver(retention_days=30)._get_expired_records()[:100].explain()
+
+        assert "created_at" in plan
+        assert "USING INDEX" in plan
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from unittest import mock
+
+import pytest
+from bkuser.apps.audit.constants import ObjectTypeEnum, OperationEnum
+from bkuser.apps.audit.data_models import AuditObject
+from bkuser.apps.audit.models import OperationAuditRecord
+from bkuser.apps.audit.recorder import add_audit_record, batch_add_audit_records
+from bkuser.apps.audit.tasks import persist_operation_audit_records
+from django.test import override_settings
+
+pytestmark = pytest.mark.django_db
+
+
+class TestAuditRecorder:
+    def test_add_audit_record(self):
+        add_audit_record(
+            operator="admin",
+            tenant_id="default",
+            operation=OperationEnum.MODIFY_DATA_SOURCE,
+            object_type=ObjectTypeEnum.DATA_SOURCE,
+            object_id=1,
+            data_before={"name": "before"},
+            data_after={"name": "after"},
+        )
+
+        record = OperationAuditRecord.objects.get(tenant_id="default")
+        assert record.object_id == "1"
+        assert record.data_after == {"name": "after"}
+
+    def test_add_audit_record_without_change(self):
+        add_audit_record(
+            operator="admin",
+            tenant_id="default",
+            operation=OperationEnum.MODIFY_DATA_SOURCE,
+            object_type=ObjectTypeEnum.DATA_SOURCE,
+            object_id=1,
+            data_before={"name": "same"},
+            data_after={"name": "same"},
+        )
+
+        assert not OperationAuditRecord.objects.exists()
+
+    @override_settings(AUDIT_RECORD_ASYNC_WRITE_ENABLED=True)
+    def test_batch_add_audit_records_async(self, django_capture_on_commit_callbacks):
+        objects = [
+            AuditObject(
+                id=idx,
+                type=ObjectTypeEnum.DATA_SOURCE,
+                operation=OperationEnum.MODIFY_DATA_SOURCE,
+                data_before={"name": "before"},
+                data_after={"name": "after"},
+            )
+            for idx in range(3)
+        ]
+        with mock.patch.object(persist_operation_audit_records, "delay") as mocked_delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                batch_add_audit_records("admin", "default", objects)
+
+            # 请求中不会写入 DB，而是在事务提交后投递异步任务
+            assert not OperationAuditRecord.objects.exists()
+            mocked_delay.assert_called_once()
+
+        records, created_at = mocked_delay.call_args.args
+        persist_operation_audit_records(records, created_at)
+
+        assert OperationAuditRecord.objects.count() == 3
+        # 操作时间为投递任务时的时间，而非任务执行时间
+        assert {r.created_at.isoformat() for r in OperationAuditRecord.objects.all()} == {created_at}
+        assert OperationAuditRecord.objects.values("event_id").distinct().count() == 1
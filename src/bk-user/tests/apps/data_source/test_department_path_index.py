@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import pytest
+from bkuser.apps.data_source.constants import DataSourceTypeEnum
+from bkuser.apps.data_source.department_path_index import (
+    DataSourceDepartmentPathIndex,
+    get_department_full_names,
+    get_department_paths,
+)
+from bkuser.apps.data_source.models import DataSource, DataSourceDepartment
+from bkuser.common.locks import LockType, RedisLock
+from bkuser.plugins.local.models import LocalDataSourcePluginConfig
+
+from tests.test_utils.data_source import init_data_source_users_depts_and_relations
+
+pytestmark = pytest.mark.django_db
+
+
+class TestDataSourceDepartmentPathIndex:
+    @pytest.fixture
+    def dept_id_map(self, full_local_data_source):
+        return dict(DataSourceDepartment.objects.filter(data_source=full_local_data_source).values_list("code", "id"))
+
+    def test_get_many(self, full_local_data_source, dept_id_map):
+        index = DataSourceDepartmentPathIndex(full_local_data_source.id)
+        paths = index.get_many([dept_id_map["company"], dept_id_map["center_aa"], dept_id_map["group_baa"]])
+
+        company = paths[dept_id_map["company"]]
+        assert company.ancestor_ids == []
+        assert company.full_name == "公司"
+        assert set(company.children_ids) == {dept_id_map["dept_a"], dept_id_map["dept_b"]}
+
+        center_aa = paths[dept_id_map["center_aa"]]
+        assert center_aa.ancestor_ids == [dept_id_map["company"], dept_id_map["dept_a"]]
+        assert center_aa.ancestor_names == ["公司", "部门A"]
+        assert center_aa.full_name == "公司/部门A/中心AA"
+        assert center_aa.children_ids == [dept_id_map["group_aaa"]]
+
+        group_baa = paths[dept_id_map["group_baa"]]
+        assert group_baa.full_name == "公司/部门B/中心BA/小组BAA"
+        assert group_baa.children_ids == []
+
+    def test_get_many_from_cache(self, django_assert_num_queries, full_local_data_source, dept_id_map):
+        index = DataSourceDepartmentPathIndex(full_local_data_source.id)
+        index.get_many([dept_id_map["company"]])
+
+        # 索引构建后，再次获取不需要查询 DB
+        with django_assert_num_queries(0):
+            paths = index.get_many([dept_id_map["center_ab"], dept_id_map["group_aba"]])
+
+        assert paths[dept_id_map["group_aba"]].full_name == "公司/部门A/中心AB/小组ABA"
+
+    def test_get_many_with_invalid_dept(self, full_local_data_source, dept_id_map):
+        index = DataSourceDepartmentPathIndex(full_local_data_source.id)
+        assert index.get_many([]) == {}
+        assert list(index.get_many([dept_id_map["company"], -1]).keys()) == [dept_id_map["company"]]
+
+    def test_get_many_with_partial_miss(self, django_assert_num_queries, full_local_data_source, dept_id_map):
+        index = DataSourceDepartmentPathIndex(full_local_data_source.id)
+        index.get_many([dept_id_map["company"]])
+        version = index.cache.get(index._version_key)
+
+        # 部分数据被缓存淘汰时，只查询缺失的部门并回填，不会重新构建索引
+        index.cache.delete(index._path_key(version, dept_id_map["center_aa"]))
+        with django_assert_num_queries(4):
+            paths = index.get_many([dept_id_map["company"], dept_id_map["center_aa"], -1])
+
+        assert index.cache.get(index._version_key) == version
+        assert paths.keys() == {dept_id_map["company"], dept_id_map["center_aa"]}
+        assert paths[dept_id_map["center_aa"]].full_name == "公司/部门A/中心AA"
+
+        # 回填后（包括不存在的部门），再次获取不需要查询 DB
+        with django_assert_num_queries(0):
+            assert index.get_many([dept_id_map["center_aa"], -1]).keys() == {dept_id_map["center_aa"]}
+
+    def test_get_many_when_building(self, full_local_data_source, dept_id_map):
+        index = DataSourceDepartmentPathIndex(full_local_data_source.id)
+        dept_ids = list(dept_id_map.values())
+        excepted = index._build()
+        index.invalidate()
+
+        # 其他请求正在构建索引时，直接从 DB 中查询，结果与索引一致
+        lock = RedisLock(LockType.DEPARTMENT_PATH_INDEX, full_local_data_source.id, blocking=False)
+        assert lock.acquire()
+        try:
+            paths = index.get_many([*dept_ids, -1])
+        finally:
+            lock.release()
+
+        assert not index.cache.get(index._version_key)
+        assert paths.keys() == set(dept_ids)
+        for dept_id in dept_ids:
+            assert paths[dept_id].ancestor_ids == excepted[dept_id].ancestor_ids
+            assert paths[dept_id].ancestor_names == excepted[dept_id].ancestor_names
+            assert set(paths[dept_id].children_ids) == set(excepted[dept_id].children_ids)
+
+    def test_invalidate(self, full_local_data_source, dept_id_map):
+        index = DataSourceDepartmentPathIndex(full_local_data_source.id)
+        assert index.get_many([dept_id_map["center_aa"]])[dept_id_map["center_aa"]].full_name == "公司/部门A/中心AA"
+
+        DataSourceDepartment.objects.filter(id=dept_id_map["dept_a"]).update(name="部门A(重命名)")
+        # 索引未失效前，获取到的还是旧数据
+        assert index.get_many([dept_id_map["center_aa"]])[dept_id_map["center_aa"]].full_name == "公司/部门A/中心AA"
+
+        index.invalidate()
+        assert (
+            index.get_many([dept_id_map["center_aa"]])[dept_id_map["center_aa"]].full_name
+            == "公司/部门A(重命名)/中心AA"
+        )
+
+
+def test_get_department_paths(default_tenant, full_local_data_source, local_ds_plugin_cfg, local_ds_plugin):
+    another_data_source = DataSource.objects.create(
+        owner_tenant_id=default_tenant.id,
+        type=DataSourceTypeEnum.REAL,
+        plugin=local_ds_plugin,
+        plugin_config=LocalDataSourcePluginConfig(**local_ds_plugin_cfg),
+    )
+    init_data_source_users_depts_and_relations(another_data_source)
+
+    depts = [
+        (dept.data_source_id, dept.id)
+        for dept in DataSourceDepartment.objects.filter(
+            data_source__in=[full_local_data_source, another_data_source], code="center_ab"
+        )
+    ]
+    paths = get_department_paths(depts)
+
+    assert len(paths) == len(depts) == 2
+    for _, dept_id in depts:
+        assert paths[dept_id].full_name == "公司/部门A/中心AB"
+
+
+def test_get_department_full_names(
+    django_assert_num_queries, default_tenant, full_local_data_source, local_ds_plugin_cfg, local_ds_plugin
+):
+    another_data_source = DataSource.objects.create(
+        owner_tenant_id=default_tenant.id,
+        type=DataSourceTypeEnum.REAL,
+        plugin=local_ds_plugin,
+        plugin_config=LocalDataSourcePluginConfig(**local_ds_plugin_cfg),
+    )
+    init_data_source_users_depts_and_relations(another_data_source)
+
+    depts = DataSourceDepartment.objects.filter(data_source__in=[full_local_data_source, another_data_source])
+    dept_ids = [dept.id for dept in depts]
+
+    # 查询次数与部门数量无关
+    with django_assert_num_queries(2):
+        full_names = get_department_full_names([*dept_ids, -1])
+
+    # 与逐个部门基于祖先链计算的结果一致
+    paths = get_department_paths((dept.data_source_id, dept.id) for dept in depts)
+    assert full_names == {dept_id: paths[dept_id].full_name for dept_id in dept_ids}
+    assert full_names[depts.get(data_source=another_data_source, code="group_baa").id] == "公司/部门B/中心BA/小组BAA"
+
+
+def test_get_department_full_names_empty():
+    assert get_department_full_names([]) == {}
+    assert get_department_full_names([-1]) == {}
@@ -14,8 +14,17 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
+import hashlib
+from unittest import mock
+
 import pytest
-from bkuser.apps.data_source.models import DataSource, DataSourceSensitiveInfo
+from bkuser.apps.data_source.models import (
+    DataSource,
+    DataSourceSensitiveInfo,
+    DataSourceUser,
+    DataSourceUserExtrasIndex,
+    DataSourceUserSearchToken,
+)
 from bkuser.common.constants import SENSITIVE_MASK
 from bkuser.plugins.local.constants import PasswordGenerateMethod
 from bkuser.plugins.local.models import LocalDataSourcePluginConfig
@@ -96,3 +105,230 @@ def test_set_plugin_config_empty_value(local_ds_plugin_cfg, bare_local_data_sour
     bare_local_data_source.set_plugin_cfg(plugin_cfg)
     assert get_items(bare_local_data_source.plugin_config, "password_initial.fixed_password") is None
     assert get_items(bare_local_data_source.plugin_config, "login_limit.force_change_at_first_login") is False
+
+
+class TestDataSourceUserContentHash:
+    def test_save(self, bare_local_data_source):
+        user = DataSourceUser.objects.create(
+            data_source=bare_local_data_source, code="zhangsan", username="zhangsan", full_name="张三"
+        )
+        assert user.content_hash == user.gen_content_hash()
+
+        # 更新参与哈希计算的字段，即使没有在 update_fields 中指定 content_hash，也会被更新
+        old_content_hash = user.content_hash
+        user.full_name = "张三三"
+        user.save(update_fields=["full_name", "updated_at"])
+
+        user.refresh_from_db()
+        assert user.content_hash != old_content_hash
+        assert user.content_hash == user.gen_content_hash()
+
+    def test_save_without_content_fields(self, bare_local_data_source):
+        user = DataSourceUser.objects.create(
+            data_source=bare_local_data_source, code="zhangsan", username="zhangsan", full_name="张三"
+        )
+        DataSourceUser.objects.filter(id=user.id).update(content_hash="")
+
+        # 只更新不参与哈希计算的字段，不会更新内容哈希
+        user.logo = "fake_logo"
+        user.save(update_fields=["logo", "updated_at"])
+
+        user.refresh_from_db()
+        assert user.content_hash == ""
+
+    def test_gen_content_hash(self, bare_local_data_source):
+        user = DataSourceUser(
+            data_source=bare_local_data_source,
+            code="zhangsan",
+            username="zhangsan",
+            full_name="张三",
+            extras={"age": 18, "gender": "male"},
+        )
+        same_user = DataSourceUser(
+            data_source=bare_local_data_source,
+            code="zhangsan",
+            username="zhangsan",
+            full_name="张三",
+            extras={"gender": "male", "age": 18},
+        )
+        # extras 中 key 的顺序不影响内容哈希
+        assert user.gen_content_hash() == same_user.gen_content_hash()
+
+        same_user.extras["age"] = 20
+        assert user.gen_content_hash() != same_user.gen_content_hash()
+
+
+class TestDataSourceUserExtrasIndex:
+    @staticmethod
+    def _get_indexes(user: DataSourceUser):
+        return set(DataSourceUserExtrasIndex.objects.filter(user=user).values_list("field_name", "value"))
+
+    @pytest.mark.parametrize(
+        ("value", "excepted"),
+        [
+            ("male", ['"male"']),
+            (18, ["18"]),
+            ("18", ['"18"']),
+            ("中文", ['"中文"']),
+            (None, []),
+            (["running", "golf", None], ['"running"', '"golf"']),
+            # 超长的值使用摘要代替
+            ("x" * 300, ["md5:" + hashlib.md5(('"' + "x" * 300 + '"').encode()).hexdigest()]),
+        ],
+    )
+    def test_build_values(self, value, excepted):
+        assert sorted(DataSourceUserExtrasIndex.build_values(value)) == sorted(excepted)
+
+    def test_save(self, bare_local_data_source):
+        user = DataSourceUser.objects.create(
+            data_source=bare_local_data_source,
+            username="zhangsan",
+            full_name="张三",
+            extras={"age": 18, "sport_hobby": ["running", "golf"], "region": None},
+        )
+        assert self._get_indexes(user) == {("age", "18"), ("sport_hobby", '"running"'), ("sport_hobby", '"golf"')}
+
+        user.extras = {"age": 20, "sport_hobby": ["golf"]}
+        user.save(update_fields=["extras", "updated_at"])
+        assert self._get_indexes(user) == {("age", "20"), ("sport_hobby", '"golf"')}
+
+        # 未更新 extras 时，不需要重建索引
+        DataSourceUserExtrasIndex.objects.filter(user=user).delete()
+        user.save(update_fields=["full_name", "updated_at"])
+        assert self._get_indexes(user) == set()
+
+    def test_refresh_without_pk(self, bare_local_data_source):
+        users = [
+            DataSourceUser(
+                data_source=bare_local_data_source, code=username, username=username, full_name=username, extras=extras
+            )
+            for username, extras in [("zhangsan", {"age": 18}), ("lisi", {"age": 20})]
+        ]
+        DataSourceUser.objects.bulk_create(users)
+        # 模拟 bulk_create 没有回填主键的情况（如 MySQL）
+        for u in users:
+            u.id = None
+
+        DataSourceUserExtrasIndex.objects.refresh(bare_local_data_source.id, users)
+
+        assert set(DataSourceUserExtrasIndex.objects.values_list("user__username", "value")) == {
+            ("zhangsan", "18"),
+            ("lisi", "20"),
+        }
+
+    def test_delete_user(self, bare_local_data_source):
+        user = DataSourceUser.objects.create(
+            data_source=bare_local_data_source, username="zhangsan", full_name="张三", extras={"age": 18}
+        )
+        DataSourceUser.objects.filter(id=user.id).delete()
+
+        assert not DataSourceUserExtrasIndex.objects.filter(data_source=bare_local_data_source).exists()
+
+
+class TestDataSourceUserSearchToken:
+    @pytest.mark.parametrize(
+        ("value", "excepted"),
+        [
+            (None, set()),
+            ("", set()),
+            ("a", {"a"}),
+            ("Ab", {"b", "ab"}),
+            ("abcd", {"abc", "bcd", "d", "cd"}),
+            ("张三丰", {"张三丰", "丰", "三丰"}),
+        ],
+    )
+    def test_build_tokens(self, value, excepted):
+        assert set(DataSourceUserSearchToken.build_tokens(value)) == excepted
+
+    @pytest.mark.parametrize(
+        ("value", "excepted"),
+        [
+            ("ab", []),
+            ("abc", ["abc"]),
+            ("abcde", ["abc", "bcd", "cde"]),
+            ("abcdefgh", ["abc", "cde", "fgh"]),
+            ("aaaaaa", ["aaa"]),
+        ],
+    )
+    def test_build_probe_grams(self, value, excepted):
+        assert DataSourceUserSearchToken.build_probe_grams(value) == excepted
+
+    def test_save(self, bare_local_data_source):
+        user = DataSourceUser.objects.create(
+            data_source=bare_local_data_source, username="zhangsan", full_name="张三", email="", phone=""
+        )
+        assert set(DataSourceUserSearchToken.objects.filter(user=user).values_list("field_name", flat=True)) == {
+            "username",
+            "full_name",
+        }
+
+        user.email = "zhangsan@example.com"
+        user.save(update_fields=["email", "updated_at"])
+        assert DataSourceUserSearchToken.objects.filter(user=user, field_name="email", token="exa").exists()
+
+    @pytest.mark.parametrize(
+        "keyword", ["a", "san", "ZHANG", "ng", "an@", "@example.com", "张", "三", "138", "not_exists"]
+    )
+    def test_match_user_ids(self, bare_local_data_source, keyword):
+        """索引匹配的结果需要是 icontains 结果的超集（短关键字时相等）"""
+        for username, full_name, email, phone in [
+            ("zhangsan", "张三", "zhangsan@example.com", "13800000000"),
+            ("lisi", "李四", "lisi@example.com", "13900000000"),
+            ("wangwu", "王五", "", ""),
+            ("Sandy", "桑迪", "sandy@qq.com", "12345"),
+        ]:
+            DataSourceUser.objects.create(
+                data_source=bare_local_data_source, username=username, full_name=full_name, email=email, phone=phone
+            )
+
+        fields = DataSourceUserSearchToken.search_fields
+        user_ids = DataSourceUserSearchToken.objects.match_user_ids(keyword, fields, [bare_local_data_source.id])
+        assert user_ids is not None
+        matched_ids = set(user_ids.values_list("user_id", flat=True))
+        excepted_ids = {
+            u.id
+            for u in DataSourceUser.objects.filter(data_source=bare_local_data_source)
+            if any(keyword.lower() in (getattr(u, f) or "").lower() for f in fields)
+        }
+        assert matched_ids >= excepted_ids
+        if len(keyword) < DataSourceUserSearchToken.gram_size:
+            assert matched_ids == excepted_ids
+
+    @pytest.mark.parametrize("keyword", ["z", "zh", "zhang", "not_exists"])
+    def test_match_user_ids_low_selectivity(self, bare_local_data_source, keyword):
+        """命中的 token 数量达到上限时，不使用索引（不存在的关键字除外）"""
+        for idx in range(3):
+            DataSourceUser.objects.create(
+                data_source=bare_local_data_source, username=f"zhangsan{idx}", full_name=f"张三{idx}", phone=""
+            )
+
+        with mock.patch.object(DataSourceUserSearchToken, "gram_sample_limit", 2):
+            user_ids = DataSourceUserSearchToken.objects.match_user_ids(
+                keyword, ["username"], [bare_local_data_source.id]
+            )
+
+        if keyword == "not_exists":
+            assert user_ids is not None
+            assert not user_ids.exists()
+        else:
+            assert user_ids is None
+
+    def test_match_user_ids_by_data_source(self, default_tenant, bare_local_data_source):
+        """只匹配指定数据源的用户，其他数据源的 token 不参与统计 & 匹配"""
+        other_data_source = DataSource.objects.create(
+            owner_tenant_id=default_tenant.id,
+            type=bare_local_data_source.type,
+            plugin=bare_local_data_source.plugin,
+            plugin_config=bare_local_data_source.get_plugin_cfg(),
+        )
+        user = DataSourceUser.objects.create(data_source=bare_local_data_source, username="zhangsan", phone="")
+        for username in ["zhangsan", "zhangsan_2"]:
+            DataSourceUser.objects.create(data_source=other_data_source, username=username, phone="")
+
+        with mock.patch.object(DataSourceUserSearchToken, "gram_sample_limit", 2):
+            for keyword in ["zh", "zhangsan"]:
+                user_ids = DataSourceUserSearchToken.objects.match_user_ids(
+                    keyword, ["username"], [bare_local_data_source.id]
+                )
+                assert user_ids is not None
+                assert set(user_ids.values_list("user_id", flat=True)) == {user.id}
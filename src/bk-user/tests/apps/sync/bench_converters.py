@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""
+数据源用户转换基准测试（不会在单元测试中执行）
+
+执行方式：pytest tests/apps/sync/bench_converters.py -s
+可通过环境变量 BENCH_USER_COUNT 指定用户数量（默认 100000）
+"""
+
+import os
+import time
+from typing import List
+
+import pytest
+from bkuser.apps.sync.converters import DataSourceUserConversionPlan, DataSourceUserConverter
+from bkuser.apps.sync.loggers import TaskLogger
+from bkuser.plugins.models import RawDataSourceUser
+
+pytestmark = pytest.mark.django_db
+
+USER_COUNT = int(os.getenv("BENCH_USER_COUNT", "100000"))
+
+
+def _gen_raw_users(count: int) -> List[RawDataSourceUser]:
+    return [
+        RawDataSourceUser(
+            code=f"user-{idx}",
+            properties={
+                "username": f"user-{idx}",
+                "full_name": f"用户-{idx}",
+                "email": f"user-{idx}@m.com",
+                "phone": f"135{idx:08d}",
+                "phone_country_code": "86",
+                "age": str(20 + idx % 40),
+                "gender": ["male", "female", "other"][idx % 3],
+                "region": f"region-{idx % 30}",
+                "sport_hobby": "running,golf" if idx % 2 else "swimming",
+            },
+            leaders=[],
+            departments=[],
+        )
+        for idx in range(count)
+    ]
+
+
+def _users_per_sec(converter: DataSourceUserConverter, raw_users: List[RawDataSourceUser]) -> float:
+    start = time.perf_counter()
+    for u in raw_users:
+        converter.convert(u)
+    return len(raw_users) / (time.perf_counter() - start)
+
+
+def _users_per_sec_without_plan(converter: DataSourceUserConverter, raw_users: List[RawDataSourceUser]) -> float:
+    """优化前：逐个用户构建字段映射 & 遍历自定义字段配置（仅用于对比）"""
+    custom_fields = list(converter.custom_fields)
+    start = time.perf_counter()
+    for u in raw_users:
+        converter.plan = DataSourceUserConversionPlan(converter.field_mapping, custom_fields)
+        converter.convert(u)
+    return len(raw_users) / (time.perf_counter() - start)
+
+
+def test_convert_users(bare_local_data_source, tenant_user_custom_fields):
+    raw_users = _gen_raw_users(USER_COUNT)
+    print(f"\ndata source user convert benchmark (users: {USER_COUNT})")
+
+    def new_converter() -> DataSourceUserConverter:
+        return DataSourceUserConverter(bare_local_data_source, TaskLogger())
+
+    converter = new_converter()
+    users = [converter.convert(u) for u in raw_users]
+    assert users[1].extras == {"age": 21, "gender": "female", "region": "region-1", "sport_hobby": ["running", "golf"]}
+
+    print(f"  without plan: {_users_per_sec_without_plan(new_converter(), raw_users):.0f} users/s")
+    print(f"  compiled plan: {_users_per_sec(new_converter(), raw_users):.0f} users/s")
@@ -144,3 +144,42 @@ class TestDataSourceSyncRunner:
             DataSourceDepartmentUserRelation.objects.filter(data_source=bare_local_data_source).count()
             == user_dept_rel_cnt
         )
+
+    @pytest.mark.usefixtures("_init_data_source_users_depts")
+    def test_update_in_chunk_mode(self, settings, bare_local_data_source, data_source_sync_task, user_workbook):
+        settings.DATA_SOURCE_SYNC_USER_CHUNK_SIZE = 5
+        data_source_sync_task.extras = {"overwrite": True, "incremental": False}
+        data_source_sync_task.save()
+
+        DataSourceSyncTaskRunner(data_source_sync_task, {"workbook": user_workbook}).run()
+
+        data_source_sync_task.refresh_from_db()
+        assert data_source_sync_task.status == SyncTaskStatus.SUCCESS
+        assert "sync users in chunk mode, chunk size is 5" in data_source_sync_task.logs
+
+        # 分块模式的同步结果，应该与不分块的一致
+        assert DataSourceUser.objects.filter(data_source=bare_local_data_source).count() == 12
+        assert DataSourceUserLeaderRelation.objects.filter(data_source=bare_local_data_source).count() == 12
+        assert DataSourceDepartmentUserRelation.objects.filter(data_source=bare_local_data_source).count() == 14
+
+    @pytest.mark.parametrize("chunk_size", [0, 5])
+    @pytest.mark.usefixtures("_init_data_source_users_depts")
+    def test_update_with_prefetch_users(
+        self, settings, bare_local_data_source, data_source_sync_task, user_workbook, chunk_size
+    ):
+        settings.DATA_SOURCE_SYNC_PREFETCH_USERS = True
+        settings.DATA_SOURCE_SYNC_USER_CHUNK_SIZE = chunk_size
+        data_source_sync_task.extras = {"overwrite": True, "incremental": False}
+        data_source_sync_task.save()
+
+        DataSourceSyncTaskRunner(data_source_sync_task, {"workbook": user_workbook}).run()
+
+        data_source_sync_task.refresh_from_db()
+        assert data_source_sync_task.status == SyncTaskStatus.SUCCESS
+        assert "prefetch users from data source plugin while syncing departments" in data_source_sync_task.logs
+
+        # 预拉取模式的同步结果，应该与串行拉取的一致
+        assert DataSourceDepartment.objects.filter(data_source=bare_local_data_source).count() == 12
+        assert DataSourceUser.objects.filter(data_source=bare_local_data_source).count() == 12
+        assert DataSourceUserLeaderRelation.objects.filter(data_source=bare_local_data_source).count() == 12
+        assert DataSourceDepartmentUserRelation.objects.filter(data_source=bare_local_data_source).count() == 14
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""
+数据源部门关系同步基准测试（不会在单元测试中执行）
+
+执行方式：pytest tests/apps/sync/syncers/bench_data_source_department.py -s
+可通过环境变量 BENCH_DEPT_COUNT 指定部门数量（默认 5000），BENCH_ROUNDS 指定每种模式的同步轮次（默认 3）
+"""
+
+import os
+import time
+from typing import List
+
+import pytest
+from bkuser.apps.data_source.models import DataSourceDepartmentRelation
+from bkuser.apps.sync.syncers import DataSourceDepartmentSyncer
+from bkuser.apps.sync.syncers.data_source_department import DataSourceDepartmentRelationSyncer
+from bkuser.plugins.models import RawDataSourceDepartment
+
+pytestmark = pytest.mark.django_db
+
+DEPT_COUNT = int(os.getenv("BENCH_DEPT_COUNT", "5000"))
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "3"))
+# 每个部门的子部门数量
+FAN_OUT = 10
+
+
+def _gen_raw_departments(count: int) -> List[RawDataSourceDepartment]:
+    """生成单棵树的部门数据，部门 i 的父部门为 (i - 1) // FAN_OUT"""
+    return [
+        RawDataSourceDepartment(
+            code=f"dept-{idx}", name=f"部门-{idx}", parent=f"dept-{(idx - 1) // FAN_OUT}" if idx else None
+        )
+        for idx in range(count)
+    ]
+
+
+def _sync_relations(ctx, data_source, raw_departments: List[RawDataSourceDepartment]) -> float:
+    syncer = DataSourceDepartmentRelationSyncer(
+        ctx=ctx, data_source=data_source, raw_departments=raw_departments, overwrite=True, incremental=False
+    )
+    start = time.perf_counter()
+    syncer.sync()
+    return time.perf_counter() - start
+
+
+def test_department_relation_sync(settings, data_source_sync_task_ctx, bare_local_data_source):
+    raw_departments = _gen_raw_departments(DEPT_COUNT)
+    DataSourceDepartmentSyncer(
+        ctx=data_source_sync_task_ctx,
+        data_source=bare_local_data_source,
+        raw_departments=raw_departments,
+        overwrite=True,
+        incremental=False,
+    ).sync()
+    _sync_relations(data_source_sync_task_ctx, bare_local_data_source, raw_departments)
+
+    # 每轮同步都将最后一个部门移动到另外一个父部门下（模拟只有少量部门变动的场景）
+    moved_dept = raw_departments[-1]
+    candidate_parents = [raw_departments[1].code, raw_departments[2].code]
+
+    results = {}
+    for rebuild in [True, False]:
+        settings.DATA_SOURCE_SYNC_DEPT_RELATION_REBUILD = rebuild
+
+        costs = []
+        for idx in range(ROUNDS):
+            moved_dept.parent = candidate_parents[idx % 2]
+            costs.append(_sync_relations(data_source_sync_task_ctx, bare_local_data_source, raw_departments))
+
+            relation = DataSourceDepartmentRelation.objects.get(department__code=moved_dept.code)
+            assert relation.parent.department.code == moved_dept.parent
+
+        results["rebuild" if rebuild else "patch"] = costs
+
+    print(f"\ndepartment relation sync benchmark (departments: {DEPT_COUNT}, rounds: {ROUNDS})")
+    for mode, costs in results.items():
+        print(f"  {mode:<8} avg: {sum(costs) / len(costs):.3f}s, min: {min(costs):.3f}s, max: {max(costs):.3f}s")
@@ -22,11 +22,13 @@ from bkuser.apps.data_source.models import (
     DataSource,
     DataSourceDepartment,
     DataSourceDepartmentRelation,
+    DepartmentRelationMPTTTree,
 )
 from bkuser.apps.sync.contexts import DataSourceSyncTaskContext
 from bkuser.apps.sync.syncers import DataSourceDepartmentSyncer
 from bkuser.apps.sync.syncers.data_source_department import DataSourceDepartmentRelationSyncer
 from bkuser.plugins.models import RawDataSourceDepartment
+from bkuser.utils.tree import Tree
 
 pytestmark = pytest.mark.django_db
 
@@ -48,6 +50,7 @@ class TestSyncDataSourceDepartment:
         assert self._gen_parent_relations_from_db(
             data_source=bare_local_data_source
         ) == self._gen_parent_relations_from_raw_departments(raw_departments)
+        self._assert_mptt_forest_valid(bare_local_data_source)
 
     def test_update(self, data_source_sync_task_ctx, full_local_data_source):
         raw_departments = [
@@ -72,6 +75,53 @@ class TestSyncDataSourceDepartment:
         assert self._gen_parent_relations_from_db(
             data_source=full_local_data_source
         ) == self._gen_parent_relations_from_raw_departments(raw_departments)
+        self._assert_mptt_forest_valid(full_local_data_source)
+
+    def test_update_with_move_department(self, data_source_sync_task_ctx, full_local_data_source, raw_departments):
+        relations = DataSourceDepartmentRelation.objects.filter(data_source=full_local_data_source)
+        tree_ids_before_sync = set(relations.values_list("tree_id", flat=True))
+        mptt_tree_cnt_before_sync = DepartmentRelationMPTTTree.objects.count()
+
+        # 将中心AB 移动到部门B 下，小组ABA 跟随移动
+        for dept in raw_departments:
+            if dept.code == "center_ab":
+                dept.parent = "dept_b"
+
+        self._sync_data_source_departments(
+            data_source_sync_task_ctx, full_local_data_source, raw_departments, overwrite=True, incremental=False
+        )
+
+        assert self._gen_parent_relations_from_db(
+            data_source=full_local_data_source
+        ) == self._gen_parent_relations_from_raw_departments(raw_departments)
+        self._assert_mptt_forest_valid(full_local_data_source)
+        # 原有的树复用原来的 tree_id，只有新增的树（部门 V）才会分配新的 tree_id
+        assert tree_ids_before_sync < set(relations.values_list("tree_id", flat=True))
+        assert DepartmentRelationMPTTTree.objects.count() > mptt_tree_cnt_before_sync
+        mptt_tree_cnt_before_sync = DepartmentRelationMPTTTree.objects.count()
+
+        # 再次同步，数据没有变化，tree_id 也不会重新分配
+        self._sync_data_source_departments(
+            data_source_sync_task_ctx, full_local_data_source, raw_departments, overwrite=True, incremental=False
+        )
+        self._assert_mptt_forest_valid(full_local_data_source)
+        assert DepartmentRelationMPTTTree.objects.count() == mptt_tree_cnt_before_sync
+
+    def test_update_with_rebuild(self, settings, data_source_sync_task_ctx, full_local_data_source, raw_departments):
+        settings.DATA_SOURCE_SYNC_DEPT_RELATION_REBUILD = True
+
+        for dept in raw_departments:
+            if dept.code == "center_ab":
+                dept.parent = "dept_b"
+
+        self._sync_data_source_departments(
+            data_source_sync_task_ctx, full_local_data_source, raw_departments, overwrite=True, incremental=False
+        )
+
+        assert self._gen_parent_relations_from_db(
+            data_source=full_local_data_source
+        ) == self._gen_parent_relations_from_raw_departments(raw_departments)
+        self._assert_mptt_forest_valid(full_local_data_source)
 
     def test_update_with_incremental(self, data_source_sync_task_ctx, full_local_data_source, random_raw_department):
         dept_relation_cnt_before_sync = DataSourceDepartmentRelation.objects.filter(
@@ -96,6 +146,7 @@ class TestSyncDataSourceDepartment:
         assert DataSourceDepartmentRelation.objects.filter(data_source=full_local_data_source).count() == (
             dept_relation_cnt_before_sync + 1
         )
+        self._assert_mptt_forest_valid(full_local_data_source)
 
     def test_update_without_incremental_and_overwrite(
         self, data_source_sync_task_ctx, full_local_data_source, raw_departments
@@ -144,3 +195,26 @@ class TestSyncDataSourceDepartment:
     def _gen_parent_relations_from_db(data_source: DataSource) -> Set[Tuple[str, str | None]]:
         dept_relations = DataSourceDepartmentRelation.objects.filter(data_source=data_source)
         return {(rel.department.code, rel.parent.department.code if rel.parent else None) for rel in dept_relations}
+
+    @staticmethod
+    def _assert_mptt_forest_valid(data_source: DataSource):
+        """检查 MPTT 字段（tree_id, lft, rght, level）与部门父子关系是否一致"""
+        dept_relations = list(DataSourceDepartmentRelation.objects.filter(data_source=data_source))
+        tree = Tree([(rel.department_id, rel.parent_id) for rel in dept_relations])
+
+        for rel in dept_relations:
+            assert rel.level == len(tree.get_ancestors(rel.department_id))
+            if rel.parent_id is None:
+                assert rel.lft == 1
+                # 每棵树有且只有一个根节点
+                assert [r.department_id for r in dept_relations if r.tree_id == rel.tree_id and r.parent is None] == [
+                    rel.department_id
+                ]
+
+            descendant_ids = {
+                r.department_id
+                for r in dept_relations
+                if r.tree_id == rel.tree_id and rel.lft < r.lft and r.rght < rel.rght
+            }
+            assert descendant_ids == set(tree.get_descendants(rel.department_id))
+            assert rel.rght - rel.lft == len(descendant_ids) * 2 + 1
@@ -25,7 +25,9 @@ from bkuser.apps.data_source.models import (
     DataSourceUser,
     DataSourceUserLeaderRelation,
 )
+from bkuser.apps.sync.constants import DataSourceSyncObjectType, SyncOperation
 from bkuser.apps.sync.contexts import DataSourceSyncTaskContext
+from bkuser.apps.sync.spools import RawDataSourceUserSpool
 from bkuser.apps.sync.syncers import (
     DataSourceDepartmentRelationSyncer,
     DataSourceDepartmentSyncer,
@@ -291,11 +293,99 @@ class TestSyncDataSourceUser:
 
     def test_destroy(self, data_source_sync_task_ctx, full_local_data_source):
         raw_users: List[RawDataSourceUser] = []
+        user_codes = set(
+            DataSourceUser.objects.filter(data_source=full_local_data_source).values_list("code", flat=True)
+        )
 
         self._sync_data_source_users(
             data_source_sync_task_ctx, full_local_data_source, raw_users, overwrite=True, incremental=False
         )
         assert DataSourceUser.objects.filter(data_source=full_local_data_source).count() == 0
+        # 被删除的用户需要被记录
+        assert {
+            e.code for e in data_source_sync_task_ctx.recorder.iter_entries() if e.operation == SyncOperation.DELETE
+        } == user_codes
+
+    def test_record_created_users_with_id(
+        self, data_source_sync_task_ctx, bare_local_data_source, tenant_user_custom_fields, raw_departments, raw_users
+    ):
+        self._sync_data_source_departments(
+            data_source_sync_task_ctx, bare_local_data_source, raw_departments, overwrite=True, incremental=False
+        )
+        self._sync_data_source_users(
+            data_source_sync_task_ctx, bare_local_data_source, raw_users, overwrite=True, incremental=False
+        )
+
+        user_id_map = dict(DataSourceUser.objects.filter(data_source=bare_local_data_source).values_list("code", "id"))
+        entries = [
+            e for e in data_source_sync_task_ctx.recorder.iter_entries() if e.type == DataSourceSyncObjectType.USER
+        ]
+        # 新建的用户在创建时即回填了主键
+        assert {e.code: e.id for e in entries if e.operation == SyncOperation.CREATE} == user_id_map
+
+    def test_update_with_content_hash(
+        self, data_source_sync_task_ctx, full_local_data_source, tenant_user_custom_fields, raw_users
+    ):
+        # 首次同步，会更新所有用户的数据 & 内容哈希
+        self._sync_data_source_users(
+            data_source_sync_task_ctx, full_local_data_source, raw_users, overwrite=True, incremental=False
+        )
+        users = DataSourceUser.objects.filter(data_source=full_local_data_source)
+        assert all(u.content_hash == u.gen_content_hash() for u in users)
+        updated_at_map = dict(users.values_list("code", "updated_at"))
+
+        # 模拟存量数据没有内容哈希的情况
+        users.filter(code="lisi").update(content_hash="")
+        # 模拟通过批量操作修改了数据，同时将内容哈希置空的情况
+        users.filter(code="wangwu").update(full_name="王五五", content_hash="")
+
+        # 数据源数据没有变化，再次同步
+        self._sync_data_source_users(
+            data_source_sync_task_ctx, full_local_data_source, raw_users, overwrite=True, incremental=False
+        )
+        # 内容哈希缺失的用户，数据没有变化，只会修正内容哈希
+        lisi = users.get(code="lisi")
+        assert lisi.content_hash == lisi.gen_content_hash()
+        assert lisi.updated_at == updated_at_map["lisi"]
+        # 数据有变化的用户，会被数据源数据覆盖
+        wangwu = users.get(code="wangwu")
+        assert wangwu.full_name == "王五"
+        assert wangwu.content_hash == wangwu.gen_content_hash()
+        # 其他没有变化的用户，不会被更新
+        assert users.get(code="zhangsan").updated_at == updated_at_map["zhangsan"]
+
+    def test_update_in_chunk_mode(
+        self, data_source_sync_task_ctx, full_local_data_source, tenant_user_custom_fields, raw_users, random_raw_user
+    ):
+        # 修改用户信息 & 关联边，并添加一个随机用户
+        raw_users[0].properties["full_name"] = "张三的另一个名字"
+        raw_users[0].leaders = ["linshiyi", "baishier"]
+        raw_users[0].departments = ["center_aa", "center_ab"]
+        raw_users.append(random_raw_user)
+
+        with RawDataSourceUserSpool() as spool:
+            spool.extend(raw_users)
+            assert len(spool) == len(raw_users)
+
+            self._sync_data_source_users(
+                data_source_sync_task_ctx,
+                full_local_data_source,
+                spool,  # type: ignore
+                overwrite=True,
+                incremental=False,
+                chunk_size=2,
+            )
+
+        users = DataSourceUser.objects.filter(data_source=full_local_data_source)
+        assert set(users.values_list("code", flat=True)) == {user.code for user in raw_users}
+        assert all(bool(e) for e in users.values_list("extras", flat=True))
+        assert users.get(code="zhangsan").full_name == "张三的另一个名字"
+
+        # 验证用户部门信息
+        assert self._gen_user_depts_from_db(users) == self._gen_user_depts_from_raw_users(raw_users)
+
+        # 验证用户 Leader 信息
+        assert self._gen_user_leaders_from_db(users) == self._gen_user_leaders_from_raw_users(raw_users)
 
     @staticmethod
     def _sync_data_source_departments(
@@ -323,6 +413,7 @@ class TestSyncDataSourceUser:
         raw_users: List[RawDataSourceUser],
         overwrite: bool,
         incremental: bool,
+        chunk_size: int = 0,
     ):
         """执行数据源部门同步（所有步骤）"""
         kwargs = {
@@ -334,7 +425,7 @@ class TestSyncDataSourceUser:
         }
         # 同步前存量的用户 ID 集合
         exists_user_ids = set(DataSourceUser.objects.filter(data_source=data_source).values_list("id", flat=True))
-        DataSourceUserSyncer(**kwargs).sync()  # type: ignore
+        DataSourceUserSyncer(chunk_size=chunk_size, **kwargs).sync()  # type: ignore
         DataSourceUserLeaderRelationSyncer(exists_user_ids_before_sync=exists_user_ids, **kwargs).sync()  # type: ignore
         DataSourceUserDeptRelationSyncer(exists_user_ids_before_sync=exists_user_ids, **kwargs).sync()  # type: ignore
 
@@ -59,6 +59,31 @@ class TestTenantDepartmentSyncer:
             data_source=full_local_data_source,
         ).exists()
 
+    def test_reuse_tenant_dept_id(self, tenant_sync_task_ctx, full_local_data_source, random_tenant):
+        TenantDepartmentSyncer(tenant_sync_task_ctx, full_local_data_source, random_tenant).sync()
+        dept_id_map = dict(
+            TenantDepartment.objects.filter(tenant=random_tenant).values_list("data_source_department__code", "id")
+        )
+        # 每个租户部门都需要有 ID 记录
+        assert (
+            dict(
+                TenantDepartmentIDRecord.objects.filter(
+                    tenant=random_tenant, data_source=full_local_data_source
+                ).values_list("code", "tenant_department_id")
+            )
+            == dept_id_map
+        )
+
+        # 租户部门被删除后重新同步，ID 需要与之前一致
+        TenantDepartment.objects.filter(tenant=random_tenant).delete()
+        TenantDepartmentSyncer(tenant_sync_task_ctx, full_local_data_source, random_tenant).sync()
+        assert (
+            dict(
+                TenantDepartment.objects.filter(tenant=random_tenant).values_list("data_source_department__code", "id")
+            )
+            == dept_id_map
+        )
+
     @staticmethod
     def _gen_ds_dept_ids_with_tenant(tenant: Tenant, data_source: DataSource) -> Set[int]:
         return set(
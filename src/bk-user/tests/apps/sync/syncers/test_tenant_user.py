@@ -16,11 +16,15 @@
 # to the current version of the project delivered to anyone in the future.
 
 from typing import Set
+from unittest import mock
 
 import pytest
 from bkuser.apps.data_source.models import DataSource, DataSourceUser
+from bkuser.apps.sync.constants import SyncOperation, TenantSyncObjectType
+from bkuser.apps.sync.differs import TenantSyncDiffer
 from bkuser.apps.sync.syncers import TenantUserSyncer
 from bkuser.apps.tenant.models import Tenant, TenantUser, TenantUserIDRecord
+from django.db import connection
 
 pytestmark = pytest.mark.django_db
 
@@ -51,6 +55,9 @@ class TestTenantUserSyncer:
         assert self._gen_ds_user_ids_with_data_source(
             data_source=full_local_data_source
         ) == self._gen_ds_user_ids_with_tenant(random_tenant, full_local_data_source)
+        # 被删除的租户用户需要被记录到变更日志中
+        deleted_users = tenant_sync_task_ctx.recorder.get(SyncOperation.DELETE, TenantSyncObjectType.USER)
+        assert len(deleted_users) == 2  # noqa: PLR2004
 
         # 删除场景，只会删除当前数据源关联的租户用户
         DataSourceUser.objects.filter(data_source=full_local_data_source).delete()
@@ -61,6 +68,39 @@ class TestTenantUserSyncer:
         # 租户用户 ID 复用
         assert TenantUserIDRecord.objects.filter(tenant=random_tenant, data_source=full_local_data_source).exists()
 
+    def test_diff_in_transaction(self, tenant_sync_task_ctx, full_local_data_source, random_tenant):
+        TenantUserSyncer(tenant_sync_task_ctx, full_local_data_source, random_tenant).sync()
+        deleted_user = DataSourceUser.objects.get(data_source=full_local_data_source, code="lushi")
+        deleted_user_id = deleted_user.id
+        deleted_user.delete()
+
+        outer_atomic_depth = len(connection.savepoint_ids)
+        atomic_depths = []
+
+        def record_atomic_depth(method):
+            def wrapper(differ):
+                atomic_depths.append(len(connection.savepoint_ids))
+                return method(differ)
+
+            return wrapper
+
+        with mock.patch.object(
+            TenantSyncDiffer,
+            "get_waiting_delete_queryset",
+            record_atomic_depth(TenantSyncDiffer.get_waiting_delete_queryset),
+        ), mock.patch.object(
+            TenantSyncDiffer,
+            "get_waiting_sync_queryset",
+            record_atomic_depth(TenantSyncDiffer.get_waiting_sync_queryset),
+        ):
+            TenantUserSyncer(tenant_sync_task_ctx, full_local_data_source, random_tenant).sync()
+
+        # 差异计算需要与变更在同一个事务中，避免期间的并发修改导致误删
+        assert atomic_depths
+        assert all(depth > outer_atomic_depth for depth in atomic_depths)
+        deleted_users = tenant_sync_task_ctx.recorder.get(SyncOperation.DELETE, TenantSyncObjectType.USER)
+        assert [u.data_source_user_id for u in deleted_users] == [deleted_user_id]
+
     @staticmethod
     def _gen_ds_user_ids_with_tenant(tenant: Tenant, data_source: DataSource) -> Set[int]:
         return set(
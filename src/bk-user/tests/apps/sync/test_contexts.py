@@ -17,10 +17,17 @@
 
 import pytest
 from bkuser.apps.data_source.models import DataSourceDepartment, DataSourceUser
-from bkuser.apps.sync.constants import DataSourceSyncObjectType, SyncOperation, SyncTaskStatus
+from bkuser.apps.sync.constants import (
+    DataSourceSyncObjectType,
+    SyncLogLevel,
+    SyncLogPhase,
+    SyncOperation,
+    SyncTaskStatus,
+)
 from bkuser.apps.sync.contexts import DataSourceSyncTaskContext, TenantSyncTaskContext
 from bkuser.apps.sync.models import (
     DataSourceDepartmentChangeLog,
+    DataSourceSyncTaskLog,
     DataSourceUserChangeLog,
     TenantDepartmentChangeLog,
     TenantUserChangeLog,
@@ -62,6 +69,21 @@ class TestDataSourceSyncTaskContext:
         assert data_source_sync_task.has_warning
         assert "this is warning log" in data_source_sync_task.logs
 
+    def test_store_structured_logs(self, data_source_sync_task):
+        with DataSourceSyncTaskContext(data_source_sync_task) as ctx:
+            ctx.logger.phase = SyncLogPhase.USER
+            for _ in range(3):
+                ctx.logger.warning("user leader: lisi is missing")
+
+        logs = list(DataSourceSyncTaskLog.objects.filter(task=data_source_sync_task))
+        assert [log.seq for log in logs] == [1, 2, 3]
+        assert [(log.phase, log.level, log.count) for log in logs] == [
+            (SyncLogPhase.PREPARE, SyncLogLevel.INFO, 1),
+            (SyncLogPhase.USER, SyncLogLevel.WARNING, 3),
+            (SyncLogPhase.FINISH, SyncLogLevel.INFO, 1),
+        ]
+        assert "WARNING user leader: lisi is missing (repeated 3 times)" in data_source_sync_task.logs
+
     def test_with_records(self, data_source_sync_task):
         ds = data_source_sync_task.data_source
         zhangsan = DataSourceUser(
@@ -96,16 +118,45 @@ class TestDataSourceSyncTaskContext:
             ctx.recorder.add(operation=SyncOperation.DELETE, type=DataSourceSyncObjectType.DEPARTMENT, items=depts)
 
         user_change_logs = DataSourceUserChangeLog.objects.filter(task=data_source_sync_task)
-        # 创建类数据，会再查询一次 DB，因此 DB 中没有数据的（lisi），不会记录
+        # 有 ID 的数据，给啥就记录啥（不会再查询 DB）
         assert set(
             user_change_logs.filter(operation=SyncOperation.CREATE).values_list("user_code", flat=True),
-        ) == {"zhangsan"}
+        ) == {"zhangsan", "lisi"}
         # 更新 / 删除类的数据，给啥就记录啥
         assert set(
             user_change_logs.filter(operation=SyncOperation.UPDATE).values_list("user_code", flat=True),
         ) == {"lisi"}
         assert DataSourceDepartmentChangeLog.objects.filter(task=data_source_sync_task).count() == len(depts)
 
+    def test_with_records_missing_id(self, data_source_sync_task):
+        ds = data_source_sync_task.data_source
+        DataSourceUser.objects.create(data_source=ds, code="zhangsan", username="zhangsan", full_name="张三")
+        # 模拟 bulk_create 未回填主键的情况，会根据 code 查询 ID，DB 中没有数据的（lisi），不会记录
+        users = [
+            DataSourceUser(data_source=ds, code="zhangsan", username="zhangsan", full_name="张三"),
+            DataSourceUser(data_source=ds, code="lisi", username="lisi", full_name="李四"),
+        ]
+        with DataSourceSyncTaskContext(data_source_sync_task) as ctx:
+            ctx.recorder.add(operation=SyncOperation.CREATE, type=DataSourceSyncObjectType.USER, items=users)
+
+        change_logs = DataSourceUserChangeLog.objects.filter(task=data_source_sync_task)
+        assert list(change_logs.values_list("user_code", "user_id")) == [
+            ("zhangsan", str(DataSourceUser.objects.get(data_source=ds, code="zhangsan").id))
+        ]
+
+    def test_store_records_in_batches(self, django_assert_num_queries, data_source_sync_task):
+        ds = data_source_sync_task.data_source
+        depts = [DataSourceDepartment(id=idx, data_source=ds, code=f"d{idx}", name=f"d{idx}") for idx in range(1, 6)]
+
+        ctx = DataSourceSyncTaskContext(data_source_sync_task)
+        ctx.batch_size = 2
+        ctx.recorder.add(operation=SyncOperation.CREATE, type=DataSourceSyncObjectType.DEPARTMENT, items=depts)
+        # 5 条变更记录，按每批 2 条写入，需要 3 次写入
+        with django_assert_num_queries(3):
+            ctx._store_records_into_db()
+
+        assert DataSourceDepartmentChangeLog.objects.filter(task=data_source_sync_task).count() == len(depts)
+
 
 class TestTenantSyncTaskContext:
     def test_failed_task(self, tenant_sync_task):
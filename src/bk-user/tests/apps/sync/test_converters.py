@@ -15,11 +15,14 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+from unittest import mock
+
 import pytest
 from bkuser.apps.data_source.constants import FieldMappingOperation
 from bkuser.apps.data_source.data_models import DataSourceUserFieldMapping
-from bkuser.apps.sync.converters import DataSourceUserConverter
+from bkuser.apps.sync.converters import DataSourceUserConversionPlan, DataSourceUserConverter
 from bkuser.apps.sync.loggers import TaskLogger
+from bkuser.common.validators import validate_phone_with_country_code
 from bkuser.plugins.models import RawDataSourceUser
 
 pytestmark = pytest.mark.django_db
@@ -254,3 +257,28 @@ class TestDataSourceUserConverter:
 
         with pytest.raises(ValueError, match="not subset of"):
             DataSourceUserConverter(bare_local_data_source, logger).convert(raw_zhangsan)
+
+    def test_convert_with_phone_validation_cache(self, bare_local_data_source, logger):
+        def gen_raw_user(username: str, phone: str) -> RawDataSourceUser:
+            return RawDataSourceUser(
+                code=username,
+                properties={"username": username, "full_name": username, "phone": phone},
+                leaders=[],
+                departments=[],
+            )
+
+        converter = DataSourceUserConverter(bare_local_data_source, logger)
+        with mock.patch.object(DataSourceUserConversionPlan, "phone_validation_cache_size", 1), mock.patch(
+            "bkuser.apps.sync.converters.validate_phone_with_country_code", wraps=validate_phone_with_country_code
+        ) as validate:
+            # 相同的手机号只校验一次，缓存数量有上限，被淘汰的需要重新校验
+            converter.convert(gen_raw_user("zhangsan", "13512345671"))
+            converter.convert(gen_raw_user("lisi", "13512345671"))
+            converter.convert(gen_raw_user("wangwu", "13512345672"))
+            converter.convert(gen_raw_user("zhaoliu", "13512345671"))
+
+        assert validate.call_args_list == [
+            mock.call("13512345671", "86"),
+            mock.call("13512345672", "86"),
+            mock.call("13512345671", "86"),
+        ]
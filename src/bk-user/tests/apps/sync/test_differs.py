@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import pytest
+from bkuser.apps.data_source.models import DataSourceDepartment, DataSourceUser
+from bkuser.apps.sync.differs import TenantSyncDiffer
+from bkuser.apps.tenant.models import TenantDepartment, TenantUser
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.test_utils.tenant import sync_users_depts_to_tenant
+
+pytestmark = pytest.mark.django_db
+
+
+class TestTenantSyncDiffer:
+    def test_initial(self, random_tenant, full_local_data_source):
+        differ = TenantSyncDiffer.for_users(random_tenant, full_local_data_source)
+        assert not differ.get_waiting_delete_queryset().exists()
+        assert set(differ.get_waiting_sync_queryset()) == set(
+            DataSourceUser.objects.filter(data_source=full_local_data_source)
+        )
+
+    def test_diff_users(self, random_tenant, full_local_data_source):
+        sync_users_depts_to_tenant(random_tenant, full_local_data_source)
+        differ = TenantSyncDiffer.for_users(random_tenant, full_local_data_source)
+        assert not differ.get_waiting_delete_queryset().exists()
+        assert not differ.get_waiting_sync_queryset().exists()
+
+        zhangsan = TenantUser.objects.get(tenant=random_tenant, data_source_user__username="zhangsan")
+        DataSourceUser.objects.filter(data_source=full_local_data_source, username="zhangsan").delete()
+        TenantUser.objects.filter(tenant=random_tenant, data_source_user__username="lisi").delete()
+
+        assert [u.id for u in differ.get_waiting_delete_queryset()] == [zhangsan.id]
+        assert [u.username for u in differ.get_waiting_sync_queryset()] == ["lisi"]
+
+    def test_diff_departments(self, random_tenant, full_local_data_source):
+        sync_users_depts_to_tenant(random_tenant, full_local_data_source)
+        differ = TenantSyncDiffer.for_departments(random_tenant, full_local_data_source)
+
+        DataSourceDepartment.objects.filter(data_source=full_local_data_source, code="group_aaa").delete()
+        TenantDepartment.objects.filter(tenant=random_tenant, data_source_department__code="center_ab").delete()
+
+        assert differ.get_waiting_delete_queryset().count() == 1
+        assert [d.code for d in differ.get_waiting_sync_queryset()] == ["center_ab"]
+
+    def test_query_size_independent_of_data_size(self, random_tenant, full_local_data_source):
+        sync_users_depts_to_tenant(random_tenant, full_local_data_source)
+        differ = TenantSyncDiffer.for_users(random_tenant, full_local_data_source)
+
+        with CaptureQueriesContext(connection) as ctx:
+            list(differ.get_waiting_delete_queryset())
+            list(differ.get_waiting_sync_queryset())
+
+        # 差异由 DB 通过子查询计算，不会将 ID 列表作为参数下发
+        assert len(ctx.captured_queries) == 2
+        assert all("NOT EXISTS" in query["sql"] and " IN (" not in query["sql"] for query in ctx.captured_queries)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import threading
+import time
+from typing import Iterator, List
+
+import pytest
+from bkuser.apps.sync.constants import SyncLogPhase
+from bkuser.apps.sync.exceptions import DataSourceUserFetchStopped
+from bkuser.apps.sync.fetchers import DataSourceUserFetcher
+from bkuser.apps.sync.loggers import TaskLogger
+from bkuser.apps.sync.spools import RawDataSourceUserSpool
+from bkuser.plugins.models import RawDataSourceUser
+
+
+class DummyPlugin:
+    """模拟数据源插件，拉取用户时会阻塞，直到 release 被设置"""
+
+    id = "dummy"
+
+    def __init__(self, user_count: int = 3, exc: Exception | None = None):
+        self.logger = TaskLogger()
+        self.users = [
+            RawDataSourceUser(code=f"user-{idx}", properties={}, leaders=[], departments=[])
+            for idx in range(user_count)
+        ]
+        self.exc = exc
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.fetch_thread: threading.Thread | None = None
+
+    def fetch_users(self) -> List[RawDataSourceUser]:
+        return list(self.iter_users())
+
+    def iter_users(self) -> Iterator[RawDataSourceUser]:
+        self.fetch_thread = threading.current_thread()
+        self.started.set()
+        assert self.release.wait(timeout=5)
+        self.logger.info("fetch users from dummy plugin")
+        if self.exc:
+            raise self.exc
+
+        yield from self.users
+
+
+class PagedDummyPlugin(DummyPlugin):
+    """模拟分页拉取用户的数据源插件，会一直拉取，直到被停止"""
+
+    def __init__(self):
+        super().__init__()
+        self.fetched_count = 0
+        self.closed = threading.Event()
+
+    def iter_users(self) -> Iterator[RawDataSourceUser]:
+        self.started.set()
+        try:
+            while True:
+                self.fetched_count += 1
+                yield RawDataSourceUser(code=f"user-{self.fetched_count}", properties={}, leaders=[], departments=[])
+        finally:
+            # 模拟插件释放连接
+            self.closed.set()
+
+
+class TestDataSourceUserFetcher:
+    @pytest.mark.parametrize("chunk_size", [0, 2])
+    def test_without_prefetch(self, chunk_size):
+        plugin = DummyPlugin()
+        plugin.release.set()
+
+        with DataSourceUserFetcher(plugin, chunk_size, prefetch=False, task_logger=plugin.logger) as fetcher:  # type: ignore
+            # 未启用预拉取时，不会提前拉取用户数据
+            assert not plugin.started.is_set()
+            users = fetcher.fetch()
+            assert list(users) == plugin.users
+
+        assert plugin.fetch_thread is threading.current_thread()
+
+    @pytest.mark.parametrize("chunk_size", [0, 2])
+    def test_prefetch(self, chunk_size):
+        plugin = DummyPlugin()
+
+        with DataSourceUserFetcher(plugin, chunk_size, prefetch=True, task_logger=plugin.logger) as fetcher:  # type: ignore
+            # 进入上下文后，用户数据即在后台线程中开始拉取，与当前线程的其他操作（如同步部门）并行
+            assert plugin.started.wait(timeout=5)
+            assert plugin.fetch_thread is not threading.current_thread()
+
+            # 后台拉取期间，主线程处于部门同步阶段，但插件记录的日志归属于用户同步阶段
+            plugin.logger.phase = SyncLogPhase.DEPARTMENT
+            plugin.release.set()
+            users = fetcher.fetch()
+            assert isinstance(users, RawDataSourceUserSpool if chunk_size else list)
+            assert list(users) == plugin.users
+
+        assert [(e.phase, e.message) for e in plugin.logger.entries] == [
+            (SyncLogPhase.USER, "fetch users from dummy plugin")
+        ]
+
+    def test_prefetch_error(self):
+        plugin = DummyPlugin(exc=RuntimeError("connection refused"))
+        plugin.release.set()
+
+        # 后台拉取时的异常，会在获取用户数据时抛出
+        with DataSourceUserFetcher(plugin, 2, prefetch=True, task_logger=plugin.logger) as fetcher, pytest.raises(  # type: ignore
+            RuntimeError, match="connection refused"
+        ):
+            fetcher.fetch()
+
+    def test_prefetch_exit_early(self):
+        plugin = DummyPlugin()
+
+        fetcher = DataSourceUserFetcher(plugin, 2, prefetch=True, task_logger=plugin.logger)  # type: ignore
+        fetcher.stop_timeout = 0.1  # type: ignore
+        with pytest.raises(ValueError, match="sync departments failed"), fetcher:  # noqa: PT012
+            assert plugin.started.wait(timeout=5)
+            raise ValueError("sync departments failed")
+
+        # 提前退出时，插件阻塞在单次请求中，超时后不再等待，拉取结束后暂存池会被关闭
+        assert fetcher._spool is not None
+        plugin.release.set()
+        fetcher._executor.shutdown(wait=True)  # type: ignore
+        assert fetcher._spool._file.closed
+        # 插件恢复后，不会继续拉取剩余的用户数据
+        assert isinstance(fetcher._future.exception(), DataSourceUserFetchStopped)  # type: ignore
+        assert len(fetcher._spool) == 0
+
+    def test_prefetch_stop_on_error(self):
+        plugin = PagedDummyPlugin()
+
+        fetcher = DataSourceUserFetcher(plugin, 2, prefetch=True, task_logger=plugin.logger)  # type: ignore
+        with pytest.raises(ValueError, match="sync departments failed"), fetcher:  # noqa: PT012
+            assert plugin.started.wait(timeout=5)
+            raise ValueError("sync departments failed")
+
+        # 同步提前失败时，后台拉取会被停止，退出时已经结束，插件连接 & 暂存池均已释放
+        assert fetcher._future.done()  # type: ignore
+        assert isinstance(fetcher._future.exception(), DataSourceUserFetchStopped)  # type: ignore
+        assert plugin.closed.is_set()
+        assert fetcher._spool._file.closed  # type: ignore
+
+        fetched_count = plugin.fetched_count
+        time.sleep(0.05)
+        assert plugin.fetched_count == fetched_count
@@ -16,8 +16,9 @@
 # to the current version of the project delivered to anyone in the future.
 
 import pytest
-from bkuser.apps.data_source.models import DataSource
-from bkuser.apps.sync.handlers import set_data_source_sync_periodic_task
+from bkuser.apps.data_source.department_path_index import DataSourceDepartmentPathIndex
+from bkuser.apps.data_source.models import DataSource, DataSourceDepartment
+from bkuser.apps.sync.handlers import invalidate_department_path_index, set_data_source_sync_periodic_task
 from bkuser.apps.sync.names import gen_data_source_sync_periodic_task_name
 from django.db.models.signals import post_save
 from django_celery_beat.models import PeriodicTask
@@ -54,3 +55,15 @@ def test_set_data_source_sync_periodic_task_with_general(bare_general_data_sourc
     bare_general_data_source.sync_config = {}
     bare_general_data_source.save()
     assert not PeriodicTask.objects.filter(name=task_name).exists()
+
+
+def test_invalidate_department_path_index(django_capture_on_commit_callbacks, full_local_data_source):
+    dept = DataSourceDepartment.objects.get(data_source=full_local_data_source, code="center_aa")
+    index = DataSourceDepartmentPathIndex(full_local_data_source.id)
+    assert index.get_many([dept.id])[dept.id].full_name == "公司/部门A/中心AA"
+
+    DataSourceDepartment.objects.filter(data_source=full_local_data_source, code="dept_a").update(name="部门AA")
+    with django_capture_on_commit_callbacks(execute=True):
+        invalidate_department_path_index(sender=None, data_source=full_local_data_source)
+
+    assert index.get_many([dept.id])[dept.id].full_name == "公司/部门AA/中心AA"
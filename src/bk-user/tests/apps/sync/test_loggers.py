@@ -15,8 +15,11 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import threading
+
 import pytest
-from bkuser.apps.sync.loggers import TaskLogger
+from bkuser.apps.sync.constants import SyncLogLevel, SyncLogPhase
+from bkuser.apps.sync.loggers import TaskLogEntry, TaskLogger
 
 pytestmark = pytest.mark.django_db
 
@@ -43,3 +46,69 @@ class TestTaskLogger:
 
         logger.warning("this is warning log")
         assert logger.has_warning
+
+    def test_aggregate_repeated_logs(self):
+        logger = TaskLogger()
+        logger.info("start sync users...")
+        for _ in range(3):
+            logger.warning("user department: dept_a is missing")
+        logger.phase = SyncLogPhase.USER
+        logger.warning("user department: dept_a is missing")
+
+        assert logger.entries == [
+            TaskLogEntry(SyncLogPhase.PREPARE, SyncLogLevel.INFO, "start sync users...", 1),
+            TaskLogEntry(SyncLogPhase.PREPARE, SyncLogLevel.WARNING, "user department: dept_a is missing", 3),
+            TaskLogEntry(SyncLogPhase.USER, SyncLogLevel.WARNING, "user department: dept_a is missing", 1),
+        ]
+        assert logger.logs == (
+            "INFO start sync users...\n\n"
+            "WARNING user department: dept_a is missing (repeated 3 times)\n\n"
+            "WARNING user department: dept_a is missing\n\n"
+        )
+
+    def test_size_limit(self):
+        logger = TaskLogger(max_size=20)
+        logger.info("0123456789")
+        logger.warning("abcdefghij")
+        # 超出大小上限，INFO / WARNING 日志仅计数，ERROR 日志始终保留
+        logger.info("omitted info")
+        logger.warning("omitted warning")
+        logger.warning("omitted warning again")
+        logger.error("error is always kept")
+        # 已保存的日志仍可以继续累计次数
+        logger.info("0123456789")
+
+        entries = logger.entries
+        assert [(e.message, e.times) for e in entries[:-1]] == [
+            ("0123456789", 2),
+            ("abcdefghij", 1),
+            ("error is always kept", 1),
+        ]
+        assert entries[-1].level == SyncLogLevel.WARNING
+        assert entries[-1].message == "task logs exceed size limit (20), omitted logs count: INFO: 1, WARNING: 2"
+        assert logger.has_warning
+
+    def test_truncate_long_message(self):
+        logger = TaskLogger()
+        logger.warning("x" * (TaskLogger.max_message_length + 100))
+
+        assert logger.entries[0].message == "x" * TaskLogger.max_message_length + "...(truncated)"
+
+    def test_bind_phase(self):
+        logger = TaskLogger()
+        logger.phase = SyncLogPhase.DEPARTMENT
+
+        def log_in_thread():
+            with logger.bind_phase(SyncLogPhase.USER):
+                logger.info("fetch users in thread")
+
+        thread = threading.Thread(target=log_in_thread)
+        thread.start()
+        thread.join()
+        logger.info("sync departments")
+
+        # 绑定的阶段只对当前线程生效，不影响其他线程
+        assert [(e.phase, e.message) for e in logger.entries] == [
+            (SyncLogPhase.USER, "fetch users in thread"),
+            (SyncLogPhase.DEPARTMENT, "sync departments"),
+        ]
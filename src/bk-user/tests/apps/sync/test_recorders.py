@@ -18,7 +18,7 @@
 import pytest
 from bkuser.apps.data_source.models import DataSourceDepartment, DataSourceUser
 from bkuser.apps.sync.constants import DataSourceSyncObjectType, SyncOperation
-from bkuser.apps.sync.recorders import ChangeLogRecorder
+from bkuser.apps.sync.recorders import ChangeLogEntry, ChangeLogRecorder, SpooledChangeLogRecorder
 
 pytestmark = pytest.mark.django_db
 
@@ -36,3 +36,40 @@ class TestChangeLogRecorder:
 
         assert len(recorder.get(operation=SyncOperation.CREATE, type=DataSourceSyncObjectType.USER)) == len(users) * 2
         assert recorder.get(operation=SyncOperation.CREATE, type=DataSourceSyncObjectType.DEPARTMENT) == departments
+
+
+class TestSpooledChangeLogRecorder:
+    def test_standard(self, full_general_data_source):
+        users = list(DataSourceUser.objects.filter(data_source=full_general_data_source))
+        departments = list(DataSourceDepartment.objects.filter(data_source=full_general_data_source))
+
+        recorder = SpooledChangeLogRecorder()
+        recorder.add(operation=SyncOperation.CREATE, type=DataSourceSyncObjectType.USER, items=users)
+        recorder.add(operation=SyncOperation.DELETE, type=DataSourceSyncObjectType.USER, items=iter(users[:2]))
+        # 迭代后仍可以继续追加
+        assert len(list(recorder.iter_entries())) == len(users) + 2
+        recorder.add(operation=SyncOperation.UPDATE, type=DataSourceSyncObjectType.DEPARTMENT, items=departments)
+
+        assert recorder.count(SyncOperation.CREATE, DataSourceSyncObjectType.USER) == len(users)
+        assert recorder.count(SyncOperation.DELETE, DataSourceSyncObjectType.USER) == 2  # noqa: PLR2004
+        assert recorder.count(SyncOperation.UPDATE, DataSourceSyncObjectType.DEPARTMENT) == len(departments)
+
+        entries = list(recorder.iter_entries())
+        assert len(entries) == len(users) + 2 + len(departments)
+        assert entries[0] == ChangeLogEntry(
+            SyncOperation.CREATE,
+            DataSourceSyncObjectType.USER,
+            users[0].id,
+            users[0].code,
+            users[0].username,
+            users[0].full_name,
+        )
+        assert entries[-1] == ChangeLogEntry(
+            SyncOperation.UPDATE,
+            DataSourceSyncObjectType.DEPARTMENT,
+            departments[-1].id,
+            departments[-1].code,
+            departments[-1].name,
+            "",
+        )
+        recorder.close()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from bkuser.apps.sync.spools import RawDataSourceUserSpool
+from bkuser.plugins.models import RawDataSourceUser
+
+
+class TestRawDataSourceUserSpool:
+    def test_standard(self):
+        users = [
+            RawDataSourceUser(
+                code=f"user-{idx}",
+                properties={"username": f"user_{idx}", "full_name": f"用户 {idx}\n换行"},
+                leaders=["user-0"] if idx else [],
+                departments=["company"],
+            )
+            for idx in range(5)
+        ]
+
+        with RawDataSourceUserSpool() as spool:
+            spool.extend(users[:3])
+            assert len(spool) == 3
+            assert list(spool) == users[:3]
+
+            # 迭代后继续追加，不会覆盖已有数据
+            spool.extend(users[3:])
+            assert len(spool) == 5
+            # 支持重复迭代
+            assert list(spool) == users
+            assert list(spool) == users
+
+    def test_empty(self):
+        with RawDataSourceUserSpool() as spool:
+            assert len(spool) == 0
+            assert list(spool) == []
@@ -16,7 +16,8 @@
 # to the current version of the project delivered to anyone in the future.
 
 import pytest
-from bkuser.apps.sync.constants import SyncTaskStatus
+from bkuser.apps.sync.constants import SyncLogLevel, SyncTaskStatus
+from bkuser.apps.sync.models import DataSourceSyncTaskLog
 from bkuser.apps.sync.tasks import sync_data_source
 from bkuser.apps.sync.workbook_temp_store import WorkbookTempStore
 
@@ -48,6 +49,7 @@ class TestSyncDataSource:
             f"data source sync task {task_id} require raw data in temporary storage, but not found"
             in data_source_sync_task.logs
         )
+        assert DataSourceSyncTaskLog.objects.filter(task=data_source_sync_task, level=SyncLogLevel.ERROR).exists()
 
     def test_file_not_get(self, data_source_sync_task, user_workbook):
         task_id = data_source_sync_task.id
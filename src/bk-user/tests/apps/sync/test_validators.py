@@ -16,7 +16,7 @@
 # to the current version of the project delivered to anyone in the future.
 
 import pytest
-from bkuser.apps.data_source.models import DataSource, DataSourceUser
+from bkuser.apps.data_source.models import DataSource, DataSourceUser, DataSourceUserExtrasIndex
 from bkuser.apps.sync.loggers import TaskLogger
 from bkuser.apps.sync.validators import DataSourceUserExtrasUniqueValidator
 from bkuser.apps.tenant.constants import UserFieldDataType
@@ -82,3 +82,25 @@ class TestDataSourceUserExtrasUniqueValidator:
 
         with pytest.raises(ValueError, match="duplicate unique values found"):
             DataSourceUserExtrasUniqueValidator(random_ds, logger).validate()
+
+    def test_validate_with_duplicate_unique_after_bulk_update(
+        self, random_tenant, random_ds, user_lisi, user_wangwu, logger, tenant_user_custom_field
+    ):
+        # 批量更新需要手动刷新自定义字段索引，否则校验无法感知到变更
+        user_lisi.extras = {"age": 18}
+        DataSourceUser.objects.bulk_update([user_lisi], fields=["extras"])
+        DataSourceUserExtrasUniqueValidator(random_ds, logger).validate()
+
+        DataSourceUserExtrasIndex.objects.refresh(random_ds.id, [user_lisi])
+        with pytest.raises(ValueError, match="duplicate unique values found"):
+            DataSourceUserExtrasUniqueValidator(random_ds, logger).validate()
+
+    def test_validate_with_null_value(
+        self, random_tenant, random_ds, user_lisi, user_wangwu, logger, tenant_user_custom_field
+    ):
+        # 空值可以重复
+        for u in [user_lisi, user_wangwu]:
+            u.extras = {"age": None}
+            u.save()
+
+        DataSourceUserExtrasUniqueValidator(random_ds, logger).validate()
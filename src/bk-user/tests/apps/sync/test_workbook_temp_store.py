@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import base64
+
+import pytest
+from bkuser.apps.sync.constants import WorkbookTempStoreBackend
+from bkuser.apps.sync.workbook_temp_store import FileSystemWorkbookStorage, RedisWorkbookStorage, WorkbookTempStore
+from bkuser.common.cache import Cache, CacheEnum, CacheKeyPrefixEnum
+from django.conf import settings
+from openpyxl.workbook.workbook import Workbook
+
+
+@pytest.fixture
+def user_workbook_content() -> bytes:
+    return (settings.BASE_DIR / "tests/assets/fake_users.xlsx").read_bytes()
+
+
+def _get_usernames(workbook: Workbook) -> list:
+    return [row[0] for row in workbook["users"].iter_rows(min_row=3, max_col=1, values_only=True)]
+
+
+class TestWorkbookTempStore:
+    @pytest.mark.parametrize("backend", [WorkbookTempStoreBackend.REDIS, WorkbookTempStoreBackend.FILESYSTEM])
+    def test_save_and_pop_raw_bytes(self, settings, tmp_path, user_workbook_content, backend):
+        settings.WORKBOOK_TEMP_STORE_BACKEND = backend
+        settings.WORKBOOK_TEMP_STORE_FILESYSTEM_DIR = str(tmp_path)
+        store = WorkbookTempStore()
+
+        temporary_storage_id = store.save(user_workbook_content)
+        if backend == WorkbookTempStoreBackend.FILESYSTEM:
+            assert (tmp_path / f"{temporary_storage_id}.xlsx").read_bytes() == user_workbook_content
+
+        workbook = store.pop(temporary_storage_id)
+        assert _get_usernames(workbook)[:2] == ["zhangsan", "lisi"]
+        workbook.close()
+
+        # 获取成功后即被删除
+        with pytest.raises(ValueError, match="not found in temporary storage"):
+            store.pop(temporary_storage_id)
+
+    def test_save_workbook(self, user_workbook):
+        store = WorkbookTempStore()
+        workbook = store.pop(store.save(user_workbook))
+        assert _get_usernames(workbook) == _get_usernames(user_workbook)
+        workbook.close()
+
+    def test_unsupported_backend(self):
+        with pytest.raises(ValueError, match="not supported"):
+            WorkbookTempStore("bk-repo")
+
+
+class TestRedisWorkbookStorage:
+    def test_chunked(self, user_workbook_content):
+        storage = RedisWorkbookStorage(chunk_size=1024)
+        storage.set("wb", user_workbook_content, 60)
+
+        cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.WORKBOOK_TEMPORARY_STORE)
+        chunk_cnt = cache.get("wb")
+        assert chunk_cnt == (len(user_workbook_content) + 1023) // 1024
+        # 分块存储的是原始字节，没有 base64 编码
+        assert cache.get("wb:0") == user_workbook_content[:1024]
+        assert storage.get("wb") == user_workbook_content
+
+        storage.delete("wb")
+        assert storage.get("wb") is None
+        assert cache.get_many([f"wb:{idx}" for idx in range(chunk_cnt)]) == {}
+
+    def test_missing_chunk(self, user_workbook_content):
+        storage = RedisWorkbookStorage(chunk_size=1024)
+        storage.set("wb", user_workbook_content, 60)
+
+        # 部分分块丢失，则认为数据不完整
+        Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.WORKBOOK_TEMPORARY_STORE).delete("wb:1")
+        assert storage.get("wb") is None
+
+    def test_legacy_base64_data(self, user_workbook_content):
+        cache = Cache(CacheEnum.REDIS, CacheKeyPrefixEnum.WORKBOOK_TEMPORARY_STORE)
+        cache.set("legacy", base64.b64encode(user_workbook_content).decode("utf-8"), 60)
+
+        # 兼容旧版本存储的 base64 编码数据
+        workbook = WorkbookTempStore(WorkbookTempStoreBackend.REDIS).pop("legacy")
+        assert _get_usernames(workbook)[0] == "zhangsan"
+        workbook.close()
+
+
+class TestFileSystemWorkbookStorage:
+    def test_standard(self, tmp_path):
+        storage = FileSystemWorkbookStorage(tmp_path)
+        storage.set("abc123", b"content", 60)
+        assert (tmp_path / "abc123.xlsx").read_bytes() == b"content"
+        assert storage.get("abc123") == b"content"
+
+        storage.delete("abc123")
+        assert storage.get("abc123") is None
+        assert not list(tmp_path.iterdir())
+
+    def test_expired(self, tmp_path):
+        storage = FileSystemWorkbookStorage(tmp_path)
+        storage.set("expired", b"content", -1)
+        assert storage.get("expired") is None
+        assert not (tmp_path / "expired.xlsx").exists()
+
+    def test_clean_expired_when_set(self, tmp_path):
+        storage = FileSystemWorkbookStorage(tmp_path)
+        storage.set("expired", b"content", -1)
+        storage.set("valid", b"content", 60)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["valid.xlsx"]
+
+    def test_invalid_key(self, tmp_path):
+        with pytest.raises(ValueError, match="invalid temporary storage key"):
+            FileSystemWorkbookStorage(tmp_path).get("../etc/passwd")
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import json
+import time
+from typing import Any, Dict, Iterator, Tuple
+from unittest import mock
+
+import pytest
+from bkuser.apps.data_source.models import DataSourceDepartmentUserRelation, DataSourceUserLeaderRelation
+from bkuser.apps.tenant.relation_dumps import DepartmentUserRelationDump, UserLeaderRelationDump
+from bkuser.apps.tenant.tasks import rebuild_tenant_relation_dumps
+from bkuser.common.locks import LockType, RedisLock
+
+from tests.test_utils.tenant import sync_users_depts_to_tenant
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def tenant_id(random_tenant, full_local_data_source) -> str:
+    sync_users_depts_to_tenant(random_tenant, full_local_data_source)
+    return random_tenant.id
+
+
+def _get_or_build_chunks(dump) -> Tuple[Dict[str, Any], Iterator[bytes]]:
+    manifest, chunks = dump.get_or_build_chunks()
+    assert manifest is not None
+    return manifest, chunks
+
+
+def _load_relations(chunks):
+    return json.loads(b"[" + b",".join(chunks) + b"]")
+
+
+class TestTenantRelationDump:
+    def test_build(self, tenant_id):
+        dump = DepartmentUserRelationDump(tenant_id)
+        assert dump.get_manifest() is None
+
+        manifest, chunks = _get_or_build_chunks(dump)
+        relations = _load_relations(chunks)
+        assert (
+            len(relations)
+            == DataSourceDepartmentUserRelation.objects.filter(data_source__owner_tenant_id=tenant_id).count()
+        )
+        assert set(relations[0].keys()) == {"id", "department_id", "profile_id"}
+
+        # 已经构建过的转储，不会重复构建
+        assert _get_or_build_chunks(dump)[0] == manifest
+
+    def test_build_in_chunks(self, tenant_id):
+        dump = UserLeaderRelationDump(tenant_id)
+        dump.chunk_size = 3
+
+        manifest, chunks = _get_or_build_chunks(dump)
+        relation_cnt = DataSourceUserLeaderRelation.objects.filter(data_source__owner_tenant_id=tenant_id).count()
+        assert manifest["chunk_count"] == (relation_cnt + dump.chunk_size - 1) // dump.chunk_size
+        assert [r["id"] for r in _load_relations(chunks)] == list(
+            DataSourceUserLeaderRelation.objects.filter(data_source__owner_tenant_id=tenant_id).values_list(
+                "id", flat=True
+            )
+        )
+
+    def test_iter_chunks_lazily(self, tenant_id):
+        dump = UserLeaderRelationDump(tenant_id)
+        dump.chunk_size = 3
+        manifest, _ = _get_or_build_chunks(dump)
+
+        # 分块在迭代时才逐个读取
+        with mock.patch.object(dump.cache, "get", wraps=dump.cache.get) as get:
+            chunks = dump.iter_chunks(manifest)
+            assert get.call_count == 0
+
+            next(chunks)
+            assert get.call_count == 1
+
+    def test_rebuild(self, tenant_id):
+        dump = UserLeaderRelationDump(tenant_id)
+        manifest, chunks = _get_or_build_chunks(dump)
+        relations = _load_relations(chunks)
+
+        DataSourceUserLeaderRelation.objects.filter(data_source__owner_tenant_id=tenant_id).first().delete()
+        assert dump.rebuild()
+
+        new_manifest = dump.get_manifest()
+        assert new_manifest is not None
+        assert new_manifest["version"] != manifest["version"]
+        assert len(_load_relations(dump.iter_chunks(new_manifest))) == len(relations) - 1
+
+    def test_claim_refresh(self, tenant_id):
+        dump = UserLeaderRelationDump(tenant_id)
+        manifest, _ = _get_or_build_chunks(dump)
+        assert not dump.claim_refresh(manifest)
+
+        # 超过刷新间隔后，只有首个调用方能够获得刷新权
+        manifest["built_at"] = time.time() - dump.refresh_interval - 1
+        assert dump.claim_refresh(manifest)
+        assert not dump.claim_refresh(manifest)
+
+    def test_get_or_build_chunks_with_missing_chunk(self, tenant_id):
+        dump = UserLeaderRelationDump(tenant_id)
+        manifest, chunks = _get_or_build_chunks(dump)
+        relations = _load_relations(chunks)
+        dump.cache.delete(dump._chunk_key(manifest["version"], 0))
+
+        assert not dump.is_complete(manifest)
+
+        # 分块丢失后，会重建转储数据，并返回完整的分块
+        new_manifest, chunks = _get_or_build_chunks(dump)
+        assert new_manifest["version"] != manifest["version"]
+        assert dump.get_manifest() == new_manifest
+        assert dump.is_complete(new_manifest)
+        assert _load_relations(chunks) == relations
+
+    def test_iter_chunks_with_chunk_evicted_while_streaming(self, tenant_id):
+        dump = UserLeaderRelationDump(tenant_id)
+        dump.chunk_size = 3
+        manifest, chunks = _get_or_build_chunks(dump)
+        relations = _load_relations(chunks)
+
+        chunks = dump.iter_chunks(manifest)
+        first_chunk = next(chunks)
+        # 完整性检查后分块被淘汰，剩余的分块从 DB 生成
+        dump.cache.delete(dump._chunk_key(manifest["version"], 1))
+
+        assert _load_relations([first_chunk, *chunks]) == relations
+
+    def test_get_or_build_chunks_with_lock_wait_timeout(self, tenant_id):
+        dump = UserLeaderRelationDump(tenant_id)
+        dump.lock_wait_timeout = 0.1  # type: ignore
+
+        # 模拟其他进程持有重建锁（重建过慢或进程崩溃）
+        lock = RedisLock(LockType.RELATION_DUMP, dump._lock_suffix, timeout=dump.lock_timeout, blocking=False)
+        assert lock.acquire()
+        try:
+            manifest, chunks = dump.get_or_build_chunks()
+        finally:
+            lock.release()
+
+        # 等待超时后不再重建，直接从 DB 生成数据
+        assert manifest is None
+        assert dump.get_manifest() is None
+        assert len(_load_relations(chunks)) == (
+            DataSourceUserLeaderRelation.objects.filter(data_source__owner_tenant_id=tenant_id).count()
+        )
+
+    def test_rebuild_expire_previous_chunks(self, tenant_id):
+        dump = UserLeaderRelationDump(tenant_id)
+        dump.chunk_size = 3
+        manifest, _ = _get_or_build_chunks(dump)
+        prev_chunks = dump.iter_chunks(manifest)
+        first_chunk = next(prev_chunks)
+
+        assert dump.rebuild()
+
+        # 旧版本的分块在短时间内依然可以读取，保证正在输出的请求不受影响
+        assert len([first_chunk, *prev_chunks]) == manifest["chunk_count"]
+
+        # 旧版本的分块的过期时间被缩短，避免在 Redis 中堆积
+        for idx in range(manifest["chunk_count"]):
+            key = dump.cache._make_key(dump._chunk_key(manifest["version"], idx))
+            assert 0 < dump.cache.cache.ttl(key) <= dump.prev_chunks_timeout
+
+
+def test_rebuild_tenant_relation_dumps(tenant_id):
+    # 未被使用过的转储，不会被重建
+    rebuild_tenant_relation_dumps(tenant_id)
+    assert DepartmentUserRelationDump(tenant_id).get_manifest() is None
+    assert UserLeaderRelationDump(tenant_id).get_manifest() is None
+
+    manifest, _ = _get_or_build_chunks(UserLeaderRelationDump(tenant_id))
+    rebuild_tenant_relation_dumps(tenant_id)
+    assert DepartmentUserRelationDump(tenant_id).get_manifest() is None
+    assert UserLeaderRelationDump(tenant_id).get_manifest()["version"] != manifest["version"]  # type: ignore
+
+    # 指定转储名称时，会强制重建
+    rebuild_tenant_relation_dumps(tenant_id, [DepartmentUserRelationDump.name])
+    assert DepartmentUserRelationDump(tenant_id).get_manifest() is not None
@@ -18,7 +18,12 @@
 import pytest
 from bkuser.apps.data_source.models import DataSourceDepartment, DataSourceUser
 from bkuser.apps.tenant.constants import TenantUserIdRuleEnum
-from bkuser.apps.tenant.models import TenantDepartmentIDRecord, TenantUserIDGenerateConfig, TenantUserIDRecord
+from bkuser.apps.tenant.models import (
+    TenantDepartment,
+    TenantDepartmentIDRecord,
+    TenantUserIDGenerateConfig,
+    TenantUserIDRecord,
+)
 from bkuser.apps.tenant.utils import TenantDeptIDGenerator, TenantUserIDGenerator
 from bkuser.utils.uuid import generate_uuid
 
@@ -138,3 +143,33 @@ class TestTenantDeptIdGenerator:
         assert generator.gen(company) is None
         assert generator.gen(dept_a) is None
         assert len(generator.tenant_dept_id_map) == 0
+
+    def test_batch_record(self, random_tenant, full_local_data_source, company, dept_a):
+        TenantDepartmentIDRecord.objects.create(
+            tenant_id=random_tenant.id,
+            data_source=full_local_data_source,
+            code=company.code,
+            tenant_department_id=102,
+        )
+
+        generator = TenantDeptIDGenerator(random_tenant.id, full_local_data_source, prepare_batch=True)
+        tenant_depts = [
+            TenantDepartment(
+                id=generator.gen(dept), tenant=random_tenant, data_source_department=dept, data_source=dept.data_source
+            )
+            for dept in [company, dept_a]
+        ]
+        TenantDepartment.objects.bulk_create(tenant_depts)
+        # 模拟 bulk_create 不回填主键的情况（如 MySQL）
+        tenant_depts[1].id = None
+        generator.batch_record(tenant_depts)
+
+        # 已有记录的不会被覆盖，新建的租户部门需要被记录
+        dept_a_tenant_dept_id = TenantDepartment.objects.get(tenant=random_tenant, data_source_department=dept_a).id
+        assert dict(
+            TenantDepartmentIDRecord.objects.filter(
+                tenant_id=random_tenant.id, data_source=full_local_data_source
+            ).values_list("code", "tenant_department_id")
+        ) == {company.code: 102, dept_a.code: dept_a_tenant_dept_id}
+        assert tenant_depts[1].id == dept_a_tenant_dept_id
+        assert generator.gen(dept_a) == dept_a_tenant_dept_id
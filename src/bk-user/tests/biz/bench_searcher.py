@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""
+组织架构用户搜索基准测试（不会在单元测试中执行）
+
+执行方式：pytest tests/biz/bench_searcher.py -s
+可通过环境变量 BENCH_USER_COUNT 指定用户数量（默认 500000，本地 sqlite 环境建议调小，如 50000）
+可通过环境变量 BENCH_OTHER_USER_COUNT 指定其他租户数据源的用户数量（默认与 BENCH_USER_COUNT 相同），
+用于验证其他租户的数据量不影响搜索性能
+"""
+
+import os
+import time
+from functools import reduce
+from operator import or_
+from typing import Callable, List
+
+import pytest
+from bkuser.apps.data_source.models import DataSource, DataSourceUser, DataSourceUserSearchToken
+from bkuser.apps.tenant.models import TenantUser
+from bkuser.biz.searcher import TenantUserSearcher
+from django.db.models import Case, IntegerField, Q, Value, When
+
+pytestmark = pytest.mark.django_db
+
+USER_COUNT = int(os.getenv("BENCH_USER_COUNT", "500000"))
+OTHER_USER_COUNT = int(os.getenv("BENCH_OTHER_USER_COUNT", str(USER_COUNT)))
+BATCH_SIZE = 5000
+KEYWORDS = ["zhang", "san", "@example", "张三", "zhangsan000123", "user12345@", "张三123", "not_exists_keyword"]
+
+
+def _timeit(func: Callable[[], object], count: int = 3) -> float:
+    start = time.perf_counter()
+    for __ in range(count):
+        func()
+    return (time.perf_counter() - start) / count
+
+
+def _gen_users(tenant, data_source, count: int):
+    """批量生成数据源用户 & 租户用户，并构建搜索索引"""
+    for start in range(0, count, BATCH_SIZE):
+        users = [
+            DataSourceUser(
+                data_source=data_source,
+                code=f"user-{idx}",
+                username=f"{['zhang', 'li', 'wang'][idx % 3]}san{idx:06d}",
+                full_name=f"{['张', '李', '王'][idx % 3]}三{idx}",
+                email=f"user{idx}@example.com",
+                phone=f"13{idx:09d}",
+            )
+            for idx in range(start, min(start + BATCH_SIZE, count))
+        ]
+        DataSourceUser.objects.bulk_create(users)
+        users = list(DataSourceUser.objects.filter(data_source=data_source, code__in=[u.code for u in users]))
+        DataSourceUserSearchToken.objects.refresh(data_source.id, users)
+        TenantUser.objects.bulk_create(
+            [
+                TenantUser(id=f"{tenant.id}-{u.code}", tenant=tenant, data_source=data_source, data_source_user=u)
+                for u in users
+            ]
+        )
+
+
+def _any_field_q(lookup: str, keyword: str) -> Q:
+    fields = DataSourceUserSearchToken.search_fields
+    return reduce(or_, [Q(**{f"data_source_user__{f}__{lookup}": keyword}) for f in fields])
+
+
+def _icontains_search(queryset, keyword: str, limit: int) -> List[str]:
+    """优化前的实现：直接 icontains 过滤，不排序（仅用于对比）"""
+    return list(queryset.filter(_any_field_q("icontains", keyword)).values_list("id", flat=True)[:limit])
+
+
+def _icontains_ranked_search(queryset, keyword: str, limit: int) -> List[str]:
+    """直接 icontains 过滤，排序规则与 TenantUserSearcher 一致（仅用于对比）"""
+    rank = Case(
+        When(_any_field_q("iexact", keyword), then=Value(0)),
+        When(_any_field_q("istartswith", keyword), then=Value(1)),
+        default=Value(2),
+        output_field=IntegerField(),
+    )
+    queryset = queryset.filter(_any_field_q("icontains", keyword)).annotate(search_rank=rank)
+    return list(
+        queryset.order_by("search_rank", "data_source_user__username", "id").values_list("id", flat=True)[:limit]
+    )
+
+
+def test_search_tenant_users(default_tenant, random_tenant, bare_local_data_source):
+    start = time.perf_counter()
+    _gen_users(random_tenant, bare_local_data_source, USER_COUNT)
+    # 其他租户的数据源用户（用户名等与当前租户的相似），不应出现在搜索结果中，也不应影响搜索性能
+    other_data_source = DataSource.objects.create(
+        owner_tenant_id=default_tenant.id,
+        type=bare_local_data_source.type,
+        plugin=bare_local_data_source.plugin,
+        plugin_config=bare_local_data_source.get_plugin_cfg(),
+    )
+    _gen_users(default_tenant, other_data_source, OTHER_USER_COUNT)
+    print(f"\nprepare {USER_COUNT} + {OTHER_USER_COUNT} users cost: {time.perf_counter() - start:.1f}s")
+
+    queryset = TenantUser.objects.filter(tenant=random_tenant)
+    searcher = TenantUserSearcher()
+    print(f"tenant user search benchmark (users: {USER_COUNT}, other tenant users: {OTHER_USER_COUNT})")
+    for keyword in KEYWORDS:
+        # 搜索结果需要与 icontains 一致（排序不同，因此比较全量集合）
+        assert set(searcher.filter(queryset, keyword).values_list("id", flat=True)) == set(
+            _icontains_search(queryset, keyword, USER_COUNT)
+        )
+
+        assert searcher.search_ids(queryset, keyword, 100) == _icontains_ranked_search(queryset, keyword, 100)
+
+        costs = [
+            ("icontains", _timeit(lambda kw=keyword: _icontains_search(queryset, kw, 100))),  # type: ignore
+            ("icontains(ranked)", _timeit(lambda kw=keyword: _icontains_ranked_search(queryset, kw, 100))),  # type: ignore
+            ("token(ranked)", _timeit(lambda kw=keyword: searcher.search_ids(queryset, kw, 100))),  # type: ignore
+        ]
+        print(f"  {keyword:<20} " + ", ".join(f"{name}: {cost * 1000:.1f}ms" for name, cost in costs))
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import pytest
+from bkuser.apps.audit.constants import OperationEnum
+from bkuser.apps.audit.models import OperationAuditRecord
+from bkuser.apps.data_source.models import DataSourceDepartmentUserRelation, DataSourceUserLeaderRelation
+from bkuser.apps.tenant.models import TenantUser
+from bkuser.biz.auditor import TenantUserDestroyAuditor, batch_get_tenant_user_snapshots
+
+from tests.test_utils.tenant import sync_users_depts_to_tenant
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def tenant_users(random_tenant, full_local_data_source):
+    sync_users_depts_to_tenant(random_tenant, full_local_data_source)
+    return list(TenantUser.objects.filter(tenant=random_tenant))
+
+
+class TestBatchGetTenantUserSnapshots:
+    def test_snapshots(self, tenant_users):
+        snapshots = batch_get_tenant_user_snapshots(tenant_users)
+
+        assert set(snapshots.keys()) == {u.id for u in tenant_users}
+        for tenant_user in tenant_users:
+            ds_user = tenant_user.data_source_user
+            snapshot = snapshots[tenant_user.id]
+            assert snapshot["data_source_user"]["username"] == ds_user.username
+            assert sorted(snapshot["department_ids"]) == sorted(
+                DataSourceDepartmentUserRelation.objects.filter(user=ds_user).values_list("department_id", flat=True)
+            )
+            assert sorted(snapshot["leader_ids"]) == sorted(
+                DataSourceUserLeaderRelation.objects.filter(user=ds_user).values_list("leader_id", flat=True)
+            )
+
+    def test_query_count_independent_of_users(self, django_assert_num_queries, tenant_users):
+        # 数据源用户、部门关系、上级关系各一次查询
+        with django_assert_num_queries(3):
+            batch_get_tenant_user_snapshots(tenant_users)
+
+
+class TestTenantUserDestroyAuditor:
+    def test_batch_record(self, random_tenant, tenant_users):
+        auditor = TenantUserDestroyAuditor("admin", random_tenant.id)
+        auditor.batch_pre_record_data_before(tenant_users)
+        auditor.record()
+
+        records = OperationAuditRecord.objects.filter(tenant_id=random_tenant.id)
+        assert records.filter(operation=OperationEnum.DELETE_TENANT_USER).count() == len(tenant_users)
+        assert records.filter(operation=OperationEnum.DELETE_DATA_SOURCE_USER).count() == len(tenant_users)
+        # 同一批次的记录具有相同的事件 ID
+        assert records.values("event_id").distinct().count() == 1
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import pytest
+from bkuser.apps.data_source.models import LocalDataSourceIdentityInfo
+from bkuser.biz.credential import LocalUserCredentialVerifier, LocalUserLoginThrottle
+from bkuser.common.cache import CacheEnum
+from bkuser.common.hashers import make_password
+from django.core.cache import caches
+
+
+def test_local_user_credential_verifier():
+    infos = [
+        LocalDataSourceIdentityInfo(data_source_id=1, username="zhangsan", password=make_password("password-1")),
+        LocalDataSourceIdentityInfo(data_source_id=2, username="zhangsan", password=make_password("password-2")),
+        LocalDataSourceIdentityInfo(data_source_id=3, username="zhangsan", password=make_password("password-1")),
+    ]
+
+    matched = LocalUserCredentialVerifier().verify(infos, "password-1")
+    assert [info.data_source_id for info in matched] == [1, 3]
+    assert LocalUserCredentialVerifier().verify(infos, "password-3") == []
+
+
+class TestLocalUserLoginThrottle:
+    @pytest.fixture(autouse=True)
+    def _enable_throttle(self, settings):
+        settings.LOGIN_ATTEMPT_THROTTLE_ENABLED = True
+        settings.LOGIN_ATTEMPT_MAX_FAILURES = 3
+        caches[CacheEnum.REDIS].clear()
+        yield
+        caches[CacheEnum.REDIS].clear()
+
+    def test_lock_after_max_failures(self):
+        throttle = LocalUserLoginThrottle("zhangsan")
+        for __ in range(2):
+            throttle.record_failure([1, 2])
+        throttle.record_failure([1])
+
+        assert throttle.get_locked_data_source_ids([1, 2, 3]) == {1}
+        # 不同用户名之间互不影响
+        assert LocalUserLoginThrottle("lisi").get_locked_data_source_ids([1, 2, 3]) == set()
+
+    def test_reset(self):
+        throttle = LocalUserLoginThrottle("zhangsan")
+        for __ in range(3):
+            throttle.record_failure([1, 2])
+
+        throttle.reset([1])
+        assert throttle.get_locked_data_source_ids([1, 2]) == {2}
+
+    def test_disabled(self, settings):
+        settings.LOGIN_ATTEMPT_THROTTLE_ENABLED = False
+
+        throttle = LocalUserLoginThrottle("zhangsan")
+        for __ in range(5):
+            throttle.record_failure([1])
+
+        assert throttle.get_locked_data_source_ids([1]) == set()
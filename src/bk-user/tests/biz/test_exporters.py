@@ -14,9 +14,12 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
+import io
+
 import pytest
 from bkuser.apps.data_source.models import DataSourceUser
 from bkuser.biz.exporters import DataSourceUserExporter
+from openpyxl.reader.excel import load_workbook
 
 pytestmark = pytest.mark.django_db
 
@@ -95,3 +98,39 @@ class TestDataSourceExporter:
             "lushi",
             "",
         ]
+
+    def test_export_to(self, full_local_data_source, tenant_user_custom_fields):
+        exists_users = DataSourceUser.objects.filter(data_source=full_local_data_source)
+        for idx, user in enumerate(exists_users):
+            user.extras = {"age": str(20 + idx), "gender": "male", "sport_hobby": ["running", "swimming"]}
+            user.save()
+
+        exporter = DataSourceUserExporter(full_local_data_source)
+        # 调小分批数量，以验证分批读取用户数据的逻辑
+        exporter.chunk_size = 3
+        with io.BytesIO() as fp:
+            exporter.export_to(fp)
+            fp.seek(0)
+            wk = load_workbook(fp)
+
+        # 只写模式导出的数据，应与 export() 导出的一致（包括表头）
+        with io.BytesIO() as fp:
+            DataSourceUserExporter(full_local_data_source).export().save(fp)
+            fp.seek(0)
+            expected_wk = load_workbook(fp)
+
+        sheet, expected_sheet = wk["users"], expected_wk["users"]
+        assert [[c.value for c in row] for row in sheet.iter_rows()] == [
+            [c.value for c in row] for row in expected_sheet.iter_rows()
+        ]
+        assert sheet.max_row == exists_users.count() + 2  # noqa: PLR2004
+        assert sheet["G3"].value == "20"
+        assert sheet["J3"].value == "running,swimming"
+
+        # 表头样式，合并单元格，列宽等同样被保留
+        assert sheet.merged_cells.ranges == expected_sheet.merged_cells.ranges
+        assert sheet.row_dimensions[1].height == expected_sheet.row_dimensions[1].height
+        assert sheet["A1"].alignment.wrapText
+        assert sheet["J2"].value == "运动爱好/sport_hobby"
+        assert sheet["J2"].font.color.rgb == expected_sheet["J2"].font.color.rgb
+        assert sheet.column_dimensions["J"].width == exporter.default_column_width
@@ -15,8 +15,10 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 import pytest
+from bkuser.apps.data_source.models import DataSourceUser
 from bkuser.apps.idp.data_models import DataSourceMatchRule, FieldCompareRule
 from bkuser.apps.idp.models import Idp
+from bkuser.apps.tenant.constants import UserFieldDataType
 from bkuser.biz.idp import AuthenticationMatcher
 from django.db.models import Q
 
@@ -33,23 +35,19 @@ class TestAuthenticationMatcher:
         self.matcher = AuthenticationMatcher(default_idp.id)
 
     @pytest.mark.parametrize(
-        ("field", "excepted_filter_key"),
+        ("field", "excepted_condition"),
         [
-            ("id", "id"),
-            ("username", "username"),
-            ("full_name", "full_name"),
-            ("phone_country_code", "phone_country_code"),
-            ("phone", "phone"),
-            ("email", "email"),
-            ("age", "extras__age"),
-            ("gender", "extras__gender"),
-            ("region", "extras__region"),
-            ("sport_hobby", "extras__sport_hobby__contains"),
+            ("id", Q(id="value")),
+            ("username", Q(username="value")),
+            ("full_name", Q(full_name="value")),
+            ("phone_country_code", Q(phone_country_code="value")),
+            ("phone", Q(phone="value")),
+            ("email", Q(email="value")),
             ("other_not_found", None),
         ],
     )
-    def test_build_field_filter_key(self, field, excepted_filter_key):
-        assert self.matcher._build_field_filter_key(field) == excepted_filter_key
+    def test_build_field_condition(self, field, excepted_condition):
+        assert self.matcher._build_field_condition(1, field, "value") == excepted_condition
 
     @pytest.mark.parametrize(
         ("source_data", "excepted_queryset"),
@@ -105,15 +103,9 @@ class TestAuthenticationMatcher:
                     field_compare_rules=[
                         FieldCompareRule(source_field="user_id", target_field="username"),
                         FieldCompareRule(source_field="phone", target_field="phone"),
-                        FieldCompareRule(source_field="email", target_field="region"),
                     ],
                 ),
-                (
-                    Q(data_source_id=1)
-                    & Q(username="test_username")
-                    & Q(phone="1234567890123")
-                    & Q(extras__region="111@qq.com")
-                ),
+                (Q(data_source_id=1) & Q(username="test_username") & Q(phone="1234567890123")),
             ),
             # ID Field Compare rule
             (
@@ -138,3 +130,64 @@ class TestAuthenticationMatcher:
         queryset = self.matcher._convert_one_rule_to_queryset_filter(rule, source_data)
 
         assert queryset == excepted_queryset
+
+    @pytest.mark.parametrize(
+        ("field_compare_rules", "source_data", "excepted_usernames"),
+        [
+            # string
+            (
+                [FieldCompareRule(source_field="addr", target_field="region")],
+                {"addr": "shenzhen"},
+                {"zhangsan", "lisi"},
+            ),
+            # number，与 JSON 查询一致，数字与字符串不相等
+            ([FieldCompareRule(source_field="age", target_field="age")], {"age": 20}, {"zhangsan"}),
+            ([FieldCompareRule(source_field="age", target_field="age")], {"age": "20"}, {"wangwu"}),
+            # multi_enum，需要包含所有值
+            (
+                [FieldCompareRule(source_field="hobby", target_field="sport_hobby")],
+                {"hobby": "running"},
+                {"zhangsan", "lisi"},
+            ),
+            (
+                [FieldCompareRule(source_field="hobby", target_field="sport_hobby")],
+                {"hobby": ["running", "golf"]},
+                {"lisi"},
+            ),
+            # 多字段
+            (
+                [
+                    FieldCompareRule(source_field="addr", target_field="region"),
+                    FieldCompareRule(source_field="age", target_field="age"),
+                ],
+                {"addr": "shenzhen", "age": 30},
+                {"lisi"},
+            ),
+        ],
+    )
+    def test_match_custom_fields(self, bare_local_data_source, field_compare_rules, source_data, excepted_usernames):
+        for username, extras in [
+            ("zhangsan", {"region": "shenzhen", "age": 20, "sport_hobby": ["running"]}),
+            ("lisi", {"region": "shenzhen", "age": 30, "sport_hobby": ["running", "golf"]}),
+            ("wangwu", {"region": "beijing", "age": "20", "sport_hobby": ["golf"]}),
+        ]:
+            DataSourceUser.objects.create(
+                data_source=bare_local_data_source, username=username, full_name=username, extras=extras
+            )
+
+        self.matcher.custom_field_data_type_map = {
+            "age": UserFieldDataType.NUMBER,
+            "region": UserFieldDataType.STRING,
+            "sport_hobby": UserFieldDataType.MULTI_ENUM,
+        }
+        self.matcher.idp.data_source_match_rules = [
+            DataSourceMatchRule(
+                data_source_id=bare_local_data_source.id, field_compare_rules=field_compare_rules
+            ).model_dump()
+        ]
+
+        user_ids = self.matcher.match([source_data])
+
+        assert set(DataSourceUser.objects.filter(id__in=user_ids).values_list("username", flat=True)) == (
+            excepted_usernames
+        )
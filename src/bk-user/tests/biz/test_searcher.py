@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from unittest import mock
+
+import pytest
+from bkuser.apps.data_source.models import DataSourceUserSearchToken
+from bkuser.apps.tenant.models import TenantUser
+from bkuser.biz.searcher import TenantUserSearcher
+
+from tests.test_utils.tenant import sync_users_depts_to_tenant
+
+pytestmark = pytest.mark.django_db
+
+
+class TestTenantUserSearcher:
+    @pytest.fixture
+    def tenant_users(self, random_tenant, full_local_data_source):
+        sync_users_depts_to_tenant(random_tenant, full_local_data_source)
+        return TenantUser.objects.filter(tenant=random_tenant)
+
+    @pytest.mark.parametrize(
+        ("fields", "keyword"),
+        [
+            (None, "i"),
+            (None, "SHI"),
+            (None, "shi"),
+            (None, "lis"),
+            (None, "@m.com"),
+            (None, "13512345"),
+            (None, "十一"),
+            (["username", "full_name"], "@m"),
+            (["username", "full_name"], "an"),
+            (None, "not_exists"),
+        ],
+    )
+    @pytest.mark.parametrize("gram_sample_limit", [1, 1000])
+    def test_filter_same_as_icontains(self, tenant_users, fields, keyword, gram_sample_limit):
+        searcher = TenantUserSearcher(fields)
+        excepted = {
+            u.id
+            for u in tenant_users.select_related("data_source_user")
+            if any(keyword.lower() in (getattr(u.data_source_user, f) or "").lower() for f in searcher.fields)
+        }
+        with mock.patch.object(DataSourceUserSearchToken, "gram_sample_limit", gram_sample_limit):
+            assert set(searcher.filter(tenant_users, keyword).values_list("id", flat=True)) == excepted
+
+    def test_search_ids_ranked(self, tenant_users):
+        user_ids = TenantUserSearcher(["username"]).search_ids(tenant_users, "lushi", limit=10)
+        usernames = [TenantUser.objects.get(id=user_id).data_source_user.username for user_id in user_ids]
+        assert usernames == ["lushi"]
+
+        # 以关键字开头的排在前面，同等级的按用户名排序
+        user_ids = TenantUserSearcher(["username"]).search_ids(tenant_users, "liu", limit=10)
+        usernames = [TenantUser.objects.get(id=user_id).data_source_user.username for user_id in user_ids]
+        assert usernames == ["liuqi", "zhaoliu"]
+
+        user_ids = TenantUserSearcher(["username"]).search_ids(tenant_users, "shi", limit=10)
+        usernames = [TenantUser.objects.get(id=user_id).data_source_user.username for user_id in user_ids]
+        assert usernames == ["baishier", "linshiyi", "lushi"]
+
+    def test_search_ids_limit(self, tenant_users):
+        assert len(TenantUserSearcher().search_ids(tenant_users, "i", limit=3)) == 3
+
+    def test_filter_match_in_queryset_data_sources(self, tenant_users, full_local_data_source):
+        with mock.patch.object(
+            DataSourceUserSearchToken.objects, "match_user_ids", wraps=DataSourceUserSearchToken.objects.match_user_ids
+        ) as match_user_ids:
+            TenantUserSearcher().filter(tenant_users, "lisi")
+
+        assert match_user_ids.call_args.args[2] == [full_local_data_source.id]
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""
+PBKDF2-SM3 密码哈希基准测试（不会在单元测试中执行）
+
+执行方式：pytest tests/common/hashers/bench_pbkdf2.py -s
+可通过环境变量 BENCH_PASSWORD_COUNT 指定批量哈希的密码数量（默认 64），BENCH_HASH_WORKERS 指定进程数（默认 4）
+"""
+
+import os
+import time
+from typing import Callable
+
+from bkuser.common.hashers import make_password, make_passwords
+from bkuser.common.hashers.pbkdf2 import (
+    _HASHLIB_SM3_AVAILABLE,
+    PBKDF2SM3PasswordHasher,
+    _pbkdf2_hmac_sm3,
+    _pbkdf2_hmac_sm3_py,
+)
+from bkuser.common.hashers.sm3 import SM3
+
+PASSWORD_COUNT = int(os.getenv("BENCH_PASSWORD_COUNT", "64"))
+HASH_WORKERS = int(os.getenv("BENCH_HASH_WORKERS", "4"))
+ITERATIONS = PBKDF2SM3PasswordHasher.iterations
+
+
+def _legacy_pbkdf2_hmac_sm3(password: bytes, salt: bytes, iterations: int) -> bytes:
+    """优化前的实现（仅用于对比）"""
+    inner, outer = SM3(), SM3()
+    block_size = inner.block_size
+    password = password + b"\x00" * (block_size - len(password))
+    inner.update(bytes((x ^ 0x36) for x in password))
+    outer.update(bytes((x ^ 0x5C) for x in password))
+
+    def prf(msg):
+        inner_cp = inner.copy()
+        outer_cp = outer.copy()
+        inner_cp.update(msg)
+        outer_cp.update(inner_cp.digest())
+        return outer_cp.digest()
+
+    prev = prf(salt + (1).to_bytes(4, "big"))
+    r_key = int.from_bytes(prev, "big")
+    for _i in range(iterations - 1):
+        prev = prf(prev)
+        r_key ^= int.from_bytes(prev, "big")
+
+    return r_key.to_bytes(inner.digest_size, "big")
+
+
+def _timeit(func: Callable[[], object], count: int = 1) -> float:
+    start = time.perf_counter()
+    for __ in range(count):
+        func()
+    return (time.perf_counter() - start) / count
+
+
+def test_pbkdf2_hmac_sm3():
+    password, salt = b"pass-@-123456", b"this-is-a-salt"
+    excepted = _legacy_pbkdf2_hmac_sm3(password, salt, ITERATIONS)
+
+    impls = [
+        ("legacy", lambda: _legacy_pbkdf2_hmac_sm3(password, salt, ITERATIONS)),
+        ("python", lambda: _pbkdf2_hmac_sm3_py(password, salt, ITERATIONS)),
+    ]
+    if _HASHLIB_SM3_AVAILABLE:
+        impls.append(("hashlib", lambda: _pbkdf2_hmac_sm3(password, salt, ITERATIONS)))
+
+    print(f"\npbkdf2_hmac_sm3 benchmark (iterations: {ITERATIONS})")
+    legacy_cost = 0.0
+    for name, func in impls:
+        assert func() == excepted
+        cost = _timeit(func, 3)
+        legacy_cost = legacy_cost or cost
+        print(f"  {name:<10} {cost * 1000:.1f}ms/hash, speedup: {legacy_cost / cost:.1f}x")
+
+
+def test_make_passwords(settings):
+    settings.PASSWORD_ENCRYPT_ALGORITHM = "pbkdf2_sm3"
+    settings.PASSWORD_HASH_MAX_WORKERS = HASH_WORKERS
+    raw_passwords = [f"pass-@-{idx}" for idx in range(PASSWORD_COUNT)]
+
+    print(f"\nmake passwords benchmark (count: {PASSWORD_COUNT}, workers: {HASH_WORKERS}, cpus: {os.cpu_count()})")
+    serial_cost = _timeit(lambda: [make_password(p) for p in raw_passwords])
+    batch_cost = _timeit(lambda: make_passwords(raw_passwords, use_process_pool=True))
+    for name, cost in [("serial", serial_cost), ("batch", batch_cost)]:
+        print(f"  {name:<10} total: {cost:.3f}s, throughput: {PASSWORD_COUNT / cost:.1f} hashes/s")
@@ -15,7 +15,11 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+from unittest import mock
+
+import pytest
 from bkuser.common.hashers import PBKDF2SM3PasswordHasher
+from bkuser.common.hashers.pbkdf2 import _HASHLIB_SM3_AVAILABLE, _pbkdf2_hmac_sm3, _pbkdf2_hmac_sm3_py
 
 SMALL_ITERATIONS = 3000
 
@@ -77,3 +81,35 @@ class TestPBKDF2SM3PasswordHasher:
 
         assert hasher.must_update(encrypted)
         hasher.harden_runtime(raw_password, encrypted)
+
+
+class TestPBKDF2HmacSM3:
+    """测试 pbkdf2_hmac_sm3 的不同实现，计算结果应完全一致"""
+
+    @pytest.mark.parametrize(
+        ("password", "dk_len"),
+        [
+            (b"pass-@-123456", None),
+            (b"pass-@-123456", 16),
+            # 多个分块
+            (b"pass-@-123456", 80),
+            # 密码长度超过分块大小
+            (b"p" * 100, None),
+        ],
+    )
+    def test_implementations_consistent(self, password, dk_len):
+        excepted = _pbkdf2_hmac_sm3_py(password, b"this-is-a-salt", SMALL_ITERATIONS, dk_len)
+        assert len(excepted) == (dk_len or 32)  # noqa: PLR2004
+        assert _pbkdf2_hmac_sm3(password, b"this-is-a-salt", SMALL_ITERATIONS, dk_len) == excepted
+
+    @pytest.mark.skipif(not _HASHLIB_SM3_AVAILABLE, reason="hashlib not support sm3")
+    def test_python_implementation(self, raw_password):
+        with mock.patch("bkuser.common.hashers.pbkdf2._HASHLIB_SM3_AVAILABLE", False):
+            encrypted = PBKDF2SM3PasswordHasher().encode(raw_password, salt="this-is-a-salt")
+
+        assert encrypted.endswith("$JAZq76l8rPx1hWEX1GSrHAApEmERAfoZbYB/9qzA5m8=")
+
+    @pytest.mark.parametrize(("iterations", "dk_len"), [(0, None), (1, 0)])
+    def test_invalid_params(self, iterations, dk_len):
+        with pytest.raises(ValueError, match="must greater than 0"):
+            _pbkdf2_hmac_sm3(b"password", b"salt", iterations, dk_len)
@@ -14,7 +14,10 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
-from bkuser.common.hashers import check_password, make_password
+from unittest import mock
+
+import pytest
+from bkuser.common.hashers import check_password, make_password, make_passwords
 from django.conf import settings
 from django.test.utils import override_settings
 
@@ -63,3 +66,53 @@ def test_check_password_encrypt_by_other_algo_case_2(raw_password):
     with override_settings(PASSWORD_ENCRYPT_ALGORITHM="pbkdf2_sm3"):
         assert settings.PASSWORD_ENCRYPT_ALGORITHM == "pbkdf2_sm3"
         assert check_password(raw_password, encrypted)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+@pytest.mark.parametrize("use_process_pool", [True, False])
+def test_make_passwords(settings, max_workers, use_process_pool):
+    """测试批量加密（串行 / 多进程），每个密码单独加盐"""
+    settings.PASSWORD_ENCRYPT_ALGORITHM = "pbkdf2_sm3"
+    settings.PASSWORD_HASH_MAX_WORKERS = max_workers
+
+    raw_passwords = [f"pass-@-{idx}" for idx in range(8)] + ["pass-@-0"]
+    encrypted_passwords = make_passwords(raw_passwords, use_process_pool=use_process_pool)
+
+    assert len(encrypted_passwords) == len(raw_passwords)
+    assert len(set(encrypted_passwords)) == len(raw_passwords)
+    for raw_password, encrypted in zip(raw_passwords, encrypted_passwords):
+        assert encrypted.startswith("pbkdf2_sm3$")
+        assert check_password(raw_password, encrypted)
+
+
+def test_make_passwords_fallback_to_serial(settings):
+    """进程池不可用时，退化为串行计算"""
+    settings.PASSWORD_HASH_MAX_WORKERS = 2
+
+    raw_passwords = [f"pass-@-{idx}" for idx in range(8)]
+    with mock.patch("bkuser.common.hashers.shortcuts.ProcessPoolExecutor", side_effect=OSError("unavailable")):
+        encrypted_passwords = make_passwords(raw_passwords, use_process_pool=True)
+
+    assert all(check_password(raw, encrypted) for raw, encrypted in zip(raw_passwords, encrypted_passwords))
+
+
+def test_make_passwords_without_process_pool(settings):
+    """未指定使用进程池时（如 web 请求中），不会创建进程池"""
+    settings.PASSWORD_HASH_MAX_WORKERS = 2
+
+    raw_passwords = [f"pass-@-{idx}" for idx in range(8)]
+    with mock.patch("bkuser.common.hashers.shortcuts.ProcessPoolExecutor") as executor_cls:
+        encrypted_passwords = make_passwords(raw_passwords)
+
+    executor_cls.assert_not_called()
+    assert all(check_password(raw, encrypted) for raw, encrypted in zip(raw_passwords, encrypted_passwords))
+
+
+def test_make_passwords_raise_hash_error(settings):
+    """哈希计算本身的异常不会被吞掉"""
+    settings.PASSWORD_HASH_MAX_WORKERS = 2
+
+    with mock.patch("bkuser.common.hashers.shortcuts.ProcessPoolExecutor") as executor_cls:
+        executor_cls.return_value.__enter__.return_value.map.side_effect = TypeError("bad password")
+        with pytest.raises(TypeError, match="bad password"):
+            make_passwords([f"pass-@-{idx}" for idx in range(8)], use_process_pool=True)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from bkuser.plugins.general.exceptions import RequestApiError
+from bkuser.plugins.general.http import fetch_all_data, iter_all_data
+
+# 桩服务提供的数据总数
+TOTAL_COUNT = 345
+
+
+class StubServer(ThreadingHTTPServer):
+    """本地桩服务，模拟通用 HTTP 数据源 API（分页返回数据）"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubRequestHandler)
+        self.lock = threading.Lock()
+        # 各页码的请求次数
+        self.page_req_counts: Dict[int, int] = {}
+        # 同时进行中的请求数 & 最大值
+        self.inflight = 0
+        self.max_inflight = 0
+        # 首次请求时返回 503 的页码（用于验证重试）
+        self.flaky_pages: List[int] = []
+        # 总是返回 404 的页码（不在重试状态码范围内）
+        self.broken_pages: List[int] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/api/v1/users"
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    server: StubServer
+
+    def do_GET(self):  # noqa: N802
+        query = parse_qs(urlparse(self.path).query)
+        page, page_size = int(query["page"][0]), int(query["page_size"][0])
+
+        with self.server.lock:
+            self.server.page_req_counts[page] = self.server.page_req_counts.get(page, 0) + 1
+            req_cnt = self.server.page_req_counts[page]
+            self.server.inflight += 1
+            self.server.max_inflight = max(self.server.max_inflight, self.server.inflight)
+
+        try:
+            # 模拟接口耗时，使得并发请求能够重叠
+            time.sleep(0.05)
+            if page in self.server.broken_pages or (page in self.server.flaky_pages and req_cnt == 1):
+                self._send(503 if page in self.server.flaky_pages else 404, {})
+                return
+
+            start = (page - 1) * page_size
+            results = [{"id": str(idx)} for idx in range(start, min(start + page_size, TOTAL_COUNT))]
+            self._send(200, {"count": TOTAL_COUNT, "results": results})
+        finally:
+            with self.server.lock:
+                self.server.inflight -= 1
+
+    def _send(self, status_code: int, data: Dict):
+        body = json.dumps(data).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _fetch(server: StubServer, concurrency: int, retries: int = 0) -> List[Dict]:
+    return fetch_all_data(server.url, {}, {}, 10, 5, retries, concurrency)  # type: ignore
+
+
+class TestIterAllData:
+    @pytest.mark.parametrize("concurrency", [1, 4])
+    def test_fetch_all_data(self, stub_server, concurrency):
+        items = _fetch(stub_server, concurrency)
+        # 并发模式下，依然按页码顺序返回数据
+        assert [item["id"] for item in items] == [str(idx) for idx in range(TOTAL_COUNT)]
+        # 每页只请求一次
+        assert set(stub_server.page_req_counts.values()) == {1}
+        assert len(stub_server.page_req_counts) == 35  # noqa: PLR2004
+
+    def test_sequential(self, stub_server):
+        _fetch(stub_server, concurrency=1)
+        assert stub_server.max_inflight == 1
+
+    def test_bounded_concurrency(self, stub_server):
+        _fetch(stub_server, concurrency=4)
+        assert 1 < stub_server.max_inflight <= 4  # noqa: PLR2004
+
+    def test_retry(self, stub_server):
+        stub_server.flaky_pages = [1, 7]
+        items = _fetch(stub_server, concurrency=4, retries=1)
+
+        assert len(items) == TOTAL_COUNT
+        assert stub_server.page_req_counts[1] == stub_server.page_req_counts[7] == 2  # noqa: PLR2004
+
+    def test_error(self, stub_server):
+        stub_server.broken_pages = [5]
+        with pytest.raises(RequestApiError):
+            _fetch(stub_server, concurrency=4)
+
+    def test_stop_early(self, stub_server):
+        items = iter_all_data(stub_server.url, {}, {}, 10, 5, 0, 4)  # type: ignore
+        assert [next(items)["id"] for _ in range(25)] == [str(idx) for idx in range(25)]
+        items.close()  # type: ignore
+
+        # 提前终止迭代后，只会请求首页及已提交的分页，不会拉取全部分页
+        assert len(stub_server.page_req_counts) < 35  # noqa: PLR2004
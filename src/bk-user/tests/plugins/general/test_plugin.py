@@ -119,6 +119,49 @@ class TestGeneralDataSourcePlugin:
         plugin = GeneralDataSourcePlugin(general_ds_cfg, logger)
         assert len(plugin.fetch_users()) == 3  # noqa: PLR2004
 
+    @mock.patch(
+        "bkuser.plugins.general.plugin.iter_all_data",
+        return_value=iter(
+            [
+                {"id": "company", "name": "总公司", "parent": None},
+                {"id": "dept_a", "name": "部门A", "parent": "company", "extras": {"region": "CN"}},
+            ]
+        ),
+    )
+    def test_iter_departments(self, general_ds_cfg, logger):
+        plugin = GeneralDataSourcePlugin(general_ds_cfg, logger)
+        assert [d.code for d in plugin.iter_departments()] == ["company", "dept_a"]
+
+    @mock.patch(
+        "bkuser.plugins.general.plugin.iter_all_data",
+        return_value=iter(
+            [
+                {
+                    "id": "100",
+                    "username": "sanzhang",
+                    "full_name": "张三",
+                    "extras": {},
+                    "leaders": [],
+                    "departments": ["company"],
+                },
+                {
+                    "id": "101",
+                    "username": "sili",
+                    "full_name": "李四",
+                    "extras": {"gender": "female"},
+                    "leaders": ["100"],
+                    "departments": ["dept_a"],
+                },
+            ]
+        ),
+    )
+    def test_iter_users(self, general_ds_cfg, logger):
+        plugin = GeneralDataSourcePlugin(general_ds_cfg, logger)
+        users = plugin.iter_users()
+        # 逐个返回，而不是一次性返回列表
+        assert not isinstance(users, list)
+        assert [u.code for u in users] == ["100", "101"]
+
     @mock.patch("bkuser.plugins.general.plugin.fetch_first_item", new=_mocked_fetch_first_item)
     def test_test_connection(self, general_ds_cfg, logger):
         result = GeneralDataSourcePlugin(general_ds_cfg, logger).test_connection()
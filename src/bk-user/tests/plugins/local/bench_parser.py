@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""
+本地数据源用户表解析基准测试（不会在单元测试中执行）
+
+执行方式：pytest tests/plugins/local/bench_parser.py -s
+可通过环境变量 BENCH_USER_COUNT 指定用户数量（默认 100000），BENCH_TRACE_MEMORY=1 统计内存峰值（耗时会显著增加）
+"""
+
+import os
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Tuple
+
+from bkuser.apps.sync.loggers import TaskLogger
+from bkuser.plugins.local.parser import LocalDataSourceDataParser
+from openpyxl import Workbook, load_workbook
+
+USER_COUNT = int(os.getenv("BENCH_USER_COUNT", "100000"))
+TRACE_MEMORY = os.getenv("BENCH_TRACE_MEMORY") == "1"
+
+
+def _gen_user_workbook(path: Path, count: int):
+    """以只写（write_only）模式生成用户表，格式与导入模板一致"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("users")
+    sheet.append(["填写必读"])
+    sheet.append([*LocalDataSourceDataParser.builtin_col_names, "年龄/age", "籍贯/region"])
+    for idx in range(count):
+        sheet.append(
+            [
+                f"user-{idx}",
+                f"用户-{idx}",
+                f"user-{idx}@m.com",
+                f"135{idx:08d}",
+                f"公司/部门{idx % 10}/中心{idx % 100}, 公司/部门{idx % 7}",
+                f"user-{idx // 10}" if idx >= 10 else None,  # noqa: PLR2004
+                20 + idx % 40,
+                f"region-{idx % 30}",
+            ]
+        )
+
+    workbook.save(path)
+
+
+def _load_and_parse(path: Path, read_only: bool) -> Tuple[float, float]:
+    """加载并解析用户表，返回 (加载耗时, 解析耗时)"""
+    start = time.perf_counter()
+    workbook = load_workbook(path, read_only=read_only)
+    loaded_at = time.perf_counter()
+
+    parser = LocalDataSourceDataParser(TaskLogger(), workbook)
+    parser.parse()
+    parsed_at = time.perf_counter()
+    workbook.close()
+
+    assert len(parser.get_users()) == USER_COUNT
+    return loaded_at - start, parsed_at - loaded_at
+
+
+def test_parse_user_workbook(tmp_path):
+    path = tmp_path / "users.xlsx"
+    _gen_user_workbook(path, USER_COUNT)
+
+    print(f"\nlocal data source workbook parse benchmark (users: {USER_COUNT})")
+    for read_only in [False, True]:
+        mode = "read_only" if read_only else "full"
+        load_cost, parse_cost = _load_and_parse(path, read_only)
+        result = f"  {mode:<10} load: {load_cost:.3f}s, parse: {parse_cost:.3f}s, total: {load_cost + parse_cost:.3f}s"
+
+        if TRACE_MEMORY:
+            tracemalloc.start()
+            _load_and_parse(path, read_only)
+            __, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result += f", peak memory: {peak / 1024 / 1024:.1f} MiB"
+
+        print(result)
@@ -24,3 +24,10 @@ from openpyxl.workbook import Workbook
 @pytest.fixture
 def user_workbook() -> Workbook:
     return load_workbook(settings.BASE_DIR / "tests/assets/fake_users.xlsx")
+
+
+@pytest.fixture
+def read_only_user_workbook():
+    workbook = load_workbook(settings.BASE_DIR / "tests/assets/fake_users.xlsx", read_only=True)
+    yield workbook
+    workbook.close()
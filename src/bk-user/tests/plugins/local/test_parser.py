@@ -119,6 +119,19 @@ class TestLocalDataSourceDataParser:
         with pytest.raises(DuplicateUsername):
             LocalDataSourceDataParser(logger, user_workbook).parse()
 
+    def test_parse_read_only_workbook(self, logger, user_workbook, read_only_user_workbook):
+        parser = LocalDataSourceDataParser(logger, user_workbook)
+        parser.parse()
+
+        read_only_parser = LocalDataSourceDataParser(logger, read_only_user_workbook)
+        read_only_parser.parse()
+
+        # 只读模式加载的 Workbook，解析结果应与完整加载的一致
+        assert read_only_parser.get_users() == parser.get_users()
+        assert sorted(read_only_parser.get_departments(), key=lambda d: d.code) == sorted(
+            parser.get_departments(), key=lambda d: d.code
+        )
+
     def test_get_departments(self, logger, user_workbook):
         parser = LocalDataSourceDataParser(logger, user_workbook)
         parser.parse()
@@ -14,6 +14,7 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
+from bkuser.apps.data_source.department_path_index import DataSourceDepartmentPathIndex
 from bkuser.apps.data_source.models import (
     DataSource,
     DataSourceDepartment,
@@ -211,6 +212,9 @@ def init_data_source_users_depts_and_relations(ds: DataSource) -> None:
     ]
     DataSourceUserLeaderRelation.objects.bulk_create(user_leader_relations)
 
+    # 单元测试中数据源 ID 可能会被复用，需要使部门路径索引失效，避免读取到其他用例的数据
+    DataSourceDepartmentPathIndex(ds.id).invalidate()
+
 
 def init_local_data_source_identity_infos(ds: DataSource) -> None:
     """初始化本地数据源身份信息"""
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from typing import List
+from unittest import mock
+
+import pytest
+from bkuser.apps.data_source.models import DataSourceDepartment
+from bkuser.utils.django import _get_auto_pk_step, bulk_create_with_pks, fill_bulk_created_pks
+from django.db import connection
+
+pytestmark = pytest.mark.django_db
+
+
+def test_fill_bulk_created_pks(django_assert_num_queries, bare_local_data_source):
+    depts = [
+        DataSourceDepartment(data_source=bare_local_data_source, code=f"d{idx}", name=f"d{idx}") for idx in range(5)
+    ]
+    DataSourceDepartment.objects.bulk_create(depts)
+    dept_id_map = {
+        dept.code: dept.id for dept in DataSourceDepartment.objects.filter(data_source=bare_local_data_source)
+    }
+
+    # 已有主键的对象不需要查询
+    with django_assert_num_queries(0):
+        fill_bulk_created_pks(DataSourceDepartment, depts, "code", data_source=bare_local_data_source)
+
+    # 模拟 bulk_create 未回填主键的情况（如 MySQL），按批次查询并回填
+    for dept in depts:
+        dept.id = None
+
+    with django_assert_num_queries(3):
+        fill_bulk_created_pks(DataSourceDepartment, depts, "code", batch_size=2, data_source=bare_local_data_source)
+
+    assert {dept.code: dept.id for dept in depts} == dept_id_map
+
+
+def _without_returning():
+    """模拟不支持 RETURNING 的 DB（如 MySQL）"""
+    return mock.patch.object(
+        type(connection.features),
+        "can_return_rows_from_bulk_insert",
+        new_callable=mock.PropertyMock,
+        return_value=False,
+    )
+
+
+class TestBulkCreateWithPks:
+    @pytest.fixture
+    def depts(self, bare_local_data_source) -> List[DataSourceDepartment]:
+        return [
+            DataSourceDepartment(data_source=bare_local_data_source, code=f"d{idx}", name=f"d{idx}")
+            for idx in range(5)
+        ]
+
+    def test_without_returning(self, django_assert_num_queries, bare_local_data_source, depts):
+        """DB 不支持 RETURNING 时（如 MySQL），根据单条 INSERT 语句分配的连续主键回填，每批只有一条 INSERT 语句"""
+        DataSourceDepartment.objects.create(data_source=bare_local_data_source, code="exists", name="exists")
+
+        with _without_returning():  # noqa: SIM117
+            with django_assert_num_queries(3) as ctx:
+                bulk_create_with_pks(
+                    DataSourceDepartment, depts, "code", batch_size=2, data_source=bare_local_data_source
+                )
+
+        assert all(q["sql"].startswith("INSERT") for q in ctx.captured_queries)
+        dept_id_map = dict(
+            DataSourceDepartment.objects.filter(data_source=bare_local_data_source).values_list("code", "id")
+        )
+        assert {dept.code: dept.id for dept in depts} == {
+            code: id for code, id in dept_id_map.items() if code != "exists"
+        }
+        assert all(not dept._state.adding for dept in depts)
+
+    def test_with_non_consecutive_pks(self, django_assert_num_queries, bare_local_data_source, depts):
+        """自增主键不保证连续时（如 MySQL 自增锁模式为 2），bulk_create 后根据唯一键查询回填"""
+        with _without_returning(), mock.patch(
+            "bkuser.utils.django._get_auto_pk_step", return_value=None
+        ), django_assert_num_queries(2):
+            bulk_create_with_pks(DataSourceDepartment, depts, "code", data_source=bare_local_data_source)
+
+        dept_id_map = dict(
+            DataSourceDepartment.objects.filter(data_source=bare_local_data_source).values_list("code", "id")
+        )
+        assert {dept.code: dept.id for dept in depts} == dept_id_map
+
+
+@pytest.mark.parametrize(
+    ("lock_mode", "increment", "excepted"),
+    [(0, 1, 1), (1, 2, 2), (2, 1, None)],
+)
+def test_get_auto_pk_step_mysql(lock_mode, increment, excepted):
+    conn = mock.MagicMock(alias=f"mysql-{lock_mode}-{increment}", vendor="mysql")
+    conn.cursor.return_value.__enter__.return_value.fetchone.return_value = (lock_mode, increment)
+
+    assert _get_auto_pk_step(conn) == excepted
+    # 结果会被缓存，不会重复查询
+    assert _get_auto_pk_step(conn) == excepted
+    assert conn.cursor.call_count == 1
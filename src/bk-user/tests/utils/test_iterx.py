@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - 用户管理 (bk-user) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import pytest
+from bkuser.utils.iterx import chunked
+
+
+@pytest.mark.parametrize(
+    ("iterable", "size", "expected"),
+    [
+        ([], 2, []),
+        ([1, 2, 3], 1, [[1], [2], [3]]),
+        ([1, 2, 3, 4], 2, [[1, 2], [3, 4]]),
+        ([1, 2, 3, 4, 5], 2, [[1, 2], [3, 4], [5]]),
+        ([1, 2, 3], 5, [[1, 2, 3]]),
+        ((i for i in range(5)), 3, [[0, 1, 2], [3, 4]]),
+    ],
+)
+def test_chunked(iterable, size, expected):
+    assert list(chunked(iterable, size)) == expected
+
+
+@pytest.mark.parametrize("size", [0, -1])
+def test_chunked_with_invalid_size(size):
+    with pytest.raises(ValueError, match="chunk size must be greater than 0"):
+        list(chunked([1, 2, 3], size))